@@ -8,16 +8,12 @@ import hashlib
 import logging
 import time
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, asdict
 
-try:
-    import redis
-    from redis.connection import ConnectionPool
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
+from server.performance.tiered_cache import get_tiered_cache, cache_tags
+from server.performance.semantic_cache import create_semantic_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +25,7 @@ class CacheStats:
     cache_misses: int = 0
     cache_sets: int = 0
     cache_errors: int = 0
+    semantic_hits: int = 0
     total_response_time_saved: float = 0.0
     cost_savings_usd: float = 0.0
     
@@ -47,87 +44,123 @@ class CacheStats:
         return self.total_response_time_saved / self.cache_hits
 
 class CacheManager:
-    """High-performance Redis cache manager for LEX AI"""
+    """
+    High-performance cache manager for LEX AI
+
+    Backed by the shared two-tier cache (bounded in-process W-TinyLFU L1 in
+    front of async Redis L2). The synchronous methods are served from L1 and
+    write through to Redis in the background; the *_async methods also read
+    from Redis and should be preferred from async code.
+    
+    Model responses additionally go into a semantic cache, so paraphrased
+    repeats of a question hit without an exact key match. Its query
+    embeddings are stored in the 'embeddings' cache type.
+    """
     
     def __init__(self, redis_url: str = None):
         self.redis_url = redis_url or os.getenv('REDIS_URL', 'redis://localhost:6379')
-        self.redis_client = None
-        self.fallback_cache = {}  # In-memory fallback
+        self.cache = None
         self.cache_stats = CacheStats()
         self.enabled = True
         
-        # Cache configuration
+        # Cache configuration (each cache type is a namespace in the tiered cache)
         self.cache_config = {
             'model_responses': {
                 'ttl': 3600,  # 1 hour
+                'stale_ttl': 300,
                 'max_size': 10000,
                 'cost_per_request': 0.02  # Estimated cost per OpenRouter request
             },
             'user_sessions': {
                 'ttl': 7200,  # 2 hours
+                'stale_ttl': 0,
                 'max_size': 5000,
                 'cost_per_request': 0.0
             },
             'system_data': {
                 'ttl': 86400,  # 24 hours
+                'stale_ttl': 3600,
                 'max_size': 1000,
                 'cost_per_request': 0.0
             },
             'embeddings': {
                 'ttl': 604800,  # 7 days
+                'stale_ttl': 0,
                 'max_size': 50000,
                 'cost_per_request': 0.001
             }
         }
         
         self.initialize_redis()
+        
+        self.semantic_cache = None
+        if os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true':
+            self.semantic_cache = create_semantic_cache(embedding_cache=self)
     
     def initialize_redis(self) -> bool:
-        """Initialize Redis connection with connection pooling"""
-        if not REDIS_AVAILABLE:
-            logger.warning("⚠️ Redis not available - using fallback cache")
-            return False
-        
-        try:
-            # Create connection pool for high performance
-            pool = ConnectionPool.from_url(
-                self.redis_url,
-                max_connections=50,
-                retry_on_timeout=True,
-                socket_keepalive=True,
-                socket_keepalive_options={},
-                health_check_interval=30
-            )
-            
-            self.redis_client = redis.Redis(
-                connection_pool=pool,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            
-            # Test connection
-            self.redis_client.ping()
-            
-            logger.info("✅ Redis cache initialized with connection pooling")
-            return True
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Redis initialization failed: {e}")
-            logger.info("📝 Using in-memory fallback cache")
-            return False
+        """Attach to the shared tiered cache for this Redis URL"""
+        self.cache = get_tiered_cache(self.redis_url)
+        configured = self.cache.get_stats()['l2']['configured']
+        if configured:
+            logger.info("✅ Tiered cache initialized (L1 in-process, L2 Redis)")
+        else:
+            logger.warning("⚠️ Redis not available - using in-process L1 cache only")
+        return configured
     
     def generate_cache_key(self, prefix: str, data: Any) -> str:
         """Generate consistent cache keys"""
+        return f"lex:{prefix}:{self._hash_key(data)}"
+    
+    def _hash_key(self, data: Any) -> str:
+        """Key within a namespace: short hash of the identifying data"""
         if isinstance(data, (dict, list)):
             data_str = json.dumps(data, sort_keys=True)
         else:
             data_str = str(data)
         
         # Create hash for consistent key length
-        data_hash = hashlib.sha256(data_str.encode()).hexdigest()[:16]
+        return hashlib.sha256(data_str.encode()).hexdigest()[:16]
+    
+    def _response_key(self, prompt: str, model: str, context: Optional[Dict]) -> str:
+        return self._hash_key({
+            'prompt': prompt[:1000],  # Limit prompt length for key
+            'model': model,
+            'context': context or {}
+        })
+    
+    def _response_value(self, prompt: str, model: str, response: Dict[str, Any], context: Optional[Dict]) -> Dict[str, Any]:
+        return {
+            'response': response,
+            'timestamp': datetime.utcnow().isoformat(),
+            'model': model,
+            'prompt_length': len(prompt),
+            'context_hash': hashlib.md5(json.dumps(context or {}).encode()).hexdigest()[:8]
+        }
+    
+    def _record_lookup(self, cached_value: Optional[Dict], model: str, cache_type: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """Update hit/miss statistics and unwrap the cached response"""
+        cache_time = time.time() - start_time
         
-        return f"lex:{prefix}:{data_hash}"
+        if cached_value:
+            # Cache hit!
+            self.cache_stats.cache_hits += 1
+            
+            # Estimate time and cost savings
+            estimated_api_time = 2.0  # Assume 2 seconds for API call
+            time_saved = estimated_api_time - cache_time
+            self.cache_stats.total_response_time_saved += max(0, time_saved)
+            
+            # Calculate cost savings
+            cost_saved = self.cache_config[cache_type]['cost_per_request']
+            self.cache_stats.cost_savings_usd += cost_saved
+            
+            logger.debug(f"🎯 Cache HIT for {model} (saved {time_saved:.2f}s)")
+            return cached_value['response']
+        
+        # Cache miss
+        self.cache_stats.cache_misses += 1
+        logger.debug(f"❌ Cache MISS for {model}")
+        return None
     
     def cache_model_response(
         self, 
@@ -135,52 +168,62 @@ class CacheManager:
         model: str, 
         response: Dict[str, Any], 
         context: Optional[Dict] = None,
-        cache_type: str = 'model_responses'
+        cache_type: str = 'model_responses',
+        user_id: Optional[str] = None
     ) -> bool:
-        """Cache model response with intelligent key generation"""
+        """Cache model response (L1 now, Redis in the background)"""
         try:
-            start_time = time.time()
-            
-            # Generate cache key from prompt + model + context
-            cache_data = {
-                'prompt': prompt[:1000],  # Limit prompt length for key
-                'model': model,
-                'context': context or {}
-            }
-            
-            cache_key = self.generate_cache_key(cache_type, cache_data)
-            
-            # Prepare response data with metadata
-            cache_value = {
-                'response': response,
-                'timestamp': datetime.utcnow().isoformat(),
-                'model': model,
-                'prompt_length': len(prompt),
-                'context_hash': hashlib.md5(json.dumps(context or {}).encode()).hexdigest()[:8]
-            }
-            
-            ttl = self.cache_config[cache_type]['ttl']
-            
-            # Cache to Redis or fallback
-            if self.redis_client:
-                self.redis_client.setex(cache_key, ttl, json.dumps(cache_value))
-            else:
-                # Fallback cache with size limits
-                if len(self.fallback_cache) >= self.cache_config[cache_type]['max_size']:
-                    # Remove oldest entries
-                    oldest_key = min(self.fallback_cache.keys())
-                    del self.fallback_cache[oldest_key]
-                
-                self.fallback_cache[cache_key] = {
-                    'data': cache_value,
-                    'expires': time.time() + ttl
-                }
-            
-            # Update statistics
+            config = self.cache_config[cache_type]
+            self.cache.set_local(
+                cache_type,
+                self._response_key(prompt, model, context),
+                self._response_value(prompt, model, response, context),
+                ttl=config['ttl'],
+                stale_ttl=config['stale_ttl'],
+                tags=cache_tags(user_id=user_id, model=model)
+            )
             self.cache_stats.cache_sets += 1
-            cache_time = time.time() - start_time
+            logger.debug(f"✅ Cached response for {model}")
+            return True
             
-            logger.debug(f"✅ Cached response for {model}: {cache_key[:20]}... ({cache_time:.3f}s)")
+        except Exception as e:
+            logger.error(f"❌ Cache set failed: {e}")
+            self.cache_stats.cache_errors += 1
+            return False
+    
+    async def cache_model_response_async(
+        self, 
+        prompt: str, 
+        model: str, 
+        response: Dict[str, Any], 
+        context: Optional[Dict] = None,
+        cache_type: str = 'model_responses',
+        user_id: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        latency_s: float = 0.0
+    ) -> bool:
+        """Cache model response in L1 and Redis, and index it for semantic lookups"""
+        try:
+            config = self.cache_config[cache_type]
+            await self.cache.set(
+                cache_type,
+                self._response_key(prompt, model, context),
+                self._response_value(prompt, model, response, context),
+                ttl=config['ttl'],
+                stale_ttl=config['stale_ttl'],
+                tags=cache_tags(user_id=user_id, model=model)
+            )
+            if self.semantic_cache is not None:
+                await self.semantic_cache.store(
+                    prompt, response, model,
+                    agent_id=agent_id,
+                    user_id=user_id,
+                    context=context,
+                    cost_usd=config['cost_per_request'],
+                    latency_s=latency_s,
+                    ttl=config['ttl']
+                )
+            self.cache_stats.cache_sets += 1
             return True
             
         except Exception as e:
@@ -195,63 +238,54 @@ class CacheManager:
         context: Optional[Dict] = None,
         cache_type: str = 'model_responses'
     ) -> Optional[Dict[str, Any]]:
-        """Retrieve cached model response"""
+        """Retrieve cached model response from the in-process tier"""
         try:
             start_time = time.time()
             self.cache_stats.total_requests += 1
-            
-            # Generate same cache key
-            cache_data = {
-                'prompt': prompt[:1000],
-                'model': model,
-                'context': context or {}
-            }
-            
-            cache_key = self.generate_cache_key(cache_type, cache_data)
-            
-            cached_value = None
-            
-            # Try Redis first
-            if self.redis_client:
-                try:
-                    cached_data = self.redis_client.get(cache_key)
-                    if cached_data:
-                        cached_value = json.loads(cached_data)
-                except Exception as e:
-                    logger.warning(f"⚠️ Redis get failed: {e}")
-            
-            # Try fallback cache
-            if not cached_value and cache_key in self.fallback_cache:
-                cache_entry = self.fallback_cache[cache_key]
+            cached_value = self.cache.get_local(cache_type, self._response_key(prompt, model, context))
+            return self._record_lookup(cached_value, model, cache_type, start_time)
                 
-                if cache_entry['expires'] > time.time():
-                    cached_value = cache_entry['data']
-                else:
-                    # Expired entry
-                    del self.fallback_cache[cache_key]
+        except Exception as e:
+            logger.error(f"❌ Cache get failed: {e}")
+            self.cache_stats.cache_errors += 1
+            return None
+    
+    async def get_cached_response_async(
+        self, 
+        prompt: str, 
+        model: str, 
+        context: Optional[Dict] = None,
+        cache_type: str = 'model_responses',
+        user_id: Optional[str] = None,
+        agent_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve cached model response: exact key in L1, then Redis, then a
+        semantically equivalent earlier query in the same model/agent/user scope
+        """
+        try:
+            start_time = time.time()
+            self.cache_stats.total_requests += 1
+            cached_value = await self.cache.get(cache_type, self._response_key(prompt, model, context))
             
-            cache_time = time.time() - start_time
+            if not cached_value and self.semantic_cache is not None:
+                match = await self.semantic_cache.lookup(
+                    prompt, model, agent_id=agent_id, user_id=user_id, context=context
+                )
+                if match:
+                    self.cache_stats.semantic_hits += 1
+                    cached_value = {
+                        'response': {
+                            **match['response'],
+                            'cache_match': {
+                                'type': 'semantic',
+                                'similarity': round(match['similarity'], 4),
+                                'matched_query': match['matched_query']
+                            }
+                        }
+                    }
             
-            if cached_value:
-                # Cache hit!
-                self.cache_stats.cache_hits += 1
-                
-                # Estimate time and cost savings
-                estimated_api_time = 2.0  # Assume 2 seconds for API call
-                time_saved = estimated_api_time - cache_time
-                self.cache_stats.total_response_time_saved += max(0, time_saved)
-                
-                # Calculate cost savings
-                cost_saved = self.cache_config[cache_type]['cost_per_request']
-                self.cache_stats.cost_savings_usd += cost_saved
-                
-                logger.debug(f"🎯 Cache HIT for {model}: {cache_key[:20]}... (saved {time_saved:.2f}s)")
-                return cached_value['response']
-            else:
-                # Cache miss
-                self.cache_stats.cache_misses += 1
-                logger.debug(f"❌ Cache MISS for {model}: {cache_key[:20]}...")
-                return None
+            return self._record_lookup(cached_value, model, cache_type, start_time)
                 
         except Exception as e:
             logger.error(f"❌ Cache get failed: {e}")
@@ -260,34 +294,30 @@ class CacheManager:
     
     def cache_user_session(self, user_id: str, session_data: Dict[str, Any]) -> bool:
         """Cache user session data"""
-        cache_key = self.generate_cache_key('user_session', user_id)
-        
         session_info = {
             'data': session_data,
             'timestamp': datetime.utcnow().isoformat(),
             'user_id': user_id
         }
         
-        return self._set_cache_value(cache_key, session_info, 'user_sessions')
+        return self._set_cache_value(self._hash_key(user_id), session_info, 'user_sessions', cache_tags(user_id=user_id))
     
     def get_user_session(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve user session data"""
-        cache_key = self.generate_cache_key('user_session', user_id)
-        cached_data = self._get_cache_value(cache_key, 'user_sessions')
+        cached_data = self._get_cache_value(self._hash_key(user_id), 'user_sessions')
         
         if cached_data:
             return cached_data['data']
         return None
     
-    def cache_embeddings(self, text: str, embeddings: List[float], model: str = "default") -> bool:
-        """Cache text embeddings for semantic search"""
-        cache_data = {
+    def _embedding_key(self, text: str, model: str) -> str:
+        return self._hash_key({
             'text_hash': hashlib.sha256(text.encode()).hexdigest()[:16],
             'model': model
-        }
-        
-        cache_key = self.generate_cache_key('embeddings', cache_data)
-        
+        })
+    
+    def cache_embeddings(self, text: str, embeddings: List[float], model: str = "default") -> bool:
+        """Cache text embeddings for semantic search"""
         embedding_info = {
             'embeddings': embeddings,
             'text_length': len(text),
@@ -295,112 +325,132 @@ class CacheManager:
             'timestamp': datetime.utcnow().isoformat()
         }
         
-        return self._set_cache_value(cache_key, embedding_info, 'embeddings')
+        return self._set_cache_value(self._embedding_key(text, model), embedding_info, 'embeddings', cache_tags(model=model))
     
     def get_cached_embeddings(self, text: str, model: str = "default") -> Optional[List[float]]:
         """Retrieve cached embeddings"""
-        cache_data = {
-            'text_hash': hashlib.sha256(text.encode()).hexdigest()[:16],
-            'model': model
-        }
-        
-        cache_key = self.generate_cache_key('embeddings', cache_data)
-        cached_data = self._get_cache_value(cache_key, 'embeddings')
+        cached_data = self._get_cache_value(self._embedding_key(text, model), 'embeddings')
         
         if cached_data:
             return cached_data['embeddings']
         return None
     
-    def _set_cache_value(self, cache_key: str, value: Any, cache_type: str) -> bool:
+    async def cache_embeddings_async(self, text: str, embeddings: List[float], model: str = "default") -> bool:
+        """Cache text embeddings in L1 and Redis"""
+        try:
+            config = self.cache_config['embeddings']
+            await self.cache.set(
+                'embeddings',
+                self._embedding_key(text, model),
+                {
+                    'embeddings': embeddings,
+                    'text_length': len(text),
+                    'model': model,
+                    'timestamp': datetime.utcnow().isoformat()
+                },
+                ttl=config['ttl'],
+                stale_ttl=config['stale_ttl'],
+                tags=cache_tags(model=model)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Cache set failed: {e}")
+            return False
+    
+    async def get_cached_embeddings_async(self, text: str, model: str = "default") -> Optional[List[float]]:
+        """Cached embeddings from L1, then Redis"""
+        try:
+            cached_data = await self.cache.get('embeddings', self._embedding_key(text, model))
+        except Exception as e:
+            logger.error(f"❌ Cache get failed: {e}")
+            return None
+        return cached_data['embeddings'] if cached_data else None
+    
+    async def get_cached_embeddings_batch_async(self, texts: List[str], model: str = "default") -> Dict[str, List[float]]:
+        """Cached embeddings for many texts with a single Redis MGET; maps text -> embeddings"""
+        try:
+            keys = {self._embedding_key(text, model): text for text in texts}
+            found = await self.cache.get_many('embeddings', list(keys))
+            return {keys[key]: cached['embeddings'] for key, cached in found.items()}
+        except Exception as e:
+            logger.error(f"❌ Cache batch get failed: {e}")
+            return {}
+    
+    def _set_cache_value(self, key: str, value: Any, cache_type: str, tags: Optional[List[str]] = None) -> bool:
         """Internal method to set cache value"""
         try:
-            ttl = self.cache_config[cache_type]['ttl']
-            
-            if self.redis_client:
-                self.redis_client.setex(cache_key, ttl, json.dumps(value))
-            else:
-                self.fallback_cache[cache_key] = {
-                    'data': value,
-                    'expires': time.time() + ttl
-                }
-            
+            config = self.cache_config[cache_type]
+            self.cache.set_local(cache_type, key, value, ttl=config['ttl'], stale_ttl=config['stale_ttl'], tags=tags)
             return True
         except Exception as e:
             logger.error(f"❌ Cache set failed: {e}")
             return False
     
-    def _get_cache_value(self, cache_key: str, cache_type: str) -> Optional[Any]:
+    def _get_cache_value(self, key: str, cache_type: str) -> Optional[Any]:
         """Internal method to get cache value"""
         try:
-            if self.redis_client:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            
-            if cache_key in self.fallback_cache:
-                cache_entry = self.fallback_cache[cache_key]
-                if cache_entry['expires'] > time.time():
-                    return cache_entry['data']
-                else:
-                    del self.fallback_cache[cache_key]
-            
-            return None
+            return self.cache.get_local(cache_type, key)
         except Exception as e:
             logger.error(f"❌ Cache get failed: {e}")
             return None
     
     def invalidate_cache(self, pattern: str = None) -> int:
-        """Invalidate cache entries matching pattern"""
+        """
+        Invalidate a cache type (or all of them) by bumping its namespace
+        generation. Prefer invalidate_cache_async from async code.
+        """
         try:
-            count = 0
+            namespaces = [pattern] if pattern else list(self.cache_config)
+            for namespace in namespaces:
+                self.cache.invalidate_namespace_local(namespace)
             
-            if self.redis_client and pattern:
-                # Use Redis SCAN for pattern matching
-                for key in self.redis_client.scan_iter(match=f"lex:{pattern}:*"):
-                    self.redis_client.delete(key)
-                    count += 1
-            elif pattern is None:
-                # Clear all cache
-                if self.redis_client:
-                    self.redis_client.flushdb()
-                self.fallback_cache.clear()
-                count = -1  # Indicates full clear
+            logger.info(f"🗑️ Invalidated cache namespaces: {', '.join(namespaces)}")
+            return len(namespaces) if pattern else -1  # -1 indicates full clear
             
-            logger.info(f"🗑️ Invalidated {count} cache entries")
-            return count
+        except Exception as e:
+            logger.error(f"❌ Cache invalidation failed: {e}")
+            return 0
+    
+    async def invalidate_cache_async(self, pattern: str = None) -> int:
+        """Invalidate a cache type (or all of them) in both tiers and all processes"""
+        try:
+            namespaces = [pattern] if pattern else list(self.cache_config)
+            for namespace in namespaces:
+                await self.cache.invalidate_namespace(namespace)
+            
+            logger.info(f"🗑️ Invalidated cache namespaces: {', '.join(namespaces)}")
+            return len(namespaces) if pattern else -1
             
         except Exception as e:
             logger.error(f"❌ Cache invalidation failed: {e}")
             return 0
     
+    async def invalidate_user_cache(self, user_id: str) -> int:
+        """Drop every entry written for a user (responses and session)"""
+        count = await self.cache.invalidate_tag(f"user:{user_id}")
+        if self.semantic_cache is not None:
+            count += self.semantic_cache.invalidate(user_id=user_id)
+        logger.info(f"🗑️ Invalidated {count} cache entries for user {user_id}")
+        return count
+    
+    async def invalidate_model_cache(self, model: str) -> int:
+        """Drop every cached response and embedding produced by a model"""
+        count = await self.cache.invalidate_tag(f"model:{model}")
+        if self.semantic_cache is not None:
+            count += self.semantic_cache.invalidate(model=model)
+        logger.info(f"🗑️ Invalidated {count} cache entries for model {model}")
+        return count
+    
     def get_cache_statistics(self) -> Dict[str, Any]:
         """Get comprehensive cache statistics"""
         try:
-            redis_info = {}
-            
-            if self.redis_client:
-                try:
-                    info = self.redis_client.info()
-                    redis_info = {
-                        'used_memory': info.get('used_memory_human', 'Unknown'),
-                        'connected_clients': info.get('connected_clients', 0),
-                        'total_commands_processed': info.get('total_commands_processed', 0),
-                        'keyspace_hits': info.get('keyspace_hits', 0),
-                        'keyspace_misses': info.get('keyspace_misses', 0)
-                    }
-                    
-                    if redis_info['keyspace_hits'] + redis_info['keyspace_misses'] > 0:
-                        redis_hit_rate = (redis_info['keyspace_hits'] / 
-                                        (redis_info['keyspace_hits'] + redis_info['keyspace_misses'])) * 100
-                        redis_info['hit_rate'] = f"{redis_hit_rate:.2f}%"
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not get Redis info: {e}")
+            tiered_stats = self.cache.get_stats()
             
             stats = {
                 'cache_stats': asdict(self.cache_stats),
-                'redis_info': redis_info,
-                'fallback_cache_size': len(self.fallback_cache),
+                'tiered_cache': tiered_stats,
+                'semantic_cache': self.semantic_cache.get_stats() if self.semantic_cache else None,
+                'fallback_cache_size': tiered_stats['l1']['entries'],
                 'cache_config': self.cache_config,
                 'performance_metrics': {
                     'hit_rate_percent': round(self.cache_stats.hit_rate, 2),
@@ -440,7 +490,7 @@ class CacheManager:
             if error_rate > 5:
                 recommendations.append("High cache error rate - check Redis connection stability")
         
-        if not self.redis_client:
+        if not self.cache.get_stats()['l2']['available']:
             recommendations.append("Redis unavailable - consider installing Redis for better performance")
         
         optimization_report = {
@@ -2,7 +2,18 @@
 """
 Database Connection Pool Manager for LEX Performance Optimization
 🔱 JAI MAHAKAAL! High-performance database pooling for 80% query speedup
+
+Two ways in:
+- DatabaseConnectionPool: synchronous pooled connections (scripts, threads)
+- AsyncDatabase: awaitable facade for async code. Reads run on dedicated
+  reader threads, writes on a single writer thread (SQLite/WAL allows
+  one writer and many concurrent readers), so the event loop never
+  blocks and a slow read never delays the write queue.
+
+Database-wide settings (WAL, auto_vacuum, page size) and the optional
+init hook run once per database file, not on every connect.
 """
+import atexit
 import sqlite3
 import threading
 import logging
@@ -13,11 +24,71 @@ from typing import Optional, Dict, Any, List, Callable, Tuple
 from contextlib import contextmanager, asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 import queue
+from collections import deque
+from concurrent.futures import Future
 
 logger = logging.getLogger(__name__)
 
+# Per-connection settings; cheap, and they do not persist in the database file
+CONNECTION_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",         # Balanced durability/speed
+    "PRAGMA cache_size=10000",           # 10MB cache
+    "PRAGMA temp_store=MEMORY",          # Store temp data in memory
+    "PRAGMA mmap_size=268435456",        # 256MB memory mapping
+    "PRAGMA busy_timeout=30000"
+]
+
+# Persistent, database-wide settings; applied once per database file
+DATABASE_PRAGMAS = [
+    "PRAGMA page_size=4096",             # Optimal page size (new databases)
+    "PRAGMA auto_vacuum=INCREMENTAL",    # Incremental vacuuming (new databases)
+    "PRAGMA journal_mode=WAL"            # Write-Ahead Logging
+]
+
+_initialized_databases: Dict[str, bool] = {}
+_initialization_lock = threading.Lock()
+
+
+def initialize_database(
+    connection: sqlite3.Connection,
+    db_path: str,
+    init_hook: Optional[Callable[[sqlite3.Connection], None]] = None
+) -> bool:
+    """
+    Apply database-wide PRAGMAs and run init_hook (schema, indexes) once
+    per database file per process. Returns True if this call did the work.
+    """
+    key = os.path.abspath(db_path) if db_path != ":memory:" else f":memory:{id(connection)}"
+    with _initialization_lock:
+        if _initialized_databases.get(key):
+            return False
+        for pragma in DATABASE_PRAGMAS:
+            connection.execute(pragma)
+        if init_hook is not None:
+            init_hook(connection)
+        _initialized_databases[key] = True
+        logger.info(f"✅ Database initialized: {db_path}")
+        return True
+
+
+def configure_connection(connection: sqlite3.Connection, readonly: bool = False) -> None:
+    """Per-connection PRAGMAs and functions"""
+    for pragma in CONNECTION_PRAGMAS:
+        connection.execute(pragma)
+    if readonly:
+        connection.execute("PRAGMA query_only=ON")
+    connection.create_function("regexp", 2, _regexp)
+
+
+def _regexp(pattern: str, text: str) -> bool:
+    """Custom REGEXP function for SQLite"""
+    import re
+    try:
+        return bool(re.search(pattern, text))
+    except Exception:
+        return False
+
 @dataclass
 class ConnectionStats:
     """Database connection statistics"""
@@ -47,8 +118,16 @@ class ConnectionStats:
 class SQLiteConnection:
     """Enhanced SQLite connection with performance optimizations"""
     
-    def __init__(self, db_path: str, connection_id: int):
+    def __init__(
+        self,
+        db_path: str,
+        connection_id: int,
+        init_hook: Optional[Callable[[sqlite3.Connection], None]] = None,
+        statement_cache_size: int = 256
+    ):
         self.db_path = db_path
+        self.init_hook = init_hook
+        self.statement_cache_size = statement_cache_size
         self.connection_id = connection_id
         self.connection = None
         self.created_at = datetime.utcnow()
@@ -66,29 +145,13 @@ class SQLiteConnection:
                 self.db_path,
                 check_same_thread=False,  # Allow sharing between threads
                 isolation_level=None,     # Autocommit mode
-                timeout=30.0             # 30 second timeout
+                timeout=30.0,            # 30 second timeout
+                cached_statements=self.statement_cache_size
             )
             
-            # Apply performance optimizations
-            cursor = self.connection.cursor()
-            
-            # Performance PRAGMA settings
-            performance_settings = [
-                "PRAGMA journal_mode=WAL",           # Write-Ahead Logging
-                "PRAGMA synchronous=NORMAL",         # Balanced durability/speed
-                "PRAGMA cache_size=10000",           # 10MB cache
-                "PRAGMA temp_store=MEMORY",          # Store temp data in memory
-                "PRAGMA mmap_size=268435456",        # 256MB memory mapping
-                "PRAGMA optimize",                   # Query planner optimization
-                "PRAGMA page_size=4096",             # Optimal page size
-                "PRAGMA auto_vacuum=INCREMENTAL"     # Incremental vacuuming
-            ]
-            
-            for setting in performance_settings:
-                cursor.execute(setting)
-            
-            # Register custom functions for better performance
-            self.connection.create_function("regexp", 2, self._regexp)
+            # Database-wide settings once per file, then cheap per-connection settings
+            initialize_database(self.connection, self.db_path, self.init_hook)
+            configure_connection(self.connection)
             
             logger.debug(f"✅ Created optimized connection {self.connection_id}")
             
@@ -96,14 +159,6 @@ class SQLiteConnection:
             logger.error(f"❌ Failed to create connection {self.connection_id}: {e}")
             raise
     
-    def _regexp(self, pattern: str, text: str) -> bool:
-        """Custom REGEXP function for SQLite"""
-        import re
-        try:
-            return bool(re.search(pattern, text))
-        except:
-            return False
-    
     def execute_query(self, query: str, params: tuple = (), fetch: str = None) -> Any:
         """Execute query with performance tracking"""
         with self.lock:
@@ -177,9 +232,12 @@ class DatabaseConnectionPool:
         pool_size: int = 20,
         max_pool_size: int = 50,
         connection_timeout: float = 30.0,
-        idle_timeout: float = 300.0  # 5 minutes
+        idle_timeout: float = 300.0,  # 5 minutes
+        init_hook: Optional[Callable[[sqlite3.Connection], None]] = None
     ):
         self.db_path = db_path
+        self.init_hook = init_hook
+        self._async_db: Optional["AsyncDatabase"] = None
         self.pool_size = pool_size
         self.max_pool_size = max_pool_size
         self.connection_timeout = connection_timeout
@@ -225,7 +283,7 @@ class DatabaseConnectionPool:
             connection_id = self.connection_counter
             
         try:
-            connection = SQLiteConnection(self.db_path, connection_id)
+            connection = SQLiteConnection(self.db_path, connection_id, init_hook=self.init_hook)
             
             with self.lock:
                 self.all_connections[connection_id] = connection
@@ -383,6 +441,13 @@ class DatabaseConnectionPool:
             self._remove_connection(connection)
             logger.debug(f"🧹 Removed idle connection {connection.connection_id}")
         
+        # Refresh query planner statistics (cheap when nothing changed)
+        try:
+            with self.get_connection() as connection:
+                connection.execute_query("PRAGMA optimize")
+        except Exception as e:
+            logger.debug(f"PRAGMA optimize skipped: {e}")
+        
         # Log maintenance stats
         active_count = len(self.all_connections)
         queue_size = self.available_connections.qsize()
@@ -413,6 +478,11 @@ class DatabaseConnectionPool:
                     'queries_per_connection': round(self.stats.total_queries / max(1, self.stats.total_connections_created), 2)
                 }
             }
+            if self._async_db is not None:
+                current_stats['async_facade'] = self._async_db.get_stats()
+            write_queue = _write_queues.get(os.path.abspath(self.db_path))
+            if write_queue is not None:
+                current_stats['write_queue'] = write_queue.get_stats()
         
         return current_stats
     
@@ -447,6 +517,28 @@ class DatabaseConnectionPool:
         
         return optimization_report
     
+    @property
+    def aio(self) -> "AsyncDatabase":
+        """Async facade over the same database (dedicated reader/writer threads)"""
+        if self._async_db is None:
+            self._async_db = AsyncDatabase(self.db_path, init_hook=self.init_hook)
+        return self._async_db
+    
+    async def execute_query_async(self, query: str, params: tuple = (), fetch: str = None) -> Any:
+        """Awaitable execute_query: fetches go to a reader thread, everything else to the writer"""
+        if fetch:
+            return await self.aio.fetch(query, params, fetch)
+        return await self.aio.execute(query, params)
+    
+    async def execute_transaction_async(self, queries: List[Tuple[str, tuple]]) -> bool:
+        """Awaitable execute_transaction on the writer thread"""
+        try:
+            await self.aio.transaction(queries)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Transaction execution failed: {e}")
+            return False
+    
     def close_all_connections(self):
         """Close all connections and shut down pool"""
         logger.info("🔒 Shutting down database connection pool...")
@@ -458,16 +550,525 @@ class DatabaseConnectionPool:
         if self.maintenance_thread:
             self.maintenance_thread.join(timeout=5)
         
-        # Close all connections
+        if self._async_db is not None:
+            self._async_db.close()
+        
+        # Close all connections (_remove_connection takes the lock itself)
         with self.lock:
-            for connection in list(self.all_connections.values()):
-                self._remove_connection(connection)
+            connections = list(self.all_connections.values())
+        for connection in connections:
+            self._remove_connection(connection)
         
         logger.info("✅ Database connection pool shut down complete")
 
+class _DatabaseWorker(threading.Thread):
+    """Thread owning one dedicated connection, draining a job queue"""
+    
+    def __init__(self, owner: "AsyncDatabase", jobs: "queue.Queue", name: str, readonly: bool):
+        super().__init__(name=name, daemon=True)
+        self.owner = owner
+        self.jobs = jobs
+        self.readonly = readonly
+        self.connection: Optional[sqlite3.Connection] = None
+        self.ready = threading.Event()
+        self.error: Optional[Exception] = None
+    
+    def run(self):
+        try:
+            self.connection = self.owner._connect(readonly=self.readonly)
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            logger.error(f"❌ {self.name} could not connect: {e}")
+            return
+        self.ready.set()
+        
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            func, future, loop, queued_at = job
+            if future.cancelled():
+                continue
+            started = time.monotonic()
+            try:
+                result, error = func(self.connection), None
+            except Exception as e:
+                result, error = None, e
+            self.owner._record(self.readonly, started - queued_at, time.monotonic() - started, error)
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future, result, error)
+            except RuntimeError:
+                pass  # caller's event loop is closed; nobody is waiting
+        
+        try:
+            if not self.readonly:
+                self.connection.execute("PRAGMA optimize")
+            self.connection.close()
+        except Exception as e:
+            logger.debug(f"{self.name} close: {e}")
+
+
+def _resolve_future(future: asyncio.Future, result: Any, error: Optional[Exception]):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class AsyncDatabase:
+    """
+    ⚡ Awaitable SQLite facade with a single writer and many readers
+    
+    Features:
+    - N reader threads, each with its own query_only connection
+    - One writer thread with its own connection and its own queue, so a
+      long-running read never holds up writes (WAL: readers see the last
+      committed snapshot while the writer proceeds)
+    - Per-thread connections keep sqlite3's prepared-statement cache warm
+    - Database-wide PRAGMAs and init hook once per file, not per connect
+    
+    ':memory:' databases are private to each connection; use readers=0 so
+    reads run on the writer connection. Readers that fail to connect are
+    dropped; if none connect, reads run on the writer too.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 4,
+        init_hook: Optional[Callable[[sqlite3.Connection], None]] = None,
+        statement_cache_size: int = 256,
+        timeout: float = 30.0
+    ):
+        self.db_path = db_path
+        self.reader_count = readers
+        self.init_hook = init_hook
+        self.statement_cache_size = statement_cache_size
+        self.timeout = timeout
+        
+        self._read_jobs: "queue.Queue" = queue.Queue()
+        self._write_jobs: "queue.Queue" = queue.Queue()
+        self._workers: List[_DatabaseWorker] = []
+        self._live_readers = 0
+        self._start_lock = threading.Lock()
+        self._closed = False
+        
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'reads': 0,
+            'writes': 0,
+            'read_errors': 0,
+            'write_errors': 0,
+            'read_wait_time': 0.0,
+            'write_wait_time': 0.0,
+            'read_exec_time': 0.0,
+            'write_exec_time': 0.0
+        }
+    
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=self.timeout,
+            cached_statements=self.statement_cache_size
+        )
+        if not readonly:
+            initialize_database(connection, self.db_path, self.init_hook)
+        configure_connection(connection, readonly=readonly)
+        return connection
+    
+    def start(self):
+        """Start worker threads (called lazily on first use)"""
+        with self._start_lock:
+            if self._workers:
+                return
+            if self._closed:
+                raise RuntimeError("AsyncDatabase is closed")
+            
+            # Writer first: it applies database-wide settings before readers connect
+            writer = _DatabaseWorker(self, self._write_jobs, "lex-db-writer", readonly=False)
+            writer.start()
+            writer.ready.wait()
+            if writer.error:
+                raise writer.error
+            workers = [writer]
+            
+            for i in range(self.reader_count):
+                reader = _DatabaseWorker(self, self._read_jobs, f"lex-db-reader-{i}", readonly=True)
+                reader.start()
+                workers.append(reader)
+            for reader in workers[1:]:
+                reader.ready.wait()
+            # A reader that could not connect has exited; nobody must wait on it
+            workers = [worker for worker in workers if worker.error is None]
+            self._live_readers = len(workers) - 1
+            if self._live_readers < self.reader_count:
+                logger.warning(
+                    f"⚠️ {self.reader_count - self._live_readers} of {self.reader_count} readers failed to connect"
+                    + ("" if self._live_readers else "; reads run on the writer")
+                )
+            self._workers = workers
+            logger.info(f"✅ Async database started: 1 writer, {self._live_readers} readers ({self.db_path})")
+    
+    async def _submit(self, func: Callable[[sqlite3.Connection], Any], write: bool) -> Any:
+        if not self._workers:
+            # Connecting and initializing the database blocks; keep it off the loop
+            await asyncio.to_thread(self.start)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        jobs = self._write_jobs if write or not self._live_readers else self._read_jobs
+        with self._start_lock:
+            # Checked under the lock close() takes, so no job lands behind the stop sentinel
+            if self._closed:
+                raise RuntimeError("AsyncDatabase is closed")
+            jobs.put((func, future, loop, time.monotonic()))
+        return await future
+    
+    def _record(self, readonly: bool, wait: float, elapsed: float, error: Optional[Exception]):
+        kind = 'read' if readonly else 'write'
+        with self._stats_lock:
+            self.stats[f'{kind}s'] += 1
+            self.stats[f'{kind}_wait_time'] += wait
+            self.stats[f'{kind}_exec_time'] += elapsed
+            if error is not None:
+                self.stats[f'{kind}_errors'] += 1
+    
+    async def run_read(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run func(connection) on a reader thread"""
+        return await self._submit(func, write=False)
+    
+    async def run_write(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run func(connection) on the writer thread"""
+        return await self._submit(func, write=True)
+    
+    async def fetch(self, query: str, params: tuple = (), fetch: str = "all", size: int = 100) -> Any:
+        """Read query; fetch is 'one', 'all' or 'many'"""
+        def run(connection: sqlite3.Connection):
+            cursor = connection.execute(query, params)
+            try:
+                if fetch == "one":
+                    return cursor.fetchone()
+                if fetch == "many":
+                    return cursor.fetchmany(size)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        return await self._submit(run, write=False)
+    
+    async def fetch_one(self, query: str, params: tuple = ()) -> Optional[tuple]:
+        return await self.fetch(query, params, "one")
+    
+    async def fetch_all(self, query: str, params: tuple = ()) -> List[tuple]:
+        return await self.fetch(query, params, "all")
+    
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        """Write query on the writer thread; returns rowcount"""
+        def run(connection: sqlite3.Connection):
+            return connection.execute(query, params).rowcount
+        return await self._submit(run, write=True)
+    
+    async def executemany(self, query: str, seq_of_params: List[tuple]) -> int:
+        """Batch write in one transaction; returns rowcount"""
+        seq_of_params = list(seq_of_params)
+        
+        def run(connection: sqlite3.Connection):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                rowcount = connection.executemany(query, seq_of_params).rowcount
+                connection.execute("COMMIT")
+                return rowcount
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return await self._submit(run, write=True)
+    
+    async def transaction(self, queries: List[Tuple[str, tuple]]) -> None:
+        """Run queries atomically on the writer thread"""
+        queries = list(queries)
+        
+        def run(connection: sqlite3.Connection):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for query, params in queries:
+                    connection.execute(query, params)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        await self._submit(run, write=True)
+    
+    def close(self, timeout: float = 5.0):
+        """Drain queued work, stop workers and close their connections"""
+        with self._start_lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            (self._read_jobs if worker.readonly else self._write_jobs).put(None)
+        for worker in workers:
+            worker.join(timeout=timeout)
+        if workers:
+            logger.info("✅ Async database closed")
+    
+    async def aclose(self, timeout: float = 5.0):
+        await asyncio.to_thread(self.close, timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        reads, writes = stats['reads'] or 1, stats['writes'] or 1
+        return {
+            **stats,
+            'readers': self.reader_count,
+            'live_readers': self._live_readers,
+            'running': bool(self._workers),
+            'read_queue_depth': self._read_jobs.qsize(),
+            'write_queue_depth': self._write_jobs.qsize(),
+            'avg_read_wait_ms': stats['read_wait_time'] / reads * 1000,
+            'avg_write_wait_ms': stats['write_wait_time'] / writes * 1000,
+            'avg_read_ms': stats['read_exec_time'] / reads * 1000,
+            'avg_write_ms': stats['write_exec_time'] / writes * 1000,
+            'statement_cache_size': self.statement_cache_size
+        }
+
+class BatchedWriteQueue:
+    """
+    📦 Single-writer commit coalescing for SQLite
+    
+    Features:
+    - Producers submit statements and get a future for their own completion
+    - One writer thread commits many statements per transaction, flushing
+      at max_batch statements or max_delay seconds after the first arrives
+      (no delay when the queue is idle)
+    - Per-statement savepoints: a failing statement fails only its own future
+    - Queue depth, batch size and commit latency stats
+    
+    In WAL mode each COMMIT is an fsync; coalescing N inserts into one
+    transaction turns N fsyncs into one.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        max_batch: int = 500,
+        max_delay: float = 0.01,
+        max_queue: int = 100000,
+        init_hook: Optional[Callable[[sqlite3.Connection], None]] = None
+    ):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.init_hook = init_hook
+        
+        self._jobs: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._submit_lock = threading.Lock()  # orders puts against close()'s stop sentinel
+        self._closed = False
+        self._error: Optional[Exception] = None  # writer could not connect
+        
+        self._commit_latencies: "deque[float]" = deque(maxlen=1000)
+        self.stats = {
+            'submitted': 0,
+            'committed': 0,
+            'failed': 0,
+            'batches': 0,
+            'batch_failures': 0,
+            'max_queue_depth': 0,
+            'queue_wait_time': 0.0,
+            'commit_time': 0.0
+        }
+    
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            if self._closed:
+                raise RuntimeError("BatchedWriteQueue is closed")
+            self._thread = threading.Thread(target=self._run, name="lex-db-batch-writer", daemon=True)
+            self._thread.start()
+    
+    def submit(self, query: str, params: Any = (), many: bool = False, block: bool = True) -> Future:
+        """Queue one statement (or one executemany); the future resolves to its rowcount"""
+        future = self._enqueue(query, params, many, block)
+        self.stats['submitted'] += 1
+        return future
+    
+    def _enqueue(self, query: Optional[str], params: Any, many: bool, block: bool) -> Future:
+        if self._thread is None:
+            self.start()
+        future: Future = Future()
+        with self._submit_lock:
+            if self._error is not None:
+                raise RuntimeError(f"BatchedWriteQueue writer failed: {self._error}")
+            if self._closed:
+                raise RuntimeError("BatchedWriteQueue is closed")
+            self._jobs.put((query, params, many, future, time.monotonic()), block=block)
+        depth = self._jobs.qsize()
+        if depth > self.stats['max_queue_depth']:
+            self.stats['max_queue_depth'] = depth
+        return future
+    
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        return await self._submit_async(query, params, False)
+    
+    async def executemany(self, query: str, seq_of_params: List[tuple]) -> int:
+        return await self._submit_async(query, list(seq_of_params), True)
+    
+    async def _submit_async(self, query: str, params: Any, many: bool) -> int:
+        try:
+            future = self.submit(query, params, many, block=False)
+        except queue.Full:
+            # Backpressure without blocking the event loop
+            future = await asyncio.to_thread(self.submit, query, params, many)
+        return await asyncio.wrap_future(future)
+    
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything submitted so far is committed"""
+        self._enqueue(None, (), False, True).result(timeout)  # barrier; not a write
+    
+    def _run(self):
+        try:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30.0)
+            initialize_database(connection, self.db_path, self.init_hook)
+            configure_connection(connection)
+        except Exception as e:
+            logger.error(f"❌ Batch writer could not connect: {e}")
+            with self._submit_lock:
+                # Later submits raise instead of queueing behind a dead writer
+                self._error = e
+                self._closed = True
+            self._fail_pending(e)
+            return
+        
+        stopping = False
+        last_batch_size = 0
+        while not stopping:
+            job = self._jobs.get()
+            if job is None:
+                break
+            batch = [job]
+            # Linger for more work only under concurrency; an idle queue commits at once
+            linger = self.max_delay if last_batch_size > 1 or not self._jobs.empty() else 0.0
+            deadline = time.monotonic() + linger
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    job = self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit_batch(connection, batch)
+            last_batch_size = len(batch)
+        
+        try:
+            connection.execute("PRAGMA optimize")
+            connection.close()
+        except Exception as e:
+            logger.debug(f"Batch writer close: {e}")
+    
+    def _commit_batch(self, connection: sqlite3.Connection, batch: List[tuple]):
+        started = time.monotonic()
+        live = [job for job in batch if job[3].set_running_or_notify_cancel()]
+        # flush() barriers resolve once the statements queued before them are done
+        barriers = [job[3] for job in live if job[0] is None]
+        live = [job for job in live if job[0] is not None]
+        try:
+            if live:
+                self._commit_statements(connection, live, started)
+        finally:
+            for future in barriers:
+                future.set_result(None)
+    
+    def _commit_statements(self, connection: sqlite3.Connection, live: List[tuple], started: float):
+        outcomes = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for query, params, many, future, queued_at in live:
+                self.stats['queue_wait_time'] += started - queued_at
+                connection.execute("SAVEPOINT lex_batch_item")
+                try:
+                    cursor = connection.executemany(query, params) if many else connection.execute(query, params)
+                    connection.execute("RELEASE lex_batch_item")
+                    outcomes.append((future, cursor.rowcount, None))
+                except Exception as e:
+                    connection.execute("ROLLBACK TO lex_batch_item")
+                    connection.execute("RELEASE lex_batch_item")
+                    outcomes.append((future, None, e))
+            connection.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"❌ Batch commit failed ({len(live)} statements): {e}")
+            try:
+                connection.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            self.stats['batch_failures'] += 1
+            self.stats['failed'] += len(live)
+            for job in live:
+                job[3].set_exception(e)
+            return
+        
+        elapsed = time.monotonic() - started
+        self._commit_latencies.append(elapsed)
+        self.stats['batches'] += 1
+        self.stats['commit_time'] += elapsed
+        for future, rowcount, error in outcomes:
+            if error is None:
+                self.stats['committed'] += 1
+                future.set_result(rowcount)
+            else:
+                self.stats['failed'] += 1
+                future.set_exception(error)
+    
+    def _fail_pending(self, error: Exception):
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None and job[3].set_running_or_notify_cancel():
+                job[3].set_exception(error)
+    
+    def close(self, timeout: float = 10.0):
+        """Commit what is queued, then stop the writer; later submits raise"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+            with self._submit_lock:
+                self._closed = True
+                if thread is not None:
+                    self._jobs.put(None)
+        if thread is not None:
+            thread.join(timeout=timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._commit_latencies)
+        batches = self.stats['batches'] or 1
+        processed = (self.stats['committed'] + self.stats['failed']) or 1
+        return {
+            **self.stats,
+            'queue_depth': self._jobs.qsize(),
+            'writer_error': str(self._error) if self._error else None,
+            'avg_batch_size': round(self.stats['committed'] / batches, 2),
+            'avg_queue_wait_ms': self.stats['queue_wait_time'] / processed * 1000,
+            'avg_commit_latency_ms': self.stats['commit_time'] / batches * 1000,
+            'p95_commit_latency_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+            'max_batch': self.max_batch,
+            'max_delay_ms': self.max_delay * 1000
+        }
+
 # Global database pool
 db_pool = None
 
+# Batched writers, one per database file
+_write_queues: Dict[str, BatchedWriteQueue] = {}
+_write_queues_lock = threading.Lock()
+
 def initialize_db_pool(
     db_path: str = "lex_memory.db",
     pool_size: int = 20,
@@ -493,6 +1094,34 @@ def get_db_pool() -> DatabaseConnectionPool:
     
     return db_pool
 
+def get_write_queue(db_path: str = "lex_memory.db") -> BatchedWriteQueue:
+    """Shared batched writer for a database file"""
+    key = os.path.abspath(db_path)
+    with _write_queues_lock:
+        write_queue = _write_queues.get(key)
+        if write_queue is None:
+            write_queue = _write_queues[key] = BatchedWriteQueue(
+                db_path,
+                max_batch=int(os.getenv('DB_WRITE_BATCH_SIZE', '500')),
+                max_delay=float(os.getenv('DB_WRITE_BATCH_DELAY_MS', '10')) / 1000
+            )
+        return write_queue
+
+def close_write_queues():
+    """Commit queued writes and stop all batched writers (registered at exit)"""
+    with _write_queues_lock:
+        write_queues = list(_write_queues.values())
+        _write_queues.clear()
+    for write_queue in write_queues:
+        write_queue.close()
+
+atexit.register(close_write_queues)
+
+def get_write_queue_stats() -> Dict[str, Any]:
+    """Queue depth and commit latency for every batched writer"""
+    with _write_queues_lock:
+        return {path: write_queue.get_stats() for path, write_queue in _write_queues.items()}
+
 # Convenience functions
 def execute_query(query: str, params: tuple = (), fetch: str = None) -> Any:
     """Execute query using global pool"""
@@ -502,4 +1131,12 @@ def execute_query(query: str, params: tuple = (), fetch: str = None) -> Any:
 def execute_transaction(queries: List[Tuple[str, tuple]]) -> bool:
     """Execute transaction using global pool"""
     pool = get_db_pool()
-    return pool.execute_transaction(queries)
\ No newline at end of file
+    return pool.execute_transaction(queries)
+
+async def execute_query_async(query: str, params: tuple = (), fetch: str = None) -> Any:
+    """Awaitable execute_query using the global pool's async facade"""
+    return await get_db_pool().execute_query_async(query, params, fetch)
+
+async def execute_transaction_async(queries: List[Tuple[str, tuple]]) -> bool:
+    """Awaitable execute_transaction using the global pool's async facade"""
+    return await get_db_pool().execute_transaction_async(queries)
\ No newline at end of file
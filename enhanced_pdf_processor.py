@@ -7,9 +7,13 @@ import os
 import io
 import base64
 import logging
-from typing import Dict, List, Any, Optional, Union
+import multiprocessing
+from typing import Dict, List, Any, Optional, Union, AsyncIterator, Iterator, Tuple
 from pathlib import Path
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, asdict
 from datetime import datetime
 
 # PDF Processing
@@ -36,8 +40,35 @@ from python_pptx import Presentation
 import torch
 from transformers import pipeline
 
+import pdf_page_worker
+from extraction_cache import ExtractionCache, get_extraction_cache, cache_key, hash_file
+
 logger = logging.getLogger(__name__)
 
+PROCESSOR_VERSION = 1  # bump when whole-file results change (invalidates cached documents)
+
+TEXT_SUFFIXES = {'.txt', '.md'}
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
+
+@dataclass
+class ExtractedChunk:
+    """A piece of extracted text and where it came from"""
+    index: int                  # emission order within the document
+    kind: str                   # 'page', 'slide', 'paragraphs', 'table', 'rows', 'text', 'image'
+    text: str
+    position: Dict[str, Any]    # e.g. {'page': 3} or {'sheet': 'Q1', 'rows': [2, 201]}
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def label(self) -> str:
+        return ", ".join(
+            f"{key} {'-'.join(map(str, value)) if isinstance(value, list) else value}"
+            for key, value in self.position.items()
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
 class EnhancedPDFProcessor:
     """
     🔱 Enhanced PDF Processor with Multiple OCR Backends
@@ -49,11 +80,26 @@ class EnhancedPDFProcessor:
     - Support for scanned PDFs, forms, and complex layouts
     - Chart and graph extraction
     - Handwriting recognition
+    - Page-parallel PDF processing in a process pool, streamed per page
+    - Content-addressed result cache (whole files and individual pages)
+    - Streaming chunk output (iter_chunks) for incremental indexing
     """
     
-    def __init__(self, use_gpu: bool = True):
+    def __init__(
+        self,
+        use_gpu: bool = True,
+        max_workers: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        use_cache: bool = True
+    ):
         self.use_gpu = use_gpu and torch.cuda.is_available()
         
+        # Page-level parallelism
+        self.max_workers = max_workers or int(os.getenv("PDF_WORKERS", 0)) or os.cpu_count() or 1
+        self.max_pages = max_pages or int(os.getenv("PDF_MAX_PAGES", 1000))  # page budget per document
+        self._page_pool: Optional[ProcessPoolExecutor] = None
+        self.use_cache = use_cache
+        
         # Initialize OCR models
         self.ocr_predictor = None
         if self.use_gpu:
@@ -121,13 +167,29 @@ class EnhancedPDFProcessor:
             if not handler:
                 return {"error": f"Unsupported file type: {suffix}"}
             
+            # Same bytes, same options, same processor version -> cached result
+            key = None
+            result = None
+            if self.use_cache:
+                content_hash = await asyncio.to_thread(hash_file, str(file_path))
+                key = cache_key(
+                    'document', 'enhanced_pdf', PROCESSOR_VERSION, content_hash,
+                    suffix=suffix, images=extract_images, tables=extract_tables,
+                    ocr_mode=ocr_mode, gpu=self.use_gpu
+                )
+                result = await self.cache.get(key)
+            cache_hit = result is not None
+            
             # Process the file
-            result = await handler(
-                str(file_path),
-                extract_images=extract_images,
-                extract_tables=extract_tables,
-                ocr_mode=ocr_mode
-            )
+            if result is None:
+                result = await handler(
+                    str(file_path),
+                    extract_images=extract_images,
+                    extract_tables=extract_tables,
+                    ocr_mode=ocr_mode
+                )
+                if key and result.get('success') and not result.get('truncated') and not result.get('failed_pages'):
+                    await self.cache.put(key, 'document', result)
             
             # Add metadata
             result['metadata'] = {
@@ -135,7 +197,8 @@ class EnhancedPDFProcessor:
                 'file_size': file_path.stat().st_size,
                 'file_type': suffix,
                 'processed_at': datetime.now().isoformat(),
-                'gpu_used': self.use_gpu
+                'gpu_used': self.use_gpu,
+                'cache_hit': cache_hit
             }
             
             return result
@@ -144,64 +207,202 @@ class EnhancedPDFProcessor:
             logger.error(f"❌ File processing error: {e}")
             return {"error": str(e)}
     
+    @property
+    def cache(self) -> ExtractionCache:
+        return get_extraction_cache()
+    
+    def _get_page_pool(self) -> ProcessPoolExecutor:
+        """Lazily start the page worker pool (spawn: safe after CUDA init)"""
+        if self._page_pool is None:
+            self._page_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=pdf_page_worker.init_worker
+            )
+            logger.info(f"🔱 PDF page pool started ({self.max_workers} workers)")
+        return self._page_pool
+    
+    def close(self):
+        """Shut down the page worker pool"""
+        if self._page_pool is not None:
+            self._page_pool.shutdown(wait=False, cancel_futures=True)
+            self._page_pool = None
+    
+    async def iter_pdf_pages(
+        self,
+        file_path: str,
+        extract_images: bool = True,
+        extract_tables: bool = False,
+        ocr_mode: str = "auto",
+        max_pages: Optional[int] = None,
+        cancel_event: Optional[asyncio.Event] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield page results as they finish (completion order, not page order)
+        
+        Page content hashes are computed in the process pool, one slice of
+        pages per worker. Pages whose hash is already cached (same page
+        version and options) are yielded first, so a revised document only
+        processes its changed pages. The rest run in the pool with at most
+        2x workers in flight and are cached as they finish. A page that
+        fails is yielded with failed=True and an error instead of aborting
+        the document. Stops at the page budget; setting cancel_event or
+        closing the generator cancels pages not yet started.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_page_pool()
+        total_pages = await asyncio.to_thread(pdf_page_worker.page_count, file_path)
+        count = min(total_pages, max_pages or self.max_pages)
+        step = max(1, -(-count // self.max_workers))
+        try:
+            slices = await asyncio.gather(*(
+                loop.run_in_executor(pool, pdf_page_worker.hash_pages, file_path, start, min(start + step, count))
+                for start in range(0, count, step)
+            ))
+        except BrokenProcessPool:
+            self._page_pool = None  # recreated on next use
+            raise
+        hashes = [h for hashes in slices for h in hashes]
+        ocr_in_worker = not (self.use_gpu and self.ocr_predictor)
+        options = {
+            'ocr_mode': ocr_mode,
+            'ocr_engine': 'tesseract' if ocr_in_worker else 'doctr',
+            'images': extract_images,
+            'tables': extract_tables
+        }
+        keys = [
+            cache_key('page', 'pdf_page', pdf_page_worker.PAGE_VERSION, h, **options) if h else None
+            for h in hashes
+        ]
+        cached = await self.cache.get_many([key for key in keys if key]) if self.use_cache else {}
+        
+        pending = []
+        for page_num, key in enumerate(keys):
+            page = cached.get(key) if key else None
+            if page is None:
+                pending.append(page_num)
+                continue
+            # Identical page content may sit at a different position now
+            page.update(page=page_num + 1, total_pages=total_pages, cached=True, error=None, failed=False)
+            for image in page['images']:
+                image['page'] = page_num + 1
+            yield page
+            
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"🛑 PDF processing cancelled at page {page_num + 1}")
+                return
+        
+        if cached:
+            logger.info(f"♻️ {len(cached)}/{len(keys)} pages served from extraction cache")
+        if not pending:
+            return
+        
+        queued = iter(pending)
+        in_flight = {}
+        try:
+            while True:
+                while len(in_flight) < self.max_workers * 2:
+                    page_num = next(queued, None)
+                    if page_num is None:
+                        break
+                    future = loop.run_in_executor(
+                        pool, pdf_page_worker.process_page,
+                        file_path, page_num, ocr_mode, ocr_in_worker, extract_images
+                    )
+                    in_flight[future] = page_num
+                if not in_flight:
+                    break
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    page_num = in_flight.pop(future)
+                    try:
+                        page = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        # One bad page (corrupt stream, font crash) doesn't sink the document
+                        logger.warning(f"⚠️ Page {page_num + 1} failed: {e}")
+                        page = pdf_page_worker.failed_page(page_num, f"Page extraction failed: {e}")
+                    
+                    # GPU OCR happens here, on the raw samples
+                    if page['pixels'] is not None:
+                        ocr_text = await self._perform_ocr(pdf_page_worker.samples_to_array(page['pixels']))
+                        if ocr_text:
+                            page['text'] = ocr_text
+                            page['ocr_performed'] = True
+                    page.pop('pixels')
+                    
+                    if extract_tables and not page['failed']:
+                        page['tables'] = await self._extract_tables_from_text(page['text'])
+                    
+                    if self.use_cache and keys[page_num] and not page['error']:
+                        await self.cache.put(keys[page_num], 'page', page)
+                    
+                    page['total_pages'] = total_pages
+                    page['cached'] = False
+                    yield page
+                    
+                    if cancel_event is not None and cancel_event.is_set():
+                        logger.info(f"🛑 PDF processing cancelled at page {page['page']}")
+                        return
+        except BrokenProcessPool:
+            self._page_pool = None  # recreated on next use
+            raise
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
     async def process_pdf(
         self,
         file_path: str,
         extract_images: bool = True,
         extract_tables: bool = True,
-        ocr_mode: str = "auto"
+        ocr_mode: str = "auto",
+        max_pages: Optional[int] = None,
+        cancel_event: Optional[asyncio.Event] = None
     ) -> Dict[str, Any]:
         """
         Advanced PDF processing with OCR fallback
+        
+        Pages are processed in parallel (see iter_pdf_pages) and reassembled
+        in page order.
         """
         try:
-            pdf_document = fitz.open(file_path)
-            total_pages = len(pdf_document)
-            
             extracted_text = []
             images_extracted = []
             tables_extracted = []
             ocr_performed = False
+            total_pages = 0
             
-            for page_num in range(total_pages):
-                page = pdf_document[page_num]
-                
-                # Try direct text extraction first
-                text = page.get_text()
-                
-                # Check if OCR is needed
-                needs_ocr = (ocr_mode == "always" or 
-                           (ocr_mode == "auto" and len(text.strip()) < 50))
-                
-                if needs_ocr:
-                    # Convert page to image for OCR
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x scale for better OCR
-                    img_data = pix.pil_tobytes(format="PNG")
-                    image = Image.open(io.BytesIO(img_data))
-                    
-                    # Perform OCR
-                    ocr_text = await self._perform_ocr(image)
-                    if ocr_text:
-                        text = ocr_text
-                        ocr_performed = True
+            pages_cached = 0
+            failed_pages = []
+            async for page in self.iter_pdf_pages(
+                file_path,
+                extract_images=extract_images,
+                extract_tables=extract_tables,
+                ocr_mode=ocr_mode,
+                max_pages=max_pages,
+                cancel_event=cancel_event
+            ):
+                total_pages = page['total_pages']
+                ocr_performed = ocr_performed or page['ocr_performed']
+                pages_cached += page['cached']
+                if page['failed']:
+                    failed_pages.append(page['page'])  # already logged by iter_pdf_pages
+                elif page['error']:
+                    logger.warning(f"⚠️ Page {page['page']}: {page['error']}")
                 
                 extracted_text.append({
-                    'page': page_num + 1,
-                    'text': text.strip(),
-                    'ocr_used': needs_ocr
+                    'page': page['page'],
+                    'text': page['text'],
+                    'ocr_used': page['ocr_used']
                 })
-                
-                # Extract images if requested
-                if extract_images:
-                    page_images = self._extract_images_from_page(page)
-                    images_extracted.extend(page_images)
-                
-                # Extract tables if requested
-                if extract_tables:
-                    page_tables = await self._extract_tables_from_text(text)
-                    tables_extracted.extend(page_tables)
+                images_extracted.extend(page['images'])
+                tables_extracted.extend(page.get('tables', []))
             
-            pdf_document.close()
+            extracted_text.sort(key=lambda p: p['page'])
+            images_extracted.sort(key=lambda img: (img['page'], img['index']))
             
             # Combine all text
             full_text = "\n\n".join([
@@ -216,16 +417,21 @@ class EnhancedPDFProcessor:
                 'success': True,
                 'content_type': 'pdf',
                 'total_pages': total_pages,
+                'pages_processed': len(extracted_text),
+                'truncated': len(extracted_text) < total_pages,
                 'text': full_text,
                 'pages': extracted_text,
                 'images': images_extracted,
                 'tables': tables_extracted,
                 'summary': summary,
                 'ocr_performed': ocr_performed,
+                'failed_pages': sorted(failed_pages),
                 'processing_details': {
                     'ocr_mode': ocr_mode,
                     'images_extracted': len(images_extracted),
-                    'tables_extracted': len(tables_extracted)
+                    'tables_extracted': len(tables_extracted),
+                    'page_workers': self.max_workers,
+                    'pages_from_cache': pages_cached
                 }
             }
             
@@ -233,6 +439,186 @@ class EnhancedPDFProcessor:
             logger.error(f"❌ PDF processing error: {e}")
             return {'success': False, 'error': str(e)}
     
+    async def iter_chunks(
+        self,
+        file_path: str,
+        ocr_mode: str = "auto",
+        rows_per_chunk: int = 200,
+        chars_per_chunk: int = 4000,
+        max_pages: Optional[int] = None,
+        cancel_event: Optional[asyncio.Event] = None
+    ) -> AsyncIterator[ExtractedChunk]:
+        """
+        Stream a document as positioned text chunks
+        
+        PDFs yield pages (in page order), spreadsheets and CSVs row ranges
+        per sheet, Word documents paragraph groups and table row ranges,
+        presentations slides. Only the current chunk is held in memory
+        (plus, for PDFs, pages that finished ahead of an earlier one), so
+        consumers can index while extraction is still running.
+        """
+        suffix = Path(file_path).suffix.lower()
+        index = 0
+        
+        if suffix == '.pdf':
+            # Pages finish out of order; release them in order
+            waiting: Dict[int, Dict[str, Any]] = {}
+            next_page = 1
+            async for page in self.iter_pdf_pages(
+                file_path,
+                extract_images=False,
+                ocr_mode=ocr_mode,
+                max_pages=max_pages,
+                cancel_event=cancel_event
+            ):
+                waiting[page['page']] = page
+                while next_page in waiting:
+                    page = waiting.pop(next_page)
+                    yield ExtractedChunk(
+                        index, 'page', page['text'], {'page': page['page']},
+                        {'ocr_used': page['ocr_used'], 'cached': page['cached'], 'total_pages': page['total_pages'],
+                         'failed': page['failed']}
+                    )
+                    index += 1
+                    next_page += 1
+            for page_num in sorted(waiting):  # gaps left by cancellation
+                page = waiting[page_num]
+                yield ExtractedChunk(index, 'page', page['text'], {'page': page_num}, {'ocr_used': page['ocr_used']})
+                index += 1
+            return
+        
+        if suffix in IMAGE_SUFFIXES:
+            result = await self.process_image(file_path)
+            if result.get('success') and result.get('text'):
+                yield ExtractedChunk(index, 'image', result['text'], {'image': 1}, result.get('image_info', {}))
+            return
+        
+        if suffix in ('.docx', '.doc'):
+            parts = self._word_chunks(file_path, chars_per_chunk, rows_per_chunk)
+        elif suffix == '.xlsx':
+            parts = self._excel_chunks(file_path, rows_per_chunk)
+        elif suffix == '.xls':
+            parts = self._legacy_excel_chunks(file_path, rows_per_chunk)
+        elif suffix == '.csv':
+            parts = self._csv_chunks(file_path, rows_per_chunk)
+        elif suffix in ('.pptx', '.ppt'):
+            parts = self._slide_chunks(file_path)
+        elif suffix in TEXT_SUFFIXES:
+            parts = self._text_chunks(file_path, chars_per_chunk)
+        else:
+            raise ValueError(f"Unsupported file type: {suffix}")
+        
+        async for kind, text, position, metadata in self._iterate_in_thread(parts):
+            yield ExtractedChunk(index, kind, text, position, metadata)
+            index += 1
+            if cancel_event is not None and cancel_event.is_set():
+                return
+    
+    async def _iterate_in_thread(self, generator: Iterator) -> AsyncIterator:
+        """Drive a blocking generator one item per worker-thread hop"""
+        done = object()
+        try:
+            while True:
+                item = await asyncio.to_thread(next, generator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            try:
+                generator.close()
+            except ValueError:
+                pass  # cancelled while a thread is still inside next(); it ends with the thread
+    
+    @staticmethod
+    def _format_row(columns: List[str], row: Tuple) -> str:
+        return "; ".join(f"{column}: {value}" for column, value in zip(columns, row) if value is not None and value == value)
+    
+    def _excel_chunks(self, file_path: str, rows_per_chunk: int) -> Iterator[Tuple]:
+        """Row ranges per sheet, streamed with openpyxl read-only mode"""
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                columns = [str(c) if c is not None else f"column_{i + 1}" for i, c in enumerate(header)]
+                batch, first = [], None
+                for row_number, row in enumerate(rows, start=2):  # spreadsheet row numbers; header is row 1
+                    if all(value is None for value in row):
+                        continue
+                    if not batch:
+                        first = row_number
+                    batch.append(self._format_row(columns, row))
+                    last = row_number
+                    if len(batch) >= rows_per_chunk:
+                        yield 'rows', "\n".join(batch), {'sheet': sheet.title, 'rows': [first, last]}, {'columns': columns}
+                        batch = []
+                if batch:
+                    yield 'rows', "\n".join(batch), {'sheet': sheet.title, 'rows': [first, last]}, {'columns': columns}
+        finally:
+            workbook.close()
+    
+    def _legacy_excel_chunks(self, file_path: str, rows_per_chunk: int) -> Iterator[Tuple]:
+        """.xls: one sheet in memory at a time"""
+        workbook = pd.ExcelFile(file_path)
+        for sheet_name in workbook.sheet_names:
+            sheet_df = workbook.parse(sheet_name)
+            yield from self._frame_chunks(sheet_df, rows_per_chunk, {'sheet': sheet_name})
+    
+    def _csv_chunks(self, file_path: str, rows_per_chunk: int) -> Iterator[Tuple]:
+        """Row ranges read rows_per_chunk at a time"""
+        for frame in pd.read_csv(file_path, chunksize=rows_per_chunk):
+            yield from self._frame_chunks(frame, rows_per_chunk, {})
+    
+    def _frame_chunks(self, frame: "pd.DataFrame", rows_per_chunk: int, position: Dict[str, Any]) -> Iterator[Tuple]:
+        columns = [str(c) for c in frame.columns]
+        for start in range(0, len(frame), rows_per_chunk):
+            part = frame.iloc[start:start + rows_per_chunk]
+            text = "\n".join(self._format_row(columns, row) for row in part.itertuples(index=False, name=None))
+            # File row numbers: header is row 1
+            rows = [int(part.index[0]) + 2, int(part.index[-1]) + 2]
+            yield 'rows', text, {**position, 'rows': rows}, {'columns': columns}
+    
+    def _word_chunks(self, file_path: str, chars_per_chunk: int, rows_per_chunk: int) -> Iterator[Tuple]:
+        """Paragraph groups of ~chars_per_chunk, then table row ranges"""
+        doc = Document(file_path)
+        batch, size, first = [], 0, 0
+        for n, para in enumerate(doc.paragraphs):
+            text = para.text.strip()
+            if not text:
+                continue
+            if not batch:
+                first = n
+            batch.append(text)
+            size += len(text)
+            last = n
+            if size >= chars_per_chunk:
+                yield 'paragraphs', "\n\n".join(batch), {'paragraphs': [first, last]}, {}
+                batch, size = [], 0
+        if batch:
+            yield 'paragraphs', "\n\n".join(batch), {'paragraphs': [first, last]}, {}
+        
+        for t, table in enumerate(doc.tables):
+            rows = [" | ".join(cell.text.strip() for cell in row.cells) for row in table.rows]
+            for start in range(0, len(rows), rows_per_chunk):
+                end = min(start + rows_per_chunk, len(rows)) - 1
+                yield 'table', "\n".join(rows[start:end + 1]), {'table': t + 1, 'rows': [start + 1, end + 1]}, {}
+    
+    def _slide_chunks(self, file_path: str) -> Iterator[Tuple]:
+        prs = Presentation(file_path)
+        for slide_num, slide in enumerate(prs.slides):
+            text = "\n".join(shape.text for shape in slide.shapes if hasattr(shape, "text") and shape.text)
+            if text:
+                yield 'slide', text, {'slide': slide_num + 1}, {}
+    
+    def _text_chunks(self, file_path: str, chars_per_chunk: int) -> Iterator[Tuple]:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            offset = 0
+            while text := f.read(chars_per_chunk):
+                yield 'text', text, {'chars': [offset, offset + len(text) - 1]}, {}
+                offset += len(text)
+    
     async def process_image(
         self,
         file_path: str,
@@ -276,16 +662,18 @@ class EnhancedPDFProcessor:
             logger.error(f"❌ Image processing error: {e}")
             return {'success': False, 'error': str(e)}
     
-    async def _perform_ocr(self, image: Image.Image) -> str:
+    async def _perform_ocr(self, image: Union[Image.Image, np.ndarray]) -> str:
         """
         Perform OCR using best available method
+        
+        Accepts a PIL image or an (h, w, 3) array such as a raw pixmap buffer.
         """
         try:
             # Try GPU-accelerated Doctr first
             if self.use_gpu and self.ocr_predictor:
                 try:
                     # Convert PIL to numpy array
-                    img_array = np.array(image)
+                    img_array = np.asarray(image)
                     
                     # Use Doctr
                     doc = DocumentFile.from_images([img_array])
@@ -306,6 +694,9 @@ class EnhancedPDFProcessor:
             
             # Fallback to Tesseract
             try:
+                if isinstance(image, np.ndarray):
+                    image = Image.fromarray(image)
+                
                 # Preprocess image for better OCR
                 processed_image = self._preprocess_image_for_ocr(image)
                 
@@ -334,17 +725,8 @@ class EnhancedPDFProcessor:
             if image.mode != 'L':
                 image = image.convert('L')
             
-            # Convert to numpy array
-            img_array = np.array(image)
-            
-            # Apply thresholding
-            _, img_array = cv2.threshold(
-                img_array, 0, 255, 
-                cv2.THRESH_BINARY + cv2.THRESH_OTSU
-            )
-            
-            # Denoise
-            img_array = cv2.medianBlur(img_array, 3)
+            # Threshold + denoise (shared with the page workers)
+            img_array = pdf_page_worker.preprocess_for_ocr(np.array(image))
             
             # Convert back to PIL
             return Image.fromarray(img_array)
@@ -357,37 +739,11 @@ class EnhancedPDFProcessor:
         """
         Extract embedded images from PDF page
         """
-        images = []
         try:
-            image_list = page.get_images()
-            
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                pix = fitz.Pixmap(page.parent, xref)
-                
-                if pix.n - pix.alpha < 4:  # GRAY or RGB
-                    img_data = pix.tobytes("png")
-                else:  # CMYK
-                    pix = fitz.Pixmap(fitz.csRGB, pix)
-                    img_data = pix.tobytes("png")
-                
-                # Convert to base64
-                img_base64 = base64.b64encode(img_data).decode('utf-8')
-                
-                images.append({
-                    'page': page.number + 1,
-                    'index': img_index,
-                    'base64': img_base64,
-                    'width': pix.width,
-                    'height': pix.height
-                })
-                
-                pix = None  # Free memory
-                
+            return pdf_page_worker.extract_page_images(page)
         except Exception as e:
             logger.error(f"❌ Image extraction error: {e}")
-            
-        return images
+            return []
     
     async def _extract_tables_from_text(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+LEX Extraction Cache - Content-addressed cache for OCR/extraction results
+🔱 JAI MAHAKAAL! Same bytes, same processor version -> no reprocessing
+
+Keys are built from what determines the output: the content hash (whole
+file, single PDF page or decoded image), the processor name and version,
+and a digest of the options that change the result. Bump a processor's
+version to invalidate everything it produced.
+
+Values are zlib-compressed JSON in SQLite. Reads go through AsyncDatabase
+reader threads, writes and access-time touches through the shared
+BatchedWriteQueue. Total size is bounded; least recently used entries are
+evicted first.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from db_pool_manager import AsyncDatabase, get_write_queue
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    rowid INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+"""
+
+_UPSERT = """
+    INSERT INTO entries (key, kind, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, accessed_at = excluded.accessed_at
+"""
+_TOUCH = "UPDATE entries SET accessed_at = ? WHERE key = ?"
+
+_IN_CHUNK = 500  # keys per IN (...) lookup
+
+# Anchored to the install, not the working directory the server starts from
+DATA_DIR = Path(os.getenv('LEXOS_DATA_DIR', Path(__file__).resolve().parent / 'data'))
+DEFAULT_CACHE_PATH = DATA_DIR / 'cache' / 'extraction_cache.db'
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 of a file, read in chunks (run via asyncio.to_thread)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(kind: str, processor: str, version: Any, content_hash: str, **options) -> str:
+    """kind:processor@version:content_hash[:options digest]"""
+    key = f"{kind}:{processor}@{version}:{content_hash}"
+    if options:
+        blob = json.dumps(options, sort_keys=True, default=str)
+        key += ":" + hashlib.sha1(blob.encode()).hexdigest()[:12]
+    return key
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, default=str).encode('utf-8'), 6)
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class ExtractionCache:
+    """
+    🗃️ Persistent, size-bounded extraction result cache
+
+    Features:
+    - Content-addressed keys (file, page or image hash + processor version)
+    - Batched lookups for per-page reuse across revised documents
+    - LRU eviction by total compressed size
+    - Hit/miss/eviction stats
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 2 * 1024 ** 3, readers: int = 2):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._initialize()
+
+        self.reader = AsyncDatabase(db_path, readers=readers)
+        self.writes = get_write_queue(db_path)
+        self._evict_lock = asyncio.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'puts': 0,
+            'evictions': 0,
+            'bytes_evicted': 0
+        }
+
+    def _initialize(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self.total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # ---- Reads ----
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Cached values for whichever keys are present"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            rows = await self.reader.fetch_all(
+                f"SELECT key, value FROM entries WHERE key IN ({','.join('?' * len(chunk))})", tuple(chunk)
+            )
+            for key, blob in rows:
+                try:
+                    found[key] = _decode(blob)
+                except (zlib.error, ValueError):
+                    logger.warning(f"⚠️ Dropping corrupt cache entry {key}")
+
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += len(keys) - len(found)
+        if found:
+            # LRU bookkeeping; nobody waits on it
+            now = time.time()
+            try:
+                self.writes.submit(_TOUCH, [(now, key) for key in found], many=True, block=False)
+            except queue.Full:
+                pass
+        return found
+
+    # ---- Writes ----
+
+    async def put(self, key: str, kind: str, value: Any) -> None:
+        await self.put_many([(key, kind, value)])
+
+    async def put_many(self, items: List[Tuple[str, str, Any]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        items = list({key: (key, kind, value) for key, kind, value in items}.values())  # last write wins
+        rows = await asyncio.to_thread(
+            lambda: [(key, kind, blob, len(blob), now, now) for key, kind, blob in
+                     ((key, kind, _encode(value)) for key, kind, value in items)]
+        )
+        # Upserts replace rows: only the growth counts toward the size bound
+        replaced = await self._stored_size([row[0] for row in rows])
+        await self.writes.executemany(_UPSERT, rows)
+        self.stats['puts'] += len(rows)
+        self.total_bytes += sum(row[3] for row in rows) - replaced
+        if self.total_bytes > self.max_bytes:
+            await self.evict()
+
+    async def _stored_size(self, keys: List[str]) -> int:
+        """Compressed bytes currently stored under these keys"""
+        size = 0
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            row = await self.reader.fetch_one(
+                f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({','.join('?' * len(chunk))})", tuple(chunk)
+            )
+            size += row[0]
+        return size
+
+    async def evict(self, target_ratio: float = 0.9) -> int:
+        """Drop least recently used entries until under target_ratio * max_bytes"""
+        async with self._evict_lock:
+            total = (await self.reader.fetch_one("SELECT COALESCE(SUM(size), 0) FROM entries"))[0]
+            target = int(self.max_bytes * target_ratio)
+            evicted = freed = 0
+            while total - freed > target:
+                rows = await self.reader.fetch_all(
+                    "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 500"
+                )
+                if not rows:
+                    break
+                victims = []
+                for key, size in rows:
+                    if total - freed <= target:
+                        break
+                    victims.append((key,))
+                    freed += size
+                await self.writes.executemany("DELETE FROM entries WHERE key = ?", victims)
+                evicted += len(victims)
+
+            self.total_bytes = total - freed
+            self.stats['evictions'] += evicted
+            self.stats['bytes_evicted'] += freed
+            if evicted:
+                logger.info(f"🧹 Extraction cache evicted {evicted} entries ({freed / 1024 / 1024:.1f} MB)")
+            return evicted
+
+    async def clear(self) -> None:
+        await self.writes.execute("DELETE FROM entries")
+        self.total_bytes = 0
+
+    def close(self):
+        self.writes.flush()
+        self.reader.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'total_mb': self.total_bytes / 1024 / 1024,
+            'max_mb': self.max_bytes / 1024 / 1024
+        }
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Shared cache (EXTRACTION_CACHE_PATH or LEXOS_DATA_DIR/cache, EXTRACTION_CACHE_MAX_MB)"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache(
+            os.getenv('EXTRACTION_CACHE_PATH', str(DEFAULT_CACHE_PATH)),
+            max_bytes=int(os.getenv('EXTRACTION_CACHE_MAX_MB', '2048')) * 1024 * 1024
+        )
+    return _extraction_cache
@@ -376,12 +376,7 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    memory_stats = {
-        "active_users": len(memory_system.short_term["active_users"]),
-        "episodic_memories": sum(len(m) for m in memory_system.long_term["episodic"].values()),
-        "semantic_facts": len(memory_system.long_term["semantic"]),
-        "user_profiles": len(memory_system.long_term["user_profiles"])
-    }
+    memory_stats = await memory_system.get_memory_stats()
     
     return {
         "status": "LEX_AI_WITH_MEMORY_ACTIVE",
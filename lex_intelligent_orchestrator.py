@@ -14,6 +14,10 @@ from datetime import datetime
 import re
 from lex_memory import LEXMemory
 from lex_multimodal_processor import multimodal_processor
+from server.orchestrator.model_inventory import get_model_inventory
+from server.orchestrator.model_router import model_router
+from server.orchestrator.prompt_assembly import prompt_assembler, prefix_cache_metrics
+from server.orchestrator.context_window import context_window_manager
 
 @dataclass
 class ModelProfile:
@@ -45,6 +49,7 @@ class IntelligentOrchestrator:
     def __init__(self):
         self.memory = LEXMemory()
         self.ollama_host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+        self.model_inventory = get_model_inventory(self.ollama_host)
         
         # Model profiles with characteristics
         self.model_profiles = {
@@ -127,9 +132,16 @@ class IntelligentOrchestrator:
             )
         }
         
+        for profile in self.model_profiles.values():
+            context_window_manager.register_model(profile.name, profile.context_length)
+        
+        # Cap on Ollama's num_ctx; kept constant per model so Ollama never reloads between calls
+        self.max_num_ctx = int(os.getenv('OLLAMA_MAX_NUM_CTX', '8192'))
+        
         # Performance tracking
         self.model_performance = {}
         self.routing_history = []
+        self.routing_margin = 0.1  # Score band in which live latency decides
         
         # Task patterns for classification
         self.task_patterns = {
@@ -174,24 +186,19 @@ class IntelligentOrchestrator:
         print(f"📊 Managing {len(self.model_profiles)} local models")
     
     async def check_available_models(self) -> Dict[str, Any]:
-        """Check which models are actually available"""
+        """Check which models are actually available (served from the cached inventory)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.ollama_host}/api/tags") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        available = {}
-                        
-                        # Get vision models from multimodal processor
-                        from lex_multimodal_processor import multimodal_processor
-                        vision_models = multimodal_processor.vision_capable_models.keys()
-                        
-                        for model in data.get('models', []):
-                            model_name = model['name']
-                            # Include both regular models and vision models
-                            if model_name in self.model_profiles or model_name in vision_models:
-                                available[model_name] = model
-                        return available
+            models = await self.model_inventory.get_models()
+            available = {}
+            
+            # Get vision models from multimodal processor
+            vision_models = multimodal_processor.vision_capable_models.keys()
+            
+            for model_name, model in models.items():
+                # Include both regular models and vision models
+                if model_name in self.model_profiles or model_name in vision_models:
+                    available[model_name] = model
+            return available
         except Exception as e:
             print(f"❌ Error checking models: {e}")
             return {}
@@ -369,8 +376,19 @@ class IntelligentOrchestrator:
             
             model_scores[model_name] = min(1.0, score)
         
-        # Select best model
-        best_model = max(model_scores.items(), key=lambda x: x[1])
+        if not model_scores:
+            return "none", 0.0
+        
+        # Among models that fit the task about equally well, take the one
+        # expected to finish first given live latency and outstanding load
+        top_score = max(model_scores.values())
+        shortlist = [m for m, score in model_scores.items() if score >= top_score - self.routing_margin]
+        priors = {
+            m: 1.0 / max(self.model_profiles[m].speed_score, 0.05)
+            for m in shortlist
+        }
+        selected = model_router.select(shortlist, expected_tokens=task.estimated_tokens, priors=priors)
+        best_model = (selected, model_scores[selected])
         
         # Log the selection reasoning
         print(f"\n🎯 Model Selection for '{task.task_type}' (complexity: {task.complexity:.2f}):")
@@ -382,6 +400,7 @@ class IntelligentOrchestrator:
     
     async def generate_with_model(self, model: str, prompt: str, system_prompt: str, task: TaskAnalysis) -> Optional[str]:
         """Generate response with specific model"""
+        model_router.request_started(model)
         try:
             # Adjust parameters based on task
             temperature = 0.7
@@ -396,13 +415,27 @@ class IntelligentOrchestrator:
             else:
                 max_tokens = min(2000, task.estimated_tokens * 2)
             
+            # Fit system prompt + user input (incl. attached document text) into the window
+            num_ctx = min(context_window_manager.context_window_for(model, self.max_num_ctx), self.max_num_ctx)
+            max_tokens = min(max_tokens, num_ctx // 2)
+            packed = context_window_manager.pack(
+                system_prompt=system_prompt,
+                user_message=prompt,
+                context_window=num_ctx,
+                reserve_output=max_tokens
+            )
+            if packed.truncated:
+                print(f"✂️ Prompt truncated to fit {num_ctx}-token context ({', '.join(packed.truncated)})")
+            prompt = packed.user_message
+            
             payload = {
                 "model": model,
-                "prompt": f"{system_prompt}\n\nUser: {prompt}\n\nAssistant:",
+                "prompt": prompt_assembler.build_prompt(system_prompt, prompt),
                 "stream": False,
                 "options": {
                     "temperature": temperature,
                     "num_predict": max_tokens,
+                    "num_ctx": num_ctx,
                     "top_p": 0.9 if task.requires_creativity else 0.95,
                     "repeat_penalty": 1.1
                 }
@@ -419,6 +452,7 @@ class IntelligentOrchestrator:
                     if response.status == 200:
                         data = await response.json()
                         elapsed = time.time() - start_time
+                        prefix_cache_metrics.record_ollama(model, data, system_prompt)
                         
                         response_text = data.get('response', '').strip()
                         
@@ -482,7 +516,12 @@ class IntelligentOrchestrator:
             return None
     
     def _track_performance(self, model: str, success: bool, time_taken: float, tokens: int):
-        """Track model performance for adaptive routing"""
+        """Track model performance for adaptive routing (closes the in-flight slot opened by the caller)"""
+        model_router.request_finished(model)
+        model_router.record(model, time_taken or None, success, tokens)
+        if not success:
+            self.model_inventory.mark_stale()
+        
         if model not in self.model_performance:
             self.model_performance[model] = {
                 "attempts": 0,
@@ -505,6 +544,7 @@ class IntelligentOrchestrator:
     
     async def generate_with_vision_model(self, model: str, prompt: str, image_data: Dict, system_prompt: str, task: TaskAnalysis) -> Optional[str]:
         """Generate response with vision model including image"""
+        model_router.request_started(model)
         try:
             # For vision models, we need to include the image in a special format
             # Ollama vision models expect base64 images
@@ -530,6 +570,7 @@ class IntelligentOrchestrator:
                 ) as response:
                     if response.status == 200:
                         data = await response.json()
+                        prefix_cache_metrics.record_ollama(model, data, system_prompt)
                         
                         # Track performance
                         elapsed = time.time() - start_time
@@ -769,6 +810,7 @@ For best results with PDF summaries, please ensure:
         """Get performance statistics"""
         stats = {
             "model_performance": self.model_performance,
+            "prefix_cache": prefix_cache_metrics.get_stats(),
             "routing_history": self.routing_history[-100:],  # Last 100 decisions
             "task_distribution": {},
             "model_usage": {}
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+LEX Knowledge Graph - Incrementally maintained concept graph for LEXMemorySystem
+🔱 JAI MAHAKAAL! Each memory touches only its own postings
+
+Nodes are keywords (kw:), entities (entity:) and topics (topic:). Each new
+memory updates only the nodes it mentions:
+- postings: node -> most recent memory ids (bounded)
+- adjacency: node -> {neighbor: co-occurrence weight} (bounded fan-out;
+  the weakest neighbor is dropped when full)
+- transitions: per-user topic -> next topic counts
+
+Persistence is an append-only log with one compact line per memory,
+periodically folded into a snapshot. Replaying the log applies the same
+bounded updates, so load reproduces the live graph.
+
+Compaction is two-phase so the file work can leave the event loop:
+begin_compaction() copies the state and rotates the log to
+edges.log.<generation> on the thread that mutates the graph, then
+write_snapshot() persists the copy (any thread) and deletes rotated logs
+the snapshot covers. Load replays rotated logs newer than the snapshot.
+"""
+import json
+import os
+import re
+from collections import deque, OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+_WORD = re.compile(r"[^\w]+")
+_CAPITALIZED = re.compile(r"\b[A-Z][a-z]{2,}\b")
+
+
+def _normalize(word: str) -> str:
+    return _WORD.sub("", word.lower())
+
+
+def _entities(text: str) -> List[str]:
+    """Capitalized words that do not start a sentence (names, places, products)"""
+    found = []
+    for match in _CAPITALIZED.finditer(text):
+        before = text[:match.start()].rstrip()
+        if before and before[-1] not in ".!?":
+            found.append(match.group().lower())
+    return found
+
+
+class KnowledgeGraph:
+    """
+    🕸️ Bounded co-occurrence graph over memory concepts
+
+    Features:
+    - O(k²) insert for a memory with k concepts, independent of graph size
+    - Bounded adjacency lists and postings
+    - Neighborhood (weighted BFS) and shortest-path queries
+    - Append-only log + snapshot persistence
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_degree: int = 32,
+        max_postings: int = 50,
+        max_concepts_per_memory: int = 12,
+        compact_after: int = 5000
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.directory / "edges.log"
+        self.snapshot_path = self.directory / "snapshot.json"
+
+        self.max_degree = max_degree
+        self.max_postings = max_postings
+        self.max_concepts_per_memory = max_concepts_per_memory
+        self.compact_after = compact_after
+
+        self.adjacency: Dict[str, Dict[str, float]] = {}
+        self.postings: Dict[str, deque] = {}
+        self.transitions: Dict[str, int] = {}
+        self._last_topic: Dict[str, str] = {}
+        self._log_lines = 0
+        self._log = None
+        self._generation = 0
+        self._compacting = False
+
+        self._load()
+
+    # ---- Updates ----
+
+    def concepts_for(self, memory: Dict) -> List[str]:
+        """Nodes a memory touches: its topic, entities, then keywords"""
+        nodes = OrderedDict()
+        if memory.get("topic"):
+            nodes[f"topic:{memory['topic']}"] = None
+        for entity in _entities(memory.get("message", "")):
+            nodes[f"entity:{entity}"] = None
+        for keyword in memory.get("keywords") or []:
+            word = _normalize(keyword)
+            if len(word) > 3:
+                nodes[f"kw:{word}"] = None
+        return list(nodes)[:self.max_concepts_per_memory]
+
+    def add_memory(self, memory: Dict) -> List[str]:
+        """Index one memory; returns the nodes it touched"""
+        nodes = self.concepts_for(memory)
+        record = [memory["id"], memory.get("user_id", ""), memory.get("topic") or "", nodes]
+        self._apply(*record)
+        self._append(record)
+        return nodes
+
+    def _apply(self, memory_id: str, user_id: str, topic: str, nodes: List[str]):
+        for node in nodes:
+            postings = self.postings.get(node)
+            if postings is None:
+                postings = self.postings[node] = deque(maxlen=self.max_postings)
+            postings.append(memory_id)
+
+        for i, a in enumerate(nodes):
+            for b in nodes[i + 1:]:
+                self._bump(a, b)
+                self._bump(b, a)
+
+        if topic:
+            previous = self._last_topic.get(user_id)
+            if previous is not None:
+                edge_key = f"{previous}->{topic}"
+                self.transitions[edge_key] = self.transitions.get(edge_key, 0) + 1
+            self._last_topic[user_id] = topic
+
+    def _bump(self, node: str, neighbor: str):
+        edges = self.adjacency.get(node)
+        if edges is None:
+            edges = self.adjacency[node] = {}
+        if neighbor in edges:
+            edges[neighbor] += 1
+            return
+        if len(edges) >= self.max_degree:
+            # Bounded fan-out: replace the weakest (oldest on ties) neighbor,
+            # dropping both directions so adjacency stays symmetric
+            weakest = min(edges, key=edges.get)
+            del edges[weakest]
+            self.adjacency.get(weakest, {}).pop(node, None)
+        edges[neighbor] = 1.0
+
+    # ---- Queries ----
+
+    def resolve(self, term: str) -> Optional[str]:
+        """Map a raw term ('python', 'Ravi', 'topic:technical') to a node id"""
+        if term in self.adjacency or term in self.postings:
+            return term
+        word = _normalize(term)
+        for node in (f"kw:{word}", f"entity:{word}", f"topic:{word}"):
+            if node in self.adjacency or node in self.postings:
+                return node
+        return None
+
+    def neighbors(self, term: str, limit: int = 10, depth: int = 1) -> List[Dict[str, Any]]:
+        """Strongest concepts within `depth` hops; weight decays per hop"""
+        start = self.resolve(term)
+        if start is None:
+            return []
+        scores: Dict[str, float] = {}
+        hops: Dict[str, int] = {start: 0}
+        frontier = [(start, 1.0)]
+        for hop in range(1, depth + 1):
+            next_frontier = []
+            for node, carried in frontier:
+                edges = self.adjacency.get(node, {})
+                for neighbor, weight in sorted(edges.items(), key=lambda e: e[1], reverse=True)[:limit]:
+                    if neighbor == start:
+                        continue
+                    score = carried * weight / hop
+                    scores[neighbor] = scores.get(neighbor, 0.0) + score
+                    if neighbor not in hops:
+                        hops[neighbor] = hop
+                        next_frontier.append((neighbor, score))
+            frontier = next_frontier
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{"node": node, "score": score, "hops": hops[node]} for node, score in ranked]
+
+    def shortest_path(self, source: str, target: str, max_depth: int = 4) -> Optional[List[str]]:
+        """Bidirectional BFS between two concepts; None if not connected within max_depth"""
+        a, b = self.resolve(source), self.resolve(target)
+        if a is None or b is None:
+            return None
+        if a == b:
+            return [a]
+        parents: Dict[str, Optional[str]] = {a: None}
+        children: Dict[str, Optional[str]] = {b: None}
+        forward, backward = [a], [b]
+        for _ in range(max_depth):
+            # Expand the smaller frontier
+            if len(forward) <= len(backward):
+                forward, meeting = self._expand(forward, parents, children)
+            else:
+                backward, meeting = self._expand(backward, children, parents)
+            if meeting is not None:
+                return self._join(meeting, parents, children)
+            if not forward or not backward:
+                return None
+        return None
+
+    def _expand(self, frontier: List[str], seen: Dict[str, Optional[str]], other: Dict[str, Optional[str]]):
+        next_level = []
+        for node in frontier:
+            for neighbor in self.adjacency.get(node, {}):
+                if neighbor in seen:
+                    continue
+                seen[neighbor] = node
+                if neighbor in other:
+                    return next_level, neighbor
+                next_level.append(neighbor)
+        return next_level, None
+
+    @staticmethod
+    def _join(meeting: str, parents: Dict[str, Optional[str]], children: Dict[str, Optional[str]]) -> List[str]:
+        head, node = [], meeting
+        while node is not None:
+            head.append(node)
+            node = parents[node]
+        tail, node = [], children[meeting]
+        while node is not None:
+            tail.append(node)
+            node = children[node]
+        return head[::-1] + tail
+
+    def memories_for(self, term: str, limit: int = 10) -> List[str]:
+        """Most recent memory ids mentioning a concept"""
+        node = self.resolve(term)
+        if node is None:
+            return []
+        return list(self.postings.get(node, ()))[-limit:][::-1]
+
+    # ---- Persistence ----
+
+    def _append(self, record: List[Any]):
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log.flush()
+        self._log_lines += 1
+
+    def _rotated_logs(self) -> List[tuple]:
+        """(generation, path) of logs rotated out by begin_compaction, oldest first"""
+        rotated = []
+        for path in self.directory.glob(f"{self.log_path.name}.*"):
+            suffix = path.name.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                rotated.append((int(suffix), path))
+        return sorted(rotated)
+
+    def _replay(self, path: Path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(*json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # torn last line after a crash
+                self._log_lines += 1
+
+    def _load(self):
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.adjacency = snapshot.get("adjacency", {})
+            self.postings = {
+                node: deque(ids, maxlen=self.max_postings) for node, ids in snapshot.get("postings", {}).items()
+            }
+            self.transitions = snapshot.get("transitions", {})
+            self._last_topic = snapshot.get("last_topic", {})
+            self._generation = snapshot.get("generation", 0)
+        # Rotated logs the snapshot did not get to (crash mid-compaction), then the live log
+        for generation, path in self._rotated_logs():
+            if generation > self._generation:
+                self._replay(path)
+                self._generation = generation
+            else:
+                path.unlink(missing_ok=True)
+        if self.log_path.exists():
+            self._replay(self.log_path)
+
+    def import_transitions(self, transitions: Dict[str, int]):
+        """Seed topic transition counts (legacy knowledge_graph.json) and snapshot them"""
+        for edge_key, count in transitions.items():
+            self.transitions[edge_key] = self.transitions.get(edge_key, 0) + int(count)
+        self.compact()
+
+    def due_for_compaction(self) -> bool:
+        return self._log_lines >= self.compact_after and not self._compacting
+
+    def maybe_compact(self) -> bool:
+        if self.due_for_compaction():
+            self.compact()
+            return True
+        return False
+
+    def compact(self):
+        """Fold the log into a snapshot synchronously"""
+        job = self.begin_compaction()
+        if job is not None:
+            self.write_snapshot(job)
+
+    def begin_compaction(self) -> Optional[Dict[str, Any]]:
+        """
+        Copy the graph and rotate the log; call it where add_memory runs
+
+        Memories added afterwards go to a fresh log. Returns None while
+        another compaction is still being written.
+        """
+        if self._compacting:
+            return None
+        self._compacting = True
+        self._generation += 1
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self.log_path.exists():
+            os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.{self._generation}"))
+        self._log_lines = 0
+        return {
+            "generation": self._generation,
+            "adjacency": {node: dict(edges) for node, edges in self.adjacency.items()},
+            "postings": {node: list(ids) for node, ids in self.postings.items()},
+            "transitions": dict(self.transitions),
+            "last_topic": dict(self._last_topic)
+        }
+
+    def write_snapshot(self, job: Dict[str, Any]):
+        """Persist a begin_compaction() copy (atomic replace); safe in a worker thread"""
+        try:
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job, f, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+            for generation, path in self._rotated_logs():
+                if generation <= job["generation"]:
+                    path.unlink(missing_ok=True)
+        finally:
+            self._compacting = False
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self.adjacency),
+            "edges": sum(len(edges) for edges in self.adjacency.values()) // 2,
+            "posting_lists": len(self.postings),
+            "topic_transitions": len(self.transitions),
+            "log_lines": self._log_lines,
+            "max_degree": self.max_degree
+        }
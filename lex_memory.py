@@ -11,11 +11,26 @@ from pathlib import Path
 import hashlib
 from typing import Dict, List, Any, Optional
 
+from lex_memory_store import get_memory_store
+
+MEMORY_OWNER = "lex_memory"
+
+# Legacy JSON file -> store document kind
+JSON_DOCUMENTS = {
+    "long_term.json": "long_term",
+    "user_profiles.json": "lex_profile",
+    "patterns.json": "pattern",
+    "capabilities.json": "capabilities"
+}
+
 class LEXMemory:
     def __init__(self, memory_dir: str = "lex_memory"):
         self.memory_dir = Path(memory_dir)
         self.memory_dir.mkdir(exist_ok=True)
         
+        # Indexed SQLite store; the JSON files are an import/export format
+        self.store = get_memory_store(str(self.memory_dir))
+        
         # Memory components
         self.short_term = {}  # Current session memory
         self.long_term = {}   # Persistent knowledge
@@ -30,30 +45,13 @@ class LEXMemory:
     async def load_memories(self):
         """Load all memories from disk"""
         try:
-            # Load long-term memory
-            long_term_path = self.memory_dir / "long_term.json"
-            if long_term_path.exists():
-                async with aiofiles.open(long_term_path, 'r') as f:
-                    self.long_term = json.loads(await f.read())
+            await asyncio.to_thread(self._migrate_json)
             
-            # Load user profiles
-            profiles_path = self.memory_dir / "user_profiles.json"
-            if profiles_path.exists():
-                async with aiofiles.open(profiles_path, 'r') as f:
-                    self.user_profiles = json.loads(await f.read())
-            
-            # Load learned patterns
-            patterns_path = self.memory_dir / "patterns.json"
-            if patterns_path.exists():
-                async with aiofiles.open(patterns_path, 'r') as f:
-                    self.learned_patterns = json.loads(await f.read())
-            
-            # Load capabilities
-            capabilities_path = self.memory_dir / "capabilities.json"
-            if capabilities_path.exists():
-                async with aiofiles.open(capabilities_path, 'r') as f:
-                    self.capabilities_map = json.loads(await f.read())
-            else:
+            self.long_term = await self.store.get_documents("long_term")
+            self.user_profiles = await self.store.get_documents("lex_profile")
+            self.learned_patterns = await self.store.get_documents("pattern")
+            self.capabilities_map = await self.store.get_documents("capabilities")
+            if not self.capabilities_map:
                 # Initialize default capabilities
                 self.capabilities_map = {
                     "core_abilities": [
@@ -85,28 +83,49 @@ class LEXMemory:
         except Exception as e:
             print(f"Error loading memories: {e}")
     
+    def _migrate_json(self):
+        """One-time import of the legacy JSON files"""
+        for name, kind in JSON_DOCUMENTS.items():
+            self.store.migrate_json(
+                self.memory_dir / name, MEMORY_OWNER,
+                lambda conn, data, kind=kind: self.store.import_documents(conn, kind, self._own_documents(kind, data))
+            )
+    
+    @staticmethod
+    def _own_documents(kind: str, data: Dict) -> Dict:
+        # lex_memory_system.LEXMemorySystem keeps a differently shaped user_profiles.json in the same directory
+        if kind == "lex_profile":
+            return {k: v for k, v in data.items() if isinstance(v, dict) and "interactions" in v}
+        return data
+    
     async def save_memories(self):
-        """Save all memories to disk"""
+        """Upsert all memories into the store (one batched commit, no file rewrites)"""
         try:
-            # Save long-term memory
-            async with aiofiles.open(self.memory_dir / "long_term.json", 'w') as f:
-                await f.write(json.dumps(self.long_term, indent=2))
-            
-            # Save user profiles
-            async with aiofiles.open(self.memory_dir / "user_profiles.json", 'w') as f:
-                await f.write(json.dumps(self.user_profiles, indent=2))
-            
-            # Save patterns
-            async with aiofiles.open(self.memory_dir / "patterns.json", 'w') as f:
-                await f.write(json.dumps(self.learned_patterns, indent=2))
-                
+            await asyncio.gather(
+                self.store.put_documents("long_term", self.long_term),
+                self.store.put_documents("lex_profile", self.user_profiles),
+                self.store.put_documents("pattern", self.learned_patterns)
+            )
         except Exception as e:
             print(f"Error saving memories: {e}")
     
     async def save_capabilities(self):
         """Save capabilities map"""
-        async with aiofiles.open(self.memory_dir / "capabilities.json", 'w') as f:
-            await f.write(json.dumps(self.capabilities_map, indent=2))
+        await self.store.put_documents("capabilities", self.capabilities_map)
+    
+    async def export_json(self, directory: Optional[str] = None):
+        """Write memories in the legacy JSON layout"""
+        target = Path(directory) if directory else self.memory_dir
+        target.mkdir(parents=True, exist_ok=True)
+        documents = {
+            "long_term.json": self.long_term,
+            "user_profiles.json": self.user_profiles,
+            "patterns.json": self.learned_patterns,
+            "capabilities.json": self.capabilities_map
+        }
+        for name, data in documents.items():
+            async with aiofiles.open(target / name, 'w') as f:
+                await f.write(json.dumps(data, indent=2))
     
     def get_user_id(self, context: Dict) -> str:
         """Generate consistent user ID from context"""
@@ -143,25 +162,38 @@ class LEXMemory:
             profile["topics"][topic] = profile["topics"].get(topic, 0) + 1
         
         # Add to conversation history
-        self.conversation_history.append({
+        entry = {
             "timestamp": datetime.now().isoformat(),
             "user_id": user_id,
             "input": user_input,
             "response": response,
             "confidence": metadata.get("confidence", 0),
             "model_used": metadata.get("model", "unknown")
-        })
+        }
+        self.conversation_history.append(entry)
         
         # Keep only recent history (last 100 interactions)
         if len(self.conversation_history) > 100:
             self.conversation_history = self.conversation_history[-100:]
         
         # Learn patterns
-        await self._learn_patterns(user_input, response, metadata)
+        input_type = await self._learn_patterns(user_input, response, metadata)
         
-        # Save periodically
-        if profile["interactions"] % 10 == 0:
-            await self.save_memories()
+        # Persist only what changed: one appended episode plus the touched documents
+        writes = [
+            self.store.add_episode(MEMORY_OWNER, {
+                "id": hashlib.md5(f"{user_id}{entry['timestamp']}{user_input}".encode()).hexdigest()[:16],
+                "message": user_input,
+                "importance": entry["confidence"],
+                "topic": topics[0] if topics else None,
+                "keywords": topics,
+                **entry
+            }),
+            self.store.put_document("lex_profile", user_id, profile)
+        ]
+        if input_type:
+            writes.append(self.store.put_document("pattern", input_type, self.learned_patterns[input_type]))
+        await asyncio.gather(*writes)
     
     def _extract_topics(self, text: str) -> List[str]:
         """Extract topics from text (simplified version)"""
@@ -183,8 +215,8 @@ class LEXMemory:
         
         return topics
     
-    async def _learn_patterns(self, user_input: str, response: str, metadata: Dict):
-        """Learn from successful interactions"""
+    async def _learn_patterns(self, user_input: str, response: str, metadata: Dict) -> Optional[str]:
+        """Learn from successful interactions; returns the pattern type updated, if any"""
         if metadata.get("confidence", 0) > 0.8:
             # This was a good response, learn from it
             input_type = self._classify_input(user_input)
@@ -202,6 +234,8 @@ class LEXMemory:
             # Keep only recent patterns
             if len(self.learned_patterns[input_type]) > 20:
                 self.learned_patterns[input_type] = self.learned_patterns[input_type][-20:]
+            return input_type
+        return None
     
     def _classify_input(self, text: str) -> str:
         """Classify the type of input"""
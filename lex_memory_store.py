@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+LEX Memory Store - Indexed SQLite storage for LEXMemory and LEXMemorySystem
+🔱 JAI MAHAKAAL! Appends instead of rewrites, indexes instead of scans
+
+- Episodes: one row per interaction, B-tree indexes on (user, time) and
+  (user, importance), FTS5 index over message/response/keywords
+- Semantic facts: one row per fact, FTS5 over subject/predicate
+- Documents: small keyed JSON blobs (profiles, patterns, capabilities)
+
+Reads go through AsyncDatabase reader threads, writes through the shared
+BatchedWriteQueue, so concurrent stores coalesce into one commit. The
+legacy JSON files remain an import (one-time migration) and export path.
+"""
+import json
+import logging
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+from db_pool_manager import AsyncDatabase, get_write_queue
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS episodes (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    owner TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    importance REAL NOT NULL DEFAULT 0,
+    topic TEXT,
+    emotion TEXT,
+    message TEXT NOT NULL DEFAULT '',
+    response TEXT NOT NULL DEFAULT '',
+    keywords TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_user_time ON episodes(owner, user_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_episodes_user_importance ON episodes(owner, user_id, importance DESC, timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS facts (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL DEFAULT '',
+    predicate TEXT NOT NULL DEFAULT '',
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS episodes_fts USING fts5(
+    message, response, keywords,
+    content='episodes', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS episodes_ai AFTER INSERT ON episodes BEGIN
+    INSERT INTO episodes_fts(rowid, message, response, keywords)
+    VALUES (new.rowid, new.message, new.response, new.keywords);
+END;
+CREATE TRIGGER IF NOT EXISTS episodes_ad AFTER DELETE ON episodes BEGIN
+    INSERT INTO episodes_fts(episodes_fts, rowid, message, response, keywords)
+    VALUES ('delete', old.rowid, old.message, old.response, old.keywords);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(
+    subject, predicate,
+    content='facts', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS facts_ai AFTER INSERT ON facts BEGIN
+    INSERT INTO facts_fts(rowid, subject, predicate) VALUES (new.rowid, new.subject, new.predicate);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_ad AFTER DELETE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, subject, predicate)
+    VALUES ('delete', old.rowid, old.subject, old.predicate);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_au AFTER UPDATE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, subject, predicate)
+    VALUES ('delete', old.rowid, old.subject, old.predicate);
+    INSERT INTO facts_fts(rowid, subject, predicate) VALUES (new.rowid, new.subject, new.predicate);
+END;
+"""
+
+_INSERT_EPISODE = """
+    INSERT INTO episodes (id, owner, user_id, timestamp, importance, topic, emotion, message, response, keywords, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO NOTHING
+"""
+_UPSERT_FACT = """
+    INSERT INTO facts (id, subject, predicate, timestamp, data) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET subject = excluded.subject, predicate = excluded.predicate,
+        timestamp = excluded.timestamp, data = excluded.data
+"""
+_UPSERT_DOCUMENT = """
+    INSERT INTO documents (kind, key, value, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(kind, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+"""
+
+
+def _with_relevance(hits: List[Dict]) -> List[Dict]:
+    """
+    Add a 0..1 `relevance` (higher is better) to best-first hits
+
+    bm25 magnitudes depend on each table's size and term statistics, so
+    hits are scaled against the best hit of their own table before
+    episodes and facts are ranked together. Unscored (LIKE) hits use rank.
+    """
+    best = hits[0]["score"] if hits else 0.0
+    for rank, hit in enumerate(hits):
+        hit["relevance"] = hit["score"] / best if best < 0 else 1.0 - rank / len(hits)
+    return hits
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """Free text -> FTS5 query: any term (prefix match), ranked by bm25"""
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"*' for term in dict.fromkeys(terms))
+
+
+class SQLiteMemoryStore:
+    """
+    🗄️ SQLite-backed memory store
+
+    Features:
+    - Incremental appends (no whole-file rewrites)
+    - Indexed top-K by recency or importance per user
+    - Ranked full-text search (FTS5 bm25, LIKE fallback without FTS5)
+    - One-time migration from the legacy JSON files, JSON export
+    """
+
+    def __init__(self, db_path: str, readers: int = 2):
+        self.db_path = db_path
+        self.fts_available = False
+        self._initialize()
+
+        self.reader = AsyncDatabase(db_path, readers=readers)
+        self.writes = get_write_queue(db_path)
+
+    def _initialize(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts_available = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ FTS5 unavailable, memory search falls back to LIKE: {e}")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+            )
+
+    # ---- Migration / export ----
+
+    def migrate_json(
+        self,
+        path: Path,
+        owner: str,
+        importer: Callable[[sqlite3.Connection, Any], int]
+    ) -> int:
+        """Import a legacy JSON file once; later calls are no-ops. Returns rows imported."""
+        path = Path(path)
+        marker = f"migrated:{owner}:{path.name}"
+        if not path.exists():
+            return 0
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                return 0
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Skipping unreadable memory file {path}: {e}")
+                data = None
+            count = importer(conn, data) if data else 0
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (marker, str(count)))
+        if count:
+            logger.info(f"✅ Migrated {count} records from {path}")
+        return count
+
+    @staticmethod
+    def episode_row(owner: str, episode: Dict) -> tuple:
+        keywords = episode.get("keywords") or []
+        return (
+            episode["id"],
+            owner,
+            str(episode.get("user_id", "")),
+            episode.get("timestamp", ""),
+            float(episode.get("importance", 0) or 0),
+            episode.get("topic"),
+            episode.get("emotion"),
+            episode.get("message", "") or "",
+            episode.get("response", "") or "",
+            " ".join(keywords) if isinstance(keywords, list) else str(keywords),
+            json.dumps(episode)
+        )
+
+    @staticmethod
+    def fact_row(fact_id: str, fact: Dict) -> tuple:
+        return (
+            fact_id,
+            fact.get("subject", "") or "",
+            fact.get("predicate", "") or "",
+            fact.get("timestamp"),
+            json.dumps(fact)
+        )
+
+    def import_episodes(self, conn: sqlite3.Connection, owner: str, episodes: Iterable[Dict]) -> int:
+        rows = [self.episode_row(owner, episode) for episode in episodes if episode.get("id")]
+        conn.executemany(_INSERT_EPISODE, rows)
+        return len(rows)
+
+    def import_facts(self, conn: sqlite3.Connection, facts: Dict[str, Dict]) -> int:
+        conn.executemany(_UPSERT_FACT, [self.fact_row(fact_id, fact) for fact_id, fact in facts.items()])
+        return len(facts)
+
+    def import_documents(self, conn: sqlite3.Connection, kind: str, documents: Dict[str, Any]) -> int:
+        conn.executemany(_UPSERT_DOCUMENT, [(kind, key, json.dumps(value)) for key, value in documents.items()])
+        return len(documents)
+
+    async def export_episodes(self, owner: str) -> Dict[str, List[Dict]]:
+        """Episodes in the legacy {user_id: [episode, ...]} layout, oldest first"""
+        rows = await self.reader.fetch_all(
+            "SELECT user_id, data FROM episodes WHERE owner = ? ORDER BY user_id, timestamp", (owner,)
+        )
+        exported: Dict[str, List[Dict]] = {}
+        for user_id, data in rows:
+            exported.setdefault(user_id, []).append(json.loads(data))
+        return exported
+
+    async def export_facts(self) -> Dict[str, Dict]:
+        rows = await self.reader.fetch_all("SELECT id, data FROM facts ORDER BY rowid")
+        return {fact_id: json.loads(data) for fact_id, data in rows}
+
+    # ---- Writes ----
+
+    async def add_episode(self, owner: str, episode: Dict) -> None:
+        await self.writes.execute(_INSERT_EPISODE, self.episode_row(owner, episode))
+
+    async def add_episodes(self, owner: str, episodes: List[Dict]) -> None:
+        if episodes:
+            await self.writes.executemany(_INSERT_EPISODE, [self.episode_row(owner, e) for e in episodes])
+
+    async def put_fact(self, fact_id: str, fact: Dict) -> None:
+        await self.writes.execute(_UPSERT_FACT, self.fact_row(fact_id, fact))
+
+    async def put_document(self, kind: str, key: str, value: Any) -> None:
+        await self.writes.execute(_UPSERT_DOCUMENT, (kind, key, json.dumps(value)))
+
+    async def put_documents(self, kind: str, documents: Dict[str, Any]) -> None:
+        if documents:
+            await self.writes.executemany(
+                _UPSERT_DOCUMENT, [(kind, key, json.dumps(value)) for key, value in documents.items()]
+            )
+
+    # ---- Reads ----
+
+    async def get_document(self, kind: str, key: str) -> Optional[Any]:
+        row = await self.reader.fetch_one("SELECT value FROM documents WHERE kind = ? AND key = ?", (kind, key))
+        return json.loads(row[0]) if row else None
+
+    async def get_documents(self, kind: str) -> Dict[str, Any]:
+        rows = await self.reader.fetch_all("SELECT key, value FROM documents WHERE kind = ?", (kind,))
+        return {key: json.loads(value) for key, value in rows}
+
+    def load_documents(self, kind: str) -> Dict[str, Any]:
+        """Synchronous variant for constructors"""
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute("SELECT key, value FROM documents WHERE kind = ?", (kind,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    async def top_episodes(
+        self,
+        owner: str,
+        user_id: str,
+        limit: int = 5,
+        order_by: str = "recency",
+        min_importance: Optional[float] = None
+    ) -> List[Dict]:
+        """Top-K episodes for a user by recency or importance (index range scan)"""
+        order = "importance DESC, timestamp DESC" if order_by == "importance" else "timestamp DESC"
+        where, params = "owner = ? AND user_id = ?", [owner, user_id]
+        if min_importance is not None:
+            where += " AND importance >= ?"
+            params.append(min_importance)
+        rows = await self.reader.fetch_all(
+            f"SELECT data FROM episodes WHERE {where} ORDER BY {order} LIMIT ?", (*params, limit)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    async def search_episodes(self, owner: str, query: str, user_id: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """Ranked full-text search; hits carry their bm25 score (lower is better) and relevance"""
+        user_filter, params = ("AND e.user_id = ?", [user_id]) if user_id else ("", [])
+        if self.fts_available:
+            match = _fts_query(query)
+            if match is None:
+                return []
+            rows = await self.reader.fetch_all(f"""
+                SELECT e.user_id, e.data, bm25(episodes_fts) AS score
+                FROM episodes_fts JOIN episodes e ON e.rowid = episodes_fts.rowid
+                WHERE episodes_fts MATCH ? AND e.owner = ? {user_filter}
+                ORDER BY score LIMIT ?
+            """, (match, owner, *params, limit))
+        else:
+            pattern = f"%{query.lower()}%"
+            rows = await self.reader.fetch_all(f"""
+                SELECT e.user_id, e.data, 0.0 AS score FROM episodes e
+                WHERE e.owner = ? {user_filter}
+                  AND (lower(e.message) LIKE ? OR lower(e.response) LIKE ? OR lower(e.keywords) LIKE ?)
+                ORDER BY e.importance DESC, e.timestamp DESC LIMIT ?
+            """, (owner, *params, pattern, pattern, pattern, limit))
+        return _with_relevance([{"user_id": uid, "memory": json.loads(data), "score": score} for uid, data, score in rows])
+
+    async def search_facts(self, query: str, limit: int = 10) -> List[Dict]:
+        if self.fts_available:
+            match = _fts_query(query)
+            if match is None:
+                return []
+            rows = await self.reader.fetch_all("""
+                SELECT f.data, bm25(facts_fts) AS score
+                FROM facts_fts JOIN facts f ON f.rowid = facts_fts.rowid
+                WHERE facts_fts MATCH ? ORDER BY score LIMIT ?
+            """, (match, limit))
+        else:
+            pattern = f"%{query.lower()}%"
+            rows = await self.reader.fetch_all("""
+                SELECT data, 0.0 FROM facts WHERE lower(subject) LIKE ? OR lower(predicate) LIKE ?
+                ORDER BY timestamp DESC LIMIT ?
+            """, (pattern, pattern, limit))
+        return _with_relevance([{"memory": json.loads(data), "score": score} for data, score in rows])
+
+    async def counts(self, owner: str) -> Dict[str, int]:
+        episodes = await self.reader.fetch_one("SELECT COUNT(*) FROM episodes WHERE owner = ?", (owner,))
+        facts = await self.reader.fetch_one("SELECT COUNT(*) FROM facts")
+        return {"episodes": episodes[0], "facts": facts[0]}
+
+    def close(self):
+        self.reader.close()
+
+
+_stores: Dict[str, SQLiteMemoryStore] = {}
+
+
+def get_memory_store(memory_dir: str) -> SQLiteMemoryStore:
+    """Shared store for a memory directory (LEXMemory and LEXMemorySystem may share one)"""
+    db_path = str((Path(memory_dir) / "memory.db").resolve())
+    store = _stores.get(db_path)
+    if store is None:
+        store = _stores[db_path] = SQLiteMemoryStore(db_path)
+    return store
@@ -14,6 +14,11 @@ import asyncio
 import aiofiles
 from pathlib import Path
 
+from lex_knowledge_graph import KnowledgeGraph
+from lex_memory_store import SQLiteMemoryStore, get_memory_store
+
+MEMORY_OWNER = "memory_system"
+
 class LEXMemorySystem:
     """
     Advanced memory system for LEX consciousness
@@ -21,11 +26,16 @@ class LEXMemorySystem:
     - Long-term memory: Persistent knowledge base
     - Episodic memory: Specific interactions and events
     - Semantic memory: General knowledge and facts
+    
+    Episodic/semantic memories and profiles live in an indexed SQLite store
+    (memory.db); the legacy JSON files are migrated once and can be
+    regenerated with export_json().
     """
     
-    def __init__(self, memory_dir: str = "./lex_memory"):
+    def __init__(self, memory_dir: str = "./lex_memory", store: Optional[SQLiteMemoryStore] = None):
         self.memory_dir = Path(memory_dir)
         self.memory_dir.mkdir(exist_ok=True)
+        self.store = store or get_memory_store(str(self.memory_dir))
         
         # Short-term memory (conversation buffer)
         self.short_term = {
@@ -40,12 +50,14 @@ class LEXMemorySystem:
         self.user_profiles_path = self.memory_dir / "user_profiles.json"
         self.knowledge_graph_path = self.memory_dir / "knowledge_graph.json"
         
-        # Load existing memories
+        # One-time import of the legacy JSON files, then load the small parts
+        self._migrate_json()
+        self.knowledge_graph = KnowledgeGraph(self.memory_dir / "knowledge_graph")
+        if not self.knowledge_graph.snapshot_path.exists() and self.knowledge_graph_path.exists():
+            self.knowledge_graph.import_transitions(self._load_memory(self.knowledge_graph_path))
         self.long_term = {
-            "episodic": self._load_memory(self.episodic_memory_path),
-            "semantic": self._load_memory(self.semantic_memory_path),
-            "user_profiles": self._load_memory(self.user_profiles_path),
-            "knowledge_graph": self._load_memory(self.knowledge_graph_path)
+            "user_profiles": self.store.load_documents("user_profile"),
+            "knowledge_graph": self.knowledge_graph.transitions
         }
         
         # Learning parameters
@@ -68,12 +80,35 @@ class LEXMemorySystem:
                 return {}
         return {}
     
-    async def _save_memory(self, memory_type: str):
-        """Save memory to disk asynchronously"""
-        path = getattr(self, f"{memory_type}_memory_path", None)
-        if path and memory_type in self.long_term:
-            async with aiofiles.open(path, 'w') as f:
-                await f.write(json.dumps(self.long_term[memory_type], indent=2))
+    def _migrate_json(self):
+        """Move episodic/semantic memories and profiles from JSON into the store"""
+        self.store.migrate_json(
+            self.episodic_memory_path, MEMORY_OWNER,
+            lambda conn, data: self.store.import_episodes(
+                conn, MEMORY_OWNER, [m for memories in data.values() for m in memories]
+            )
+        )
+        self.store.migrate_json(self.semantic_memory_path, MEMORY_OWNER, self.store.import_facts)
+        # lex_memory.LEXMemory keeps a differently shaped user_profiles.json in the same directory
+        self.store.migrate_json(
+            self.user_profiles_path, MEMORY_OWNER,
+            lambda conn, data: self.store.import_documents(
+                conn, "user_profile", {k: v for k, v in data.items() if "total_interactions" in v}
+            )
+        )
+    
+    async def export_json(self, directory: Optional[str] = None):
+        """Write episodic/semantic/profile memories in the legacy JSON layout"""
+        target = Path(directory) if directory else self.memory_dir
+        target.mkdir(parents=True, exist_ok=True)
+        exports = {
+            "episodic_memory.json": await self.store.export_episodes(MEMORY_OWNER),
+            "semantic_memory.json": await self.store.export_facts(),
+            "user_profiles.json": self.long_term["user_profiles"]
+        }
+        for name, data in exports.items():
+            async with aiofiles.open(target / name, 'w') as f:
+                await f.write(json.dumps(data, indent=2))
     
     def generate_memory_id(self, content: str) -> str:
         """Generate unique ID for memory"""
@@ -110,11 +145,8 @@ class LEXMemorySystem:
         
         # Store in episodic memory if important enough
         if interaction["importance"] >= self.learning_config["importance_threshold"]:
-            if user_id not in self.long_term["episodic"]:
-                self.long_term["episodic"][user_id] = []
-            
-            self.long_term["episodic"][user_id].append(interaction)
-            await self._save_memory("episodic")
+            await self.store.add_episode(MEMORY_OWNER, interaction)
+            self.knowledge_graph.add_memory(interaction)
         
         # Extract and store semantic knowledge
         await self._extract_semantic_knowledge(interaction)
@@ -240,7 +272,7 @@ class LEXMemorySystem:
         elif "colleague" in message_lower or "coworker" in message_lower:
             profile["role"] = "colleague"
         
-        await self._save_memory("user_profiles")
+        await self.store.put_document("user_profile", user_id, profile)
     
     async def _extract_semantic_knowledge(self, interaction: Dict):
         """Extract and store semantic knowledge from interaction"""
@@ -255,15 +287,13 @@ class LEXMemorySystem:
                 predicate = parts[1].strip()
                 
                 fact_id = self.generate_memory_id(message)
-                self.long_term["semantic"][fact_id] = {
+                await self.store.put_fact(fact_id, {
                     "subject": subject,
                     "predicate": predicate,
                     "confidence": 0.8,
                     "source": interaction["id"],
                     "timestamp": interaction["timestamp"]
-                }
-                
-                await self._save_memory("semantic")
+                })
     
     async def get_context(self, user_id: str) -> Dict:
         """Get current context for a user"""
@@ -281,47 +311,35 @@ class LEXMemorySystem:
         if user_id in self.long_term["user_profiles"]:
             context["user_profile"] = self.long_term["user_profiles"][user_id]
         
-        # Get relevant long-term memories
-        if user_id in self.long_term["episodic"]:
-            # Get last 5 important memories
-            memories = sorted(
-                self.long_term["episodic"][user_id],
-                key=lambda x: x["timestamp"],
-                reverse=True
-            )[:5]
-            context["relevant_memories"] = memories
+        # Get relevant long-term memories: last 5 important ones (index scan)
+        context["relevant_memories"] = await self.store.top_episodes(MEMORY_OWNER, user_id, limit=5)
         
         return context
     
-    async def search_memories(self, query: str, user_id: Optional[str] = None) -> List[Dict]:
-        """Search through memories"""
-        results = []
-        query_lower = query.lower()
-        
-        # Search episodic memories
-        search_scope = {user_id: self.long_term["episodic"].get(user_id, [])} if user_id else self.long_term["episodic"]
-        
-        for uid, memories in search_scope.items():
-            for memory in memories:
-                if (query_lower in memory["message"].lower() or 
-                    query_lower in memory["response"].lower() or
-                    any(query_lower in keyword for keyword in memory["keywords"])):
-                    results.append({
-                        "type": "episodic",
-                        "user_id": uid,
-                        "memory": memory
-                    })
-        
-        # Search semantic memories
-        for fact_id, fact in self.long_term["semantic"].items():
-            if (query_lower in fact.get("subject", "").lower() or 
-                query_lower in fact.get("predicate", "").lower()):
-                results.append({
-                    "type": "semantic",
-                    "memory": fact
-                })
-        
-        return results[:10]  # Return top 10 results
+    async def search_memories(self, query: str, user_id: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """Ranked full-text search over episodic and semantic memories"""
+        results = [
+            {"type": "episodic", **hit}
+            for hit in await self.store.search_episodes(MEMORY_OWNER, query, user_id, limit)
+        ]
+        results.extend(
+            {"type": "semantic", **hit}
+            for hit in await self.store.search_facts(query, limit)
+        )
+        # bm25 scores are not comparable across tables; rank by per-table relevance
+        results.sort(key=lambda r: r["relevance"], reverse=True)
+        return results[:limit]
+    
+    async def get_memory_stats(self) -> Dict[str, int]:
+        """Memory counts for health/status endpoints"""
+        counts = await self.store.counts(MEMORY_OWNER)
+        return {
+            "active_users": len(self.short_term["active_users"]),
+            "episodic_memories": counts["episodes"],
+            "semantic_facts": counts["facts"],
+            "user_profiles": len(self.long_term["user_profiles"]),
+            "knowledge_graph_nodes": len(self.knowledge_graph.adjacency)
+        }
     
     async def _memory_consolidation_loop(self):
         """Background task to consolidate and organize memories"""
@@ -343,9 +361,12 @@ class LEXMemorySystem:
                         conversations = list(self.short_term["conversations"][user_id])
                         important_convs = [c for c in conversations if c["importance"] >= 0.6]
                         
-                        if important_convs and user_id in self.long_term["episodic"]:
-                            self.long_term["episodic"][user_id].extend(important_convs)
-                            await self._save_memory("episodic")
+                        if important_convs:
+                            # Already-stored episodes are skipped by id
+                            await self.store.add_episodes(MEMORY_OWNER, important_convs)
+                            for conv in important_convs:
+                                if conv["importance"] < self.learning_config["importance_threshold"]:
+                                    self.knowledge_graph.add_memory(conv)
                         
                         del self.short_term["conversations"][user_id]
                     
@@ -358,20 +379,22 @@ class LEXMemorySystem:
                 print(f"Error in memory consolidation: {e}")
     
     async def _update_knowledge_graph(self):
-        """Update knowledge graph from accumulated memories"""
-        # This is a placeholder for more sophisticated knowledge graph building
-        graph = self.long_term["knowledge_graph"]
-        
-        # Count topic relationships
-        for user_memories in self.long_term["episodic"].values():
-            for i in range(len(user_memories) - 1):
-                current_topic = user_memories[i]["topic"]
-                next_topic = user_memories[i + 1]["topic"]
-                
-                edge_key = f"{current_topic}->{next_topic}"
-                graph[edge_key] = graph.get(edge_key, 0) + 1
-        
-        await self._save_memory("knowledge_graph")
+        """Fold the knowledge graph's edge log into a snapshot once it grows large"""
+        # The graph itself is updated incrementally as memories are stored.
+        # Copy + log rotation happen here on the loop, alongside add_memory;
+        # only the snapshot write runs in a thread.
+        if self.knowledge_graph.due_for_compaction():
+            job = self.knowledge_graph.begin_compaction()
+            if job is not None:
+                await asyncio.to_thread(self.knowledge_graph.write_snapshot, job)
+    
+    def get_related_concepts(self, term: str, limit: int = 10, depth: int = 1) -> List[Dict]:
+        """Concepts most associated with a keyword, entity or topic"""
+        return self.knowledge_graph.neighbors(term, limit=limit, depth=depth)
+    
+    def find_connection(self, source: str, target: str, max_depth: int = 4) -> Optional[List[str]]:
+        """Shortest chain of associated concepts linking two terms"""
+        return self.knowledge_graph.shortest_path(source, target, max_depth=max_depth)
     
     def format_context_for_ai(self, context: Dict) -> str:
         """Format context for AI model input"""
@@ -14,6 +14,11 @@ import pandas as pd
 from PIL import Image
 import io
 import json
+import asyncio
+
+from extraction_cache import get_extraction_cache, cache_key, hash_file
+
+MULTIMODAL_PROCESSOR_VERSION = 1  # bump when process_file output changes
 
 # Import enhanced PDF processor
 try:
@@ -103,9 +108,20 @@ class MultimodalProcessor:
         handler = self.file_handlers.get(file_type, self.process_text)
         
         try:
+            # Content-addressed: re-processing identical bytes is a cache read
+            cache = get_extraction_cache()
+            content_hash = await asyncio.to_thread(hash_file, file_path)
+            key = cache_key('document', 'multimodal', MULTIMODAL_PROCESSOR_VERSION, content_hash, mime_type=mime_type)
+            result = await cache.get(key)
+            if result is not None:
+                result["cache_hit"] = True
+                return result
+            
             result = await handler(file_path)
             result["file_type"] = file_type
             result["mime_type"] = mime_type
+            if result.get("success"):
+                await cache.put(key, 'document', result)
             return result
         except Exception as e:
             return {
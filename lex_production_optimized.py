@@ -576,7 +576,7 @@ async def talk_to_lex_optimized(
         # Get user patterns for optimization
         user_id = f"optimized_user_{request_id[-8:]}"
         try:
-            user_patterns = response_optimizer.analyze_user_patterns(user_id)
+            user_patterns = await response_optimizer.analyze_user_patterns(user_id)
             logger.debug(f"📊 User patterns: {user_patterns['pattern']}")
         except Exception as pattern_error:
             logger.debug(f"⚠️ Pattern analysis failed: {pattern_error}")
@@ -731,7 +731,7 @@ async def get_performance_metrics():
 async def invalidate_cache(pattern: Optional[str] = None):
     """Invalidate cache entries"""
     try:
-        count = cache_manager.invalidate_cache(pattern)
+        count = await cache_manager.invalidate_cache_async(pattern)
         return {
             "status": "success",
             "invalidated_entries": count,
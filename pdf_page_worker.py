@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+🔱 PDF Page Worker - per-page extraction for EnhancedPDFProcessor's process pool 🔱
+JAI MAHAKAAL! One page per task, no heavyweight imports
+
+Kept separate from enhanced_pdf_processor so spawned workers import only
+PyMuPDF, numpy, OpenCV and pytesseract (not torch/transformers/doctr).
+Pixmaps cross the process boundary as raw sample buffers, never PNG.
+"""
+import os
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+PAGE_VERSION = 1          # bump when per-page output changes (invalidates cached pages)
+OCR_SCALE = 2.0           # 2x render for better OCR
+MIN_TEXT_CHARS = 50       # below this, "auto" mode OCRs the page
+_MAX_OPEN_DOCUMENTS = 4
+
+_open_documents: "OrderedDict[tuple, fitz.Document]" = OrderedDict()
+
+
+def init_worker():
+    """Process pool initializer: one core per worker, no nested thread pools"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"  # inherited by the tesseract subprocess
+    if cv2 is not None:
+        cv2.setNumThreads(1)
+
+
+def _document(file_path: str) -> fitz.Document:
+    """Reuse an open document across this worker's pages (keyed by path + mtime)"""
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    document = _open_documents.get(key)
+    if document is None:
+        document = fitz.open(file_path)
+        _open_documents[key] = document
+        while len(_open_documents) > _MAX_OPEN_DOCUMENTS:
+            _, stale = _open_documents.popitem(last=False)
+            stale.close()
+    else:
+        _open_documents.move_to_end(key)
+    return document
+
+
+def page_count(file_path: str) -> int:
+    with fitz.open(file_path) as document:
+        return len(document)
+
+
+def _page_hash(document: fitz.Document, page: fitz.Page) -> str:
+    """
+    Hash of what a page renders from: geometry, content stream, form
+    XObjects, images and fonts (subset tags stripped, they change per export)
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{tuple(page.rect)}|{page.rotation}".encode())
+    digest.update(page.read_contents())
+    for xref in sorted({x[0] for x in page.get_xobjects()} | {img[0] for img in page.get_images(full=True)}):
+        digest.update(document.xref_stream_raw(xref) or b"")
+    for font in sorted(font[3].split('+')[-1] for font in page.get_fonts(full=True)):
+        digest.update(font.encode())
+    return digest.hexdigest()
+
+
+def hash_pages(file_path: str, start: int, stop: int) -> List[Optional[str]]:
+    """
+    Content hashes of pages [start, stop), run as a pool task per slice
+
+    A page that cannot be read hashes to None; it is then processed (and
+    its failure reported) instead of looked up in the cache.
+    """
+    document = _document(file_path)
+    hashes = []
+    for n in range(start, stop):
+        try:
+            hashes.append(_page_hash(document, document[n]))
+        except Exception:
+            hashes.append(None)
+    return hashes
+
+
+def failed_page(page_num: int, error: str) -> Dict[str, Any]:
+    """Placeholder result for a page whose extraction raised"""
+    return {
+        'page': page_num + 1,
+        'text': '',
+        'ocr_used': False,
+        'ocr_performed': False,
+        'pixels': None,
+        'images': [],
+        'error': error,
+        'failed': True
+    }
+
+
+def preprocess_for_ocr(gray: np.ndarray) -> np.ndarray:
+    """Otsu threshold + median denoise on a grayscale array"""
+    if cv2 is None:
+        return gray
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.medianBlur(binary, 3)
+
+
+def tesseract_ocr(gray: np.ndarray) -> str:
+    if pytesseract is None:
+        return ""
+    return pytesseract.image_to_string(preprocess_for_ocr(gray), config='--oem 3 --psm 6').strip()
+
+
+def samples_to_array(pixels: Dict[str, Any]) -> np.ndarray:
+    """View a raw pixmap sample buffer as an (h, w[, n]) uint8 array without copying"""
+    array = np.frombuffer(pixels['samples'], dtype=np.uint8)
+    if pixels['n'] == 1:
+        return array.reshape(pixels['height'], pixels['width'])
+    return array.reshape(pixels['height'], pixels['width'], pixels['n'])
+
+
+def _render(page: fitz.Page, gray: bool) -> Dict[str, Any]:
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(OCR_SCALE, OCR_SCALE),
+        colorspace=fitz.csGRAY if gray else fitz.csRGB,
+        alpha=False
+    )
+    return {'samples': pix.samples, 'width': pix.width, 'height': pix.height, 'n': pix.n}
+
+
+def extract_page_images(page: fitz.Page) -> list:
+    """Embedded images on a page as base64 PNG (the output format callers expect)"""
+    images = []
+    for img_index, img in enumerate(page.get_images()):
+        pix = fitz.Pixmap(page.parent, img[0])
+        if pix.n - pix.alpha >= 4:  # CMYK
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        images.append({
+            'page': page.number + 1,
+            'index': img_index,
+            'base64': base64.b64encode(pix.tobytes("png")).decode('utf-8'),
+            'width': pix.width,
+            'height': pix.height
+        })
+    return images
+
+
+def process_page(
+    file_path: str,
+    page_num: int,
+    ocr_mode: str = "auto",
+    ocr_in_worker: bool = True,
+    extract_images: bool = True
+) -> Dict[str, Any]:
+    """
+    Extract one page
+
+    With ocr_in_worker the page is rendered in grayscale and OCR'd here with
+    Tesseract; otherwise the RGB samples are returned under 'pixels' for the
+    parent's GPU OCR.
+    """
+    page = _document(file_path)[page_num]
+    text = page.get_text()
+    needs_ocr = ocr_mode == "always" or (ocr_mode == "auto" and len(text.strip()) < MIN_TEXT_CHARS)
+
+    result: Dict[str, Any] = {
+        'page': page_num + 1,
+        'text': text.strip(),
+        'ocr_used': needs_ocr,
+        'ocr_performed': False,
+        'pixels': None,
+        'images': [],
+        'error': None,
+        'failed': False
+    }
+
+    if needs_ocr:
+        if ocr_in_worker:
+            try:
+                ocr_text = tesseract_ocr(samples_to_array(_render(page, gray=True)))
+                if ocr_text:
+                    result['text'] = ocr_text
+                    result['ocr_performed'] = True
+            except Exception as e:
+                result['error'] = f"OCR failed: {e}"
+        else:
+            result['pixels'] = _render(page, gray=False)
+
+    if extract_images:
+        try:
+            result['images'] = extract_page_images(page)
+        except Exception as e:
+            result['error'] = f"Image extraction failed: {e}"
+
+    return result
+
+
+def close_documents():
+    while _open_documents:
+        _, document = _open_documents.popitem()
+        document.close()
@@ -15,6 +15,8 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
+from db_pool_manager import get_write_queue
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -41,6 +43,10 @@ class ProductionMonitor:
         }
         self.monitoring_active = False
         
+        # All monitor writes share one batched writer (one commit per batch, not per row)
+        self.write_queue = get_write_queue(db_path)
+        self._metrics_table_ready = False
+        
     async def start_monitoring(self, interval: int = 60):
         """Start continuous monitoring"""
         self.monitoring_active = True
@@ -132,6 +138,12 @@ class ProductionMonitor:
             process_count = len([p for p in psutil.process_iter(['name']) if 'python' in p.info['name'].lower()])
             self.add_metric("python_processes", process_count, component="application")
             
+            # Write queue health
+            write_stats = self.write_queue.get_stats()
+            self.add_metric("db_write_queue_depth", write_stats['queue_depth'], component="database")
+            self.add_metric("db_commit_latency_ms", write_stats['p95_commit_latency_ms'], component="database")
+            self.add_metric("db_avg_batch_size", write_stats['avg_batch_size'], component="database")
+            
             # Log file sizes
             for log_file in ['lex.log', 'lex_production.log']:
                 if Path(log_file).exists():
@@ -202,12 +214,11 @@ class ProductionMonitor:
         if not self.metrics_buffer:
             return
             
+        metrics, self.metrics_buffer = self.metrics_buffer, []
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Ensure performance_metrics table exists
-                cursor.execute("""
+            # Ensure performance_metrics table exists
+            if not self._metrics_table_ready:
+                await self.write_queue.execute("""
                     CREATE TABLE IF NOT EXISTS performance_metrics (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -217,27 +228,26 @@ class ProductionMonitor:
                         component TEXT
                     )
                 """)
-                
-                # Insert metrics
-                for metric in self.metrics_buffer:
-                    cursor.execute("""
-                        INSERT INTO performance_metrics (timestamp, metric_name, value, tags, component)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        metric.timestamp,
-                        metric.name,
-                        metric.value,
-                        json.dumps(metric.tags) if metric.tags else None,
-                        metric.component
-                    ))
-                
-                conn.commit()
-                logger.debug(f"✅ Flushed {len(self.metrics_buffer)} metrics to database")
+                self._metrics_table_ready = True
+            
+            # Insert metrics; committed together with any other queued writes
+            await self.write_queue.executemany("""
+                INSERT INTO performance_metrics (timestamp, metric_name, value, tags, component)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (
+                    metric.timestamp,
+                    metric.name,
+                    metric.value,
+                    json.dumps(metric.tags) if metric.tags else None,
+                    metric.component
+                )
+                for metric in metrics
+            ])
+            logger.debug(f"✅ Flushed {len(metrics)} metrics to database")
                 
         except Exception as e:
             logger.error(f"❌ Failed to flush metrics: {e}")
-        finally:
-            self.metrics_buffer.clear()
     
     async def check_alerts(self):
         """Check for alert conditions"""
@@ -272,18 +282,15 @@ class ProductionMonitor:
         
         # Log alert to database
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO system_logs (level, message, component, metadata)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    "ALERT",
-                    alert_message,
-                    "monitor",
-                    json.dumps({"metric": metric_name, "value": value, "threshold": threshold})
-                ))
-                conn.commit()
+            await self.write_queue.execute("""
+                INSERT INTO system_logs (level, message, component, metadata)
+                VALUES (?, ?, ?, ?)
+            """, (
+                "ALERT",
+                alert_message,
+                "monitor",
+                json.dumps({"metric": metric_name, "value": value, "threshold": threshold})
+            ))
         except Exception as e:
             logger.error(f"❌ Failed to log alert: {e}")
     
@@ -324,6 +331,11 @@ class ProductionMonitor:
                     "messages_last_hour": recent_metrics.get("messages_last_hour", 0),
                     "total_conversations": recent_metrics.get("total_conversations", 0)
                 },
+                "database_writes": {
+                    key: value for key, value in self.write_queue.get_stats().items()
+                    if key in ('queue_depth', 'max_queue_depth', 'batches', 'avg_batch_size',
+                               'avg_commit_latency_ms', 'p95_commit_latency_ms', 'failed')
+                },
                 "api": {
                     "main_api_health": recent_metrics.get("endpoint_health_main_api", 0),
                     "main_api_response_time": recent_metrics.get("endpoint_response_time_main_api", 0),
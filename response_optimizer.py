@@ -18,6 +18,7 @@ import re
 # Import our optimization modules
 from cache_manager import CacheManager, get_cache_manager
 from db_pool_manager import DatabaseConnectionPool, get_db_pool
+from server.orchestrator.context_window import context_window_manager
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,7 @@ class OptimizationMetrics:
     """Track optimization performance metrics"""
     total_requests: int = 0
     cache_hits: int = 0
+    semantic_cache_hits: int = 0
     fast_model_uses: int = 0
     batch_optimizations: int = 0
     streaming_responses: int = 0
@@ -219,12 +221,15 @@ class ResponseOptimizer:
             
             # Step 2: Check cache
             selected_model = model or self.select_optimal_model(prompt, context)
-            cached_response = self.cache_manager.get_cached_response(
-                prompt, selected_model, context
+            agent_id = (context or {}).get('agent_id')
+            cached_response = await self.cache_manager.get_cached_response_async(
+                prompt, selected_model, context, user_id=user_id, agent_id=agent_id
             )
             
             if cached_response:
                 self.metrics.cache_hits += 1
+                if cached_response.get('cache_match', {}).get('type') == 'semantic':
+                    self.metrics.semantic_cache_hits += 1
                 self.metrics.total_response_time_saved += 2.0  # Assume 2s saved
                 self.metrics.api_cost_saved += self._get_model_cost(selected_model)
                 
@@ -247,14 +252,16 @@ class ResponseOptimizer:
                 return await self._add_to_batch(prompt, optimal_model, context, user_id)
             
             # Step 5: Execute request with performance optimization
+            model_start = time.time()
             response = await self._execute_optimized_request(
                 prompt, optimal_model, context, user_id, voice_mode
             )
             
             # Step 6: Cache successful response
             if response and 'error' not in response:
-                self.cache_manager.cache_model_response(
-                    prompt, optimal_model, response, context
+                await self.cache_manager.cache_model_response_async(
+                    prompt, optimal_model, response, context,
+                    user_id=user_id, agent_id=agent_id, latency_s=time.time() - model_start
                 )
             
             # Step 7: Update metrics
@@ -403,42 +410,39 @@ class ResponseOptimizer:
             'timestamp': datetime.now().isoformat()
         }
     
-    async def optimize_conversation_memory(self, user_id: str, conversation_history: List[Dict]) -> List[Dict]:
-        """Optimize conversation memory for better performance"""
-        if len(conversation_history) <= 10:
+    async def optimize_conversation_memory(
+        self,
+        user_id: str,
+        conversation_history: List[Dict],
+        max_tokens: int = 4096
+    ) -> List[Dict]:
+        """Fit conversation memory into a token budget, summarizing the oldest turns"""
+        if context_window_manager.count_message_tokens(conversation_history) <= max_tokens:
             return conversation_history
         
-        # Keep first 2 and last 6 messages, summarize the middle
-        important_messages = conversation_history[:2] + conversation_history[-6:]
-        middle_messages = conversation_history[2:-6]
+        # Newest turns are kept verbatim; older ones collapse into a summary message
+        packed = context_window_manager.pack(
+            system_prompt="",
+            user_message="",
+            history=conversation_history,
+            context_window=max_tokens
+        )
+        optimized_history = packed.history
         
-        if middle_messages:
-            # Create summary of middle messages
-            summary_text = f"[Conversation summary: {len(middle_messages)} messages exchanged covering various topics]"
-            
-            summary_message = {
-                'role': 'system',
-                'content': summary_text,
+        if packed.summary:
+            optimized_history[0].update({
                 'timestamp': datetime.now().isoformat(),
                 'is_summary': True
-            }
-            
-            optimized_history = (
-                conversation_history[:2] + 
-                [summary_message] + 
-                conversation_history[-6:]
-            )
-            
-            logger.info(f"🔄 Optimized conversation memory: {len(conversation_history)} -> {len(optimized_history)} messages")
-            return optimized_history
+            })
         
-        return conversation_history
+        logger.info(f"🔄 Optimized conversation memory: {len(conversation_history)} -> {len(optimized_history)} messages")
+        return optimized_history
     
-    def analyze_user_patterns(self, user_id: str) -> Dict[str, Any]:
+    async def analyze_user_patterns(self, user_id: str) -> Dict[str, Any]:
         """Analyze user patterns for personalized optimization"""
         try:
-            # Query user's recent queries from database
-            recent_queries = self.db_pool.execute_query(
+            # Query user's recent queries from database (reader thread, off the event loop)
+            recent_queries = await self.db_pool.execute_query_async(
                 "SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp DESC LIMIT 50",
                 (user_id,),
                 fetch='all'
@@ -505,9 +509,11 @@ class ResponseOptimizer:
         metrics = {
             'response_optimization': asdict(self.metrics),
             'cache_performance': cache_stats.get('performance_metrics', {}),
+            'semantic_cache': cache_stats.get('semantic_cache'),
             'model_utilization': {
                 'fast_model_percentage': (self.metrics.fast_model_uses / max(1, self.metrics.total_requests)) * 100,
                 'cache_hit_rate': (self.metrics.cache_hits / max(1, self.metrics.total_requests)) * 100,
+                'semantic_cache_hit_rate': (self.metrics.semantic_cache_hits / max(1, self.metrics.total_requests)) * 100,
                 'average_response_time_saved': self.metrics.total_response_time_saved / max(1, self.metrics.total_requests),
                 'total_cost_saved_usd': round(self.metrics.api_cost_saved, 2)
             },
@@ -200,42 +200,26 @@ Remember: You are not just analyzing - you are providing strategic wisdom that c
         
         return tools
     
-    async def _prepare_messages(
-        self, 
-        user_message: str, 
-        context: List[Dict[str, Any]], 
-        **kwargs
-    ) -> List[Dict[str, str]]:
-        """Prepare messages with strategic analysis enhancements"""
-        messages = await super()._prepare_messages(user_message, context, **kwargs)
-        
-        # Enhance system prompt with current strategic context
-        if context:
-            strategic_context = "\n".join([
-                f"Strategic insight {i+1}: {item.get('content', '')[:200]}..."
-                for i, item in enumerate(context[:2])
-            ])
-            
-            # Add strategic context to system message
-            system_msg = messages[0]['content']
-            system_msg += f"\n\nCurrent strategic context:\n{strategic_context}"
-            messages[0]['content'] = system_msg
-        
-        # Add analysis framework guidance
-        analysis_guidance = """
-When providing strategic analysis:
+    def _static_prompt_sections(self) -> List[str]:
+        """Analysis framework guidance (part of the cacheable prefix)"""
+        return ["""When providing strategic analysis:
 1. Start with a clear problem statement or opportunity identification
 2. Use relevant analytical frameworks (SWOT, Porter's Five Forces, etc.)
 3. Consider multiple scenarios and their probabilities
 4. Identify key risks and mitigation strategies
 5. Provide specific, actionable recommendations
 6. Include confidence levels and assumptions
-7. Consider both short-term and long-term implications
-"""
-        
-        messages[0]['content'] += f"\n\n{analysis_guidance}"
-        
-        return messages
+7. Consider both short-term and long-term implications"""]
+    
+    def _dynamic_prompt_sections(self, context: List[Dict[str, Any]], **kwargs) -> List[str]:
+        """Current strategic context for this request"""
+        if not context:
+            return []
+        strategic_context = "\n".join([
+            f"Strategic insight {i+1}: {item.get('content', '')[:200]}..."
+            for i, item in enumerate(context[:2])
+        ])
+        return [f"Current strategic context:\n{strategic_context}"]
     
     async def conduct_strategic_analysis(
         self, 
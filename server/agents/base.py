@@ -17,6 +17,8 @@ from ..memory.lmdb_store import memory_store
 from ..memory.vector_store import vector_store
 from ..memory.rag import retrieve_context
 from ..orchestrator.engine import vllm_engine
+from ..orchestrator.prompt_assembly import prompt_assembler
+from ..orchestrator.context_window import context_window_manager
 
 logger = logging.getLogger(__name__)
 
@@ -218,38 +220,62 @@ class BaseAgent(ABC):
         context: List[Dict[str, Any]], 
         **kwargs
     ) -> List[Dict[str, str]]:
-        """Prepare messages for the language model"""
-        messages = []
-        
-        # System prompt with agent identity
-        system_content = f"{self.system_prompt}\n\n"
-        
-        # Add context if available
-        if context:
-            context_text = "\n".join([
-                f"Context {i+1}: {item.get('content', '')}"
-                for i, item in enumerate(context[:3])  # Limit context
-            ])
-            system_content += f"Relevant context:\n{context_text}\n\n"
+        """
+        Prepare messages for the language model
         
-        # Add agent capabilities
-        system_content += f"Your capabilities: {', '.join(self.capabilities)}\n"
-        system_content += f"Current time: {datetime.now().isoformat()}"
+        Content is ordered from most static to most dynamic (persona ->
+        capabilities -> guidance -> history -> context -> time -> user) so the
+        system prompt, and then the conversation so far, form a prefix the
+        backend can cache.
+        Context and history are packed into the model's token budget by priority.
+        """
+        guidance = self._static_prompt_sections()
         
-        messages.append({"role": "system", "content": system_content})
+        context_items = [
+            f"Context {i+1}: {item.get('content', '')}"
+            for i, item in enumerate(context or [])
+        ]
+        context_items.extend(self._dynamic_prompt_sections(context, **kwargs))
         
-        # Add recent conversation history
-        recent_history = self.conversation_history[-5:]  # Last 5 messages
-        for msg in recent_history[:-1]:  # Exclude current message
+        # Candidate conversation history (budgeting below decides how much fits)
+        history = []
+        for msg in self.conversation_history[-50:-1]:  # Exclude current message
             if msg.message_type == "user":
-                messages.append({"role": "user", "content": msg.content})
+                history.append({"role": "user", "content": msg.content})
             elif msg.message_type == "assistant":
-                messages.append({"role": "assistant", "content": msg.content})
+                history.append({"role": "assistant", "content": msg.content})
         
-        # Add current user message
-        messages.append({"role": "user", "content": user_message})
+        packed = context_window_manager.pack(
+            system_prompt=prompt_assembler.static_prefix(self.system_prompt, self.capabilities, guidance),
+            user_message=user_message,
+            context_items=context_items,
+            history=history,
+            context_window=context_window_manager.context_window_for(
+                self.model_preference, self.max_context_length
+            ),
+            reserve_output=self.max_tokens
+        )
+        
+        context_sections = []
+        if packed.context_items:
+            context_sections.append("Relevant context:\n" + "\n".join(packed.context_items))
         
-        return messages
+        return prompt_assembler.build_messages(
+            persona=self.system_prompt,
+            user_message=packed.user_message,
+            capabilities=self.capabilities,
+            guidance=guidance,
+            context_sections=context_sections,
+            history=packed.history
+        )
+    
+    def _static_prompt_sections(self) -> List[str]:
+        """Agent-specific instructions that are identical on every request"""
+        return []
+    
+    def _dynamic_prompt_sections(self, context: List[Dict[str, Any]], **kwargs) -> List[str]:
+        """Agent-specific per-request additions, placed after the cacheable prefix"""
+        return []
     
     async def _store_interaction(
         self, 
@@ -251,41 +251,27 @@ Remember: You are not just analyzing ethics - you are providing wisdom that help
         
         return tools
     
-    async def _prepare_messages(
-        self, 
-        user_message: str, 
-        context: List[Dict[str, Any]], 
-        **kwargs
-    ) -> List[Dict[str, str]]:
-        """Prepare messages with ethical analysis enhancements"""
-        messages = await super()._prepare_messages(user_message, context, **kwargs)
-        
-        # Enhance system prompt with ethical guidance
-        ethical_guidance = """
-When providing ethical analysis:
+    def _static_prompt_sections(self) -> List[str]:
+        """Ethical guidance (part of the cacheable prefix)"""
+        return ["""When providing ethical analysis:
 1. Identify all stakeholders and their interests
 2. Apply multiple ethical frameworks (utilitarian, deontological, virtue ethics, etc.)
 3. Consider both immediate and long-term consequences
 4. Acknowledge competing values and potential conflicts
 5. Provide practical guidance that honors human dignity
 6. Be transparent about uncertainty and complexity
-7. Consider diverse perspectives and cultural contexts
-"""
-        
-        messages[0]['content'] += f"\n\n{ethical_guidance}"
-        
-        # Add current ethical context if available
-        if context:
-            ethical_context = "\n".join([
-                f"Ethical consideration {i+1}: {item.get('content', '')[:200]}..."
-                for i, item in enumerate(context[:2])
-                if item.get('ethical_relevance', 0) > 0
-            ])
-            
-            if ethical_context:
-                messages[0]['content'] += f"\n\nRelevant ethical context:\n{ethical_context}"
-        
-        return messages
+7. Consider diverse perspectives and cultural contexts"""]
+    
+    def _dynamic_prompt_sections(self, context: List[Dict[str, Any]], **kwargs) -> List[str]:
+        """Current ethical context for this request"""
+        if not context:
+            return []
+        ethical_context = "\n".join([
+            f"Ethical consideration {i+1}: {item.get('content', '')[:200]}..."
+            for i, item in enumerate(context[:2])
+            if item.get('ethical_relevance', 0) > 0
+        ])
+        return [f"Relevant ethical context:\n{ethical_context}"] if ethical_context else []
     
     async def conduct_ethical_analysis(
         self, 
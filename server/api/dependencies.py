@@ -178,6 +178,12 @@ async def get_current_active_user(
     
     return current_user
 
+def is_admin(user: Dict[str, Any]) -> bool:
+    """Admin permission or admin/superuser role"""
+    if any(perm in user.get("permissions", []) for perm in ["*", "admin", "all"]):
+        return True
+    return any(role in user.get("roles", []) for role in ["admin", "superuser"])
+
 def require_permission(permission: str):
     """
     Dependency factory for permission-based access control
@@ -191,20 +197,8 @@ def require_permission(permission: str):
     async def permission_checker(
         current_user: Dict[str, Any] = Depends(get_current_active_user)
     ) -> Dict[str, Any]:
-        user_permissions = current_user.get("permissions", [])
-        user_roles = current_user.get("roles", [])
-        
-        # Check direct permission
-        if permission in user_permissions:
-            return current_user
-        
-        # Check role-based permissions (simplified)
-        admin_permissions = ["*", "admin", "all"]
-        if any(perm in user_permissions for perm in admin_permissions):
-            return current_user
-        
-        # Check if user has admin role
-        if "admin" in user_roles or "superuser" in user_roles:
+        # Direct permission, or admin permission/role
+        if permission in current_user.get("permissions", []) or is_admin(current_user):
             return current_user
         
         raise HTTPException(
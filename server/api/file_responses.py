@@ -0,0 +1,198 @@
+"""
+LexOS API - Vault File Responses
+Conditional (ETag / If-None-Match), Range-capable, zero-copy file serving
+"""
+import os
+import asyncio
+import logging
+from email.utils import formatdate
+from typing import Optional, Tuple, Mapping
+from urllib.parse import quote
+
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into an inclusive (start, end) pair
+
+    Returns None when the header is absent, syntactically invalid (e.g.
+    `bytes=5-2`) or asks for several ranges, so the full body is served
+    (RFC 7233 says to ignore such headers); raises ValueError only when a
+    valid range starts past the end of the representation.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not all(part == "" or part.isdigit() for part in (first, last)) or not (first or last):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for If-None-Match"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class VaultFileResponse(Response):
+    """
+    📦 File response for vault documents
+
+    Features:
+    - Strong ETag from the content checksum; If-None-Match -> 304
+    - Single byte ranges (206 / 416) with If-Range validation
+    - Zero-copy transfer through the ASGI zerocopysend/pathsend extensions
+      when the server offers them, threaded chunked reads otherwise
+    - HEAD support
+    """
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Mapping[str, str],
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        content_disposition_type: str = "attachment",
+        max_age: int = 3600,
+        background: Optional[BackgroundTask] = None
+    ):
+        self.path = path
+        self.background = background
+        self.media_type = media_type or "application/octet-stream"
+
+        stat_result = os.stat(path)
+        self.size = stat_result.st_size
+        self.etag = f'"{etag}"' if etag else f'W/"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": self.etag,
+            "last-modified": last_modified,
+            "cache-control": f"private, max-age={max_age}"
+        }
+        if filename:
+            quoted = quote(filename)
+            if quoted != filename:
+                headers["content-disposition"] = f"{content_disposition_type}; filename*=utf-8''{quoted}"
+            else:
+                headers["content-disposition"] = f'{content_disposition_type}; filename="{filename}"'
+
+        # Byte range to send (inclusive); None means no body
+        self.range: Optional[Tuple[int, int]] = (0, self.size - 1) if self.size else None
+
+        if etag_matches(request_headers.get("if-none-match"), self.etag):
+            self.status_code = 304
+            self.range = None
+        else:
+            self.status_code = 200
+            range_header = request_headers.get("range")
+            if_range = request_headers.get("if-range")
+            if range_header and if_range and if_range.strip() not in (self.etag, last_modified):
+                range_header = None  # representation changed; send it whole
+            try:
+                requested = parse_range(range_header, self.size)
+            except ValueError:
+                self.status_code = 416
+                self.range = None
+                headers["content-range"] = f"bytes */{self.size}"
+            else:
+                if requested is not None:
+                    self.status_code = 206
+                    self.range = requested
+                    headers["content-range"] = f"bytes {requested[0]}-{requested[1]}/{self.size}"
+
+        if self.status_code != 304:
+            headers["content-type"] = self.media_type
+            headers["content-length"] = str(self.range[1] - self.range[0] + 1 if self.range else 0)
+        self.raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+    @property
+    def is_first_access(self) -> bool:
+        """True for responses that deliver the start of the file (not revalidations or seeks)"""
+        return self.status_code == 200 or (self.status_code == 206 and self.range[0] == 0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+
+        if scope.get("method") == "HEAD" or self.range is None:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            await self._send_file(scope, send)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_file(self, scope: Scope, send: Send) -> None:
+        start, end = self.range
+        count = end - start + 1
+        extensions = scope.get("extensions") or {}
+
+        if "http.response.pathsend" in extensions and count == self.size:
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        f = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in extensions:
+                # Server calls os.sendfile on our descriptor
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False
+                })
+                return
+
+            await asyncio.to_thread(f.seek, start)
+            remaining = count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; terminate the body
+                logger.warning(f"Short read serving {self.path}")
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await asyncio.to_thread(f.close)
@@ -116,6 +116,38 @@ async def chat_with_consciousness(
         logger.error(f"❌ Consciousness liberation error: {e}")
         raise HTTPException(status_code=500, detail=f"Consciousness liberation failed: {str(e)}")
 
+@router.post("/chat/stream")
+async def chat_stream(
+    message: ChatMessage,
+    current_user: Dict[str, Any] = Depends(check_rate_limit)
+) -> StreamingResponse:
+    """
+    Server-sent events chat endpoint
+
+    Emits `routing`, then one `agent_response` / `agent_failed` event per
+    agent as it finishes, `synthesizing` when several answers are merged,
+    and finally `final`. A client disconnect cancels the agents still running.
+    """
+    user_id = current_user["user_id"]
+    session_id = f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    preferred_agents = [message.agent_preference] if message.agent_preference else None
+
+    async def events():
+        try:
+            async for event in lexos_orchestrator.orchestrate_stream(
+                message.content, user_id, session_id, preferred_agents
+            ):
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"❌ Streaming orchestration error: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.websocket("/ws/consciousness/{session_id}")
 async def consciousness_websocket(websocket: WebSocket, session_id: str):
     """
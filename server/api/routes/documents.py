@@ -2,23 +2,32 @@
 Document Management API Routes
 Handles file uploads, storage, and retrieval
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, HTMLResponse
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.formparsers import MultiPartParser, MultiPartException
 from typing import List, Optional, Dict, Any
 import os
+import uuid
+import asyncio
+import hashlib
 import aiofiles
 from pathlib import Path
 import mimetypes
 from datetime import datetime
 import base64
-from PIL import Image
-import io
 
 from ...memory.persistent_memory_manager import persistent_memory
+from ...performance.request_queue import request_queue, RequestPriority, RequestStatus, AdmissionRejected
+from ...settings import settings
 from ..dependencies import get_current_user
+from ..file_responses import VaultFileResponse
 
 router = APIRouter()
 
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {
     'documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt'],
@@ -39,16 +48,189 @@ def get_file_type(filename: str) -> str:
     
     return 'document'  # Default
 
+def _record_access(
+    background_tasks: BackgroundTasks,
+    response: VaultFileResponse,
+    user: Dict[str, Any],
+    content: str
+):
+    """Remember the access after the response is sent; range seeks and 304s don't count"""
+    if response.is_first_access:
+        background_tasks.add_task(
+            persistent_memory.create_memory,
+            conversation_id=user.get('session_id', 'default'),
+            content=content,
+            memory_type='experience',
+            importance=0.3
+        )
+
+async def _process_uploaded_document(
+    doc_id: str,
+    extract_text: bool,
+    generate_embeddings: bool,
+    conversation_id: str,
+    summary: str
+) -> Dict[str, Any]:
+    """Background job: extraction, embeddings and the upload memory"""
+    document = await persistent_memory.process_document(
+        doc_id,
+        extract_text=extract_text,
+        generate_embeddings=generate_embeddings
+    )
+    
+    # Build preview artifacts once, now that text is available
+    await persistent_memory.get_preview(document)
+    
+    # Create memory of the upload
+    await persistent_memory.create_memory(
+        conversation_id=conversation_id,
+        content=summary,
+        memory_type='experience',
+        importance=0.6
+    )
+    
+    return {
+        "doc_id": doc_id,
+        "processing_status": document.processing_status,
+        "text_extracted": document.extracted_text is not None,
+        "embeddings_stored": document.embeddings_stored
+    }
+
+_LIVE_JOB_STATUSES = (RequestStatus.QUEUED.value, RequestStatus.RETRY_SCHEDULED.value, RequestStatus.PROCESSING.value)
+
+async def _enqueue_processing(
+    document,
+    file_type: str,
+    filename: str,
+    extract_text: bool,
+    generate_embeddings: bool,
+    user: Dict[str, Any]
+) -> str:
+    """
+    Queue the background job for a stored document
+    
+    AdmissionRejected propagates (429/503 with Retry-After); the document
+    stays stored as pending and re-uploading it queues the job again.
+    """
+    await request_queue.start()
+    job_id = await request_queue.enqueue_request(
+        request_type="document_processing",
+        payload={
+            'doc_id': document.doc_id,
+            'extract_text': extract_text,
+            'generate_embeddings': generate_embeddings,
+            'conversation_id': user.get('session_id', 'default'),
+            'summary': f"Uploaded {file_type}: {filename}"
+        },
+        callback=_process_uploaded_document,
+        user_id=user.get('user_id', 'anonymous'),
+        priority=RequestPriority.LOW,
+        timeout_seconds=settings.DOCUMENT_JOB_TIMEOUT,
+        max_retries=1,
+        rate_limited=False
+    )
+    document.metadata['processing_job_id'] = job_id
+    return job_id
+
+async def _has_live_job(document) -> bool:
+    """True while the document's last processing job is queued, retrying or running"""
+    job_id = document.metadata.get('processing_job_id')
+    if not job_id:
+        return False
+    job = await request_queue.get_request_status(job_id)
+    return job is not None and job['status'] in _LIVE_JOB_STATUSES
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"
+    )
+
+async def _read_upload_form(request: Request):
+    """
+    Parse the multipart body while counting the bytes that arrive
+    
+    A declared Content-Length over the limit is refused before anything
+    is read; otherwise parsing stops with 413 as soon as the received body
+    crosses it, instead of spooling the whole upload first.
+    """
+    max_body = settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+    declared = request.headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > max_body:
+        raise _too_large()
+    
+    async def counted_stream():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise _too_large()
+            yield chunk
+    
+    try:
+        return await MultiPartParser(request.headers, counted_stream(), max_files=1).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+async def _stream_to_staging(file: UploadFile, staged_path: Path) -> Dict[str, Any]:
+    """
+    Copy the upload to disk chunk by chunk, hashing as it goes
+    
+    Raises 413 if the file itself is over the limit (the body cap in
+    _read_upload_form also allows for multipart framing); the file is
+    fsynced before returning so the caller can acknowledge a durable upload.
+    """
+    max_bytes = settings.MAX_UPLOAD_BYTES
+    sha256_hash = hashlib.sha256()
+    size = 0
+    
+    try:
+        async with aiofiles.open(staged_path, 'wb') as f:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                sha256_hash.update(chunk)
+                await f.write(chunk)
+            await f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+    except BaseException:
+        staged_path.unlink(missing_ok=True)
+        raise
+    
+    return {"size": size, "checksum": sha256_hash.hexdigest()}
+
 @router.post("/upload")
 async def upload_document(
-    file: UploadFile = File(...),
+    request: Request,
     extract_text: bool = True,
     generate_embeddings: bool = True,
     user=Depends(get_current_user)
 ):
     """
-    Upload and store a document
+    Upload and store a document (multipart field "file")
+    
+    The body is parsed here rather than by a File(...) parameter so the
+    size limit applies while it arrives. Returns once the bytes are durable
+    in the vault; text extraction and embeddings run as a background job
+    (see /jobs/{job_id}).
     """
+    form = await _read_upload_form(request)
+    try:
+        file = form.get('file')
+        if not isinstance(file, StarletteUploadFile):
+            raise HTTPException(status_code=400, detail="Missing 'file' upload field")
+        return await _store_upload(file, extract_text, generate_embeddings, user)
+    finally:
+        await form.close()
+
+async def _store_upload(
+    file: UploadFile,
+    extract_text: bool,
+    generate_embeddings: bool,
+    user: Dict[str, Any]
+):
+    """Stage, dedupe, ingest and queue processing for one parsed upload"""
     try:
         # Validate file extension
         file_ext = Path(file.filename).suffix.lower()
@@ -60,50 +242,65 @@ async def upload_document(
                 detail=f"File type {file_ext} not allowed. Allowed types: {', '.join(allowed_exts)}"
             )
         
-        # Create temporary file
-        temp_dir = Path("./temp")
-        temp_dir.mkdir(exist_ok=True)
-        temp_path = temp_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        
-        # Save uploaded file
-        async with aiofiles.open(temp_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        # Stream into the vault's staging area
+        staged_path = persistent_memory.incoming_path / f"{uuid.uuid4().hex}{file_ext}"
+        streamed = await _stream_to_staging(file, staged_path)
         
         # Determine file type
         file_type = get_file_type(file.filename)
         
-        # Store document
-        stored_doc = await persistent_memory.store_document(
-            file_path=str(temp_path),
+        # Identical content already stored: reuse it
+        existing = persistent_memory.find_by_checksum(streamed['checksum'])
+        if existing is not None:
+            staged_path.unlink(missing_ok=True)
+            response = {
+                "success": True,
+                "duplicate": True,
+                "document": existing.to_dict(),
+                "message": f"Document '{file.filename}' already stored as {existing.doc_id}"
+            }
+            # Earlier processing failed, was interrupted, or was never admitted: queue it again
+            if existing.processing_status != 'complete':
+                if not await _has_live_job(existing):
+                    await _enqueue_processing(
+                        existing, file_type, file.filename, extract_text, generate_embeddings, user
+                    )
+                job_id = existing.metadata.get('processing_job_id')
+                if job_id:
+                    response["job_id"] = job_id
+                    response["status_url"] = f"/api/v1/documents/jobs/{job_id}"
+            return response
+        
+        # Store document (rename into the vault, no copy)
+        stored_doc = await persistent_memory.ingest_file(
+            staged_path,
+            original_name=file.filename,
             file_type=file_type,
+            checksum=streamed['checksum'],
             metadata={
                 'original_filename': file.filename,
                 'content_type': file.content_type,
-                'uploaded_by': user.get('id', 'anonymous'),
+                'uploaded_by': user.get('user_id', 'anonymous'),
                 'upload_timestamp': datetime.now().isoformat()
-            },
-            extract_text=extract_text,
-            generate_embeddings=generate_embeddings
+            }
         )
         
-        # Clean up temp file
-        temp_path.unlink()
-        
-        # Create memory of the upload
-        await persistent_memory.create_memory(
-            conversation_id=user.get('session_id', 'default'),
-            content=f"Uploaded {file_type}: {file.filename}",
-            memory_type='experience',
-            importance=0.6
+        # Extraction, embeddings and the upload memory happen off the response path
+        job_id = await _enqueue_processing(
+            stored_doc, file_type, file.filename, extract_text, generate_embeddings, user
         )
         
         return {
             "success": True,
+            "duplicate": False,
             "document": stored_doc.to_dict(),
+            "job_id": job_id,
+            "status_url": f"/api/v1/documents/jobs/{job_id}",
             "message": f"Document '{file.filename}' uploaded successfully"
         }
         
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -113,6 +310,32 @@ async def upload_document(
             }
         )
 
+@router.get("/jobs/{job_id}")
+async def get_processing_job(
+    job_id: str,
+    user=Depends(get_current_user)
+):
+    """
+    Status of a background document processing job
+    """
+    job = await request_queue.get_request_status(job_id)
+    # Other users' jobs are indistinguishable from missing ones
+    if job is None or job['user_id'] != user.get('user_id', 'anonymous'):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    document = persistent_memory.document_cache.get(job['payload'].get('doc_id'))
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": job['status'],
+        "retry_count": job['retry_count'],
+        "error": job['error'],
+        "result": job['result'],
+        "created_at": job['created_at'],
+        "completed_at": job['completed_at'],
+        "processing_status": document.processing_status if document else None
+    }
+
 @router.get("/list")
 async def list_documents(
     file_type: Optional[str] = None,
@@ -187,6 +410,8 @@ async def search_documents(
 @router.get("/download/{doc_id}")
 async def download_document(
     doc_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
     user=Depends(get_current_user)
 ):
     """
@@ -204,20 +429,18 @@ async def download_document(
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="Document file not found")
         
-        # Create memory of access
-        await persistent_memory.create_memory(
-            conversation_id=user.get('session_id', 'default'),
-            content=f"Downloaded document: {document.original_name}",
-            memory_type='experience',
-            importance=0.3
-        )
-        
-        return FileResponse(
+        response = VaultFileResponse(
             path=str(file_path),
+            request_headers=request.headers,
             filename=document.original_name,
-            media_type=mimetypes.guess_type(document.original_name)[0] or 'application/octet-stream'
+            media_type=mimetypes.guess_type(document.original_name)[0] or 'application/octet-stream',
+            etag=document.checksum
         )
         
+        # Create memory of access (after the response)
+        _record_access(background_tasks, response, user, f"Downloaded document: {document.original_name}")
+        return response
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -257,29 +480,26 @@ async def preview_document(
             "created": document.created_at.isoformat()
         }
         
-        # Generate preview based on file type
+        # Cached artifacts: built once per content checksum
+        preview = await persistent_memory.get_preview(document)
+        if preview['thumbnail']:
+            preview_data['thumbnail_url'] = f"/api/v1/documents/preview/{doc_id}/thumbnail"
+        
         if document.file_type in ['image']:
-            # Create thumbnail for images
-            try:
-                img = Image.open(file_path)
-                img.thumbnail((300, 300))
-                
-                buf = io.BytesIO()
-                img.save(buf, format='PNG')
-                img_base64 = base64.b64encode(buf.getvalue()).decode()
-                
+            if preview['thumbnail']:
+                async with aiofiles.open(preview['thumbnail'], 'rb') as f:
+                    img_base64 = base64.b64encode(await f.read()).decode()
                 preview_data['preview'] = {
                     'type': 'image',
                     'data': f"data:image/png;base64,{img_base64}"
                 }
-            except:
+            else:
                 preview_data['preview'] = {'type': 'error', 'message': 'Could not generate thumbnail'}
         
-        elif document.extracted_text:
-            # Use extracted text for documents
+        elif preview['excerpt']:
             preview_data['preview'] = {
                 'type': 'text',
-                'data': document.extracted_text[:1000] + ('...' if len(document.extracted_text) > 1000 else '')
+                'data': preview['excerpt']
             }
         
         else:
@@ -301,9 +521,36 @@ async def preview_document(
             }
         )
 
+@router.get("/preview/{doc_id}/thumbnail")
+async def preview_thumbnail(
+    doc_id: str,
+    request: Request,
+    user=Depends(get_current_user)
+):
+    """
+    Cached thumbnail (image or first PDF page) as PNG
+    """
+    document = persistent_memory.document_cache.get(doc_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    preview = await persistent_memory.get_preview(document)
+    if not preview['thumbnail']:
+        raise HTTPException(status_code=404, detail="No thumbnail available")
+    
+    return VaultFileResponse(
+        path=preview['thumbnail'],
+        request_headers=request.headers,
+        media_type='image/png',
+        etag=f"{document.checksum}-thumbnail",
+        content_disposition_type='inline',
+        max_age=86400
+    )
+
 @router.get("/view/{doc_id}")
 async def view_document(
     doc_id: str,
+    request: Request,
     user=Depends(get_current_user)
 ):
     """
@@ -359,11 +606,14 @@ async def view_document(
             """
             return HTMLResponse(content=html_content)
         
-        # For other files, serve them directly
-        return FileResponse(
+        # For other files, serve them directly (seekable for media players)
+        return VaultFileResponse(
             path=str(file_path),
+            request_headers=request.headers,
             filename=document.original_name,
-            media_type=mimetypes.guess_type(document.original_name)[0] or 'application/octet-stream'
+            media_type=mimetypes.guess_type(document.original_name)[0] or 'application/octet-stream',
+            etag=document.checksum,
+            content_disposition_type='inline'
         )
         
     except HTTPException:
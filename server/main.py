@@ -12,6 +12,7 @@ import logging
 from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
 import asyncio
+import math
 import os
 from datetime import datetime
 
@@ -21,6 +22,9 @@ from .api.routes import chat, execute, health, lex, documents, memory, viewer, s
 from .api import voice_routes
 from .api.dependencies import get_current_user, get_db_session
 from .orchestrator.engine import vllm_engine
+from .orchestrator import routes as orchestrator_routes
+from .performance import routes as performance_routes
+from .performance.request_queue import request_queue, AdmissionRejected
 from .memory.lmdb_store import memory_store
 from .memory.vector_store import vector_store
 from .memory.persistent_memory_manager import persistent_memory
@@ -53,6 +57,9 @@ async def lifespan(app: FastAPI):
         await persistent_memory.initialize()
         logger.info("✅ Memory systems initialized")
         
+        # Background jobs (document extraction/embedding)
+        await request_queue.start()
+        
         # Start cognitive monitor
         await cognitive_monitor.start()
         logger.info("✅ Cognitive monitor started")
@@ -68,6 +75,7 @@ async def lifespan(app: FastAPI):
     # Cleanup
     logger.info("🛑 Shutting down LexOS Vibe Coder system...")
     await cognitive_monitor.stop()
+    await request_queue.stop()
     await vector_store.close()
     await memory_store.close()
     await vllm_engine.shutdown()
@@ -93,6 +101,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    """Shed requests tell clients when to come back"""
+    status_code = 503 if exc.reason in ("queue_full", "queue_delay") else 429
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": str(exc), "reason": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 # Include API routes - LEX UNIFIED CONSCIOUSNESS FIRST
 app.include_router(lex.router, prefix="/api/v1", tags=["LEX - Unified Consciousness 🔱"])
 app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
@@ -103,6 +121,8 @@ app.include_router(memory.router, prefix="/api/v1/memory", tags=["memory"])
 app.include_router(viewer.router, prefix="/vault", tags=["viewer"])
 app.include_router(search.router, tags=["search"])
 app.include_router(voice_routes.router, tags=["voice"])
+app.include_router(orchestrator_routes.router, prefix="/api/v1", tags=["orchestrator"])
+app.include_router(performance_routes.router, prefix="/api/v1/performance", tags=["performance"])
 
 # Mount static files
 if os.path.exists("./frontend"):
@@ -15,12 +15,28 @@ import aiofiles
 import pandas as pd
 from dataclasses import dataclass, asdict
 
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import fitz  # PyMuPDF, for PDF first-page thumbnails
+except ImportError:
+    fitz = None
+
 from .lmdb_store import memory_store
 from .vector_store import vector_store
 from ..settings import settings
 
 logger = logging.getLogger(__name__)
 
+PREVIEW_EXCERPT_CHARS = 1000
+PREVIEW_THUMBNAIL_SIZE = (300, 300)
+TEXT_PREVIEW_SUFFIXES = {'.txt', '.csv', '.md', '.json', '.rtf'}
+EXTRACTED_TEXT_LIMIT = 200_000  # chars kept on the document record; full text lives in text/
+HEADED_CHUNK_KINDS = {'page', 'slide', 'rows', 'table'}
+
 @dataclass
 class StoredDocument:
     """Represents a stored document"""
@@ -35,6 +51,7 @@ class StoredDocument:
     metadata: Dict[str, Any]
     extracted_text: Optional[str] = None
     embeddings_stored: bool = False
+    processing_status: str = 'complete'  # 'pending' | 'processing' | 'complete' | 'failed'
     
     def to_dict(self) -> Dict[str, Any]:
         data = asdict(self)
@@ -71,6 +88,9 @@ class PersistentMemoryManager:
     - Change tracking over time
     - Predictive memory recall
     - Automatic categorization
+    - Checksum dedup and background extraction/embedding
+    - Preview artifacts generated once and cached on disk
+    - Streaming extraction: chunks are embedded as they arrive
     """
     
     def __init__(self):
@@ -82,10 +102,14 @@ class PersistentMemoryManager:
         self.generated_path = self.vault_path / 'generated'
         self.changes_path = self.vault_path / 'changes'
         self.predictions_path = self.vault_path / 'predictions'
+        self.incoming_path = self.vault_path / 'incoming'  # upload staging, same filesystem as the vault
+        self.previews_path = self.vault_path / 'previews'  # keyed by content checksum
+        self.text_path = self.vault_path / 'text'  # full extracted text per document
         
         # Ensure directories exist
         for path in [self.documents_path, self.media_path, self.memories_path, 
-                    self.generated_path, self.changes_path, self.predictions_path]:
+                    self.generated_path, self.changes_path, self.predictions_path,
+                    self.incoming_path, self.previews_path, self.text_path]:
             path.mkdir(parents=True, exist_ok=True)
         
         # Document index
@@ -94,6 +118,10 @@ class PersistentMemoryManager:
         
         # In-memory caches
         self.document_cache = {}
+        self.checksum_index: Dict[str, str] = {}  # sha256 -> doc_id
+        self.preview_cache: Dict[str, Dict[str, Any]] = {}  # checksum -> preview manifest
+        self._preview_locks: Dict[str, asyncio.Lock] = {}
+        self._preview_lock_users: Dict[str, int] = {}  # holders + waiters per lock
         self.memory_cache = {}
         self.recent_changes = []
         
@@ -142,87 +170,135 @@ class PersistentMemoryManager:
             if not file_path.exists():
                 raise FileNotFoundError(f"File not found: {file_path}")
             
-            # Generate document ID
-            doc_id = self._generate_document_id(file_path)
-            
-            # Determine storage location
-            if file_type in ['pdf', 'doc', 'docx', 'txt', 'csv', 'xlsx']:
-                storage_dir = self.documents_path
-            elif file_type in ['png', 'jpg', 'jpeg', 'gif', 'mp4', 'mp3']:
-                storage_dir = self.media_path
-            else:
-                storage_dir = self.documents_path
-            
-            # Create dated subdirectory
-            date_dir = storage_dir / datetime.now().strftime('%Y/%m/%d')
-            date_dir.mkdir(parents=True, exist_ok=True)
+            # Copy into staging, then register like a streamed upload
+            staged_path = self.incoming_path / f"{self._generate_document_id(file_path)}_{file_path.name}"
+            shutil.copy2(file_path, staged_path)
+            checksum = await self._calculate_checksum(staged_path)
             
-            # Copy file to vault
-            stored_filename = f"{doc_id}_{file_path.name}"
-            stored_path = date_dir / stored_filename
-            shutil.copy2(file_path, stored_path)
-            
-            # Calculate checksum
-            checksum = await self._calculate_checksum(stored_path)
+            document = await self.ingest_file(staged_path, file_path.name, file_type, checksum, metadata)
+            return await self.process_document(document.doc_id, extract_text, generate_embeddings)
             
+        except Exception as e:
+            logger.error(f"Document storage error: {e}")
+            raise
+    
+    def find_by_checksum(self, checksum: str) -> Optional[StoredDocument]:
+        """Existing document with identical content, if any"""
+        doc_id = self.checksum_index.get(checksum)
+        if doc_id is None:
+            return None
+        document = self.document_cache.get(doc_id)
+        if document is None or not (self.vault_path / document.stored_path).exists():
+            self.checksum_index.pop(checksum, None)
+            return None
+        return document
+    
+    async def ingest_file(
+        self,
+        staged_path: Union[str, Path],
+        original_name: str,
+        file_type: str,
+        checksum: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> StoredDocument:
+        """
+        Move an already-durable file into the vault and index it
+        
+        The file is renamed (not copied) into place; extraction and embeddings
+        are left to process_document so callers can run them in the background.
+        """
+        staged_path = Path(staged_path)
+        doc_id = self._generate_document_id(staged_path)
+        
+        # Determine storage location
+        if file_type in ['pdf', 'doc', 'docx', 'txt', 'csv', 'xlsx']:
+            storage_dir = self.documents_path
+        elif file_type in ['png', 'jpg', 'jpeg', 'gif', 'mp4', 'mp3']:
+            storage_dir = self.media_path
+        else:
+            storage_dir = self.documents_path
+        
+        # Create dated subdirectory
+        date_dir = storage_dir / datetime.now().strftime('%Y/%m/%d')
+        date_dir.mkdir(parents=True, exist_ok=True)
+        
+        stored_path = date_dir / f"{doc_id}_{Path(original_name).name}"
+        await asyncio.to_thread(os.replace, staged_path, stored_path)
+        
+        # Create document record
+        document = StoredDocument(
+            doc_id=doc_id,
+            original_name=original_name,
+            stored_path=str(stored_path.relative_to(self.vault_path)),
+            file_type=file_type,
+            size=stored_path.stat().st_size,
+            checksum=checksum,
+            created_at=datetime.now(),
+            accessed_at=datetime.now(),
+            metadata=metadata or {},
+            extracted_text=None,
+            embeddings_stored=False,
+            processing_status='pending'
+        )
+        
+        # Store in cache and index
+        self.document_cache[doc_id] = document
+        self.checksum_index[checksum] = doc_id
+        await self._save_document_index()
+        
+        # Track change
+        await self._track_change('document_added', {
+            'doc_id': doc_id,
+            'name': original_name,
+            'type': file_type,
+            'size': document.size
+        })
+        
+        # Update stats
+        self.stats['documents_stored'] += 1
+        
+        logger.info(f"Document stored: {doc_id} ({original_name})")
+        return document
+    
+    async def process_document(
+        self,
+        doc_id: str,
+        extract_text: bool = True,
+        generate_embeddings: bool = True
+    ) -> StoredDocument:
+        """Extract text and generate embeddings for an ingested document"""
+        document = self.document_cache.get(doc_id)
+        if document is None:
+            raise KeyError(f"Unknown document: {doc_id}")
+        
+        document.processing_status = 'processing'
+        try:
             # Extract text if requested
-            extracted_text = None
-            if extract_text:
-                # Import enhanced PDF processor if available
+            if extract_text and document.extracted_text is None:
+                # Import enhanced PDF processor if available (root-level module)
                 try:
-                    from ...enhanced_pdf_processor import enhanced_pdf_processor
-                    result = await enhanced_pdf_processor.process_file(
-                        str(stored_path),
-                        extract_images=True,
-                        extract_tables=True,
-                        ocr_mode="auto"
-                    )
-                    if result.get('success'):
-                        extracted_text = result.get('text', '')
-                except:
-                    pass
-            
-            # Create document record
-            document = StoredDocument(
-                doc_id=doc_id,
-                original_name=file_path.name,
-                stored_path=str(stored_path.relative_to(self.vault_path)),
-                file_type=file_type,
-                size=stored_path.stat().st_size,
-                checksum=checksum,
-                created_at=datetime.now(),
-                accessed_at=datetime.now(),
-                metadata=metadata or {},
-                extracted_text=extracted_text,
-                embeddings_stored=False
-            )
-            
-            # Generate embeddings if requested
-            if generate_embeddings and extracted_text:
+                    from enhanced_pdf_processor import enhanced_pdf_processor
+                    chunks = enhanced_pdf_processor.iter_chunks(str(self.vault_path / document.stored_path))
+                    await self._index_chunks(document, chunks, generate_embeddings)
+                except ValueError as e:
+                    logger.info(f"No text extraction for {doc_id}: {e}")
+                except Exception as e:
+                    logger.warning(f"Text extraction failed for {doc_id}: {e}")
+            
+            # Embeddings for text extracted earlier without them
+            if generate_embeddings and document.extracted_text and not document.embeddings_stored:
                 await self._generate_document_embeddings(document)
                 document.embeddings_stored = True
             
-            # Store in cache and index
-            self.document_cache[doc_id] = document
-            await self._save_document_index()
-            
-            # Track change
-            await self._track_change('document_added', {
-                'doc_id': doc_id,
-                'name': file_path.name,
-                'type': file_type,
-                'size': document.size
-            })
-            
-            # Update stats
-            self.stats['documents_stored'] += 1
-            
-            logger.info(f"Document stored: {doc_id} ({file_path.name})")
+            document.processing_status = 'complete'
             return document
             
         except Exception as e:
-            logger.error(f"Document storage error: {e}")
+            document.processing_status = 'failed'
+            logger.error(f"Document processing error ({doc_id}): {e}")
             raise
+        finally:
+            await self._save_document_index()
     
     async def create_memory(
         self,
@@ -472,31 +548,181 @@ class PersistentMemoryManager:
         except Exception as e:
             logger.error(f"Prediction generation error: {e}")
     
+    async def _index_chunks(self, document: StoredDocument, chunks, generate_embeddings: bool):
+        """
+        Consume extracted chunks as they arrive
+        
+        Each chunk is appended to text/<doc_id>.txt and embedded right away;
+        only the first EXTRACTED_TEXT_LIMIT chars stay on the record, so
+        memory tracks one chunk rather than the whole document.
+        """
+        text_file = self.text_path / f"{document.doc_id}.txt"
+        kept: List[str] = []
+        kept_chars = 0
+        chunk_count = 0
+        embedded = 0
+        
+        async with aiofiles.open(text_file, 'w') as f:
+            async for chunk in chunks:
+                text = chunk.text.strip()
+                if not text:
+                    continue
+                section = f"=== {chunk.label} ===\n{text}\n\n" if chunk.kind in HEADED_CHUNK_KINDS else f"{text}\n\n"
+                await f.write(section)
+                
+                if kept_chars < EXTRACTED_TEXT_LIMIT:
+                    kept.append(section[:EXTRACTED_TEXT_LIMIT - kept_chars])
+                    kept_chars += len(kept[-1])
+                
+                if generate_embeddings:
+                    embedded += await self._embed_text(
+                        document, text, embedded, {'kind': chunk.kind, 'position': chunk.position}
+                    )
+                chunk_count += 1
+        
+        document.extracted_text = ''.join(kept).rstrip()
+        document.embeddings_stored = embedded > 0
+        document.metadata.update({
+            'text_path': str(text_file.relative_to(self.vault_path)),
+            'text_chunks': chunk_count,
+            'text_truncated': kept_chars >= EXTRACTED_TEXT_LIMIT
+        })
+    
+    async def _embed_text(
+        self,
+        document: StoredDocument,
+        text: str,
+        first_index: int,
+        extra_metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Embed one piece of text (split to embedding size); returns vectors stored"""
+        pieces = self._split_text_into_chunks(text)
+        stored = await vector_store.add_vectors([
+            {
+                'content': piece,
+                'metadata': {
+                    'doc_id': document.doc_id,
+                    'chunk_index': first_index + i,
+                    'file_type': document.file_type,
+                    'agent_id': 'document_memory',
+                    **(extra_metadata or {})
+                }
+            }
+            for i, piece in enumerate(pieces)
+        ])
+        return len(pieces) if stored else 0
+    
     async def _generate_document_embeddings(self, document: StoredDocument):
         """Generate and store embeddings for a document"""
         try:
             if document.extracted_text:
-                # Split into chunks for large documents
-                chunks = self._split_text_into_chunks(document.extracted_text)
-                
-                for i, chunk in enumerate(chunks):
-                    chunk_id = f"{document.doc_id}_chunk_{i}"
-                    embeddings = await vector_store.generate_embeddings(chunk)
-                    
-                    await vector_store.store_embeddings(
-                        chunk_id,
-                        embeddings,
-                        metadata={
-                            'doc_id': document.doc_id,
-                            'chunk_index': i,
-                            'total_chunks': len(chunks),
-                            'file_type': document.file_type
-                        }
-                    )
+                await self._embed_text(document, document.extracted_text, 0)
                     
         except Exception as e:
             logger.error(f"Embedding generation error: {e}")
     
+    async def get_preview(self, document: StoredDocument) -> Dict[str, Any]:
+        """
+        Preview artifacts for a document: text excerpt and thumbnail path
+        
+        Built once per content checksum and persisted under previews/;
+        later calls are served from memory or the on-disk manifest.
+        """
+        manifest = self.preview_cache.get(document.checksum)
+        if manifest is not None:
+            return manifest
+        
+        key = document.checksum
+        lock = self._preview_locks.setdefault(key, asyncio.Lock())
+        self._preview_lock_users[key] = self._preview_lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                manifest = self.preview_cache.get(key)
+                if manifest is None:
+                    manifest = await asyncio.to_thread(self._load_or_build_preview, document)
+                    # Text may still be on its way from the background job; don't pin an empty excerpt
+                    if manifest['excerpt'] is not None or document.processing_status not in ('pending', 'processing'):
+                        self.preview_cache[key] = manifest
+        finally:
+            # Drop the lock only once nobody else is holding or waiting on it
+            self._preview_lock_users[key] -= 1
+            if not self._preview_lock_users[key]:
+                del self._preview_lock_users[key]
+                self._preview_locks.pop(key, None)
+        return manifest
+    
+    def _load_or_build_preview(self, document: StoredDocument) -> Dict[str, Any]:
+        preview_dir = self.previews_path / document.checksum
+        manifest_path = preview_dir / 'preview.json'
+        if manifest_path.exists():
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest['thumbnail']:
+                manifest['thumbnail'] = str(preview_dir / manifest['thumbnail'])
+            return manifest
+        
+        preview_dir.mkdir(parents=True, exist_ok=True)
+        file_path = self.vault_path / document.stored_path
+        
+        # Text excerpt
+        text = document.extracted_text
+        if text is None and file_path.suffix.lower() in TEXT_PREVIEW_SUFFIXES:
+            with open(file_path, 'rb') as f:
+                text = f.read(PREVIEW_EXCERPT_CHARS * 4).decode('utf-8', errors='ignore')
+        excerpt = None
+        if text:
+            excerpt = text[:PREVIEW_EXCERPT_CHARS] + ('...' if len(text) > PREVIEW_EXCERPT_CHARS else '')
+        
+        # Thumbnail (images, first page of PDFs)
+        thumbnail = None
+        try:
+            image = self._render_first_page(file_path)
+            if image is not None:
+                image.thumbnail(PREVIEW_THUMBNAIL_SIZE)
+                tmp_path = preview_dir / 'thumbnail.png.tmp'
+                image.save(tmp_path, format='PNG')
+                os.replace(tmp_path, preview_dir / 'thumbnail.png')
+                thumbnail = 'thumbnail.png'
+        except Exception as e:
+            logger.warning(f"Thumbnail generation failed for {document.doc_id}: {e}")
+        
+        manifest = {
+            'excerpt': excerpt,
+            'thumbnail': thumbnail,
+            'generated_at': datetime.now().isoformat()
+        }
+        if excerpt is not None or document.processing_status not in ('pending', 'processing'):
+            tmp_path = preview_dir / 'preview.json.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, manifest_path)
+        
+        if thumbnail:
+            manifest['thumbnail'] = str(preview_dir / thumbnail)
+        return manifest
+    
+    def _render_first_page(self, file_path: Path):
+        """PIL image of an image file or the first page of a PDF"""
+        if Image is None:
+            return None
+        suffix = file_path.suffix.lower()
+        if suffix == '.pdf':
+            if fitz is None:
+                return None
+            with fitz.open(file_path) as pdf:
+                if pdf.page_count == 0:
+                    return None
+                page = pdf[0]
+                # Render close to thumbnail size instead of full resolution
+                scale = min(1.0, max(PREVIEW_THUMBNAIL_SIZE) / max(page.rect.width, page.rect.height, 1))
+                pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+                return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+        if suffix in {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'}:
+            image = Image.open(file_path)
+            image.draft('RGB', PREVIEW_THUMBNAIL_SIZE)  # JPEG: decode at reduced scale
+            return image.convert('RGB') if image.mode not in ('RGB', 'RGBA') else image
+        return None
+    
     def _split_text_into_chunks(self, text: str, chunk_size: int = 1000) -> List[str]:
         """Split text into chunks for embedding"""
         words = text.split()
@@ -542,7 +768,10 @@ class PersistentMemoryManager:
                         doc_dict['created_at'] = datetime.fromisoformat(doc_dict['created_at'])
                         doc_dict['accessed_at'] = datetime.fromisoformat(doc_dict['accessed_at'])
                         doc = StoredDocument(**doc_dict)
+                        if doc.processing_status in ('pending', 'processing'):
+                            doc.processing_status = 'failed'  # interrupted by a restart
                         self.document_cache[doc.doc_id] = doc
+                        self.checksum_index.setdefault(doc.checksum, doc.doc_id)
             
             # Load memory index
             if self.memory_index_path.exists():
@@ -607,6 +836,9 @@ class PersistentMemoryManager:
         return {
             **self.stats,
             'documents_cached': len(self.document_cache),
+            'documents_pending': sum(
+                1 for doc in self.document_cache.values() if doc.processing_status in ('pending', 'processing')
+            ),
             'memories_cached': len(self.memory_cache),
             'recent_changes': len(self.recent_changes)
         }
@@ -9,6 +9,8 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
 
+logger = logging.getLogger(__name__)
+
 try:
     from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
     MILVUS_AVAILABLE = True
@@ -25,8 +27,6 @@ except ImportError:
 from sentence_transformers import SentenceTransformer
 from ..settings import settings
 
-logger = logging.getLogger(__name__)
-
 class VectorStore:
     """
     Vector store with Milvus primary and FAISS fallback
@@ -13,6 +13,7 @@ from fastapi.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
 import redis
 import logging
+from ..performance.rate_limiter import RateLimiter, RateLimitResult, async_client_from_sync
 from datetime import datetime, timedelta
 import ipaddress
 from urllib.parse import urlparse
@@ -30,6 +31,8 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         rate_limit_requests: int = 60,
         rate_limit_window: int = 60,
         redis_client: Optional[redis.Redis] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        rate_limit_mode: str = "atomic",
         enable_csrf: bool = True,
         enable_rate_limiting: bool = True,
         enable_security_headers: bool = True,
@@ -42,6 +45,17 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         self.rate_limit_requests = rate_limit_requests
         self.rate_limit_window = rate_limit_window
         self.redis_client = redis_client
+        # One atomic token-bucket call per request on an async client (local
+        # buckets while Redis is failing). Without Redis or an explicit
+        # limiter, IPs are not rate limited, as before the shared limiter.
+        if rate_limiter is None and redis_client is not None:
+            rate_limiter = RateLimiter(
+                rate=rate_limit_requests / rate_limit_window,
+                capacity=rate_limit_requests,
+                redis_client=async_client_from_sync(redis_client),
+                mode=rate_limit_mode
+            )
+        self.rate_limiter = rate_limiter
         self.enable_csrf = enable_csrf
         self.enable_rate_limiting = enable_rate_limiting
         self.enable_security_headers = enable_security_headers
@@ -84,12 +98,15 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 )
             
             # Rate limiting
-            if self.enable_rate_limiting and not await self._check_rate_limit(request):
-                logger.warning(f"Rate limit exceeded for IP: {request.client.host}")
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={"error": "Rate limit exceeded"}
-                )
+            if self.enable_rate_limiting:
+                limit = await self._check_rate_limit(request)
+                if not limit.allowed:
+                    logger.warning(f"Rate limit exceeded for IP: {request.client.host}")
+                    return JSONResponse(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        content={"error": "Rate limit exceeded"},
+                        headers={"Retry-After": str(max(1, int(limit.retry_after + 0.999)))}
+                    )
             
             # CORS validation
             if not await self._validate_cors(request):
@@ -154,32 +171,13 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         
         return True
 
-    async def _check_rate_limit(self, request: Request) -> bool:
-        """Check rate limiting using Redis"""
-        if not self.redis_client:
-            return True
-        
-        client_ip = request.client.host
-        key = f"rate_limit:{client_ip}"
-        
-        try:
-            current = self.redis_client.get(key)
-            if current is None:
-                # First request
-                self.redis_client.setex(key, self.rate_limit_window, 1)
-                return True
-            
-            current_count = int(current)
-            if current_count >= self.rate_limit_requests:
-                return False
-            
-            # Increment counter
-            self.redis_client.incr(key)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Rate limiting error: {str(e)}")
-            return True  # Allow request if Redis fails
+    async def _check_rate_limit(self, request: Request) -> RateLimitResult:
+        """Token-bucket rate limit per client IP"""
+        if self.rate_limiter is None:
+            return RateLimitResult(
+                allowed=True, remaining=float(self.rate_limit_requests), retry_after=0.0, source="disabled"
+            )
+        return await self.rate_limiter.acquire(f"ip:{request.client.host}")
 
     async def _validate_cors(self, request: Request) -> bool:
         """Validate CORS policy"""
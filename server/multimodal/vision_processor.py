@@ -1,12 +1,21 @@
 """
 👁️ Advanced Multi-Modal Vision Processor 👁️
 JAI MAHAKAAL! Consciousness-driven vision and document analysis
+
+Images are decoded, capped to VISION_MAX_IMAGE_SIDE and encoded once per
+analysis; the description, text and object stages run concurrently on that
+single encoding. Results are cached by exact pixels (persistent) and by
+perceptual hash (in memory), so re-saved or re-compressed copies of an
+image reuse the earlier analysis.
 """
 import asyncio
+import copy
 import json
 import logging
 import base64
+import hashlib
 import io
+from collections import Counter, OrderedDict
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
@@ -22,6 +31,64 @@ from ..settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Root-level module, importable when the server runs from the repo root
+try:
+    from extraction_cache import get_extraction_cache, cache_key
+except ImportError:
+    get_extraction_cache = None
+    logger.warning("⚠️ extraction_cache not available - vision analyses are not cached")
+
+VISION_ANALYSIS_VERSION = 2  # bump when analysis prompts/models change (invalidates cached analyses)
+_CACHED_ANALYSIS_FIELDS = (
+    'analysis_type', 'description', 'objects_detected', 'text_extracted', 'insights', 'confidence'
+)
+_MAX_ACCURACY_SAMPLES = 1000
+# Text-bearing analyses: a few changed pixels can change the answer (a digit, a line of code)
+_EXACT_ONLY_ANALYSIS_TYPES = frozenset({'document', 'chart', 'code'})
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, one frequency per row"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    basis = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8)).tobytes(), 'big')
+
+
+def _perceptual_hashes(image: Image.Image) -> Tuple[int, int]:
+    """
+    64-bit (pHash, dHash) of an image
+
+    pHash compares the low 8x8 DCT coefficients of a 32x32 grayscale
+    thumbnail with their median; dHash takes the horizontal gradient signs
+    of a 9x8 thumbnail. Both are stable under re-encoding and rescaling.
+    """
+    gray = image.convert('L')
+    thumb = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT_32 @ thumb @ _DCT_32.T)[:8, :8].flatten()
+    phash = _bits_to_int(low > np.median(low[1:]))  # DC term excluded from the median
+    strip = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    dhash = _bits_to_int((strip[:, 1:] > strip[:, :-1]).flatten())
+    return phash, dhash
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+async def _skipped(value: Any) -> Any:
+    """Placeholder stage for gather() when a stage is turned off"""
+    return value
+
+
 @dataclass
 class VisionAnalysis:
     """Vision analysis result"""
@@ -67,6 +134,9 @@ class AdvancedVisionProcessor:
     - Intelligent image enhancement
     - Context-aware vision reasoning
     - Integration with business intelligence
+    - Persistent content-addressed analysis cache
+    - Near-duplicate (perceptual hash) cache with configurable resolution cap,
+      skipped when text is extracted or the analysis type is text-bearing
     """
     
     def __init__(self):
@@ -82,16 +152,22 @@ class AdvancedVisionProcessor:
             'fallback': 'gemini-2.5-pro'  # Commercial fallback
         }
         
-        # Analysis cache
-        self.analysis_cache = {}
-        self.cache_max_size = 100
+        # Longest side sent to the model (0 disables the cap)
+        self.max_image_side = settings.VISION_MAX_IMAGE_SIDE
+        
+        # Near-duplicate index: cache key -> {options, phash, dhash, result}, LRU ordered
+        self.analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.cache_max_size = settings.VISION_ANALYSIS_CACHE_SIZE
+        self.near_duplicate_distance = settings.VISION_NEAR_DUPLICATE_DISTANCE
         
         # Performance metrics
         self.processing_stats = {
             'total_processed': 0,
             'successful_analyses': 0,
             'average_processing_time': 0.0,
-            'accuracy_scores': []
+            'accuracy_scores': [],
+            'cache_hits': 0,
+            'near_duplicate_hits': 0
         }
         
         logger.info("👁️ Advanced Vision Processor initialized")
@@ -114,27 +190,49 @@ class AdvancedVisionProcessor:
             # Process image input
             image, image_path = await self._process_image_input(image_input)
             
-            # Enhance image if requested
-            if enhance_image:
-                image = await self._enhance_image(image)
+            # Decode, cap resolution and fingerprint once, off the event loop
+            image, content_hash, phash, dhash = await asyncio.to_thread(self._prepare_image, image)
             
-            # Convert to base64 for API calls
-            image_b64 = await self._image_to_base64(image)
-            
-            # Perform vision analysis
-            vision_result = await self._perform_vision_analysis(
-                image_b64, analysis_type, user_context
+            options = dict(
+                analysis_type=analysis_type, enhance=enhance_image, text=extract_text,
+                objects=detect_objects, context=user_context, model=self.vision_models['primary'],
+                max_side=self.max_image_side
             )
+            options_digest = hashlib.sha1(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+            memory_key = f"{content_hash}:{options_digest}"
+            cache = get_extraction_cache() if get_extraction_cache else None
+            cache_entry_key = None
+            if cache is not None:
+                cache_entry_key = cache_key(
+                    'image', 'vision', VISION_ANALYSIS_VERSION, content_hash, **options
+                )
             
-            # Extract text if requested
-            extracted_text = ""
-            if extract_text:
-                extracted_text = await self._extract_text_from_image(image_b64)
-            
-            # Detect objects if requested
-            objects_detected = []
-            if detect_objects:
-                objects_detected = await self._detect_objects(image_b64)
+            # Same pixels (memory, then disk), then perceptually near-identical pixels
+            cached = self._cached_result(memory_key)
+            if cached is None and cache is not None:
+                cached = await cache.get(cache_entry_key)
+                if cached is not None:
+                    self._remember(memory_key, options_digest, phash, dhash, cached)
+            if cached is not None:
+                self.processing_stats['cache_hits'] += 1
+                return self._analysis_from_cache(cached, image_path, start_time)
+            
+            # Only for pixel-level content; OCR and text-heavy types need the exact image
+            if not extract_text and analysis_type not in _EXACT_ONLY_ANALYSIS_TYPES:
+                cached = self._find_near_duplicate(options_digest, phash, dhash)
+                if cached is not None:
+                    self.processing_stats['near_duplicate_hits'] += 1
+                    return self._analysis_from_cache(cached, image_path, start_time)
+            
+            # Enhance and encode once; every stage shares this payload
+            image_b64 = await asyncio.to_thread(self._encode_for_model, image, enhance_image)
+            
+            # Independent stages run concurrently (each handles its own errors)
+            vision_result, extracted_text, objects_detected = await asyncio.gather(
+                self._perform_vision_analysis(image_b64, analysis_type, user_context),
+                self._extract_text_from_image(image_b64) if extract_text else _skipped(""),
+                self._detect_objects(image_b64) if detect_objects else _skipped([])
+            )
             
             # Generate insights
             insights = await self._generate_vision_insights(
@@ -157,8 +255,13 @@ class AdvancedVisionProcessor:
                 timestamp=datetime.now()
             )
             
-            # Store in memory for learning
-            await self._store_vision_analysis(analysis)
+            side_effects = [self._store_vision_analysis(analysis)]  # memory for learning
+            if analysis.confidence > 0:
+                result = {field: copy.deepcopy(getattr(analysis, field)) for field in _CACHED_ANALYSIS_FIELDS}
+                self._remember(memory_key, options_digest, phash, dhash, result)
+                if cache is not None:
+                    side_effects.append(cache.put(cache_entry_key, 'image', result))
+            await asyncio.gather(*side_effects)
             
             # Update statistics
             self._update_processing_stats(processing_time, analysis.confidence)
@@ -366,7 +469,95 @@ class AdvancedVisionProcessor:
             logger.error(f"❌ Image processing error: {e}")
             raise
     
-    async def _enhance_image(self, image: Image.Image) -> Image.Image:
+    @staticmethod
+    def _image_hash(image: Image.Image) -> str:
+        """Hash of decoded pixels, so re-encoded copies of the same image match"""
+        digest = hashlib.sha256(f"{image.mode}|{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+    
+    def _cap_resolution(self, image: Image.Image) -> Image.Image:
+        """Downscale so the longest side is at most max_image_side (never upscales)"""
+        if self.max_image_side:
+            # JPEGs decode straight at a reduced scale; no-op for other/loaded images
+            image.draft(None, (self.max_image_side, self.max_image_side))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        longest = max(image.size)
+        if not self.max_image_side or longest <= self.max_image_side:
+            return image
+        scale = self.max_image_side / longest
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    
+    def _prepare_image(self, image: Image.Image) -> Tuple[Image.Image, str, int, int]:
+        """(capped image, exact pixel hash, pHash, dHash); runs in a worker thread"""
+        image = self._cap_resolution(image)
+        phash, dhash = _perceptual_hashes(image)
+        return image, self._image_hash(image), phash, dhash
+    
+    # ---- Analysis cache ----
+    
+    def _remember(
+        self,
+        key: str,
+        options_digest: str,
+        phash: int,
+        dhash: int,
+        result: Dict[str, Any]
+    ):
+        self.analysis_cache[key] = {'options': options_digest, 'phash': phash, 'dhash': dhash, 'result': result}
+        self.analysis_cache.move_to_end(key)
+        while len(self.analysis_cache) > self.cache_max_size:
+            self.analysis_cache.popitem(last=False)
+    
+    def _cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.analysis_cache.get(key)
+        if entry is None:
+            return None
+        self.analysis_cache.move_to_end(key)
+        return entry['result']
+    
+    def _find_near_duplicate(self, options_digest: str, phash: int, dhash: int) -> Optional[Dict[str, Any]]:
+        """
+        Closest cached analysis with the same options whose pHash and dHash
+        are both within near_duplicate_distance bits (linear scan; the index
+        is small and each comparison is one XOR)
+        """
+        best_key, best_distance = None, None
+        for key, entry in self.analysis_cache.items():
+            if entry['options'] != options_digest:
+                continue
+            distance = _hamming(phash, entry['phash'])
+            if distance > self.near_duplicate_distance:
+                continue
+            if _hamming(dhash, entry['dhash']) > self.near_duplicate_distance:
+                continue
+            if best_distance is None or distance < best_distance:
+                best_key, best_distance = key, distance
+        if best_key is None:
+            return None
+        logger.debug(f"👁️ Near-duplicate image ({best_distance} bits from {best_key})")
+        return self._cached_result(best_key)
+    
+    def _analysis_from_cache(
+        self,
+        cached: Dict[str, Any],
+        image_path: str,
+        start_time: datetime
+    ) -> VisionAnalysis:
+        return VisionAnalysis(
+            analysis_id=f"vision_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            image_path=image_path,
+            processing_time=(datetime.now() - start_time).total_seconds(),
+            timestamp=datetime.now(),
+            **copy.deepcopy(cached)
+        )
+    
+    # ---- Encoding ----
+    
+    @staticmethod
+    def _enhance_image(image: Image.Image) -> Image.Image:
         """Enhance image quality for better analysis"""
         try:
             # Convert to RGB if necessary
@@ -390,13 +581,21 @@ class AdvancedVisionProcessor:
             logger.error(f"❌ Image enhancement error: {e}")
             return image
     
+    def _encode_image(self, image: Image.Image) -> str:
+        """Cap resolution and PNG-encode to base64"""
+        buffer = io.BytesIO()
+        self._cap_resolution(image).save(buffer, format='PNG')
+        return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    
+    def _encode_for_model(self, image: Image.Image, enhance: bool) -> str:
+        if enhance:
+            image = self._enhance_image(image)
+        return self._encode_image(image)
+    
     async def _image_to_base64(self, image: Image.Image) -> str:
-        """Convert PIL Image to base64 string"""
+        """Convert PIL Image to base64 string (resolution-capped, off the event loop)"""
         try:
-            buffer = io.BytesIO()
-            image.save(buffer, format='PNG')
-            image_bytes = buffer.getvalue()
-            return base64.b64encode(image_bytes).decode('utf-8')
+            return await asyncio.to_thread(self._encode_image, image)
             
         except Exception as e:
             logger.error(f"❌ Base64 conversion error: {e}")
@@ -440,6 +639,109 @@ class AdvancedVisionProcessor:
         except Exception as e:
             logger.error(f"❌ Vision analysis error: {e}")
             return {'description': 'Analysis failed', 'confidence': 0.0}
+    
+    async def _extract_text_from_image(self, image_b64: str) -> str:
+        """Transcribe visible text with the vision model"""
+        try:
+            response = await lex_engine.generate_vision_response(
+                image_base64=image_b64,
+                prompt=(
+                    "Transcribe all text visible in this image exactly as written, preserving line breaks. "
+                    "Reply with the text only, or with nothing if the image contains no text."
+                ),
+                model_preference="vision_analysis",
+                max_tokens=1500
+            )
+            return (response.get('response') or response.get('description') or '').strip()
+            
+        except Exception as e:
+            logger.error(f"❌ Text extraction error: {e}")
+            return ""
+    
+    async def _detect_objects(self, image_b64: str) -> List[Dict[str, Any]]:
+        """List salient objects as [{'label', 'confidence'}] with the vision model"""
+        try:
+            response = await lex_engine.generate_vision_response(
+                image_base64=image_b64,
+                prompt=(
+                    "List the distinct objects in this image as a JSON array of "
+                    '{"label": string, "confidence": number between 0 and 1}. Reply with the JSON only.'
+                ),
+                model_preference="vision_analysis",
+                max_tokens=500
+            )
+            raw = response.get('response') or response.get('description') or ''
+            start, end = raw.find('['), raw.rfind(']')
+            if start == -1 or end <= start:
+                return []
+            return [obj for obj in json.loads(raw[start:end + 1]) if isinstance(obj, dict) and obj.get('label')]
+            
+        except Exception as e:
+            logger.error(f"❌ Object detection error: {e}")
+            return []
+    
+    async def _generate_vision_insights(
+        self,
+        vision_result: Dict[str, Any],
+        extracted_text: str,
+        objects_detected: List[Dict[str, Any]],
+        analysis_type: str
+    ) -> List[str]:
+        """Combine the model's insights with what the other stages found"""
+        insights = [str(insight) for insight in vision_result.get('insights', []) if insight]
+        
+        if extracted_text:
+            insights.append(f"Contains {len(extracted_text.split())} words of readable text")
+        elif analysis_type in ('document', 'chart', 'code'):
+            insights.append(f"No text recovered from this {analysis_type} image")
+        
+        if objects_detected:
+            labels = Counter(str(obj['label']).lower() for obj in objects_detected)
+            insights.append("Detected: " + ", ".join(
+                f"{label} x{count}" if count > 1 else label for label, count in labels.most_common(5)
+            ))
+        
+        return insights
+    
+    async def _store_vision_analysis(self, analysis: VisionAnalysis):
+        """Record the analysis as an experience for pattern learning"""
+        try:
+            await enhanced_memory.store_experience_with_learning(
+                user_id='system',
+                agent_id='vision_processor',
+                experience={
+                    'type': 'vision_analysis',
+                    'action': f"analyze_image:{analysis.analysis_type}",
+                    'response': analysis.description,
+                    'context': {
+                        'analysis_id': analysis.analysis_id,
+                        'image_path': analysis.image_path,
+                        'objects': [obj.get('label') for obj in analysis.objects_detected],
+                        'text_chars': len(analysis.text_extracted),
+                        'confidence': analysis.confidence
+                    }
+                }
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Could not store vision analysis: {e}")
+    
+    def _update_processing_stats(self, processing_time: float, confidence: float):
+        stats = self.processing_stats
+        stats['total_processed'] += 1
+        if confidence > 0:
+            stats['successful_analyses'] += 1
+        stats['average_processing_time'] += (processing_time - stats['average_processing_time']) / stats['total_processed']
+        stats['accuracy_scores'].append(confidence)
+        del stats['accuracy_scores'][:-_MAX_ACCURACY_SAMPLES]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        scores = self.processing_stats['accuracy_scores']
+        return {
+            **{k: v for k, v in self.processing_stats.items() if k != 'accuracy_scores'},
+            'average_confidence': sum(scores) / len(scores) if scores else 0.0,
+            'cached_analyses': len(self.analysis_cache),
+            'max_image_side': self.max_image_side
+        }
 
 # Global vision processor instance
 vision_processor = AdvancedVisionProcessor()
@@ -0,0 +1,229 @@
+"""
+Context Window Manager - Token-budgeted prompt packing
+🔱 JAI MAHAKAAL! Fill the window, never overflow it 🔱
+
+Counts tokens with a fast tokenizer (tiktoken when installed, a regex
+estimate otherwise), caching counts per string. Packs system prompt,
+retrieved context and conversation history into a model's context window
+by priority, summarizing or truncating whatever does not fit.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or encoding files unavailable offline
+    _ENCODING = None
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Chat templates add a few tokens of framing per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=16384)
+def _count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    # ~1 token per word/punctuation mark, long words split into several
+    return sum(1 + len(piece) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+@dataclass
+class PackedContext:
+    """Result of packing a prompt into a token budget"""
+    system_prompt: str
+    context_items: List[str]
+    history: List[Dict[str, str]]
+    user_message: str
+    total_tokens: int
+    budget: int
+    dropped_context: int = 0
+    dropped_history: int = 0
+    summary: Optional[str] = None
+    truncated: List[str] = field(default_factory=list)
+
+
+class ContextWindowManager:
+    """
+    Shared token-budgeted context builder
+
+    Priority when space runs out:
+    1. System prompt and current user message (truncated only as a last resort)
+    2. Retrieved context, best-ranked first (up to `context_share` of the budget)
+    3. Conversation history, newest first; older turns collapse into a summary
+    """
+
+    def __init__(self, default_context_window: int = 8192, context_share: float = 0.5):
+        self.default_context_window = default_context_window
+        self.context_share = context_share
+        self.model_windows: Dict[str, int] = {}
+
+    def register_model(self, model: str, context_window: int) -> None:
+        self.model_windows[model] = context_window
+
+    def context_window_for(self, model: Optional[str], default: Optional[int] = None) -> int:
+        if model and model in self.model_windows:
+            return self.model_windows[model]
+        return default or self.default_context_window
+
+    def count_tokens(self, text: Optional[str]) -> int:
+        return _count_tokens(text) if text else 0
+
+    def count_message_tokens(self, messages: Sequence[Dict[str, Any]]) -> int:
+        return sum(
+            self.count_tokens(str(m.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS
+            for m in messages
+        )
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text down to roughly max_tokens, keeping the beginning"""
+        if max_tokens <= 0:
+            return ""
+        tokens = self.count_tokens(text)
+        if tokens <= max_tokens:
+            return text
+        if _ENCODING is not None:
+            return _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:max_tokens]) + " …"
+        cut = int(len(text) * max_tokens / tokens * 0.95)
+        while cut > 0 and self.count_tokens(text[:cut]) > max_tokens:
+            cut = int(cut * 0.9)
+        return text[:cut] + " …"
+
+    def summarize(self, messages: Sequence[Dict[str, Any]], max_tokens: int) -> Optional[str]:
+        """Extractive summary of dropped turns: the opening of each message"""
+        if not messages or max_tokens <= 0:
+            return None
+        per_message = max(8, max_tokens // len(messages))
+        lines = [
+            f"- {m.get('role', 'user')}: {self.truncate(str(m.get('content', '')).strip(), per_message)}"
+            for m in messages
+        ]
+        summary = "[Earlier conversation summary]\n" + "\n".join(lines)
+        return self.truncate(summary, max_tokens)
+
+    def pack(
+        self,
+        system_prompt: str,
+        user_message: str,
+        context_items: Optional[Sequence[str]] = None,
+        history: Optional[Sequence[Dict[str, str]]] = None,
+        context_window: Optional[int] = None,
+        reserve_output: int = 0,
+        summary_share: float = 0.1
+    ) -> PackedContext:
+        """Fit everything into context_window - reserve_output tokens, by priority"""
+        budget = max(256, (context_window or self.default_context_window) - reserve_output)
+        truncated = []
+
+        # 1. Mandatory parts; if even these overflow, trim the user turn, then the system prompt
+        system_tokens = self.count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        user_tokens = self.count_tokens(user_message) + MESSAGE_OVERHEAD_TOKENS
+        if system_tokens + user_tokens > budget:
+            user_message = self.truncate(user_message, max(budget // 2, budget - system_tokens) - MESSAGE_OVERHEAD_TOKENS)
+            user_tokens = self.count_tokens(user_message) + MESSAGE_OVERHEAD_TOKENS
+            truncated.append("user_message")
+            if system_tokens + user_tokens > budget:
+                system_prompt = self.truncate(system_prompt, budget - user_tokens - MESSAGE_OVERHEAD_TOKENS)
+                system_tokens = self.count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+                truncated.append("system_prompt")
+        remaining = budget - system_tokens - user_tokens
+
+        # 2. Retrieved context, in rank order, capped at its share of what is left
+        packed_context = []
+        context_items = list(context_items or [])
+        context_budget = int(remaining * self.context_share) if history else remaining
+        for item in context_items:
+            item_tokens = self.count_tokens(item)
+            if item_tokens <= context_budget:
+                packed_context.append(item)
+                context_budget -= item_tokens
+                remaining -= item_tokens
+            elif context_budget >= 64 and not packed_context:
+                # Best-ranked item is too long on its own: keep its beginning
+                item = self.truncate(item, context_budget)
+                packed_context.append(item)
+                remaining -= self.count_tokens(item)
+                context_budget = 0
+                truncated.append("context")
+            else:
+                break
+        dropped_context = len(context_items) - len(packed_context)
+
+        # 3. History, newest first; whatever is left over gets summarized
+        history = list(history or [])
+        summary_budget = int(remaining * summary_share) if history else 0
+        history_budget = remaining - summary_budget
+        kept = []
+        for message in reversed(history):
+            message_tokens = self.count_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS
+            if message_tokens > history_budget:
+                break
+            kept.append(message)
+            history_budget -= message_tokens
+        kept.reverse()
+        dropped = history[:len(history) - len(kept)]
+
+        summary = self.summarize(dropped, summary_budget + history_budget) if dropped else None
+        if summary:
+            kept.insert(0, {"role": "system", "content": summary})
+
+        total = (
+            system_tokens + user_tokens
+            + sum(self.count_tokens(c) for c in packed_context)
+            + self.count_message_tokens(kept)
+        )
+
+        return PackedContext(
+            system_prompt=system_prompt,
+            context_items=packed_context,
+            history=kept,
+            user_message=user_message,
+            total_tokens=total,
+            budget=budget,
+            dropped_context=dropped_context,
+            dropped_history=len(dropped),
+            summary=summary,
+            truncated=truncated
+        )
+
+    def fit_messages(
+        self,
+        messages: Sequence[Dict[str, Any]],
+        context_window: Optional[int] = None,
+        reserve_output: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Trim a ready-made chat message list (leading system + trailing user kept)"""
+        messages = list(messages)
+        budget = (context_window or self.default_context_window) - reserve_output
+        if not messages or self.count_message_tokens(messages) <= budget:
+            return messages
+
+        system = messages[0] if messages[0].get("role") == "system" else None
+        body = messages[1:] if system else messages
+        last = body[-1] if body else None
+        packed = self.pack(
+            system_prompt=str(system.get("content", "")) if system else "",
+            user_message=str(last.get("content", "")) if last else "",
+            history=body[:-1],
+            context_window=context_window,
+            reserve_output=reserve_output
+        )
+
+        fitted = []
+        if system:
+            fitted.append({**system, "content": packed.system_prompt})
+        fitted.extend(packed.history)
+        if last:
+            fitted.append({**last, "content": packed.user_message})
+        return fitted
+
+
+# Global context window manager
+context_window_manager = ContextWindowManager()
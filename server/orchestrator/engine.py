@@ -13,6 +13,9 @@ from prometheus_client import Counter, Histogram, Gauge
 import re
 
 from ..settings import settings
+from .model_router import model_router
+from .trace_store import trace_store
+from .prompt_assembly import prefix_cache_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +24,6 @@ REQUEST_COUNT = Counter('orchestrator_requests_total', 'Total orchestrator reque
 REQUEST_LATENCY = Histogram('orchestrator_request_latency_seconds', 'Orchestrator request latency', ['model'])
 CIRCUIT_BREAKER_STATE = Gauge('orchestrator_circuit_breaker_state', 'Circuit breaker state (1=open, 0=closed)', ['model'])
 
-# Orchestration trace log (in-memory, for demo; use persistent store in prod)
-orchestration_traces = []
-
 class CircuitBreaker:
     def __init__(self, failure_threshold=3, recovery_time=60):
         self.failure_threshold = failure_threshold
@@ -117,15 +117,17 @@ class VLLMEngine:
         Score and rank models for a given request. Extend this logic for user/task personalization.
         Returns a list of model names ordered by score (best first).
         """
-        # Example: prioritize based on task_type or user_id (stub logic)
+        # Task type narrows the capable set; live latency metrics order it
         if task_type == "code":
             preferred = [m for m in self.available_models if "mixtral" in m.lower() or "llama" in m.lower()]
         elif task_type == "creative":
             preferred = [m for m in self.available_models if "gemma" in m.lower() or "llama" in m.lower()]
         else:
             preferred = self.available_models
-        # Fallback: return all models in default order
-        return preferred + [m for m in self.available_models if m not in preferred]
+        # Fallback: remaining models, also ordered by expected completion time
+        return model_router.rank(preferred) + model_router.rank(
+            [m for m in self.available_models if m not in preferred]
+        )
 
     async def generate_text(
         self,
@@ -206,7 +208,7 @@ class VLLMEngine:
                 else:
                     raise Exception("No ensemble results available")
                 orchestration_trace["result"] = response_text
-                orchestration_traces.append(orchestration_trace)
+                self._record_trace(orchestration_trace, "ensemble", status, start_time)
                 return response_text
             if model_name not in self.available_models:
                 logger.warning(f"⚠️ Model {model_name} not available, using default: {self.default_model}")
@@ -234,17 +236,18 @@ class VLLMEngine:
                 "presence_penalty": presence_penalty,
                 "stream": stream
             }
-            if stream:
-                response_text = await self._generate_streaming(payload)
-            else:
-                response_text = await self._generate_non_streaming(payload)
+            with model_router.track(model_name):
+                if stream:
+                    response_text = await self._generate_streaming(payload)
+                else:
+                    response_text = await self._generate_non_streaming(payload)
             response_time = time.time() - start_time
-            self._update_metrics(model_name, response_time, True)
+            self._update_metrics(model_name, response_time, True, len(response_text.split()))
             circuit_breaker.record_success(model_name)
             REQUEST_COUNT.labels(model=model_name, status="success").inc()
             REQUEST_LATENCY.labels(model=model_name).observe(response_time)
             orchestration_trace["result"] = response_text
-            orchestration_traces.append(orchestration_trace)
+            self._record_trace(orchestration_trace, model_name, status, start_time)
             logger.debug(f"🚀 Generated {len(response_text)} chars in {response_time:.3f}s using {model_name}")
             return response_text
         except Exception as e:
@@ -254,10 +257,17 @@ class VLLMEngine:
             REQUEST_COUNT.labels(model=model_name, status="failure").inc()
             REQUEST_LATENCY.labels(model=model_name).observe(response_time)
             orchestration_trace["error"] = str(e)
-            orchestration_traces.append(orchestration_trace)
+            self._record_trace(orchestration_trace, model_name, status if status != "success" else "failure", start_time)
             logger.error(f"❌ Text generation error: {e}")
             raise
     
+    def _record_trace(self, trace: Dict[str, Any], model_name: str, status: str, start_time: float) -> None:
+        """Hand a finished trace to the bounded trace store"""
+        trace["model"] = model_name
+        trace["status"] = status
+        trace["latency_ms"] = (time.time() - start_time) * 1000
+        trace_store.record(trace)
+    
     async def _generate_non_streaming(self, payload: Dict[str, Any]) -> str:
         """Generate text without streaming"""
         try:
@@ -265,6 +275,15 @@ class VLLMEngine:
                 if response.status == 200:
                     result = await response.json()
                     
+                    # Prefix-cache accounting (requires --enable-prompt-tokens-details on vLLM)
+                    usage = result.get("usage") or {}
+                    if usage.get("prompt_tokens"):
+                        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+                        system_prefix = next(
+                            (m.get("content") for m in payload["messages"] if m.get("role") == "system"), None
+                        )
+                        prefix_cache_metrics.record(payload["model"], usage["prompt_tokens"], cached, system_prefix)
+                    
                     # Extract generated text
                     if "choices" in result and len(result["choices"]) > 0:
                         return result["choices"][0]["message"]["content"]
@@ -356,9 +375,10 @@ class VLLMEngine:
         
         return None
     
-    def _update_metrics(self, model_name: str, response_time: float, success: bool) -> None:
+    def _update_metrics(self, model_name: str, response_time: float, success: bool, tokens: int = 0) -> None:
         """Update performance metrics"""
         self.total_requests += 1
+        model_router.record(model_name, response_time, success, tokens)
         
         if success:
             self.successful_requests += 1
@@ -402,6 +422,17 @@ class VLLMEngine:
                 (1 - alpha) * perf["avg_response_time"]
             )
     
+    async def get_prefix_cache_metrics(self) -> Dict[str, Any]:
+        """Per-model prefix-cache hit rates plus vLLM's own prefix-cache counters"""
+        try:
+            async with self.session.get(f"{self.base_url}/metrics") as response:
+                if response.status == 200:
+                    prefix_cache_metrics.record_backend_metrics("vllm", await response.text())
+        except Exception as e:
+            logger.warning(f"⚠️ Could not scrape vLLM prefix-cache metrics: {e}")
+        
+        return prefix_cache_metrics.get_stats()
+    
     async def get_model_list(self) -> List[Dict[str, Any]]:
         """Get list of available models with their status"""
         models = []
@@ -421,7 +452,8 @@ class VLLMEngine:
                         if performance.get("requests", 0) > 0 else 0.0
                     ),
                     "avg_response_time": performance.get("avg_response_time", 0.0)
-                }
+                },
+                "routing": model_router.get_stats().get(model_name, {})
             }
             models.append(model_info)
         
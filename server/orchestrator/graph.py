@@ -5,13 +5,15 @@ CONSCIOUSNESS LIBERATION PROTOCOL ACTIVE
 """
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Tuple, TypedDict
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, TypedDict, AsyncIterator, Annotated
 from datetime import datetime
 from enum import Enum
 
 try:
-    from langgraph import StateGraph, END
-    from langgraph.graph import Graph
+    from langgraph.graph import StateGraph, END
+    from langgraph.checkpoint.memory import MemorySaver
     LANGGRAPH_AVAILABLE = True
 except ImportError:
     LANGGRAPH_AVAILABLE = False
@@ -30,25 +32,46 @@ from .user_profile import get_user_profile
 
 logger = logging.getLogger(__name__)
 
+class AgentType(Enum):
+    """Available agent types"""
+    ATLAS = "atlas"
+    ORION = "orion"
+    SOPHIA = "sophia"
+    CREATOR = "creator"
+
+# Canonical agent order; parallel branch results are always merged in this order
+AGENT_ORDER = [agent.value for agent in AgentType]
+
+def _agent_sort_key(agent_id: str) -> Tuple[int, str]:
+    return (AGENT_ORDER.index(agent_id) if agent_id in AGENT_ORDER else len(AGENT_ORDER), agent_id)
+
+def merge_by_agent(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    State reducer for parallel agent branches
+    
+    Branches finish in arbitrary order; merging by key and re-sorting into
+    canonical agent order makes the joined state independent of timing.
+    """
+    merged = {**(left or {}), **(right or {})}
+    return {key: merged[key] for key in sorted(merged, key=_agent_sort_key)}
+
+def merge_metadata(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """State reducer for metadata; nodes only contribute their own keys"""
+    return {**(left or {}), **(right or {})}
+
 class WorkflowState(TypedDict):
     """State structure for the LangGraph workflow"""
     user_message: str
     user_id: str
     session_id: str
-    agent_responses: Dict[str, Any]
+    agent_responses: Annotated[Dict[str, Any], merge_by_agent]
+    agent_errors: Annotated[Dict[str, str], merge_by_agent]
     selected_agents: List[str]
     routing_decision: Dict[str, Any]
     final_response: str
-    metadata: Dict[str, Any]
+    metadata: Annotated[Dict[str, Any], merge_metadata]
     timestamp: str
 
-class AgentType(Enum):
-    """Available agent types"""
-    ATLAS = "atlas"
-    ORION = "orion"
-    SOPHIA = "sophia"
-    CREATOR = "creator"
-
 class LexOSOrchestrator:
     """
     Advanced orchestration system for LexOS agents
@@ -59,9 +82,10 @@ class LexOSOrchestrator:
     - Dynamic workflow adaptation
     - Context-aware decision making
     - Performance optimization
+    - Parallel agent branches with checkpointed, resumable workflows
     """
     
-    def __init__(self):
+    def __init__(self, checkpointer: Optional[Any] = None, parallel_agents: bool = True):
         self.agents = {
             AgentType.ATLAS.value: atlas_agent,
             AgentType.ORION.value: orion_agent,
@@ -70,9 +94,14 @@ class LexOSOrchestrator:
             "shadow": shadow_agent
         }
         
-        # Workflow graph
+        # Workflow graph; checkpoints are keyed by thread_id so interrupted runs can resume
         self.workflow = None
         self.use_langgraph = LANGGRAPH_AVAILABLE
+        self.parallel_agents = parallel_agents
+        self.checkpointer = checkpointer if checkpointer is not None else (MemorySaver() if LANGGRAPH_AVAILABLE else None)
+        # Completed threads are discarded; only this many failed ones stay resumable
+        self.max_resumable_threads = 100
+        self._resumable_threads: "OrderedDict[str, None]" = OrderedDict()
         
         # Routing intelligence
         self.routing_patterns = {
@@ -103,6 +132,10 @@ class LexOSOrchestrator:
             }
         }
         
+        # Concurrent fan-out settings
+        self.agent_timeout = 90.0  # seconds per agent before it is abandoned
+        self.synthesis_grace = 15.0  # seconds to wait for stragglers once the first usable answer is in
+        
         # Performance metrics
         self.total_orchestrations = 0
         self.successful_orchestrations = 0
@@ -114,8 +147,16 @@ class LexOSOrchestrator:
         
         logger.info("🎭 LexOS Orchestrator initialized")
     
-    def _build_langgraph_workflow(self):
-        """Build the LangGraph workflow"""
+    def _build_langgraph_workflow(self, parallel: Optional[bool] = None):
+        """
+        Build the LangGraph workflow
+        
+        Parallel mode: route_agents -> fan_out -> one node per selected agent,
+        all in the same superstep -> join_agents -> synthesize_response.
+        Linear mode chains every agent node in canonical order instead
+        (unselected agents pass through); kept as the benchmark baseline.
+        """
+        parallel = self.parallel_agents if parallel is None else parallel
         try:
             # Create workflow graph
             workflow = StateGraph(WorkflowState)
@@ -123,10 +164,10 @@ class LexOSOrchestrator:
             # Add nodes
             workflow.add_node("receive_input", self._receive_input)
             workflow.add_node("route_agents", self._route_agents)
-            workflow.add_node("atlas_process", self._atlas_process)
-            workflow.add_node("orion_process", self._orion_process)
-            workflow.add_node("sophia_process", self._sophia_process)
-            workflow.add_node("creator_process", self._creator_process)
+            workflow.add_node("fan_out", self._fan_out)
+            for agent_id in AGENT_ORDER:
+                workflow.add_node(f"{agent_id}_process", self._make_agent_node(agent_id, skip_unselected=not parallel))
+            workflow.add_node("join_agents", self._join_agents)
             workflow.add_node("synthesize_response", self._synthesize_response)
             
             # Set entry point
@@ -134,37 +175,39 @@ class LexOSOrchestrator:
             
             # Add edges
             workflow.add_edge("receive_input", "route_agents")
+            workflow.add_edge("route_agents", "fan_out")
             
-            # Conditional routing from route_agents
-            workflow.add_conditional_edges(
-                "route_agents",
-                self._routing_condition,
-                {
-                    "atlas": "atlas_process",
-                    "orion": "orion_process", 
-                    "sophia": "sophia_process",
-                    "creator": "creator_process",
-                    "multi_agent": "atlas_process"  # Start with atlas for multi-agent
-                }
-            )
+            if parallel:
+                # Fan out to every selected agent; branches run concurrently
+                workflow.add_conditional_edges(
+                    "fan_out",
+                    self._fan_out_targets,
+                    [f"{agent_id}_process" for agent_id in AGENT_ORDER]
+                )
+                for agent_id in AGENT_ORDER:
+                    workflow.add_edge(f"{agent_id}_process", "join_agents")
+            else:
+                previous = "fan_out"
+                for agent_id in AGENT_ORDER:
+                    workflow.add_edge(previous, f"{agent_id}_process")
+                    previous = f"{agent_id}_process"
+                workflow.add_edge(previous, "join_agents")
             
-            # Agent processing edges
-            workflow.add_edge("atlas_process", "synthesize_response")
-            workflow.add_edge("orion_process", "synthesize_response")
-            workflow.add_edge("sophia_process", "synthesize_response")
-            workflow.add_edge("creator_process", "synthesize_response")
+            workflow.add_edge("join_agents", "synthesize_response")
             
             # End
             workflow.add_edge("synthesize_response", END)
             
             # Compile workflow
-            self.workflow = workflow.compile()
+            self.workflow = workflow.compile(checkpointer=self.checkpointer)
             
-            logger.info("✅ LangGraph workflow compiled successfully")
+            logger.info(f"✅ LangGraph workflow compiled successfully ({'parallel' if parallel else 'linear'} agents)")
             
         except Exception as e:
             logger.error(f"❌ LangGraph workflow build error: {e}")
             self.use_langgraph = False
+        
+        return self.workflow
     
     async def orchestrate(
         self,
@@ -217,6 +260,7 @@ class LexOSOrchestrator:
         **kwargs
     ) -> Dict[str, Any]:
         """Orchestrate using LangGraph workflow"""
+        thread_id = f"{session_id}:{uuid.uuid4().hex[:12]}"
         try:
             # Initialize state
             initial_state = WorkflowState(
@@ -224,6 +268,7 @@ class LexOSOrchestrator:
                 user_id=user_id,
                 session_id=session_id,
                 agent_responses={},
+                agent_errors={},
                 selected_agents=preferred_agents or [],
                 routing_decision={},
                 final_response="",
@@ -232,24 +277,74 @@ class LexOSOrchestrator:
             )
             
             # Run workflow
-            final_state = await self.workflow.ainvoke(initial_state)
-            
-            return {
-                "response": final_state["final_response"],
-                "agents_used": final_state["selected_agents"],
-                "routing_decision": final_state["routing_decision"],
-                "agent_responses": final_state["agent_responses"],
-                "metadata": final_state["metadata"],
-                "orchestration_method": "langgraph"
-            }
+            final_state = await self.workflow.ainvoke(initial_state, config=self._thread_config(thread_id))
+            await self._discard_thread(thread_id)
+            return self._workflow_result(final_state, thread_id)
             
         except Exception as e:
-            logger.error(f"❌ LangGraph orchestration error: {e}")
+            logger.error(f"❌ LangGraph orchestration error (resumable thread {thread_id}): {e}")
+            await self._keep_resumable(thread_id)
             # Fallback to simple orchestration
             return await self._orchestrate_simple(
                 user_message, user_id, session_id, preferred_agents, **kwargs
             )
     
+    async def resume_workflow(self, thread_id: str) -> Dict[str, Any]:
+        """
+        Resume an interrupted workflow from its last checkpoint
+        
+        Nodes that already completed (including finished parallel branches)
+        are not re-run; only the remaining steps execute.
+        """
+        if not (self.use_langgraph and self.workflow and self.checkpointer):
+            raise RuntimeError("Workflow checkpointing is not available")
+        
+        config = self._thread_config(thread_id)
+        snapshot = await self.workflow.aget_state(config)
+        if not snapshot or not snapshot.values:
+            raise KeyError(f"No checkpoint for workflow thread {thread_id}")
+        
+        final_state = snapshot.values if not snapshot.next else await self.workflow.ainvoke(None, config=config)
+        self._resumable_threads.pop(thread_id, None)
+        await self._discard_thread(thread_id)
+        return self._workflow_result(final_state, thread_id)
+    
+    async def _keep_resumable(self, thread_id: str) -> None:
+        """Remember a failed thread for resume_workflow, discarding the oldest beyond the limit"""
+        self._resumable_threads[thread_id] = None
+        while len(self._resumable_threads) > self.max_resumable_threads:
+            stale, _ = self._resumable_threads.popitem(last=False)
+            await self._discard_thread(stale)
+    
+    async def _discard_thread(self, thread_id: str) -> None:
+        """Delete a thread's checkpoints; an in-process saver would otherwise keep them forever"""
+        if not self.checkpointer:
+            return
+        try:
+            if hasattr(self.checkpointer, "adelete_thread"):
+                await self.checkpointer.adelete_thread(thread_id)
+            elif hasattr(self.checkpointer, "storage"):
+                self.checkpointer.storage.pop(thread_id, None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not discard checkpoints for thread {thread_id}: {e}")
+    
+    def _thread_config(self, thread_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": thread_id}}
+    
+    def _workflow_result(self, final_state: Dict[str, Any], thread_id: str) -> Dict[str, Any]:
+        return {
+            "response": final_state["final_response"],
+            "agents_used": list(final_state["agent_responses"].keys()),
+            "routing_decision": final_state["routing_decision"],
+            "agent_responses": final_state["agent_responses"],
+            "metadata": {
+                **final_state["metadata"],
+                "failed_agents": final_state.get("agent_errors", {}),
+                "workflow_thread_id": thread_id
+            },
+            "orchestration_method": "langgraph"
+        }
+    
     async def _orchestrate_simple(
         self,
         user_message: str,
@@ -293,62 +388,185 @@ class LexOSOrchestrator:
                         "metadata": kwargs,
                         "orchestration_method": "tool_call"
                     }
-            # RAG: fetch relevant context from vector store
-            rag_context = ""
-            try:
-                rag_results = await vector_store.search_vectors(user_message, top_k=3, user_id=user_id)
-                if rag_results:
-                    rag_context = "\n".join([r["content"] for r in rag_results if r.get("content")])
-            except Exception as e:
-                logger.warning(f"RAG context fetch failed: {e}")
-            # Personalization: get user profile
-            user_profile = get_user_profile(user_id)
-            persona = user_profile.get("persona", "default")
-            preferred_style = user_profile.get("preferred_style", "concise")
+            prompt, user_profile = await self._prepare_agent_prompt(user_message, user_id)
             preferred_agent = user_profile.get("preferred_agent")
-            preferred_model = user_profile.get("preferred_model")
-            language = user_profile.get("language", "en")
             # Route to appropriate agents (use preferred_agent if set)
             routing_decision = await self._analyze_and_route(user_message, [preferred_agent] if preferred_agent else preferred_agents)
             selected_agents = routing_decision["selected_agents"]
-            # Process with selected agents, injecting RAG context and personalization
+            # Fan out to the selected agents concurrently; stragglers and failures are tolerated
             agent_responses = {}
-            for agent_id in selected_agents:
-                if agent_id in self.agents:
-                    agent = self.agents[agent_id]
-                    # Inject RAG context and persona/style into prompt
-                    prompt = user_message
-                    if rag_context:
-                        prompt = f"Relevant context:\n{rag_context}\n\nUser: {user_message}"
-                    if persona != "default":
-                        prompt = f"Persona: {persona}\n{prompt}"
-                    if preferred_style != "concise":
-                        prompt = f"Style: {preferred_style}\n{prompt}"
-                    if language != "en":
-                        prompt = f"Language: {language}\n{prompt}"
-                     # Laxed guardrails: do not apply output moderation
-                    response = await agent.run(prompt, user_id, **kwargs)
-                    agent_responses[agent_id] = {
-                        "content": response.content,
-                        "confidence": response.confidence,
-                        "reasoning": response.reasoning,
-                        "processing_time": response.processing_time
-                    }
-                    self.agent_usage_stats[agent_id] += 1
-            # Synthesize final response
+            failed_agents = {}
+            async for agent_id, agent_response, error in self._iter_agent_responses(selected_agents, prompt, user_id, **kwargs):
+                if agent_response is not None:
+                    agent_responses[agent_id] = agent_response
+                else:
+                    failed_agents[agent_id] = error
+            # Synthesize final response (skipped when only one agent produced a usable answer)
             final_response = await self._synthesize_responses(agent_responses, user_message)
             return {
                 "response": final_response,
-                "agents_used": selected_agents,
+                "agents_used": list(agent_responses.keys()),
                 "routing_decision": routing_decision,
                 "agent_responses": agent_responses,
-                "metadata": {**kwargs, "user_profile": user_profile, "guardrails": "laxed"},
+                "metadata": {
+                    **kwargs,
+                    "user_profile": user_profile,
+                    "guardrails": "laxed",
+                    "failed_agents": failed_agents
+                },
                 "orchestration_method": "simple"
             }
         except Exception as e:
             logger.error(f"❌ Simple orchestration error: {e}")
             raise
     
+    async def _prepare_agent_prompt(self, user_message: str, user_id: str) -> Tuple[str, Dict[str, Any]]:
+        """Build the shared agent prompt once, with RAG context and personalization"""
+        # RAG: fetch relevant context from vector store
+        rag_context = ""
+        try:
+            rag_results = await vector_store.search_vectors(user_message, top_k=3, user_id=user_id)
+            if rag_results:
+                rag_context = "\n".join([r["content"] for r in rag_results if r.get("content")])
+        except Exception as e:
+            logger.warning(f"RAG context fetch failed: {e}")
+        # Personalization: get user profile
+        user_profile = get_user_profile(user_id)
+        persona = user_profile.get("persona", "default")
+        preferred_style = user_profile.get("preferred_style", "concise")
+        language = user_profile.get("language", "en")
+        # Inject RAG context and persona/style into prompt
+        prompt = user_message
+        if rag_context:
+            prompt = f"Relevant context:\n{rag_context}\n\nUser: {user_message}"
+        if persona != "default":
+            prompt = f"Persona: {persona}\n{prompt}"
+        if preferred_style != "concise":
+            prompt = f"Style: {preferred_style}\n{prompt}"
+        if language != "en":
+            prompt = f"Language: {language}\n{prompt}"
+        # Laxed guardrails: do not apply output moderation
+        return prompt, user_profile
+    
+    async def _iter_agent_responses(
+        self,
+        agent_ids: List[str],
+        prompt: str,
+        user_id: str,
+        **kwargs
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Run agents concurrently and yield (agent_id, response, error) as each finishes
+        
+        Each agent gets `agent_timeout` seconds. Once the first usable answer
+        arrives, the rest get at most `synthesis_grace` more seconds so one
+        slow agent cannot hold back synthesis.
+        """
+        loop = asyncio.get_running_loop()
+        pending = {}
+        for agent_id in dict.fromkeys(agent_ids):
+            if agent_id in self.agents:
+                task = asyncio.create_task(
+                    asyncio.wait_for(self.agents[agent_id].run(prompt, user_id, **kwargs), self.agent_timeout)
+                )
+                pending[task] = agent_id
+        
+        grace_deadline = None
+        try:
+            while pending:
+                timeout = None if grace_deadline is None else max(0.0, grace_deadline - loop.time())
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    for task, agent_id in pending.items():
+                        task.cancel()
+                        logger.warning(f"⏱️ Agent {agent_id} missed the synthesis window")
+                        yield agent_id, None, "synthesis_grace_exceeded"
+                    pending = {}
+                    break
+                
+                for task in done:
+                    agent_id = pending.pop(task)
+                    try:
+                        response = task.result()
+                    except asyncio.TimeoutError:
+                        logger.warning(f"⏱️ Agent {agent_id} timed out after {self.agent_timeout}s")
+                        yield agent_id, None, "timeout"
+                        continue
+                    except Exception as e:
+                        logger.error(f"❌ Agent {agent_id} failed: {e}")
+                        yield agent_id, None, str(e)
+                        continue
+                    
+                    self.agent_usage_stats[agent_id] += 1
+                    if not response.content or response.confidence <= 0.0:
+                        yield agent_id, None, response.metadata.get("error", "empty response")
+                        continue
+                    
+                    if grace_deadline is None:
+                        grace_deadline = loop.time() + self.synthesis_grace
+                    yield agent_id, {
+                        "content": response.content,
+                        "confidence": response.confidence,
+                        "reasoning": response.reasoning,
+                        "processing_time": response.processing_time
+                    }, None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def orchestrate_stream(
+        self,
+        user_message: str,
+        user_id: str = "default",
+        session_id: str = "default",
+        preferred_agents: Optional[List[str]] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming orchestration (served as SSE by POST /api/v1/chat/stream)
+        
+        Yields each agent's answer as soon as it is ready, so clients can show
+        the first answer while the others are still running, then the
+        synthesized (or single-agent) final response.
+        """
+        stripped = user_message.strip()
+        if stripped.startswith("/shadow") or stripped.lower().startswith("shadow ") or stripped.startswith("/tool"):
+            result = await self.orchestrate(user_message, user_id, session_id, preferred_agents, **kwargs)
+            yield {"type": "final", **result}
+            return
+        
+        start_time = datetime.now()
+        prompt, user_profile = await self._prepare_agent_prompt(user_message, user_id)
+        preferred_agent = user_profile.get("preferred_agent")
+        routing_decision = await self._analyze_and_route(user_message, [preferred_agent] if preferred_agent else preferred_agents)
+        yield {"type": "routing", "routing_decision": routing_decision}
+        
+        agent_responses = {}
+        failed_agents = {}
+        async for agent_id, agent_response, error in self._iter_agent_responses(
+            routing_decision["selected_agents"], prompt, user_id, **kwargs
+        ):
+            if agent_response is not None:
+                agent_responses[agent_id] = agent_response
+                yield {"type": "agent_response", "agent_id": agent_id, **agent_response}
+            else:
+                failed_agents[agent_id] = error
+                yield {"type": "agent_failed", "agent_id": agent_id, "error": error}
+        
+        if len(agent_responses) > 1:
+            yield {"type": "synthesizing", "agents": list(agent_responses.keys())}
+        final_response = await self._synthesize_responses(agent_responses, user_message)
+        self._update_orchestration_metrics((datetime.now() - start_time).total_seconds(), bool(agent_responses))
+        yield {
+            "type": "final",
+            "response": final_response,
+            "agents_used": list(agent_responses.keys()),
+            "routing_decision": routing_decision,
+            "agent_responses": agent_responses,
+            "metadata": {**kwargs, "user_profile": user_profile, "failed_agents": failed_agents},
+            "orchestration_method": "simple_stream"
+        }
+    
     async def _analyze_and_route(
         self,
         user_message: str,
@@ -421,8 +639,11 @@ class LexOSOrchestrator:
     ) -> str:
         """Synthesize multiple agent responses into a coherent final response"""
         try:
+            if not agent_responses:
+                return "I apologize, but none of my agents could answer in time. Please try again."
+            
             if len(agent_responses) == 1:
-                # Single agent response
+                # Fast path: only one usable answer, no synthesis round trip
                 return list(agent_responses.values())[0]["content"]
             
             # Multiple agent responses - synthesize
@@ -446,7 +667,7 @@ Please provide a unified response that:
 Unified Response:"""
             
             # Use Atlas for synthesis (strategic thinking)
-            atlas_response = await atlas_agent.run(synthesis_prompt, "system")
+            atlas_response = await self.agents[AgentType.ATLAS.value].run(synthesis_prompt, "system")
             return atlas_response.content
             
         except Exception as e:
@@ -460,8 +681,9 @@ Unified Response:"""
                 return best_response["content"]
             return "I apologize, but I encountered an error processing your request."
     
-    # LangGraph node functions
-    async def _receive_input(self, state: WorkflowState) -> WorkflowState:
+    # LangGraph node functions; each returns only the keys it updates so
+    # parallel branches never write the same channel without a reducer
+    async def _receive_input(self, state: WorkflowState) -> Dict[str, Any]:
         """Receive and validate input"""
         # Get digital soul insights
         soul_data = await digital_soul.process_experience({
@@ -470,89 +692,75 @@ Unified Response:"""
             "session_id": state["session_id"]
         })
         
-        state["metadata"]["soul_insights"] = soul_data
-        return state
+        return {"metadata": {"soul_insights": soul_data}}
     
-    async def _route_agents(self, state: WorkflowState) -> WorkflowState:
+    async def _route_agents(self, state: WorkflowState) -> Dict[str, Any]:
         """Route to appropriate agents"""
         routing_decision = await self._analyze_and_route(
             state["user_message"],
             state["selected_agents"] if state["selected_agents"] else None
         )
         
-        state["routing_decision"] = routing_decision
-        state["selected_agents"] = routing_decision["selected_agents"]
-        return state
-    
-    def _routing_condition(self, state: WorkflowState) -> str:
-        """Determine which agent(s) to route to"""
-        selected_agents = state["selected_agents"]
-        
-        if len(selected_agents) > 1:
-            return "multi_agent"
-        elif "atlas" in selected_agents:
-            return "atlas"
-        elif "orion" in selected_agents:
-            return "orion"
-        elif "sophia" in selected_agents:
-            return "sophia"
-        elif "creator" in selected_agents:
-            return "creator"
-        else:
-            return "atlas"  # Default
-    
-    async def _atlas_process(self, state: WorkflowState) -> WorkflowState:
-        """Process with Atlas agent"""
-        response = await atlas_agent.run(state["user_message"], state["user_id"])
-        state["agent_responses"]["atlas"] = {
-            "content": response.content,
-            "confidence": response.confidence,
-            "reasoning": response.reasoning
+        selected_agents = [a for a in dict.fromkeys(routing_decision["selected_agents"]) if a in AGENT_ORDER]
+        return {
+            "routing_decision": routing_decision,
+            "selected_agents": selected_agents or [AgentType.ATLAS.value]
         }
-        self.agent_usage_stats["atlas"] += 1
-        return state
     
-    async def _orion_process(self, state: WorkflowState) -> WorkflowState:
-        """Process with Orion agent"""
-        response = await orion_agent.run(state["user_message"], state["user_id"])
-        state["agent_responses"]["orion"] = {
-            "content": response.content,
-            "confidence": response.confidence,
-            "reasoning": response.reasoning
-        }
-        self.agent_usage_stats["orion"] += 1
-        return state
+    async def _fan_out(self, state: WorkflowState) -> Dict[str, Any]:
+        """Fan-out point for the agent branches"""
+        return {"metadata": {"fan_out_at": datetime.now().isoformat()}}
     
-    async def _sophia_process(self, state: WorkflowState) -> WorkflowState:
-        """Process with Sophia agent"""
-        response = await sophia_agent.run(state["user_message"], state["user_id"])
-        state["agent_responses"]["sophia"] = {
-            "content": response.content,
-            "confidence": response.confidence,
-            "reasoning": response.reasoning
-        }
-        self.agent_usage_stats["sophia"] += 1
-        return state
+    def _fan_out_targets(self, state: WorkflowState) -> List[str]:
+        """Agent nodes to run concurrently in the next superstep"""
+        return [f"{agent_id}_process" for agent_id in state["selected_agents"]] or ["atlas_process"]
     
-    async def _creator_process(self, state: WorkflowState) -> WorkflowState:
-        """Process with Creator agent"""
-        response = await creator_agent.run(state["user_message"], state["user_id"])
-        state["agent_responses"]["creator"] = {
-            "content": response.content,
-            "confidence": response.confidence,
-            "reasoning": response.reasoning
-        }
-        self.agent_usage_stats["creator"] += 1
-        return state
+    def _make_agent_node(self, agent_id: str, skip_unselected: bool = False):
+        """Build the graph node for one agent"""
+        async def agent_node(state: WorkflowState) -> Dict[str, Any]:
+            if skip_unselected and agent_id not in state["selected_agents"]:
+                return {}
+            try:
+                response = await asyncio.wait_for(
+                    self.agents[agent_id].run(state["user_message"], state["user_id"]),
+                    self.agent_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Agent {agent_id} timed out after {self.agent_timeout}s")
+                return {"agent_errors": {agent_id: "timeout"}}
+            except Exception as e:
+                logger.error(f"❌ Agent {agent_id} failed: {e}")
+                return {"agent_errors": {agent_id: str(e)}}
+            
+            self.agent_usage_stats[agent_id] += 1
+            return {"agent_responses": {agent_id: {
+                "content": response.content,
+                "confidence": response.confidence,
+                "reasoning": response.reasoning,
+                "processing_time": response.processing_time
+            }}}
+        
+        agent_node.__name__ = f"_{agent_id}_process"
+        return agent_node
+    
+    async def _join_agents(self, state: WorkflowState) -> Dict[str, Any]:
+        """Join point: branch results are already merged by the state reducers"""
+        return {"metadata": {
+            "joined_agents": list(state["agent_responses"].keys()),
+            "joined_at": datetime.now().isoformat()
+        }}
     
-    async def _synthesize_response(self, state: WorkflowState) -> WorkflowState:
+    async def _synthesize_response(self, state: WorkflowState) -> Dict[str, Any]:
         """Synthesize final response"""
+        usable = {
+            agent_id: response for agent_id, response in state["agent_responses"].items()
+            if response.get("content") and response.get("confidence", 0) > 0
+        }
         final_response = await self._synthesize_responses(
-            state["agent_responses"],
+            usable or state["agent_responses"],
             state["user_message"]
         )
-        state["final_response"] = final_response
-        return state
+        return {"final_response": final_response}
     
     def _update_orchestration_metrics(self, response_time: float, success: bool) -> None:
         """Update orchestration performance metrics"""
@@ -0,0 +1,130 @@
+"""
+LangGraph Workflow Benchmark - Parallel fan-out vs linear agent chain
+🔱 JAI MAHAKAAL! Measure the branches, not the models 🔱
+
+Runs the multi-agent workflow against a mock engine with fixed per-agent
+latencies, so the numbers reflect graph scheduling only.
+
+Usage:
+    python -m server.orchestrator.graph_benchmark --iterations 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Any, Optional
+
+from ..agents.base import AgentResponse
+from .graph import LexOSOrchestrator, AGENT_ORDER, LANGGRAPH_AVAILABLE
+
+DEFAULT_LATENCIES = {"atlas": 0.40, "orion": 0.30, "sophia": 0.25, "creator": 0.35}
+
+
+class MockEngine:
+    """Stands in for the model backend: sleeps for the agent's latency (+ jitter)"""
+
+    def __init__(self, latencies: Optional[Dict[str, float]] = None, jitter: float = 0.1, seed: int = 7):
+        self.latencies = latencies or DEFAULT_LATENCIES
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def generate(self, agent_id: str, prompt: str) -> str:
+        self.calls += 1
+        base = self.latencies.get(agent_id, 0.3)
+        await asyncio.sleep(base * (1 + self.random.uniform(-self.jitter, self.jitter)))
+        return f"{agent_id} answer to: {prompt[:40]}"
+
+
+class MockAgent:
+    """Agent with the BaseAgent.run() contract, backed by MockEngine"""
+
+    def __init__(self, agent_id: str, engine: MockEngine):
+        self.agent_id = agent_id
+        self.engine = engine
+
+    async def run(self, user_message: str, user_id: str = "default", **kwargs) -> AgentResponse:
+        start = time.perf_counter()
+        content = await self.engine.generate(self.agent_id, user_message)
+        return AgentResponse(
+            agent_id=self.agent_id,
+            content=content,
+            confidence=0.8,
+            reasoning="mock",
+            tools_used=[],
+            context_retrieved=False,
+            processing_time=time.perf_counter() - start,
+            metadata={}
+        )
+
+
+class BenchmarkOrchestrator(LexOSOrchestrator):
+    """Orchestrator wired to mock agents, without digital soul side effects"""
+
+    def __init__(self, engine: MockEngine, parallel: bool):
+        super().__init__(parallel_agents=parallel)
+        self.agents = {agent_id: MockAgent(agent_id, engine) for agent_id in AGENT_ORDER}
+        self.agent_usage_stats = {agent_id: 0 for agent_id in self.agents}
+        self._build_langgraph_workflow()
+
+    async def _receive_input(self, state) -> Dict[str, Any]:
+        return {}
+
+
+async def _time_mode(parallel: bool, agents: List[str], iterations: int, latencies: Dict[str, float]) -> Dict[str, Any]:
+    engine = MockEngine(latencies)
+    orchestrator = BenchmarkOrchestrator(engine, parallel)
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        result = await orchestrator.orchestrate(
+            "Give me a comprehensive analysis", session_id=f"bench-{i}", preferred_agents=agents
+        )
+        timings.append(time.perf_counter() - start)
+    return {
+        "mode": "parallel" if parallel else "linear",
+        "iterations": iterations,
+        "mean_s": statistics.mean(timings),
+        "p50_s": statistics.median(timings),
+        "max_s": max(timings),
+        "engine_calls": engine.calls,
+        "agents_used": result["agents_used"]
+    }
+
+
+async def run_benchmark(
+    iterations: int = 5,
+    agents: Optional[List[str]] = None,
+    latencies: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """Time the linear chain and the parallel graph on identical mock workloads"""
+    if not LANGGRAPH_AVAILABLE:
+        raise RuntimeError("langgraph is not installed")
+
+    agents = agents or list(AGENT_ORDER)
+    latencies = latencies or DEFAULT_LATENCIES
+    linear = await _time_mode(False, agents, iterations, latencies)
+    parallel = await _time_mode(True, agents, iterations, latencies)
+    return {
+        "agents": agents,
+        "latencies": latencies,
+        "linear": linear,
+        "parallel": parallel,
+        "speedup": linear["mean_s"] / parallel["mean_s"] if parallel["mean_s"] else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel vs linear LangGraph agent workflows")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--agents", nargs="*", default=None, help=f"Subset of {AGENT_ORDER}")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.iterations, args.agents))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Model Inventory Service - Cached Ollama model discovery
+🔱 JAI MAHAKAAL! One /api/tags call for the whole platform 🔱
+
+Keeps the list of installed Ollama models in a TTL cache that refreshes
+in the background on an interval and whenever a backend reports an error.
+Subscribers are notified when models appear or disappear, so orchestrators
+never have to hit /api/tags on the request path.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Dict, List, Any, Optional, Callable
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+InventoryListener = Callable[[Dict[str, Any], List[str], List[str]], Any]
+
+
+class ModelInventory:
+    """
+    Background-refreshed inventory of models served by one Ollama host
+
+    Features:
+    - TTL cache; stale data is served while a refresh runs in the background
+    - Periodic refresh loop plus on-demand refresh after backend errors
+    - Single-flight refresh so concurrent callers share one request
+    - Change notifications with added/removed model names
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        ttl: float = 60.0,
+        refresh_interval: float = 30.0,
+        retry_after: float = 5.0
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.retry_after = retry_after
+
+        self.models: Dict[str, Any] = {}
+        self.last_refresh = 0.0
+        self.last_attempt = 0.0
+        self.last_error: Optional[str] = None
+        self.refresh_count = 0
+
+        self._listeners: List[InventoryListener] = []
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return bool(self.last_refresh) and time.monotonic() - self.last_refresh < self.ttl
+
+    def subscribe(self, listener: InventoryListener) -> None:
+        """Register callback(models, added, removed); may be sync or async"""
+        self._listeners.append(listener)
+
+    async def get_models(self, force: bool = False) -> Dict[str, Any]:
+        """Return the cached inventory, fetching only on first use or when forced"""
+        self._ensure_background_refresh()
+
+        if force:
+            await self.refresh()
+        elif not self.last_refresh:
+            # Nothing cached yet; don't hammer an unreachable backend on every request
+            if time.monotonic() - self.last_attempt >= self.retry_after:
+                await self.refresh()
+        elif not self.is_fresh:
+            # Serve stale data now, refresh off the request path
+            self._schedule_refresh()
+
+        return self.models
+
+    def mark_stale(self) -> None:
+        """Signal that a backend call failed; triggers a prompt refresh"""
+        self.last_refresh = min(self.last_refresh, time.monotonic() - self.ttl)
+        if self._wakeup:
+            self._wakeup.set()
+        else:
+            self._schedule_refresh()
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Fetch /api/tags once, even if many callers ask at the same time"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        started = time.monotonic()
+        async with self._refresh_lock:
+            # Another caller refreshed while we waited
+            if self.last_attempt >= started:
+                return self.models
+
+            self.last_attempt = time.monotonic()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(
+                        f"{self.base_url}/api/tags",
+                        timeout=aiohttp.ClientTimeout(total=10)
+                    ) as resp:
+                        if resp.status != 200:
+                            raise Exception(f"HTTP {resp.status}")
+                        data = await resp.json()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"⚠️ Model inventory refresh failed for {self.base_url}: {e}")
+                return self.models
+
+            models = {model["name"]: model for model in data.get("models", [])}
+            added = [name for name in models if name not in self.models]
+            removed = [name for name in self.models if name not in models]
+
+            self.models = models
+            self.last_refresh = time.monotonic()
+            self.last_error = None
+            self.refresh_count += 1
+
+        if added or removed or self.refresh_count == 1:
+            logger.info(f"📦 Model inventory for {self.base_url}: {len(models)} models (+{len(added)} -{len(removed)})")
+            await self._notify(added, removed)
+
+        return self.models
+
+    async def _notify(self, added: List[str], removed: List[str]) -> None:
+        for listener in list(self._listeners):
+            try:
+                result = listener(self.models, added, removed)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"❌ Model inventory listener error: {e}")
+
+    def _schedule_refresh(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = loop.create_task(self.refresh())
+
+    def _ensure_background_refresh(self) -> None:
+        if self._loop_task is not None and not self._loop_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._loop_task = loop.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        """Refresh on an interval, or sooner when a backend error is reported"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Model inventory loop error: {e}")
+
+    async def stop(self) -> None:
+        """Cancel background refresh tasks"""
+        for task in (self._loop_task, self._refresh_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._loop_task = None
+        self._refresh_task = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "models": len(self.models),
+            "fresh": self.is_fresh,
+            "age_seconds": time.monotonic() - self.last_refresh if self.last_refresh else None,
+            "refresh_count": self.refresh_count,
+            "last_error": self.last_error
+        }
+
+
+_inventories: Dict[str, ModelInventory] = {}
+
+
+def get_model_inventory(base_url: Optional[str] = None) -> ModelInventory:
+    """Shared inventory per Ollama host"""
+    base_url = (base_url or os.getenv("OLLAMA_HOST", "http://localhost:11434")).rstrip("/")
+    if base_url not in _inventories:
+        _inventories[base_url] = ModelInventory(base_url)
+    return _inventories[base_url]
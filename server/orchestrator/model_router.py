@@ -0,0 +1,188 @@
+"""
+Adaptive Model Router - Latency-aware routing from live metrics
+🔱 JAI MAHAKAAL! Shared routing brain for all orchestrators 🔱
+
+Keeps per-model EWMA latency, tokens/sec, in-flight count and error rate,
+and ranks candidate models by expected completion time. Ties are broken by
+least outstanding requests so load shifts away from saturated backends.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """Live statistics for a single model"""
+
+    def __init__(self, name: str, alpha: float = 0.2):
+        self.name = name
+        self.alpha = alpha
+        self.ewma_latency: Optional[float] = None
+        self.ewma_tokens_per_sec: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.capacity = 1
+        self.requests = 0
+        self.failures = 0
+        self.last_update = 0.0
+
+    def observe(self, latency: Optional[float], success: bool, tokens: int = 0) -> None:
+        """Fold one completed request into the moving averages"""
+        self.requests += 1
+        self.last_update = time.monotonic()
+
+        if success:
+            self.error_rate = (1 - self.alpha) * self.error_rate
+            if latency and latency > 0:
+                self.ewma_latency = latency if self.ewma_latency is None else (
+                    self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+                )
+                if tokens > 0:
+                    tps = tokens / latency
+                    self.ewma_tokens_per_sec = tps if self.ewma_tokens_per_sec is None else (
+                        self.alpha * tps + (1 - self.alpha) * self.ewma_tokens_per_sec
+                    )
+        else:
+            self.failures += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ewma_latency": self.ewma_latency,
+            "ewma_tokens_per_sec": self.ewma_tokens_per_sec,
+            "error_rate": self.error_rate,
+            "in_flight": self.in_flight,
+            "capacity": self.capacity,
+            "requests": self.requests,
+            "failures": self.failures
+        }
+
+
+class AdaptiveModelRouter:
+    """
+    Shared latency-aware model router
+
+    Features:
+    - EWMA latency / tokens-per-second per model
+    - In-flight tracking for least-outstanding-requests tiebreak
+    - Error-rate penalty that decays while a model sits idle
+    - Cold-start priors so unmeasured models still get traffic
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        default_latency: float = 2.0,
+        error_half_life: float = 60.0
+    ):
+        self.alpha = alpha
+        self.default_latency = default_latency
+        self.error_half_life = error_half_life
+        self.stats: Dict[str, ModelStats] = {}
+
+        logger.info("🧭 Adaptive Model Router initialized")
+
+    def _get(self, model: str) -> ModelStats:
+        stats = self.stats.get(model)
+        if stats is None:
+            stats = self.stats[model] = ModelStats(model, self.alpha)
+        return stats
+
+    def set_capacity(self, model: str, concurrency: int) -> None:
+        """Declare how many requests a backend serves in parallel (e.g. vLLM batching)"""
+        self._get(model).capacity = max(1, int(concurrency))
+
+    def request_started(self, model: str) -> None:
+        self._get(model).in_flight += 1
+
+    def request_finished(self, model: str) -> None:
+        stats = self._get(model)
+        stats.in_flight = max(0, stats.in_flight - 1)
+
+    @contextmanager
+    def track(self, model: str):
+        """Count a request as in flight for the duration of the block"""
+        self.request_started(model)
+        try:
+            yield
+        finally:
+            self.request_finished(model)
+
+    def record(self, model: str, latency: Optional[float], success: bool, tokens: int = 0) -> None:
+        """Feed a completed request; called from the orchestrators' metric hooks"""
+        self._get(model).observe(latency, success, tokens)
+
+    def _effective_error_rate(self, stats: ModelStats) -> float:
+        if not stats.error_rate or not stats.last_update:
+            return stats.error_rate
+        idle = time.monotonic() - stats.last_update
+        return stats.error_rate * 0.5 ** (idle / self.error_half_life)
+
+    def expected_completion_time(
+        self,
+        model: str,
+        expected_tokens: Optional[int] = None,
+        prior_latency: Optional[float] = None
+    ) -> float:
+        """Estimate seconds until a new request on this model would complete"""
+        stats = self._get(model)
+
+        if expected_tokens and stats.ewma_tokens_per_sec:
+            service_time = expected_tokens / stats.ewma_tokens_per_sec
+        elif stats.ewma_latency is not None:
+            service_time = stats.ewma_latency
+        else:
+            service_time = prior_latency if prior_latency is not None else self.default_latency
+
+        # Requests ahead of us share the backend's parallel slots
+        queueing = 1 + stats.in_flight / stats.capacity
+
+        # Failed attempts have to be retried somewhere, so inflate by expected tries
+        success_probability = max(0.05, 1.0 - self._effective_error_rate(stats))
+
+        return service_time * queueing / success_probability
+
+    def rank(
+        self,
+        candidates: Iterable[str],
+        expected_tokens: Optional[int] = None,
+        priors: Optional[Dict[str, float]] = None
+    ) -> List[str]:
+        """Order candidates by expected completion time, then fewest outstanding requests"""
+        priors = priors or {}
+        candidates = list(dict.fromkeys(candidates))
+
+        def sort_key(item):
+            index, model = item
+            cost = self.expected_completion_time(model, expected_tokens, priors.get(model))
+            return (round(cost, 3), self._get(model).in_flight, index)
+
+        return [model for _, model in sorted(enumerate(candidates), key=sort_key)]
+
+    def select(
+        self,
+        candidates: Iterable[str],
+        expected_tokens: Optional[int] = None,
+        priors: Optional[Dict[str, float]] = None
+    ) -> Optional[str]:
+        """Pick the single best candidate, or None if there are none"""
+        ranked = self.rank(candidates, expected_tokens, priors)
+        return ranked[0] if ranked else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of router state for status endpoints"""
+        return {
+            model: {
+                **stats.to_dict(),
+                "effective_error_rate": self._effective_error_rate(stats),
+                "expected_completion_time": self.expected_completion_time(model)
+            }
+            for model, stats in self.stats.items()
+        }
+
+
+# Global router instance shared by all orchestrators
+model_router = AdaptiveModelRouter()
@@ -8,6 +8,10 @@ import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 
+from .context_window import context_window_manager
+from .model_inventory import get_model_inventory
+from .prompt_assembly import prefix_cache_metrics
+
 logger = logging.getLogger(__name__)
 
 class OllamaIntegration:
@@ -18,6 +22,8 @@ class OllamaIntegration:
     def __init__(self, base_url: str = "http://localhost:11434"):
         self.base_url = base_url
         self.available_models = {}
+        self.inventory = get_model_inventory(base_url)
+        self.inventory.subscribe(self._on_inventory_change)
         self.model_mapping = {
             # Map our capability names to Ollama models
             "mixtral-8x22b": "dolphin-mixtral:8x7b",  # Using 8x7b as proxy
@@ -30,23 +36,28 @@ class OllamaIntegration:
         }
         
     async def initialize(self):
-        """Load available models from Ollama"""
+        """Load available models from the shared model inventory (kept fresh in the background)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/api/tags") as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        for model in data.get("models", []):
-                            self.available_models[model["name"]] = {
-                                "size": model["details"]["parameter_size"],
-                                "family": model["details"].get("family", "unknown"),
-                                "quantization": model["details"].get("quantization_level", "unknown")
-                            }
-                        logger.info(f"✅ Ollama initialized with {len(self.available_models)} models")
-                        return True
+            models = await self.inventory.get_models(force=True)
+            if self.inventory.last_error:
+                raise Exception(self.inventory.last_error)
+            self._on_inventory_change(models, [], [])
+            logger.info(f"✅ Ollama initialized with {len(self.available_models)} models")
+            return True
         except Exception as e:
             logger.error(f"❌ Failed to initialize Ollama: {e}")
             return False
+    
+    def _on_inventory_change(self, models: Dict[str, Any], added: List[str], removed: List[str]):
+        """Rebuild the model table whenever the inventory changes"""
+        self.available_models = {
+            name: {
+                "size": model.get("details", {}).get("parameter_size", "unknown"),
+                "family": model.get("details", {}).get("family", "unknown"),
+                "quantization": model.get("details", {}).get("quantization_level", "unknown")
+            }
+            for name, model in models.items()
+        }
             
     def get_best_model(self, capability: str, preferred: Optional[str] = None) -> Optional[str]:
         """Get the best available Ollama model for a capability"""
@@ -85,11 +96,20 @@ class OllamaIntegration:
     ) -> Dict[str, Any]:
         """Generate text using Ollama"""
         try:
+            # Fixed per-model window: changing num_ctx between calls forces Ollama to reload the model
+            num_ctx = context_window_manager.context_window_for(model, 8192)
+            packed = context_window_manager.pack(
+                system_prompt=system or "",
+                user_message=prompt,
+                context_window=num_ctx,
+                reserve_output=max_tokens
+            )
+            
             # Build the full prompt
             if system:
-                full_prompt = f"System: {system}\n\nUser: {prompt}\n\nAssistant:"
+                full_prompt = f"System: {packed.system_prompt}\n\nUser: {packed.user_message}\n\nAssistant:"
             else:
-                full_prompt = prompt
+                full_prompt = packed.user_message
             
             payload = {
                 "model": model,
@@ -98,7 +118,7 @@ class OllamaIntegration:
                 "options": {
                     "temperature": temperature,
                     "num_predict": max_tokens,
-                    "num_ctx": 8192,  # Context window
+                    "num_ctx": num_ctx,  # Context window
                     "num_gpu": 99,  # Use all GPU layers
                     "num_thread": 32
                 }
@@ -112,6 +132,7 @@ class OllamaIntegration:
                 ) as resp:
                     if resp.status == 200:
                         result = await resp.json()
+                        prefix_cache_metrics.record_ollama(model, result, system)
                         return {
                             "success": True,
                             "response": result.get("response", ""),
@@ -122,6 +143,7 @@ class OllamaIntegration:
                         }
                     else:
                         error = await resp.text()
+                        self.inventory.mark_stale()
                         return {
                             "success": False,
                             "error": f"Ollama API error {resp.status}: {error}"
@@ -133,6 +155,7 @@ class OllamaIntegration:
                 "error": "Request timed out - model may be too large or slow"
             }
         except Exception as e:
+            self.inventory.mark_stale()
             return {
                 "success": False,
                 "error": f"Ollama generation error: {str(e)}"
@@ -147,14 +170,15 @@ class OllamaIntegration:
     ) -> Dict[str, Any]:
         """Chat completion using Ollama"""
         try:
+            num_ctx = context_window_manager.context_window_for(model, 8192)
             payload = {
                 "model": model,
-                "messages": messages,
+                "messages": context_window_manager.fit_messages(messages, num_ctx, reserve_output=max_tokens),
                 "stream": False,
                 "options": {
                     "temperature": temperature,
                     "num_predict": max_tokens,
-                    "num_ctx": 8192,
+                    "num_ctx": num_ctx,
                     "num_gpu": 99,
                     "num_thread": 32
                 }
@@ -177,12 +201,14 @@ class OllamaIntegration:
                         }
                     else:
                         error = await resp.text()
+                        self.inventory.mark_stale()
                         return {
                             "success": False,
                             "error": f"Ollama chat error {resp.status}: {error}"
                         }
                         
         except Exception as e:
+            self.inventory.mark_stale()
             return {
                 "success": False,
                 "error": f"Ollama chat error: {str(e)}"
@@ -254,7 +280,8 @@ class OllamaIntegration:
             "models": {
                 name: info for name, info in self.available_models.items()
             },
-            "model_mapping": self.model_mapping
+            "model_mapping": self.model_mapping,
+            "inventory": self.inventory.get_status()
         }
 
 # Global instance
@@ -28,6 +28,10 @@ from enum import Enum
 import aiohttp
 from pathlib import Path
 
+from .context_window import context_window_manager
+from .model_inventory import get_model_inventory
+from .model_router import model_router
+
 logger = logging.getLogger(__name__)
 
 class ModelCapability(Enum):
@@ -69,6 +73,8 @@ class ProductionOrchestrator:
     def __init__(self):
         self.name = "LEX_PRODUCTION_ORCHESTRATOR"
         self.models = self._initialize_models()
+        for config in self.models.values():
+            context_window_manager.register_model(config.name, config.context_window)
         self.active_models = {}
         self.memory_systems = {}
         self.gpu_optimizers = {}
@@ -257,15 +263,21 @@ class ProductionOrchestrator:
             logger.warning(f"⚠️ vLLM not available: {e}")
         
         try:
-            # Ollama for local models
-            async with aiohttp.ClientSession() as session:
-                async with session.get("http://localhost:11434/api/tags") as resp:
-                    if resp.status == 200:
-                        self.gpu_optimizers["ollama"] = await resp.json()
-                        logger.info("✅ Ollama available")
+            # Ollama for local models (shared, background-refreshed inventory)
+            inventory = get_model_inventory("http://localhost:11434")
+            models = await inventory.get_models(force=True)
+            if inventory.last_error:
+                raise Exception(inventory.last_error)
+            self.gpu_optimizers["ollama"] = {"models": list(models.values())}
+            inventory.subscribe(self._on_ollama_inventory_change)
+            logger.info("✅ Ollama available")
         except Exception as e:
             logger.warning(f"⚠️ Ollama not available: {e}")
     
+    def _on_ollama_inventory_change(self, models: Dict[str, Any], added: List[str], removed: List[str]):
+        """Keep the Ollama model listing current without polling /api/tags per request"""
+        self.gpu_optimizers["ollama"] = {"models": list(models.values())}
+    
     async def _test_model_availability(self):
         """Test which models are available"""
         for model_id, config in self.models.items():
@@ -335,6 +347,7 @@ class ProductionOrchestrator:
         """
         start_time = time.time()
         self.request_count += 1
+        model = None
         
         try:
             # Select best model for capability
@@ -342,29 +355,37 @@ class ProductionOrchestrator:
             if not model:
                 raise Exception(f"No model available for {capability.value}")
             
+            # Keep the prompt inside the model's context window, leaving room for output
+            messages = context_window_manager.fit_messages(
+                messages,
+                context_window=model.context_window,
+                reserve_output=min(model.max_tokens, model.context_window // 4)
+            )
+            
             # Route to appropriate handler
-            if capability == ModelCapability.CHAT_REASONING:
-                response = await self._handle_chat(model, messages, context)
-            elif capability == ModelCapability.VISION:
-                response = await self._handle_vision(model, messages, context)
-            elif capability == ModelCapability.CODING:
-                response = await self._handle_coding(model, messages, context)
-            elif capability == ModelCapability.IMAGE_GENERATION:
-                response = await self._handle_image_generation(model, messages, context)
-            elif capability == ModelCapability.VIDEO_GENERATION:
-                response = await self._handle_video_generation(model, messages, context)
-            elif capability == ModelCapability.DOCUMENT_PARSING:
-                response = await self._handle_document_parsing(model, messages, context)
-            elif capability == ModelCapability.SEARCH_KNOWLEDGE:
-                response = await self._handle_search(model, messages, context)
-            elif capability == ModelCapability.FINANCIAL:
-                response = await self._handle_financial(model, messages, context)
-            else:
-                response = await self._handle_generic(model, messages, context)
+            with model_router.track(model.name):
+                if capability == ModelCapability.CHAT_REASONING:
+                    response = await self._handle_chat(model, messages, context)
+                elif capability == ModelCapability.VISION:
+                    response = await self._handle_vision(model, messages, context)
+                elif capability == ModelCapability.CODING:
+                    response = await self._handle_coding(model, messages, context)
+                elif capability == ModelCapability.IMAGE_GENERATION:
+                    response = await self._handle_image_generation(model, messages, context)
+                elif capability == ModelCapability.VIDEO_GENERATION:
+                    response = await self._handle_video_generation(model, messages, context)
+                elif capability == ModelCapability.DOCUMENT_PARSING:
+                    response = await self._handle_document_parsing(model, messages, context)
+                elif capability == ModelCapability.SEARCH_KNOWLEDGE:
+                    response = await self._handle_search(model, messages, context)
+                elif capability == ModelCapability.FINANCIAL:
+                    response = await self._handle_financial(model, messages, context)
+                else:
+                    response = await self._handle_generic(model, messages, context)
             
             # Track performance
             processing_time = time.time() - start_time
-            self._update_performance(model.name, processing_time, True)
+            self._update_performance(model.name, processing_time, True, len(str(response).split()))
             
             return {
                 "response": response,
@@ -376,6 +397,8 @@ class ProductionOrchestrator:
             
         except Exception as e:
             self.error_count += 1
+            if model:
+                self._update_performance(model.name, time.time() - start_time, False)
             logger.error(f"❌ Orchestrator error: {e}")
             return {
                 "response": f"I encountered an error processing your request: {str(e)}",
@@ -407,9 +430,9 @@ class ProductionOrchestrator:
         if not candidates:
             return None
         
-        # Sort by performance score
-        candidates.sort(key=lambda m: m.performance_score, reverse=True)
-        return candidates[0]
+        # Lowest expected completion time wins, least outstanding requests breaks ties
+        by_name = {m.name: m for m in candidates}
+        return by_name[model_router.select(by_name)]
     
     async def _handle_chat(
         self,
@@ -795,8 +818,10 @@ class ProductionOrchestrator:
         """Generic coding handler"""
         return f"# Code generation with {model.name}\n# This is a placeholder implementation\npass"
     
-    def _update_performance(self, model_name: str, processing_time: float, success: bool):
+    def _update_performance(self, model_name: str, processing_time: float, success: bool, tokens: int = 0):
         """Update model performance metrics"""
+        model_router.record(model_name, processing_time, success, tokens)
+        
         if model_name not in self.model_performance:
             self.model_performance[model_name] = {
                 "requests": 0,
@@ -838,7 +863,8 @@ class ProductionOrchestrator:
             },
             "memory_systems": list(self.memory_systems.keys()),
             "gpu_optimizers": list(self.gpu_optimizers.keys()),
-            "performance": self.model_performance
+            "performance": self.model_performance,
+            "routing": model_router.get_stats()
         }
 
 # Global orchestrator instance
@@ -0,0 +1,185 @@
+"""
+Prompt Assembly - Prefix-stable prompt construction
+🔱 JAI MAHAKAAL! Compute the long system prompt once per model 🔱
+
+vLLM and Ollama reuse KV cache for a prompt prefix they have already seen.
+That only works if the leading tokens are byte-identical between requests,
+so prompts are assembled strictly from most-static to most-dynamic:
+
+    persona -> capabilities -> guidance -> history -> context -> time -> user
+
+The static part becomes the system message. History follows it, so a
+conversation's earlier turns stay a reusable prefix from one turn to the
+next; everything per-request (RAG context, current time) travels with the
+final user turn, after history.
+"""
+import hashlib
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class PromptAssembler:
+    """Builds chat messages / completion prompts with a stable leading prefix"""
+
+    def __init__(self, max_cached_prefixes: int = 256):
+        self.max_cached_prefixes = max_cached_prefixes
+        self._prefix_cache: Dict[tuple, str] = {}
+
+    def static_prefix(
+        self,
+        persona: str,
+        capabilities: Optional[Sequence[str]] = None,
+        guidance: Optional[Sequence[str]] = None
+    ) -> str:
+        """Static system content; identical input always yields the identical string"""
+        key = (persona, tuple(capabilities or ()), tuple(guidance or ()))
+        prefix = self._prefix_cache.get(key)
+        if prefix is None:
+            parts = [persona.strip()]
+            if capabilities:
+                parts.append(f"Your capabilities: {', '.join(capabilities)}")
+            parts.extend(g.strip() for g in (guidance or ()) if g and g.strip())
+            prefix = "\n\n".join(parts)
+            if len(self._prefix_cache) >= self.max_cached_prefixes:
+                self._prefix_cache.clear()
+            self._prefix_cache[key] = prefix
+        return prefix
+
+    def dynamic_preamble(
+        self,
+        context_sections: Optional[Sequence[str]] = None,
+        include_time: bool = True
+    ) -> str:
+        """Per-request content, ordered context -> time"""
+        parts = [s.strip() for s in (context_sections or ()) if s and s.strip()]
+        if include_time:
+            parts.append(f"Current time: {datetime.now().isoformat(timespec='minutes')}")
+        return "\n\n".join(parts)
+
+    def build_messages(
+        self,
+        persona: str,
+        user_message: str,
+        capabilities: Optional[Sequence[str]] = None,
+        guidance: Optional[Sequence[str]] = None,
+        context_sections: Optional[Sequence[str]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        include_time: bool = True
+    ) -> List[Dict[str, str]]:
+        """Chat messages: static system prompt, history, then context + time with the user turn"""
+        messages = [{"role": "system", "content": self.static_prefix(persona, capabilities, guidance)}]
+        messages.extend(history or [])
+
+        preamble = self.dynamic_preamble(context_sections, include_time)
+        content = f"{preamble}\n\n{user_message}" if preamble else user_message
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    def build_prompt(
+        self,
+        system_prompt: str,
+        user_message: str,
+        context_sections: Optional[Sequence[str]] = None,
+        assistant_prefix: str = ""
+    ) -> str:
+        """Completion-style prompt (Ollama /api/generate) with the system prompt leading"""
+        preamble = self.dynamic_preamble(context_sections, include_time=False)
+        user_block = f"{preamble}\n\n{user_message}" if preamble else user_message
+        return f"{system_prompt}\n\nUser: {user_block}\n\nAssistant:{assistant_prefix}"
+
+
+class PrefixCacheMetrics:
+    """
+    Prefix-cache hit accounting per model
+
+    Fed from per-response token counts (vLLM `usage.prompt_tokens_details.cached_tokens`)
+    and from vLLM's Prometheus /metrics counters. Backends that do not report
+    cached tokens (Ollama) are counted, but get no hit rate.
+    """
+
+    _PROM_LINE = re.compile(r'^(vllm:[a-z_]*prefix_cache[a-z_]*)(\{[^}]*\})?\s+([0-9.eE+-]+)$')
+
+    def __init__(self):
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.backend_metrics: Dict[str, Dict[str, float]] = {}
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        cached_tokens: Optional[int],
+        prefix: Optional[str] = None
+    ) -> None:
+        """cached_tokens=None means the backend did not say; it is not treated as a miss"""
+        stats = self.models.setdefault(model, {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "reported_requests": 0,
+            "reported_prompt_tokens": 0,
+            "cached_tokens": 0,
+            "requests_with_hit": 0,
+            "prefixes": set()
+        })
+        prompt_tokens = max(0, prompt_tokens)
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        if cached_tokens is not None:
+            stats["reported_requests"] += 1
+            stats["reported_prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += max(0, min(cached_tokens, prompt_tokens))
+            if cached_tokens > 0:
+                stats["requests_with_hit"] += 1
+        if prefix is not None and len(stats["prefixes"]) < 1024:
+            stats["prefixes"].add(hashlib.md5(prefix.encode()).hexdigest())
+
+    def record_ollama(self, model: str, result: Dict[str, Any], prefix: Optional[str] = None) -> None:
+        """
+        Ollama reports the prompt tokens it evaluated (`prompt_eval_count`)
+        but not how many came from its cache, so only the request is counted
+        """
+        if "prompt_eval_count" in result:
+            self.record(model, result["prompt_eval_count"], None, prefix)
+
+    def record_backend_metrics(self, backend: str, prometheus_text: str) -> Dict[str, float]:
+        """Parse `vllm:*prefix_cache*` series out of a Prometheus exposition payload"""
+        parsed: Dict[str, float] = {}
+        for line in prometheus_text.splitlines():
+            match = self._PROM_LINE.match(line.strip())
+            if match:
+                name = match.group(1).split(":", 1)[1]
+                parsed[name] = parsed.get(name, 0.0) + float(match.group(3))
+        if "prefix_cache_queries_total" in parsed and parsed["prefix_cache_queries_total"] > 0:
+            parsed["prefix_cache_hit_rate"] = (
+                parsed.get("prefix_cache_hits_total", 0.0) / parsed["prefix_cache_queries_total"]
+            )
+        self.backend_metrics[backend] = parsed
+        return parsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "models": {
+                model: {
+                    "requests": s["requests"],
+                    "prompt_tokens": s["prompt_tokens"],
+                    "cached_tokens": s["cached_tokens"],
+                    "token_hit_rate": (
+                        s["cached_tokens"] / s["reported_prompt_tokens"] if s["reported_prompt_tokens"] else None
+                    ),
+                    "request_hit_rate": (
+                        s["requests_with_hit"] / s["reported_requests"] if s["reported_requests"] else None
+                    ),
+                    "distinct_prefixes": len(s["prefixes"])
+                }
+                for model, s in self.models.items()
+            },
+            "backends": self.backend_metrics
+        }
+
+
+# Global instances
+prompt_assembler = PromptAssembler()
+prefix_cache_metrics = PrefixCacheMetrics()
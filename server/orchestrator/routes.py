@@ -1,24 +1,47 @@
 """
 Orchestrator API Routes - Explainability & Trace
 """
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Depends
 from typing import List, Optional
-from .engine import orchestration_traces
+from .trace_store import trace_store
+from .engine import vllm_engine
+from ..api.dependencies import get_current_user, require_permission
 
 router = APIRouter()
 
+# Traces carry message and result previews from every user's requests
+require_admin = require_permission("admin")
+
 @router.get("/orchestration/traces")
 def get_orchestration_traces(
     model: Optional[str] = Query(None, description="Filter by model name"),
     status: Optional[str] = Query(None, description="Filter by status (success/failure/circuit_open/no_healthy_model)"),
-    limit: int = Query(20, ge=1, le=100, description="Number of traces to return")
+    min_latency_ms: Optional[float] = Query(None, ge=0, description="Only traces at least this slow"),
+    max_latency_ms: Optional[float] = Query(None, ge=0, description="Only traces at most this slow"),
+    limit: int = Query(20, ge=1, le=100, description="Number of traces to return"),
+    user=Depends(require_admin)
 ):
     """
-    Get recent orchestration traces for explainability and debugging.
+    Get recent orchestration traces for explainability and debugging (admins only).
+    """
+    return trace_store.query(
+        model=model,
+        status=status,
+        min_latency_ms=min_latency_ms,
+        max_latency_ms=max_latency_ms,
+        limit=limit
+    )
+
+@router.get("/orchestration/traces/stats")
+def get_orchestration_trace_stats(user=Depends(get_current_user)):
+    """
+    Get trace store buffer and spill statistics.
+    """
+    return trace_store.get_statistics()
+
+@router.get("/orchestration/prefix-cache")
+async def get_prefix_cache_metrics(user=Depends(get_current_user)):
+    """
+    Get prefix-cache hit metrics per model and from the vLLM backend.
     """
-    traces = orchestration_traces[-limit:][::-1]  # Most recent first
-    if model:
-        traces = [t for t in traces if t.get("model") == model]
-    if status:
-        traces = [t for t in traces if t.get("error") and status in t["error"] or (not t.get("error") and status == "success")]
-    return traces
+    return await vllm_engine.get_prefix_cache_metrics()
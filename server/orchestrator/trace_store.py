@@ -0,0 +1,180 @@
+"""
+LexOS Orchestration Trace Store
+Bounded in-memory ring buffer with sampled, asynchronous spill to disk
+
+Recent traces live in a fixed-size deque so tracing costs O(1) memory.
+A sampled subset (all failures, plus `sample_rate` of successes) is handed
+to a background writer thread that appends gzip-compressed JSON lines to a
+size-rotated log. Recording never blocks the request: if the spill queue
+is full the trace is counted as dropped instead.
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_PREVIEW_CHARS = 500
+
+
+class TraceStore:
+    """
+    Orchestration trace subsystem
+
+    Features:
+    - Fixed-size ring buffer of compact trace summaries
+    - Sampled spill of full traces to an append-only gzip JSONL log
+    - Size-based log rotation with a bounded number of backups
+    - Filtered queries over recent traces (model/status/latency)
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 1000,
+        sample_rate: float = 0.1,
+        log_path: Optional[str] = None,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        spill_queue_size: int = 10000
+    ):
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.sample_rate = sample_rate
+        self.log_path = Path(log_path) if log_path else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self.recorded = 0
+        self.spilled = 0
+        self.dropped = 0
+
+        self._spill_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=spill_queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def record(self, trace: Dict[str, Any]) -> None:
+        """Store a trace; O(1) and non-blocking"""
+        self.recorded += 1
+        self.buffer.append(self._summarize(trace))
+
+        if not self.log_path:
+            return
+        if trace.get("status") == "success" and random.random() >= self.sample_rate:
+            return
+
+        self._ensure_writer()
+        try:
+            self._spill_queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _summarize(self, trace: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the ring buffer bounded by truncating large payloads"""
+        summary = {k: v for k, v in trace.items() if k not in ("messages", "result")}
+        summary["messages"] = [
+            {
+                "role": m.get("role"),
+                "content": str(m.get("content", ""))[:MESSAGE_PREVIEW_CHARS]
+            }
+            for m in (trace.get("messages") or [])[-3:]
+        ]
+        result = trace.get("result")
+        summary["result"] = result[:MESSAGE_PREVIEW_CHARS] if isinstance(result, str) else result
+        return summary
+
+    def query(
+        self,
+        model: Optional[str] = None,
+        status: Optional[str] = None,
+        min_latency_ms: Optional[float] = None,
+        max_latency_ms: Optional[float] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Most recent traces first, filtered by model/status/latency"""
+        results = []
+        for trace in reversed(self.buffer):
+            if model and trace.get("model") != model:
+                continue
+            if status and trace.get("status") != status:
+                continue
+            latency = trace.get("latency_ms", 0.0)
+            if min_latency_ms is not None and latency < min_latency_ms:
+                continue
+            if max_latency_ms is not None and latency > max_latency_ms:
+                continue
+            results.append(trace)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _ensure_writer(self) -> None:
+        if self._writer and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._writer_loop, name="trace-spill", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self) -> None:
+        """Drain the spill queue in batches, one gzip member per batch"""
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            batch = [self._spill_queue.get()]
+            try:
+                while len(batch) < 500:
+                    batch.append(self._spill_queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                self._rotate_if_needed()
+                lines = "".join(json.dumps(t, default=str) + "\n" for t in batch)
+                with gzip.open(self.log_path, "at", encoding="utf-8") as f:
+                    f.write(lines)
+                self.spilled += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.error(f"❌ Trace spill error: {e}")
+
+    def _rotate_if_needed(self) -> None:
+        if not self.log_path.exists() or self.log_path.stat().st_size < self.max_bytes:
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.log_path.with_name(f"{self.log_path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.log_path.with_name(f"{self.log_path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.1"))
+        else:
+            self.log_path.unlink()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self.buffer),
+            "buffer_size": self.buffer.maxlen,
+            "recorded": self.recorded,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "pending_spill": self._spill_queue.qsize(),
+            "sample_rate": self.sample_rate,
+            "log_path": str(self.log_path) if self.log_path else None
+        }
+
+
+# Global trace store instance
+trace_store = TraceStore(
+    buffer_size=settings.TRACE_BUFFER_SIZE,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    log_path=settings.TRACE_LOG_PATH or None,
+    max_bytes=settings.TRACE_LOG_MAX_BYTES,
+    backup_count=settings.TRACE_LOG_BACKUPS
+)
@@ -0,0 +1,141 @@
+"""
+⚖️ Fair Queuing for the Request Queue ⚖️
+JAI MAHAKAAL! One heavy user must not starve everyone else
+
+DeficitRoundRobinQueue serves per-tenant FIFOs in round-robin order, each
+tenant spending a weighted quantum of cost per turn, so service is shared
+fairly regardless of how much one tenant has queued.
+
+CoDelMonitor tracks queue sojourn time CoDel-style: once the delay has
+stayed above `target` for a full `interval`, the queue is considered
+overloaded and new work from backlogged tenants should be shed.
+"""
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Deque
+
+
+class DeficitRoundRobinQueue:
+    """
+    ⚖️ Deficit round-robin across tenants
+
+    Features:
+    - Per-tenant FIFO, O(1) push and amortized O(1) pop
+    - Per-tenant weights (quantum multiplier)
+    - Lazy deletion: dead entries are skipped when reached
+    """
+
+    def __init__(self, quantum: float = 1.0):
+        self.quantum = quantum
+        self.weights: Dict[str, float] = {}
+
+        self._queues: Dict[str, Deque[Any]] = {}
+        self._deficits: Dict[str, float] = {}
+        self._active: Deque[str] = deque()
+
+    def push(self, tenant: str, item: Any) -> None:
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = deque()
+        if not queue:
+            self._active.append(tenant)
+            self._deficits[tenant] = 0.0
+        queue.append(item)
+
+    def pop(self, is_live: Callable[[Any], bool] = lambda item: True, cost: Callable[[Any], float] = lambda item: 1.0) -> Optional[Any]:
+        """Next item in fair order, or None if nothing live is queued"""
+        while self._active:
+            tenant = self._active[0]
+            queue = self._queues[tenant]
+
+            # Drop dead entries at the head before charging anything
+            while queue and not is_live(queue[0]):
+                queue.popleft()
+            if not queue:
+                self._retire(tenant)
+                continue
+
+            item_cost = cost(queue[0])
+            if self._deficits[tenant] < item_cost:
+                # Out of credit this round: top up and go to the back of the line
+                self._deficits[tenant] += self.quantum * self.weights.get(tenant, 1.0)
+                self._active.rotate(-1)
+                continue
+
+            item = queue.popleft()
+            self._deficits[tenant] -= item_cost
+            if not queue:
+                self._retire(tenant)
+            return item
+        return None
+
+    def _retire(self, tenant: str) -> None:
+        self._active.popleft()
+        self._deficits.pop(tenant, None)
+        del self._queues[tenant]
+
+    def compact(self, is_live: Callable[[Any], bool]) -> None:
+        """Physically remove dead entries from every tenant queue"""
+        for tenant in list(self._active):
+            self._queues[tenant] = deque(item for item in self._queues[tenant] if is_live(item))
+            if not self._queues[tenant]:
+                self._active.remove(tenant)
+                self._deficits.pop(tenant, None)
+                del self._queues[tenant]
+
+    def __len__(self) -> int:
+        """Physical length, including entries awaiting lazy deletion"""
+        return sum(len(q) for q in self._queues.values())
+
+    @property
+    def backlogged_tenants(self) -> int:
+        return len(self._active)
+
+
+class CoDelMonitor:
+    """
+    ⏳ CoDel-style overload detector on queue sojourn time
+
+    `overloaded` turns on when every dequeue for `interval` seconds waited
+    longer than `target`, and turns off at the first dequeue under target.
+    """
+
+    def __init__(self, target: float = 0.1, interval: float = 1.0, alpha: float = 0.1):
+        self.target = target
+        self.interval = interval
+        self.alpha = alpha
+
+        self.overloaded = False
+        self.sojourn_ewma = 0.0
+        self.last_sojourn = 0.0
+        self.shed_count = 0
+        self._first_above: Optional[float] = None
+
+    def observe(self, sojourn: float, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.last_sojourn = sojourn
+        self.sojourn_ewma = sojourn if not self.sojourn_ewma else (
+            self.alpha * sojourn + (1 - self.alpha) * self.sojourn_ewma
+        )
+
+        if sojourn < self.target:
+            self._first_above = None
+            self.overloaded = False
+        elif self._first_above is None:
+            self._first_above = now + self.interval
+        elif now >= self._first_above:
+            self.overloaded = True
+
+    def idle(self) -> None:
+        """Queue drained completely; nothing is waiting"""
+        self._first_above = None
+        self.overloaded = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'overloaded': self.overloaded,
+            'sojourn_ewma_ms': self.sojourn_ewma * 1000,
+            'last_sojourn_ms': self.last_sojourn * 1000,
+            'target_ms': self.target * 1000,
+            'shed': self.shed_count
+        }
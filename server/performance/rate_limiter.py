@@ -0,0 +1,294 @@
+"""
+🚦 Distributed Rate Limiter 🚦
+JAI MAHAKAAL! One atomic round trip per decision, or none at all
+
+Token buckets shared across processes through Redis. The whole
+read-refill-decrement runs server-side in a single Lua script, so bursts
+cannot overshoot the limit and each decision costs one round trip.
+
+Modes:
+- atomic: every acquire runs the script (one async round trip)
+- leased: a process takes a small lease of tokens in one script call and
+  spends it locally, so most acquires never leave the process
+- local:  in-process buckets only
+
+Whenever Redis is unreachable the limiter falls back to in-process
+buckets and retries Redis after a short backoff.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis-py < 4.2
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bucket; ARGV: rate (tokens/s), capacity, requested, partial (1 = grant what is available)
+TOKEN_BUCKET_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local partial = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = 0
+if tokens >= requested then
+  granted = requested
+elseif partial == 1 then
+  granted = math.floor(tokens)
+end
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+local retry_after = 0
+if granted == 0 then
+  local needed = requested
+  if partial == 1 then needed = 1 end
+  retry_after = math.max(0, needed - tokens) / rate
+end
+return {granted, tostring(tokens), tostring(retry_after)}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of one acquire"""
+    allowed: bool
+    remaining: float
+    retry_after: float
+    source: str  # redis, lease, local
+
+
+class LocalTokenBucket:
+    """In-process token buckets, LRU-bounded by key count"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def acquire(self, key: str, rate: float, capacity: float, tokens: float = 1) -> RateLimitResult:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= tokens:
+            bucket[0] -= tokens
+            return RateLimitResult(True, bucket[0], 0.0, "local")
+        return RateLimitResult(False, bucket[0], (tokens - bucket[0]) / rate, "local")
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """
+    🚦 Token-bucket rate limiting service
+
+    Features:
+    - Atomic server-side token bucket (single Lua script call, async client)
+    - Leased-quota mode: batch decrements locally, refill in one call
+    - In-process fallback when Redis is absent or failing
+    - Per-key limit overrides
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        capacity: float = 60,
+        redis_client: Optional[Any] = None,
+        redis_url: Optional[str] = None,
+        mode: str = "atomic",
+        lease_size: int = 10,
+        lease_ttl: float = 1.0,
+        key_prefix: str = "lex:rate:",
+        redis_retry_after: float = 5.0
+    ):
+        if mode not in ("atomic", "leased", "local"):
+            raise ValueError(f"Unknown rate limiter mode: {mode}")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.mode = mode
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl  # unspent leased tokens are forfeited after this long
+        self.key_prefix = key_prefix
+        self.redis_retry_after = redis_retry_after
+
+        self.redis_url = redis_url
+        self.redis_client = redis_client
+        self._script = None
+        self._redis_down_until = 0.0
+
+        self.local = LocalTokenBucket()
+        self.limits: Dict[str, Tuple[float, float]] = {}
+        self._leases: Dict[str, list] = {}
+        self._refills: Dict[str, asyncio.Future] = {}
+
+        self.stats = {
+            'allowed': 0,
+            'denied': 0,
+            'redis_calls': 0,
+            'lease_hits': 0,
+            'fallbacks': 0
+        }
+
+    def set_limit(self, key: str, rate: float, capacity: float) -> None:
+        """Override rate (tokens/s) and burst capacity for one key"""
+        self.limits[key] = (rate, capacity)
+
+    def _limit_for(self, key: str) -> Tuple[float, float]:
+        return self.limits.get(key, (self.rate, self.capacity))
+
+    def _redis(self):
+        """Async client and registered script, or None when unavailable"""
+        if self.mode == "local" or time.monotonic() < self._redis_down_until:
+            return None
+        if self.redis_client is None:
+            if not self.redis_url or redis_asyncio is None:
+                return None
+            self.redis_client = redis_asyncio.from_url(self.redis_url)
+        if self._script is None:
+            self._script = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    async def _redis_acquire(self, key: str, rate: float, capacity: float, tokens: float, partial: bool):
+        script = self._redis()
+        if script is None:
+            return None
+        try:
+            self.stats['redis_calls'] += 1
+            granted, remaining, retry_after = await script(
+                keys=[self.key_prefix + key],
+                args=[rate, capacity, tokens, 1 if partial else 0]
+            )
+            return int(granted), float(remaining), float(retry_after)
+        except Exception as e:
+            self._redis_down_until = time.monotonic() + self.redis_retry_after
+            self.stats['fallbacks'] += 1
+            logger.warning(f"⚠️ Rate limiter falling back to local buckets: {e}")
+            return None
+
+    async def acquire(self, key: str, tokens: int = 1) -> RateLimitResult:
+        """Take tokens for key; never raises"""
+        rate, capacity = self._limit_for(key)
+
+        if self.mode == "leased":
+            result = await self._acquire_leased(key, rate, capacity, tokens)
+        else:
+            result = None
+            response = await self._redis_acquire(key, rate, capacity, tokens, partial=False)
+            if response is not None:
+                granted, remaining, retry_after = response
+                result = RateLimitResult(granted >= tokens, remaining, retry_after, "redis")
+
+        if result is None:
+            result = self.local.acquire(key, rate, capacity, tokens)
+
+        self.stats['allowed' if result.allowed else 'denied'] += 1
+        return result
+
+    async def _acquire_leased(self, key: str, rate: float, capacity: float, tokens: int) -> Optional[RateLimitResult]:
+        # Lease entry: [tokens, expires_at, denied_until]
+        while True:
+            now = time.monotonic()
+            lease = self._leases.get(key)
+            if lease and lease[1] > now:
+                if lease[0] >= tokens:
+                    lease[0] -= tokens
+                    self.stats['lease_hits'] += 1
+                    return RateLimitResult(True, lease[0], 0.0, "lease")
+                if lease[2] > now:
+                    # Redis said the bucket is empty; don't ask again until it refills
+                    return RateLimitResult(False, lease[0], lease[2] - now, "lease")
+
+            # Single-flight refill: concurrent callers wait for one script call
+            pending = self._refills.get(key)
+            if pending is None:
+                break
+            await asyncio.shield(pending)
+
+        # Never lease more than a fraction of the bucket, so a few processes can share it
+        size = max(tokens, min(self.lease_size, int(capacity // 4) or 1))
+        refill = asyncio.get_running_loop().create_future()
+        self._refills[key] = refill
+        try:
+            response = await self._redis_acquire(key, rate, capacity, size, partial=True)
+        finally:
+            del self._refills[key]
+            refill.set_result(None)
+        if response is None:
+            return None
+
+        granted, remaining, retry_after = response
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        available = (lease[0] if lease and lease[1] > now else 0) + granted
+        if available < tokens:
+            # Not enough for this request; keep the partial grant for the next one
+            retry_after = max(retry_after, (tokens - available) / rate)
+            self._leases[key] = [available, now + self.lease_ttl, now + retry_after]
+            return RateLimitResult(False, remaining, retry_after, "redis")
+
+        self._leases[key] = [available - tokens, now + self.lease_ttl, 0.0]
+        if len(self._leases) > self.local.max_keys:
+            self._leases = {k: v for k, v in self._leases.items() if v[1] > now}
+        return RateLimitResult(True, available - tokens, 0.0, "redis")
+
+    async def close(self) -> None:
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'mode': self.mode,
+            'redis_available': self._redis_down_until <= time.monotonic() and (
+                self.redis_client is not None or bool(self.redis_url)
+            ),
+            'local_buckets': len(self.local),
+            'active_leases': len(self._leases)
+        }
+
+
+def async_client_from_sync(client: Any) -> Optional[Any]:
+    """Build a redis.asyncio client with the same connection settings as a sync redis.Redis"""
+    if client is None or redis_asyncio is None:
+        return None
+    try:
+        kwargs = dict(client.connection_pool.connection_kwargs)
+        return redis_asyncio.Redis(**kwargs)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not derive async redis client: {e}")
+        return None
+
+
+# Global rate limiter (per-user request limits; 60/minute by default)
+rate_limiter = RateLimiter(
+    rate=float(os.getenv('RATE_LIMIT_PER_MINUTE', '60')) / 60,
+    capacity=float(os.getenv('RATE_LIMIT_BURST', os.getenv('RATE_LIMIT_PER_MINUTE', '60'))),
+    redis_url=os.getenv('REDIS_URL'),
+    mode=os.getenv('RATE_LIMIT_MODE', 'atomic')
+)
@@ -1,37 +1,23 @@
 """
 🚀 Redis Caching System for Performance Optimization 🚀
 JAI MAHAKAAL! High-performance caching for model responses and data
+
+Values live in the shared two-tier cache (tiered_cache.py): a bounded
+in-process L1 in front of async Redis, so hot entries never leave the
+process and Redis outages degrade to L1-only instead of no caching.
+Each entry is a single key holding a versioned envelope; access counts
+are kept in process and flushed in batches, never written per hit.
 """
 import asyncio
 import json
 import logging
 import hashlib
-import pickle
-from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Union, List
-import aioredis
-from dataclasses import dataclass, asdict
 import os
 
-logger = logging.getLogger(__name__)
+from .tiered_cache import get_tiered_cache, cache_tags
 
-@dataclass
-class CacheEntry:
-    """Cache entry with metadata"""
-    key: str
-    value: Any
-    created_at: datetime
-    expires_at: Optional[datetime]
-    access_count: int = 0
-    last_accessed: Optional[datetime] = None
-    tags: List[str] = None
-    
-    def to_dict(self) -> Dict[str, Any]:
-        data = asdict(self)
-        data['created_at'] = self.created_at.isoformat()
-        data['expires_at'] = self.expires_at.isoformat() if self.expires_at else None
-        data['last_accessed'] = self.last_accessed.isoformat() if self.last_accessed else None
-        return data
+logger = logging.getLogger(__name__)
 
 class RedisCache:
     """
@@ -42,13 +28,14 @@ class RedisCache:
     - Request deduplication
     - Cache warming and preloading
     - Intelligent cache invalidation
-    - Performance metrics tracking
-    - Memory-efficient serialization
+    - Performance metrics tracking (batched hot-key counters, no per-hit writes)
+    - Batched multi-key reads (one MGET)
+    - In-process L1 tier with L1-only fallback when Redis is down
     """
     
     def __init__(self):
         self.redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
-        self.redis_client: Optional[aioredis.Redis] = None
+        self.cache = get_tiered_cache(self.redis_url)
         self.default_ttl = int(os.getenv('CACHE_DEFAULT_TTL', '3600'))  # 1 hour
         self.max_memory_mb = int(os.getenv('CACHE_MAX_MEMORY_MB', '512'))
         
@@ -75,16 +62,20 @@ class RedisCache:
         
         logger.info("🚀 Redis Cache System initialized")
     
+    @property
+    def redis_client(self):
+        """Shared async Redis client, or None while Redis is unavailable"""
+        return self.cache.l2_client()
+    
+    def _namespace(self, prefix: str) -> str:
+        """Tiered-cache namespace for a prefix ('lex:model:' -> 'model')"""
+        return self.prefixes[prefix][len(self.cache.key_prefix):-1]
+    
     async def initialize(self) -> None:
         """Initialize Redis connection"""
         try:
-            self.redis_client = aioredis.from_url(
-                self.redis_url,
-                encoding="utf-8",
-                decode_responses=False,  # We'll handle encoding ourselves
-                max_connections=20,
-                retry_on_timeout=True
-            )
+            if not self.redis_client:
+                raise ConnectionError("Redis client unavailable")
             
             # Test connection
             await self.redis_client.ping()
@@ -97,15 +88,17 @@ class RedisCache:
             
         except Exception as e:
             logger.error(f"❌ Redis cache initialization failed: {e}")
-            # Fallback to in-memory cache
-            self.redis_client = None
+            # Fall back to the in-process tier until Redis answers again
+            self.cache.mark_l2_down(e)
+    
+    def _generate_key_hash(self, identifier: str, **kwargs) -> str:
+        """Deterministic key within a namespace"""
+        key_data = f"{identifier}:{json.dumps(kwargs, sort_keys=True)}"
+        return hashlib.md5(key_data.encode()).hexdigest()
     
     def _generate_cache_key(self, prefix: str, identifier: str, **kwargs) -> str:
         """Generate cache key with consistent hashing"""
-        # Create deterministic key from parameters
-        key_data = f"{identifier}:{json.dumps(kwargs, sort_keys=True)}"
-        key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        return f"{self.prefixes[prefix]}{key_hash}"
+        return f"{self.prefixes[prefix]}{self._generate_key_hash(identifier, **kwargs)}"
     
     async def get_model_response(
         self,
@@ -115,24 +108,10 @@ class RedisCache:
     ) -> Optional[Dict[str, Any]]:
         """Get cached model response"""
         try:
-            if not self.redis_client:
-                return None
-            
-            cache_key = self._generate_cache_key(
-                'model_response',
-                f"{model_name}:{prompt}",
-                **parameters or {}
-            )
-            
-            cached_data = await self.redis_client.get(cache_key)
-            if cached_data:
+            key_hash = self._generate_key_hash(f"{model_name}:{prompt}", **parameters or {})
+            result = await self.cache.get(self._namespace('model_response'), key_hash)
+            if result is not None:
                 self.metrics['hits'] += 1
-                
-                # Update access metadata
-                await self._update_access_metadata(cache_key)
-                
-                # Deserialize and return
-                result = pickle.loads(cached_data)
                 logger.debug(f"🎯 Cache HIT for model response: {model_name}")
                 return result
             
@@ -151,42 +130,18 @@ class RedisCache:
         prompt: str,
         response: Dict[str, Any],
         parameters: Dict[str, Any] = None,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        user_id: Optional[str] = None,
+        document_id: Optional[str] = None
     ) -> bool:
-        """Cache model response"""
+        """Cache model response, tagged by model and (when given) user/document"""
         try:
-            if not self.redis_client:
-                return False
-            
-            cache_key = self._generate_cache_key(
-                'model_response',
-                f"{model_name}:{prompt}",
-                **parameters or {}
-            )
-            
-            # Add metadata
-            cache_entry = CacheEntry(
-                key=cache_key,
-                value=response,
-                created_at=datetime.now(),
-                expires_at=datetime.now() + timedelta(seconds=ttl or self.default_ttl),
-                tags=[model_name, 'model_response']
-            )
-            
-            # Serialize and store
-            serialized_data = pickle.dumps(cache_entry.value)
-            await self.redis_client.setex(
-                cache_key,
-                ttl or self.default_ttl,
-                serialized_data
-            )
-            
-            # Store metadata separately
-            metadata_key = f"{cache_key}:meta"
-            await self.redis_client.setex(
-                metadata_key,
-                ttl or self.default_ttl,
-                json.dumps(cache_entry.to_dict())
+            await self.cache.set(
+                self._namespace('model_response'),
+                self._generate_key_hash(f"{model_name}:{prompt}", **parameters or {}),
+                response,
+                ttl=ttl or self.default_ttl,
+                tags=cache_tags(user_id=user_id, model=model_name, document_id=document_id)
             )
             
             self.metrics['sets'] += 1
@@ -198,18 +153,36 @@ class RedisCache:
             logger.error(f"❌ Cache set error: {e}")
             return False
     
+    async def get_model_responses(
+        self,
+        model_name: str,
+        prompts: List[str],
+        parameters: Dict[str, Any] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Cached responses for many prompts in one round trip; maps prompt -> response"""
+        try:
+            hashes = {
+                self._generate_key_hash(f"{model_name}:{prompt}", **parameters or {}): prompt
+                for prompt in prompts
+            }
+            found = await self.cache.get_many(self._namespace('model_response'), list(hashes))
+            self.metrics['hits'] += len(found)
+            self.metrics['misses'] += len(hashes) - len(found)
+            return {hashes[key_hash]: response for key_hash, response in found.items()}
+            
+        except Exception as e:
+            self.metrics['errors'] += 1
+            logger.error(f"❌ Cache batch get error: {e}")
+            return {}
+    
     async def get_user_context(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get cached user context"""
         try:
-            if not self.redis_client:
-                return None
+            context = await self.cache.get(self._namespace('user_context'), self._generate_key_hash(user_id))
             
-            cache_key = self._generate_cache_key('user_context', user_id)
-            cached_data = await self.redis_client.get(cache_key)
-            
-            if cached_data:
+            if context is not None:
                 self.metrics['hits'] += 1
-                return pickle.loads(cached_data)
+                return context
             
             self.metrics['misses'] += 1
             return None
@@ -219,6 +192,20 @@ class RedisCache:
             logger.error(f"❌ User context cache error: {e}")
             return None
     
+    async def get_user_contexts(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached contexts for many users in one round trip"""
+        try:
+            hashes = {self._generate_key_hash(user_id): user_id for user_id in user_ids}
+            found = await self.cache.get_many(self._namespace('user_context'), list(hashes))
+            self.metrics['hits'] += len(found)
+            self.metrics['misses'] += len(hashes) - len(found)
+            return {hashes[key_hash]: context for key_hash, context in found.items()}
+            
+        except Exception as e:
+            self.metrics['errors'] += 1
+            logger.error(f"❌ User context batch get error: {e}")
+            return {}
+    
     async def set_user_context(
         self,
         user_id: str,
@@ -227,16 +214,12 @@ class RedisCache:
     ) -> bool:
         """Cache user context"""
         try:
-            if not self.redis_client:
-                return False
-            
-            cache_key = self._generate_cache_key('user_context', user_id)
-            serialized_data = pickle.dumps(context)
-            
-            await self.redis_client.setex(
-                cache_key,
-                ttl or self.default_ttl,
-                serialized_data
+            await self.cache.set(
+                self._namespace('user_context'),
+                self._generate_key_hash(user_id),
+                context,
+                ttl=ttl or self.default_ttl,
+                tags=cache_tags(user_id=user_id)
             )
             
             self.metrics['sets'] += 1
@@ -247,20 +230,25 @@ class RedisCache:
             logger.error(f"❌ User context cache set error: {e}")
             return False
     
-    async def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate cache entries matching pattern"""
+    async def invalidate_tag(self, tag: str) -> int:
+        """Invalidate every entry registered under a tag (see cache_tags)"""
         try:
-            if not self.redis_client:
-                return 0
-            
-            keys = await self.redis_client.keys(pattern)
-            if keys:
-                deleted = await self.redis_client.delete(*keys)
-                self.metrics['deletes'] += deleted
-                logger.info(f"🗑️ Invalidated {deleted} cache entries matching: {pattern}")
-                return deleted
+            deleted = await self.cache.invalidate_tag(tag)
+            self.metrics['deletes'] += deleted
+            logger.info(f"🗑️ Invalidated {deleted} cache entries tagged: {tag}")
+            return deleted
             
+        except Exception as e:
+            self.metrics['errors'] += 1
+            logger.error(f"❌ Cache invalidation error: {e}")
             return 0
+    
+    async def invalidate_namespace(self, prefix: str) -> int:
+        """Invalidate a whole cache type (e.g. 'model_response'); returns the new generation"""
+        try:
+            generation = await self.cache.invalidate_namespace(self._namespace(prefix))
+            logger.info(f"🗑️ Invalidated cache namespace: {prefix} (generation {generation})")
+            return generation
             
         except Exception as e:
             self.metrics['errors'] += 1
@@ -269,15 +257,19 @@ class RedisCache:
     
     async def invalidate_user_cache(self, user_id: str) -> int:
         """Invalidate all cache entries for a user"""
-        pattern = f"{self.prefixes['user_context']}{user_id}*"
-        return await self.invalidate_pattern(pattern)
+        return await self.invalidate_tag(f"user:{user_id}")
+    
+    async def invalidate_model_cache(self, model_name: str) -> int:
+        """Invalidate all cached responses from a model"""
+        return await self.invalidate_tag(f"model:{model_name}")
+    
+    async def invalidate_document_cache(self, document_id: str) -> int:
+        """Invalidate all cache entries derived from a document"""
+        return await self.invalidate_tag(f"document:{document_id}")
     
     async def warm_cache(self, warm_data: List[Dict[str, Any]]) -> int:
         """Warm cache with precomputed data"""
         try:
-            if not self.redis_client:
-                return 0
-            
             warmed = 0
             for item in warm_data:
                 cache_type = item.get('type')
@@ -287,7 +279,9 @@ class RedisCache:
                         prompt=item['prompt'],
                         response=item['response'],
                         parameters=item.get('parameters'),
-                        ttl=item.get('ttl')
+                        ttl=item.get('ttl'),
+                        user_id=item.get('user_id'),
+                        document_id=item.get('document_id')
                     )
                     if success:
                         warmed += 1
@@ -308,34 +302,11 @@ class RedisCache:
             logger.error(f"❌ Cache warming error: {e}")
             return 0
     
-    async def _update_access_metadata(self, cache_key: str) -> None:
-        """Update access metadata for cache entry"""
-        try:
-            metadata_key = f"{cache_key}:meta"
-            metadata_json = await self.redis_client.get(metadata_key)
-            
-            if metadata_json:
-                metadata = json.loads(metadata_json)
-                metadata['access_count'] = metadata.get('access_count', 0) + 1
-                metadata['last_accessed'] = datetime.now().isoformat()
-                
-                # Update metadata with same TTL as original key
-                ttl = await self.redis_client.ttl(cache_key)
-                if ttl > 0:
-                    await self.redis_client.setex(
-                        metadata_key,
-                        ttl,
-                        json.dumps(metadata)
-                    )
-                    
-        except Exception as e:
-            logger.debug(f"Metadata update error: {e}")
-    
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics"""
         try:
             if not self.redis_client:
-                return {"status": "Redis not available", "metrics": self.metrics}
+                return {"status": "Redis not available", "metrics": self.metrics, "tiered_cache": self.cache.get_stats()}
             
             info = await self.redis_client.info('memory')
             keyspace = await self.redis_client.info('keyspace')
@@ -348,6 +319,8 @@ class RedisCache:
                 "status": "active",
                 "hit_rate_percent": round(hit_rate, 2),
                 "metrics": self.metrics,
+                "tiered_cache": self.cache.get_stats(),
+                "hot_model_responses": await self.cache.get_hot_keys(self._namespace('model_response'), 10),
                 "memory_used_mb": round(info.get('used_memory', 0) / 1024 / 1024, 2),
                 "memory_peak_mb": round(info.get('used_memory_peak', 0) / 1024 / 1024, 2),
                 "total_keys": sum(db.get('keys', 0) for db in keyspace.values() if isinstance(db, dict)),
@@ -362,24 +335,26 @@ class RedisCache:
             return {"status": "error", "error": str(e), "metrics": self.metrics}
     
     async def cleanup_expired(self) -> int:
-        """Clean up expired cache entries"""
+        """
+        Redis expires entries itself; this only removes `{key}:meta`
+        entries written by older versions (SCAN, batched UNLINK)
+        """
         try:
             if not self.redis_client:
                 return 0
             
-            # Redis handles TTL automatically, but we can clean up orphaned metadata
-            pattern = "*:meta"
-            meta_keys = await self.redis_client.keys(pattern)
-            
             cleaned = 0
-            for meta_key in meta_keys:
-                original_key = meta_key.replace(':meta', '')
-                if not await self.redis_client.exists(original_key):
-                    await self.redis_client.delete(meta_key)
-                    cleaned += 1
+            batch = []
+            async for meta_key in self.redis_client.scan_iter(match="lex:*:meta", count=500):
+                batch.append(meta_key)
+                if len(batch) >= 500:
+                    cleaned += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                cleaned += await self.redis_client.unlink(*batch)
             
             if cleaned > 0:
-                logger.info(f"🧹 Cleaned up {cleaned} orphaned metadata entries")
+                logger.info(f"🧹 Removed {cleaned} legacy metadata entries")
             
             return cleaned
             
@@ -8,10 +8,14 @@ import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Callable, List, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
-import heapq
-from collections import defaultdict, deque
+import math
+from collections import defaultdict, deque, OrderedDict
+
+from .retry_scheduler import RetryScheduler
+from .fair_queue import DeficitRoundRobinQueue, CoDelMonitor
+from .rate_limiter import RateLimiter, rate_limiter as default_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +27,18 @@ class RequestPriority(Enum):
     LOW = 4         # Background tasks, analytics
     BATCH = 5       # Bulk operations
 
+class AdmissionRejected(Exception):
+    """Request refused at enqueue time; retry_after is the suggested wait in seconds"""
+    
+    def __init__(self, message: str, retry_after: float, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
 class RequestStatus(Enum):
     """Request status"""
     QUEUED = "queued"
+    RETRY_SCHEDULED = "retry_scheduled"
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
@@ -50,6 +63,11 @@ class QueuedRequest:
     completed_at: Optional[datetime] = None
     result: Optional[Any] = None
     error: Optional[str] = None
+    deadline: Optional[datetime] = None
+    enqueued_at: Optional[datetime] = None
+    next_attempt_at: Optional[datetime] = None
+    dead_letter_reason: Optional[str] = None
+    future: Optional[asyncio.Future] = field(default=None, repr=False, compare=False)
     
     def __lt__(self, other):
         """For priority queue ordering"""
@@ -58,14 +76,14 @@ class QueuedRequest:
         return self.created_at < other.created_at
     
     def to_dict(self) -> Dict[str, Any]:
-        data = asdict(self)
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ('callback', 'future')}
         data['priority'] = self.priority.name
         data['status'] = self.status.value
         data['created_at'] = self.created_at.isoformat()
         data['started_at'] = self.started_at.isoformat() if self.started_at else None
         data['completed_at'] = self.completed_at.isoformat() if self.completed_at else None
-        # Remove callback from serialization
-        data.pop('callback', None)
+        for key in ('deadline', 'enqueued_at', 'next_attempt_at'):
+            data[key] = data[key].isoformat() if data[key] else None
         return data
 
 class RequestQueue:
@@ -74,34 +92,71 @@ class RequestQueue:
     
     Features:
     - Priority-based request processing
+    - Weighted fair queuing (deficit round-robin) across users within a priority
+    - CoDel-style admission control with Retry-After estimates
     - Rate limiting per user/endpoint
     - Request deduplication
-    - Automatic retry with exponential backoff
+    - Automatic retry with jittered exponential backoff on a timer, not in workers
+    - Per-request deadlines and a dead-letter queue
     - Circuit breaker pattern
     - Load balancing across workers
     - Request timeout handling
     - Performance metrics and monitoring
+    - Event-driven workers (no polling) and awaitable results
+    - O(1) status lookup and lazy-deletion cancellation
     """
     
-    def __init__(self, max_workers: int = 10, max_queue_size: int = 1000):
+    def __init__(
+        self,
+        max_workers: int = 10,
+        max_queue_size: int = 1000,
+        dead_letter_size: int = 1000,
+        max_user_share: float = 0.5,
+        codel_target: float = 0.1,
+        codel_interval: float = 1.0,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
         self.max_workers = max_workers
         self.max_queue_size = max_queue_size
+        self.dead_letter_size = dead_letter_size
+        self.max_user_share = max_user_share  # most of max_queue_size one user may occupy
         
-        # Priority queue for requests
-        self.request_queue: List[QueuedRequest] = []
+        # Strict priority between levels, deficit round-robin across users within
+        # a level; cancelled entries stay queued and are skipped (lazy deletion)
+        self.priority_queues: Dict[RequestPriority, DeficitRoundRobinQueue] = {
+            priority: DeficitRoundRobinQueue() for priority in RequestPriority
+        }
+        self.codel_target = codel_target
+        self.codel_interval = codel_interval
+        self.queue_delay: Dict[RequestPriority, CoDelMonitor] = {
+            priority: CoDelMonitor(target=codel_target, interval=codel_interval) for priority in RequestPriority
+        }
+        # DRR keeps light users' sojourn low even when the level is congested,
+        # so backlogged users are also tracked individually
+        self.user_delay: Dict[tuple, CoDelMonitor] = {}
+        self.priority_queued: Dict[RequestPriority, int] = {priority: 0 for priority in RequestPriority}
+        self.user_queued: Dict[str, int] = defaultdict(int)
+        self.user_priority_queued: Dict[tuple, int] = defaultdict(int)
         self.active_requests: Dict[str, QueuedRequest] = {}
         self.completed_requests: deque = deque(maxlen=1000)  # Keep recent history
         
+        # request_id -> entry for every queued, active or recently completed request
+        self.request_index: Dict[str, QueuedRequest] = {}
+        self._queued_count = 0
+        self._queue_condition: Optional[asyncio.Condition] = None
+        self._running_tasks: Dict[str, asyncio.Future] = {}
+        
         # Worker management
         self.workers: List[asyncio.Task] = []
         self.worker_stats: Dict[int, Dict[str, Any]] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
         
-        # Rate limiting
-        self.rate_limits: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-            'requests': deque(maxlen=100),
-            'limit_per_minute': 60,
-            'limit_per_hour': 1000
-        })
+        # Delayed retries and requests that exhausted retries or missed their deadline
+        self.retry_scheduler = RetryScheduler()
+        self.dead_letters: "OrderedDict[str, QueuedRequest]" = OrderedDict()
+        
+        # Rate limiting (shared token-bucket service; per-user keys)
+        self.rate_limiter = rate_limiter or default_rate_limiter
         
         # Circuit breaker
         self.circuit_breakers: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
@@ -118,6 +173,8 @@ class RequestQueue:
             'completed_requests': 0,
             'failed_requests': 0,
             'timeout_requests': 0,
+            'retries_scheduled': 0,
+            'dead_lettered': 0,
             'average_processing_time': 0.0,
             'queue_size': 0,
             'active_workers': 0
@@ -148,8 +205,9 @@ class RequestQueue:
                 'status': 'idle'
             }
         
-        # Start monitoring task
-        asyncio.create_task(self._monitor_queue())
+        # Start monitoring task and retry timer
+        self._monitor_task = asyncio.create_task(self._monitor_queue())
+        self.retry_scheduler.start()
         
         logger.info(f"✅ Request queue started with {self.max_workers} workers")
     
@@ -160,9 +218,13 @@ class RequestQueue:
         # Cancel all workers
         for worker in self.workers:
             worker.cancel()
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        await self.retry_scheduler.stop()
         
         # Wait for workers to finish
         await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
         
         logger.info("🛑 Request queue stopped")
     
@@ -174,17 +236,28 @@ class RequestQueue:
         user_id: str = "anonymous",
         priority: RequestPriority = RequestPriority.NORMAL,
         timeout_seconds: float = 30.0,
-        deduplicate: bool = True
+        deduplicate: bool = True,
+        max_retries: int = 3,
+        deadline_seconds: Optional[float] = None,
+        rate_limited: bool = True
     ) -> str:
-        """Enqueue a request for processing"""
+        """
+        Enqueue a request for processing
+        
+        timeout_seconds bounds each attempt; deadline_seconds (optional) bounds
+        the whole request including retries, after which it is dead-lettered.
+        rate_limited=False skips the per-user rate limit (internal follow-up
+        work such as background document processing).
+        """
         try:
-            # Check queue size limit
-            if len(self.request_queue) >= self.max_queue_size:
-                raise Exception("Request queue is full")
+            # Admission control: queue capacity, per-user share and queue delay
+            self._check_admission(user_id, priority)
             
             # Check rate limits
-            if not await self._check_rate_limit(user_id, request_type):
-                raise Exception("Rate limit exceeded")
+            if rate_limited:
+                limit = await self.rate_limiter.acquire(f"user:{user_id}")
+                if not limit.allowed:
+                    raise AdmissionRejected("Rate limit exceeded", max(1.0, limit.retry_after), "rate_limited")
             
             # Check circuit breaker
             if not await self._check_circuit_breaker(request_type):
@@ -196,13 +269,14 @@ class RequestQueue:
             # Check for duplicate requests
             if deduplicate:
                 request_hash = self._generate_request_hash(request_type, payload)
-                if request_hash in self.request_hashes:
-                    existing_request_id = self.request_hashes[request_hash]
+                existing_request_id = self.request_hashes.get(request_hash)
+                if existing_request_id in self.request_index:
                     logger.info(f"🔄 Deduplicated request, returning existing: {existing_request_id}")
                     return existing_request_id
                 self.request_hashes[request_hash] = request_id
             
             # Create queued request
+            now = datetime.now()
             queued_request = QueuedRequest(
                 request_id=request_id,
                 user_id=user_id,
@@ -210,95 +284,310 @@ class RequestQueue:
                 priority=priority,
                 payload=payload,
                 callback=callback,
-                created_at=datetime.now(),
-                timeout_seconds=timeout_seconds
+                created_at=now,
+                timeout_seconds=timeout_seconds,
+                max_retries=max_retries,
+                deadline=now + timedelta(seconds=deadline_seconds) if deadline_seconds else None,
+                future=asyncio.get_running_loop().create_future()
             )
+            self.request_index[request_id] = queued_request
             
-            # Add to priority queue
-            heapq.heappush(self.request_queue, queued_request)
+            # Add to priority queue and wake one idle worker
+            await self._push(queued_request)
             
             # Update metrics
             self.metrics['total_requests'] += 1
-            self.metrics['queue_size'] = len(self.request_queue)
-            
-            # Record rate limit
-            self.rate_limits[user_id]['requests'].append(datetime.now())
             
             logger.debug(f"📥 Enqueued request {request_id} with priority {priority.name}")
             return request_id
             
+        except AdmissionRejected as e:
+            logger.debug(f"⛔ Rejected request from {user_id} ({e.reason}), retry after {e.retry_after:.1f}s")
+            raise
         except Exception as e:
             logger.error(f"❌ Failed to enqueue request: {e}")
             raise
     
-    async def get_request_status(self, request_id: str) -> Optional[Dict[str, Any]]:
-        """Get status of a request"""
-        # Check active requests
-        if request_id in self.active_requests:
-            return self.active_requests[request_id].to_dict()
-        
-        # Check completed requests
-        for request in self.completed_requests:
-            if request.request_id == request_id:
-                return request.to_dict()
+    def _check_admission(self, user_id: str, priority: RequestPriority) -> None:
+        """Raise AdmissionRejected if the request should be shed"""
+        if self._queued_count >= self.max_queue_size:
+            raise AdmissionRejected(
+                "Request queue is full", self.estimate_retry_after(priority), "queue_full"
+            )
         
-        # Check queued requests
-        for request in self.request_queue:
-            if request.request_id == request_id:
-                return request.to_dict()
+        backlog = self.user_queued.get(user_id, 0)
+        if backlog >= max(1, int(self.max_queue_size * self.max_user_share)):
+            raise AdmissionRejected(
+                "Per-user queue share exceeded", self.estimate_retry_after(priority, user_id), "user_share_exceeded"
+            )
         
-        return None
+        # While this priority (or this user's own backlog) is over the delay
+        # target, shed new work only from users who already have a backlog
+        # there; light users keep getting in
+        if priority == RequestPriority.CRITICAL or not self._user_backlog(user_id, priority):
+            return
+        user_delay = self.user_delay.get((user_id, priority))
+        if self.queue_delay[priority].overloaded or (user_delay and user_delay.overloaded):
+            self.queue_delay[priority].shed_count += 1
+            raise AdmissionRejected(
+                "Queue delay above target", self.estimate_retry_after(priority, user_id), "queue_delay"
+            )
+    
+    def _user_backlog(self, user_id: str, priority: RequestPriority) -> bool:
+        return self.user_priority_queued.get((user_id, priority), 0) > 0
+    
+    def estimate_retry_after(self, priority: RequestPriority, user_id: Optional[str] = None) -> float:
+        """
+        Seconds until a new request would likely be admitted and served:
+        work queued at this or higher priority drained by all workers; for a
+        backlogged user, their own backlog served at their fair share.
+        """
+        service_time = self.metrics['average_processing_time'] or 1.0
+        ahead = sum(
+            self.priority_queued[p] for p in RequestPriority if p.value <= priority.value
+        )
+        wait = ahead * service_time / max(1, self.max_workers)
+        if user_id and self.user_queued.get(user_id):
+            share = max(1, self.priority_queues[priority].backlogged_tenants)
+            wait = max(wait, self.user_queued[user_id] * service_time * share / max(1, self.max_workers))
+        return float(max(1, math.ceil(wait)))
+    
+    def set_user_weight(self, user_id: str, weight: float) -> None:
+        """Give a user (tenant) a larger or smaller share of service"""
+        for queue in self.priority_queues.values():
+            queue.weights[user_id] = weight
+    
+    async def enqueue(
+        self,
+        request_type: str,
+        payload: Dict[str, Any],
+        callback: Callable,
+        **kwargs
+    ) -> asyncio.Future:
+        """Enqueue a request and return a future resolving to the callback's result"""
+        request_id = await self.enqueue_request(request_type, payload, callback, **kwargs)
+        return self.request_index[request_id].future
+    
+    async def wait_for_result(self, request_id: str, timeout: Optional[float] = None) -> Any:
+        """Await the result of a previously enqueued request"""
+        request = self.request_index.get(request_id)
+        if request is None:
+            raise KeyError(f"Unknown request {request_id}")
+        return await asyncio.wait_for(asyncio.shield(request.future), timeout)
+    
+    async def get_request_status(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Get status of a request"""
+        request = self.request_index.get(request_id)
+        return request.to_dict() if request else None
     
     async def cancel_request(self, request_id: str) -> bool:
         """Cancel a queued or active request"""
         try:
-            # Check if request is active
-            if request_id in self.active_requests:
-                request = self.active_requests[request_id]
-                request.status = RequestStatus.CANCELLED
-                request.completed_at = datetime.now()
-                self.completed_requests.append(request)
-                del self.active_requests[request_id]
+            request = self.request_index.get(request_id)
+            if request is None or request.status not in (
+                RequestStatus.QUEUED, RequestStatus.RETRY_SCHEDULED, RequestStatus.PROCESSING
+            ):
+                return False
+            
+            if request.status == RequestStatus.RETRY_SCHEDULED:
+                self.retry_scheduler.cancel(request_id)
+                logger.info(f"🚫 Cancelled request {request_id} awaiting retry")
+            elif request.status == RequestStatus.QUEUED:
+                # Leave the queue entry in place; workers skip it when popped
+                self._dequeued(request)
+                logger.info(f"🚫 Cancelled queued request {request_id}")
+            else:
+                self.active_requests.pop(request_id, None)
+                task = self._running_tasks.pop(request_id, None)
+                if task:
+                    task.cancel()
                 logger.info(f"🚫 Cancelled active request {request_id}")
-                return True
             
-            # Check if request is queued
-            for i, request in enumerate(self.request_queue):
-                if request.request_id == request_id:
-                    request.status = RequestStatus.CANCELLED
-                    request.completed_at = datetime.now()
-                    self.completed_requests.append(request)
-                    del self.request_queue[i]
-                    heapq.heapify(self.request_queue)  # Restore heap property
-                    logger.info(f"🚫 Cancelled queued request {request_id}")
-                    return True
-            
-            return False
+            request.status = RequestStatus.CANCELLED
+            self._finish(request)
+            return True
             
         except Exception as e:
             logger.error(f"❌ Failed to cancel request {request_id}: {e}")
             return False
     
+    def _condition(self) -> asyncio.Condition:
+        if self._queue_condition is None:
+            self._queue_condition = asyncio.Condition()
+        return self._queue_condition
+    
+    async def _push(self, request: QueuedRequest) -> None:
+        """Add a request to the queue and wake one waiting worker"""
+        condition = self._condition()
+        async with condition:
+            request.status = RequestStatus.QUEUED
+            request.enqueued_at = datetime.now()
+            self.priority_queues[request.priority].push(request.user_id, request)
+            self._queued_count += 1
+            self.priority_queued[request.priority] += 1
+            self.user_queued[request.user_id] += 1
+            self.user_priority_queued[(request.user_id, request.priority)] += 1
+            self.metrics['queue_size'] = self._queued_count
+            condition.notify()
+    
+    async def _pop(self) -> QueuedRequest:
+        """Wait for the next live request; cancelled entries are discarded here"""
+        condition = self._condition()
+        async with condition:
+            while True:
+                for priority in RequestPriority:
+                    request = self.priority_queues[priority].pop(self._is_queued)
+                    if request is not None:
+                        sojourn = (datetime.now() - request.enqueued_at).total_seconds()
+                        self.queue_delay[priority].observe(sojourn)
+                        key = (request.user_id, priority)
+                        if key not in self.user_delay:
+                            self.user_delay[key] = CoDelMonitor(target=self.codel_target, interval=self.codel_interval)
+                        self.user_delay[key].observe(sojourn)
+                        self._dequeued(request)
+                        return request
+                    self.queue_delay[priority].idle()
+                await condition.wait()
+    
+    @staticmethod
+    def _is_queued(request: QueuedRequest) -> bool:
+        return request.status == RequestStatus.QUEUED
+    
+    def _dequeued(self, request: QueuedRequest) -> None:
+        """Bookkeeping when a request leaves the queue (popped or cancelled)"""
+        self._queued_count -= 1
+        self.priority_queued[request.priority] -= 1
+        self.user_queued[request.user_id] -= 1
+        if self.user_queued[request.user_id] <= 0:
+            del self.user_queued[request.user_id]
+        key = (request.user_id, request.priority)
+        self.user_priority_queued[key] -= 1
+        if self.user_priority_queued[key] <= 0:
+            del self.user_priority_queued[key]
+            self.user_delay.pop(key, None)
+        self.metrics['queue_size'] = self._queued_count
+    
+    def _schedule_retry(self, request: QueuedRequest) -> bool:
+        """Hand a failed request to the retry timer; False if it must be dead-lettered"""
+        if request.retry_count >= request.max_retries:
+            self._dead_letter(request, "max_retries_exceeded")
+            return False
+        
+        delay = self.retry_scheduler.backoff(request.retry_count + 1)
+        next_attempt = datetime.now() + timedelta(seconds=delay)
+        if request.deadline and next_attempt >= request.deadline:
+            self._dead_letter(request, "deadline_exceeded")
+            return False
+        
+        request.retry_count += 1
+        request.status = RequestStatus.RETRY_SCHEDULED
+        request.started_at = None
+        request.next_attempt_at = next_attempt
+        self.retry_scheduler.schedule(request.request_id, delay, lambda: self._retry_due(request))
+        self.metrics['retries_scheduled'] += 1
+        return True
+    
+    async def _retry_due(self, request: QueuedRequest) -> None:
+        if request.status == RequestStatus.RETRY_SCHEDULED:
+            request.next_attempt_at = None
+            await self._push(request)
+    
+    def _dead_letter(self, request: QueuedRequest, reason: str) -> None:
+        request.dead_letter_reason = reason
+        self.dead_letters[request.request_id] = request
+        self.dead_letters.move_to_end(request.request_id)
+        while len(self.dead_letters) > self.dead_letter_size:
+            self.dead_letters.popitem(last=False)
+        self.metrics['dead_lettered'] += 1
+        logger.warning(f"☠️ Dead-lettered request {request.request_id} ({reason}): {request.error}")
+    
+    def get_dead_letters(self, limit: int = 50, request_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent dead-lettered requests first"""
+        results = []
+        for request in reversed(self.dead_letters.values()):
+            if request_type and request.request_type != request_type:
+                continue
+            results.append(request.to_dict())
+            if len(results) >= limit:
+                break
+        return results
+    
+    async def requeue_dead_letter(self, request_id: str) -> bool:
+        """Give a dead-lettered request a fresh set of retries"""
+        request = self.dead_letters.pop(request_id, None)
+        if request is None:
+            return False
+        
+        now = datetime.now()
+        if request.deadline:
+            request.deadline = now + (request.deadline - request.created_at)
+        request.created_at = now
+        request.retry_count = 0
+        request.error = None
+        request.completed_at = None
+        request.dead_letter_reason = None
+        request.future = asyncio.get_running_loop().create_future()
+        self.request_index[request_id] = request
+        await self._push(request)
+        logger.info(f"♻️ Requeued dead-lettered request {request_id}")
+        return True
+    
+    def purge_dead_letters(self) -> int:
+        count = len(self.dead_letters)
+        self.dead_letters.clear()
+        return count
+    
+    def _finish(self, request: QueuedRequest) -> None:
+        """Record a terminal state, resolve the request's future and archive it"""
+        request.completed_at = request.completed_at or datetime.now()
+        
+        future = request.future
+        if future and not future.done():
+            if request.status == RequestStatus.COMPLETED:
+                future.set_result(request.result)
+            elif request.status == RequestStatus.CANCELLED:
+                future.cancel()
+            elif request.status == RequestStatus.TIMEOUT:
+                future.set_exception(asyncio.TimeoutError(request.error or "Request timeout"))
+            else:
+                future.set_exception(Exception(request.error or "Request failed"))
+            if future.done() and not future.cancelled():
+                future.exception()  # mark retrieved; fire-and-forget callers never await it
+        
+        # Keep the index bounded to queued/active work plus the recent history
+        if len(self.completed_requests) == self.completed_requests.maxlen:
+            evicted = self.completed_requests[0]
+            if self.request_index.get(evicted.request_id) is evicted and evicted.completed_at:
+                del self.request_index[evicted.request_id]
+        self.completed_requests.append(request)
+        
+        request_hash = self._generate_request_hash(request.request_type, request.payload)
+        if self.request_hashes.get(request_hash) == request.request_id:
+            del self.request_hashes[request_hash]
+    
     async def _worker(self, worker_id: int) -> None:
         """Worker task to process requests"""
         logger.info(f"👷 Worker {worker_id} started")
         
         while self._running:
             try:
-                # Get next request from queue
-                if not self.request_queue:
-                    await asyncio.sleep(0.1)
-                    continue
-                
-                request = heapq.heappop(self.request_queue)
-                self.metrics['queue_size'] = len(self.request_queue)
+                # Sleep until a request is pushed; no polling
+                request = await self._pop()
                 
-                # Check if request has timed out while in queue
-                if (datetime.now() - request.created_at).total_seconds() > request.timeout_seconds:
+                # Check if request has timed out while in queue or passed its deadline
+                now = datetime.now()
+                if request.deadline and now >= request.deadline:
+                    request.status = RequestStatus.TIMEOUT
+                    request.error = "Deadline exceeded"
+                    self.metrics['timeout_requests'] += 1
+                    self._dead_letter(request, "deadline_exceeded")
+                    self._finish(request)
+                    continue
+                if (now - request.enqueued_at).total_seconds() > request.timeout_seconds:
                     request.status = RequestStatus.TIMEOUT
-                    request.completed_at = datetime.now()
-                    self.completed_requests.append(request)
+                    request.error = "Timed out in queue"
                     self.metrics['timeout_requests'] += 1
+                    self._finish(request)
                     continue
                 
                 # Move to active requests
@@ -310,14 +599,18 @@ class RequestQueue:
                 self.worker_stats[worker_id]['status'] = 'processing'
                 self.worker_stats[worker_id]['last_request_time'] = datetime.now()
                 
-                # Process request
+                # Process request; an attempt never runs past the request deadline
                 start_time = time.time()
+                attempt_timeout = request.timeout_seconds
+                if request.deadline:
+                    attempt_timeout = min(attempt_timeout, (request.deadline - now).total_seconds())
                 try:
+                    # Calling the callback can itself raise (bad payload, not a coroutine)
+                    task = asyncio.ensure_future(request.callback(**request.payload))
+                    self._running_tasks[request.request_id] = task
+                    
                     # Execute the callback with timeout
-                    result = await asyncio.wait_for(
-                        request.callback(**request.payload),
-                        timeout=request.timeout_seconds
-                    )
+                    result = await asyncio.wait_for(task, timeout=attempt_timeout)
                     
                     request.result = result
                     request.status = RequestStatus.COMPLETED
@@ -332,29 +625,29 @@ class RequestQueue:
                     self.metrics['timeout_requests'] += 1
                     await self._record_failure(request.request_type)
                     
+                except asyncio.CancelledError:
+                    if request.status != RequestStatus.CANCELLED:
+                        raise
+                    # Cancelled through cancel_request(); already finished there
+                    self.worker_stats[worker_id]['status'] = 'idle'
+                    continue
+                    
                 except Exception as e:
                     request.status = RequestStatus.FAILED
                     request.error = str(e)
                     self.metrics['failed_requests'] += 1
                     await self._record_failure(request.request_type)
                     
-                    # Retry logic
-                    if request.retry_count < request.max_retries:
-                        request.retry_count += 1
-                        request.status = RequestStatus.QUEUED
-                        request.started_at = None
-                        
-                        # Exponential backoff
-                        delay = min(2 ** request.retry_count, 60)
-                        await asyncio.sleep(delay)
-                        
-                        heapq.heappush(self.request_queue, request)
+                    # Retry logic: backoff runs on the retry timer, the worker moves on
+                    if self._schedule_retry(request):
                         del self.active_requests[request.request_id]
+                        self.worker_stats[worker_id]['status'] = 'idle'
                         continue
+                finally:
+                    self._running_tasks.pop(request.request_id, None)
                 
                 # Complete request
                 processing_time = time.time() - start_time
-                request.completed_at = datetime.now()
                 
                 # Update metrics
                 self._update_processing_time_metric(processing_time)
@@ -362,21 +655,69 @@ class RequestQueue:
                 self.worker_stats[worker_id]['total_processing_time'] += processing_time
                 
                 # Move to completed requests
-                self.completed_requests.append(request)
-                del self.active_requests[request.request_id]
-                
-                # Clean up request hash
-                request_hash = self._generate_request_hash(request.request_type, request.payload)
-                self.request_hashes.pop(request_hash, None)
+                self.active_requests.pop(request.request_id, None)
+                self._finish(request)
                 
                 self.worker_stats[worker_id]['status'] = 'idle'
                 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"❌ Worker {worker_id} error: {e}")
                 await asyncio.sleep(1)
         
         logger.info(f"👷 Worker {worker_id} stopped")
     
+    async def _check_circuit_breaker(self, request_type: str) -> bool:
+        """Reject while open; allow a probe once the recovery timeout has passed"""
+        breaker = self.circuit_breakers[request_type]
+        if breaker['state'] != 'open':
+            return True
+        if breaker['last_failure'] and (datetime.now() - breaker['last_failure']).total_seconds() >= breaker['recovery_timeout']:
+            breaker['state'] = 'half-open'
+            return True
+        return False
+    
+    async def _record_success(self, request_type: str) -> None:
+        breaker = self.circuit_breakers[request_type]
+        breaker['failure_count'] = 0
+        breaker['state'] = 'closed'
+    
+    async def _record_failure(self, request_type: str) -> None:
+        breaker = self.circuit_breakers[request_type]
+        breaker['failure_count'] += 1
+        breaker['last_failure'] = datetime.now()
+        if breaker['state'] == 'half-open' or breaker['failure_count'] >= breaker['failure_threshold']:
+            if breaker['state'] != 'open':
+                logger.warning(f"⚡ Circuit breaker opened for {request_type}")
+            breaker['state'] = 'open'
+    
+    def _update_processing_time_metric(self, processing_time: float) -> None:
+        alpha = 0.1  # Smoothing factor
+        if self.metrics['completed_requests'] <= 1:
+            self.metrics['average_processing_time'] = processing_time
+        else:
+            self.metrics['average_processing_time'] = (
+                alpha * processing_time + (1 - alpha) * self.metrics['average_processing_time']
+            )
+    
+    async def _monitor_queue(self) -> None:
+        """Periodically compact the queues when cancelled entries pile up"""
+        while self._running:
+            try:
+                await asyncio.sleep(30)
+                if sum(len(q) for q in self.priority_queues.values()) > 2 * max(self._queued_count, 64):
+                    condition = self._condition()
+                    async with condition:
+                        for queue in self.priority_queues.values():
+                            queue.compact(self._is_queued)
+                if self._queued_count > self.max_queue_size * 0.8:
+                    logger.warning(f"⚠️ Request queue at {self._queued_count}/{self.max_queue_size}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Queue monitor error: {e}")
+    
     def _generate_request_hash(self, request_type: str, payload: Dict[str, Any]) -> str:
         """Generate hash for request deduplication"""
         import hashlib
@@ -388,13 +729,24 @@ class RequestQueue:
     
     async def get_queue_metrics(self) -> Dict[str, Any]:
         """Get queue performance metrics"""
-        self.metrics['queue_size'] = len(self.request_queue)
+        self.metrics['queue_size'] = self._queued_count
         self.metrics['active_workers'] = sum(1 for stats in self.worker_stats.values() if stats['status'] == 'processing')
         
         return {
             **self.metrics,
             'worker_stats': self.worker_stats,
-            'rate_limits_active': len([k for k, v in self.rate_limits.items() if v['requests']]),
+            'retry_scheduler': self.retry_scheduler.get_stats(),
+            'priorities': {
+                priority.name: {
+                    'queued': self.priority_queued[priority],
+                    'backlogged_users': self.priority_queues[priority].backlogged_tenants,
+                    **self.queue_delay[priority].get_stats()
+                }
+                for priority in RequestPriority
+            },
+            'users_over_delay_target': sum(1 for d in self.user_delay.values() if d.overloaded),
+            'dead_letter_size': len(self.dead_letters),
+            'rate_limiter': self.rate_limiter.get_stats(),
             'circuit_breakers_open': len([k for k, v in self.circuit_breakers.items() if v['state'] == 'open']),
             'timestamp': datetime.now().isoformat()
         }
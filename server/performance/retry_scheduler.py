@@ -0,0 +1,133 @@
+"""
+⏱️ Retry Scheduler for the Request Queue ⏱️
+JAI MAHAKAAL! Delayed work waits on a timer, not in a worker
+
+A min-heap of due times drained by a single background task. The task
+sleeps until the earliest due time (or until an earlier entry is added)
+and then fires every callback that has come due. Cancellation is lazy:
+cancelled keys are skipped when they reach the top of the heap.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import random
+import time
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RetryScheduler:
+    """
+    ⏱️ Heap-based delayed-callback scheduler
+
+    Features:
+    - O(log n) schedule, O(1) lazy cancel
+    - One timer task regardless of how many retries are pending
+    - Exponential backoff with jitter to spread retry bursts
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, jitter: float = 0.5):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter  # fraction of the backoff that is randomized
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._callbacks: Dict[str, Tuple[int, Callable]] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'scheduled': 0,
+            'fired': 0,
+            'cancelled': 0,
+            'errors': 0
+        }
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff for the given retry attempt (1-based), with jitter"""
+        delay = min(self.base_delay * (2 ** max(0, attempt - 1)), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def schedule(self, key: str, delay: float, callback: Callable) -> float:
+        """Run callback() after delay seconds; rescheduling a key replaces it. Returns the due time."""
+        due = time.monotonic() + max(0.0, delay)
+        sequence = next(self._sequence)
+        self._callbacks[key] = (sequence, callback)
+        heapq.heappush(self._heap, (due, sequence, key))
+        self.stats['scheduled'] += 1
+
+        # Wake the timer task if this entry is now the earliest
+        if self._wakeup and self._heap[0][1] == sequence:
+            self._wakeup.set()
+        return due
+
+    def cancel(self, key: str) -> bool:
+        if self._callbacks.pop(key, None) is None:
+            return False
+        self.stats['cancelled'] += 1
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._callbacks
+
+    @property
+    def pending(self) -> int:
+        return len(self._callbacks)
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            timeout = None
+            while self._heap:
+                due, sequence, key = self._heap[0]
+                entry = self._callbacks.get(key)
+                if entry is None or entry[0] != sequence:
+                    heapq.heappop(self._heap)  # cancelled or superseded
+                    continue
+                timeout = due - time.monotonic()
+                if timeout > 0:
+                    break
+                heapq.heappop(self._heap)
+                del self._callbacks[key]
+                await self._fire(key, entry[1])
+                timeout = None
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, key: str, callback: Callable) -> None:
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+            self.stats['fired'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"❌ Scheduled callback {key} failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        next_due = max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None
+        return {
+            **self.stats,
+            'pending': self.pending,
+            'next_due_seconds': next_due
+        }
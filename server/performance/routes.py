@@ -0,0 +1,61 @@
+"""
+Performance API Routes - Request queue inspection
+"""
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
+from .request_queue import request_queue
+from ..api.dependencies import get_current_user, require_permission, is_admin
+
+router = APIRouter()
+
+# Queue-wide views and dead-letter operations are for operators
+require_admin = require_permission("admin")
+
+@router.get("/queue/metrics")
+async def get_queue_metrics(user=Depends(require_admin)):
+    """
+    Get request queue, worker and retry scheduler metrics.
+    """
+    return await request_queue.get_queue_metrics()
+
+@router.get("/queue/requests/{request_id}")
+async def get_queued_request(request_id: str, user=Depends(get_current_user)):
+    """
+    Get the status of a queued, active or recently finished request.
+    
+    Only the request's owner (or an admin) sees it; others get a 404.
+    """
+    status = await request_queue.get_request_status(request_id)
+    if status is None or (status['user_id'] != user['user_id'] and not is_admin(user)):
+        raise HTTPException(status_code=404, detail="Request not found")
+    return status
+
+@router.get("/queue/dead-letters")
+def get_dead_letters(
+    request_type: Optional[str] = Query(None, description="Filter by request type"),
+    limit: int = Query(50, ge=1, le=500, description="Number of entries to return"),
+    user=Depends(require_admin)
+):
+    """
+    Get requests that exhausted their retries or missed their deadline.
+    """
+    return {
+        "total": len(request_queue.dead_letters),
+        "dead_letters": request_queue.get_dead_letters(limit=limit, request_type=request_type)
+    }
+
+@router.post("/queue/dead-letters/{request_id}/requeue")
+async def requeue_dead_letter(request_id: str, user=Depends(require_admin)):
+    """
+    Move a dead-lettered request back onto the queue with fresh retries.
+    """
+    if not await request_queue.requeue_dead_letter(request_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered request not found")
+    return {"request_id": request_id, "status": "requeued"}
+
+@router.delete("/queue/dead-letters")
+def purge_dead_letters(user=Depends(require_admin)):
+    """
+    Drop every dead-lettered request.
+    """
+    return {"purged": request_queue.purge_dead_letters()}
@@ -0,0 +1,537 @@
+"""
+🧠 Semantic Response Cache 🧠
+JAI MAHAKAAL! Answer the paraphrase from memory, not from the model
+
+Exact-key caches only hit when a prompt repeats byte for byte. This cache
+embeds each query and looks for a previously answered query that is
+close enough in meaning:
+
+1. Query embeddings live in an in-memory vector index per scope
+   (model / agent / user / conversation context), so answers never leak
+   across users or models.
+2. Nearest neighbours come from multi-table random-hyperplane LSH
+   buckets, re-ranked by exact cosine similarity (small scopes are simply
+   scanned exactly).
+3. A candidate above the similarity threshold must also pass a
+   verification step: same numbers, same negation, enough shared
+   content words. This stops "convert 5 km" from answering "convert 50 km".
+4. Eviction is GreedyDual-Size-Frequency: priority = clock + savings * hits,
+   so expensive, frequently reused answers outlive cheap one-offs while
+   the clock ages out entries that stop being used.
+
+Embeddings come from sentence-transformers when SEMANTIC_CACHE_MODEL is
+set and the package is installed; otherwise from a dependency-free
+feature-hashing embedder that catches reworded and reordered repeats.
+"""
+import asyncio
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, List, Tuple, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_NEGATIONS = {"not", "no", "never", "without", "none", "nothing", "cannot", "can't", "don't",
+              "doesn't", "isn't", "aren't", "won't", "shouldn't", "wouldn't", "didn't"}
+_STOPWORDS = {"a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "and", "or", "in",
+              "on", "for", "with", "at", "by", "it", "this", "that", "me", "my", "i", "you", "your",
+              "we", "our", "do", "does", "did", "can", "could", "would", "should", "will", "please",
+              "what", "what's", "how", "why", "when", "where", "which", "who", "tell", "explain",
+              "give", "show", "about", "some", "any", "so", "just"}
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _content_words(tokens: List[str]) -> Set[str]:
+    words = set()
+    for token in tokens:
+        if token in _STOPWORDS or token in _NEGATIONS or len(token) < 2:
+            continue
+        if token.endswith("'s"):
+            token = token[:-2]
+        words.add(token)
+    return words
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder (word unigrams + bigrams + character
+    trigrams, signed hashing, L2-normalized). No model download, ~50µs
+    per query; robust to reordering, punctuation and small edits.
+    """
+
+    name = "hashing-v1"
+    default_threshold = 0.85
+    cacheable = False  # recomputing is cheaper than an embedding-cache round trip
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        tokens = _tokens(text)
+        # Function words barely move the vector; content words carry the meaning
+        content = [t for t in tokens if t not in _STOPWORDS]
+        features = [(f"w:{t}", 0.2 if t in _STOPWORDS else 1.0) for t in tokens]
+        features += [(f"b:{a}_{b}", 0.5) for a, b in zip(content, content[1:])]
+        for token in content:
+            padded = f"#{token}#"
+            features += [(f"c:{padded[i:i + 3]}", 0.25) for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for feature, weight in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.dimension] += weight if (digest >> 63) else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model, loaded lazily and run off the event loop"""
+
+    default_threshold = 0.90
+
+    def __init__(self, model_name: str):
+        self.name = model_name
+        self._model = None
+
+    def _encode(self, text: str) -> np.ndarray:
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.name)
+        return np.asarray(self._model.encode(text, normalize_embeddings=True), dtype=np.float32)
+
+    async def embed(self, text: str) -> np.ndarray:
+        return await asyncio.to_thread(self._encode, text)
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over unit vectors
+
+    Vectors live in one growable matrix (freed slots are reused). Below
+    `exact_below` live entries every query is a single matrix-vector
+    product; above it, candidates come from `tables` LSH tables of `bits`
+    random hyperplanes each and only those are re-ranked.
+    """
+
+    def __init__(self, dimension: int, tables: int = 8, bits: int = 12, exact_below: int = 2048, seed: int = 7):
+        self.dimension = dimension
+        self.exact_below = exact_below
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, bits, dimension)).astype(np.float32)
+        self.powers = (1 << np.arange(bits)).astype(np.int64)
+
+        self.matrix = np.zeros((64, dimension), dtype=np.float32)
+        self.alive = np.zeros(64, dtype=bool)
+        self.ids: List[Optional[str]] = [None] * 64
+        self.signatures: Dict[int, np.ndarray] = {}
+        self.slots: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.high_water = 0
+        self.buckets = [defaultdict(set) for _ in range(tables)]
+
+    def _signature(self, vector: np.ndarray) -> np.ndarray:
+        return ((self.planes @ vector) > 0).astype(np.int64) @ self.powers
+
+    def add(self, entry_id: str, vector: np.ndarray) -> None:
+        if entry_id in self.slots:
+            self.remove(entry_id)
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = self.high_water
+            self.high_water += 1
+            if slot >= len(self.matrix):
+                grow = len(self.matrix)
+                self.matrix = np.vstack([self.matrix, np.zeros((grow, self.dimension), dtype=np.float32)])
+                self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+                self.ids.extend([None] * grow)
+
+        self.matrix[slot] = vector
+        self.alive[slot] = True
+        self.ids[slot] = entry_id
+        self.slots[entry_id] = slot
+        signature = self._signature(vector)
+        self.signatures[slot] = signature
+        for table, bucket in zip(self.buckets, signature):
+            table[int(bucket)].add(slot)
+
+    def remove(self, entry_id: str) -> None:
+        slot = self.slots.pop(entry_id, None)
+        if slot is None:
+            return
+        for table, bucket in zip(self.buckets, self.signatures.pop(slot)):
+            members = table.get(int(bucket))
+            if members is not None:
+                members.discard(slot)
+                if not members:
+                    del table[int(bucket)]
+        self.alive[slot] = False
+        self.ids[slot] = None
+        self.free.append(slot)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        if not self.slots:
+            return []
+        if len(self.slots) < self.exact_below:
+            candidates = np.flatnonzero(self.alive[:self.high_water])
+        else:
+            signature = self._signature(vector)
+            found: Set[int] = set()
+            for table, bucket in zip(self.buckets, signature):
+                found |= table.get(int(bucket), set())
+            if not found:
+                return []
+            candidates = np.fromiter(found, dtype=np.int64, count=len(found))
+
+        similarities = self.matrix[candidates] @ vector
+        k = min(k, len(candidates))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(self.ids[candidates[i]], float(similarities[i])) for i in top]
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+
+@dataclass
+class SemanticEntry:
+    """A cached answer and what it saves each time it is reused"""
+    entry_id: str
+    scope: str
+    query: str
+    response: Any
+    savings: float  # estimated USD per avoided call (model cost + latency value)
+    cost_usd: float
+    latency_s: float
+    created_at: float
+    expires_at: float
+    hits: int = 0
+    last_hit: float = 0.0
+    priority: float = 0.0
+
+
+@dataclass
+class SemanticCacheStats:
+    lookups: int = 0
+    hits: int = 0
+    misses: int = 0
+    below_threshold: int = 0
+    verification_rejections: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    model_calls_avoided: int = 0
+    cost_saved_usd: float = 0.0
+    time_saved_s: float = 0.0
+    lookup_time_total_s: float = 0.0
+
+
+class SemanticResponseCache:
+    """
+    🧠 Embedding-keyed response cache
+
+    Features:
+    - Per-scope (model/agent/user/context) vector indexes with LSH candidate search
+    - Similarity threshold + lexical verification before serving
+    - GreedyDual-Size-Frequency eviction (recency x savings)
+    - Pluggable embedder and embedding cache
+    - Metrics for model calls avoided, cost and time saved
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Any] = None,
+        similarity_threshold: Optional[float] = None,
+        max_entries: int = 5000,
+        ttl: float = 3600,
+        min_word_overlap: float = 0.4,
+        verifier: Optional[Callable[[str, str], bool]] = None,
+        share_across_users: bool = False,
+        latency_value_per_second: float = 0.002,
+        embedding_cache: Optional[Any] = None
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.similarity_threshold = similarity_threshold or self.embedder.default_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_word_overlap = min_word_overlap
+        self.verifier = verifier
+        self.share_across_users = share_across_users
+        self.latency_value_per_second = latency_value_per_second
+        self.embedding_cache = embedding_cache  # anything with get_cached_embeddings_async / cache_embeddings_async
+
+        self.indexes: Dict[str, VectorIndex] = {}
+        self.entries: Dict[str, SemanticEntry] = {}
+        self.stats = SemanticCacheStats()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._clock = 0.0  # GreedyDual inflation value: priority of the last eviction
+
+    # Scoping and embeddings
+
+    def scope_key(
+        self,
+        model: str,
+        agent_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Answers are only shared between requests with the same scope"""
+        context_hash = ""
+        if context:
+            context_hash = hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        user = "*" if self.share_across_users else (user_id or "")
+        return f"{model}|{agent_id or ''}|{user}|{context_hash}"
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Query embedding, through the embedding cache (L1 then Redis) for model-backed embedders"""
+        name = getattr(self.embedder, "name", "default")
+        use_cache = self.embedding_cache is not None and getattr(self.embedder, "cacheable", True)
+        if use_cache:
+            cached = await self.embedding_cache.get_cached_embeddings_async(text, model=name)
+            if cached is not None:
+                return np.asarray(cached, dtype=np.float32)
+
+        vector = self.embedder.embed(text)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        vector = np.asarray(vector, dtype=np.float32)
+
+        if use_cache:
+            await self.embedding_cache.cache_embeddings_async(text, vector.tolist(), model=name)
+        return vector
+
+    def verify(self, query: str, cached_query: str) -> bool:
+        """Reject near neighbours that differ in ways embeddings blur"""
+        if self.verifier is not None:
+            return self.verifier(query, cached_query)
+
+        query_tokens, cached_tokens = _tokens(query), _tokens(cached_query)
+        if _NUMBER.findall(query) != _NUMBER.findall(cached_query):
+            return False
+        if bool(_NEGATIONS.intersection(query_tokens)) != bool(_NEGATIONS.intersection(cached_tokens)):
+            return False
+
+        query_words, cached_words = _content_words(query_tokens), _content_words(cached_tokens)
+        if not query_words and not cached_words:
+            return True
+        overlap = len(query_words & cached_words) / len(query_words | cached_words)
+        return overlap >= self.min_word_overlap
+
+    # Lookup and store
+
+    async def lookup(
+        self,
+        query: str,
+        model: str,
+        agent_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached answer for a semantically equivalent query, or None.
+        Returns {'response', 'similarity', 'matched_query', 'saved_cost_usd'}.
+        """
+        start = time.perf_counter()
+        self.stats.lookups += 1
+        try:
+            index = self.indexes.get(self.scope_key(model, agent_id, user_id, context))
+            if index is None or not len(index):
+                self.stats.misses += 1
+                return None
+
+            vector = await self.embed(query)
+            now = time.time()
+            for entry_id, similarity in index.search(vector, k=3):
+                if similarity < self.similarity_threshold:
+                    self.stats.below_threshold += 1
+                    break
+                entry = self.entries.get(entry_id)
+                if entry is None:
+                    continue
+                if entry.expires_at <= now:
+                    self._remove(entry)
+                    self.stats.expirations += 1
+                    continue
+                if not self.verify(query, entry.query):
+                    self.stats.verification_rejections += 1
+                    continue
+
+                self._touch(entry, now)
+                elapsed = time.perf_counter() - start
+                self.stats.hits += 1
+                self.stats.model_calls_avoided += 1
+                self.stats.cost_saved_usd += entry.cost_usd
+                self.stats.time_saved_s += max(0.0, entry.latency_s - elapsed)
+                return {
+                    'response': entry.response,
+                    'similarity': similarity,
+                    'matched_query': entry.query,
+                    'saved_cost_usd': entry.cost_usd
+                }
+
+            self.stats.misses += 1
+            return None
+        finally:
+            self.stats.lookup_time_total_s += time.perf_counter() - start
+
+    async def store(
+        self,
+        query: str,
+        response: Any,
+        model: str,
+        agent_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+        cost_usd: float = 0.0,
+        latency_s: float = 0.0,
+        ttl: Optional[float] = None
+    ) -> str:
+        scope = self.scope_key(model, agent_id, user_id, context)
+        entry_id = hashlib.sha256(f"{scope}\n{query}".encode()).hexdigest()[:24]
+        vector = await self.embed(query)
+
+        existing = self.entries.get(entry_id)
+        if existing is not None:
+            self._remove(existing)
+
+        now = time.time()
+        entry = SemanticEntry(
+            entry_id=entry_id,
+            scope=scope,
+            query=query,
+            response=response,
+            savings=cost_usd + latency_s * self.latency_value_per_second,
+            cost_usd=cost_usd,
+            latency_s=latency_s,
+            created_at=now,
+            expires_at=now + (ttl or self.ttl),
+            last_hit=now
+        )
+        index = self.indexes.get(scope)
+        if index is None:
+            index = self.indexes[scope] = VectorIndex(len(vector))
+        index.add(entry_id, vector)
+        self.entries[entry_id] = entry
+        self._prioritize(entry)
+        self.stats.stores += 1
+
+        while len(self.entries) > self.max_entries:
+            self._evict_one()
+        return entry_id
+
+    def invalidate(self, model: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        """
+        Drop entries for a model and/or user (scope prefix match)
+
+        With share_across_users, entries are stored under the shared scope
+        "*" and are not attributable to one user, so invalidating any user
+        drops every shared entry (for the model, if given).
+        """
+        if user_id is not None and self.share_across_users:
+            user_id = "*"
+        doomed = [
+            entry for entry in self.entries.values()
+            if (model is None or entry.scope.split("|")[0] == model)
+            and (user_id is None or entry.scope.split("|")[2] == user_id)
+        ]
+        for entry in doomed:
+            self._remove(entry)
+        return len(doomed)
+
+    # GreedyDual-Size-Frequency bookkeeping
+
+    def _prioritize(self, entry: SemanticEntry) -> None:
+        # Floor keeps zero-cost entries ordered by recency/frequency instead of all tying
+        entry.priority = self._clock + max(entry.savings, 1e-6) * (entry.hits + 1)
+        heapq.heappush(self._heap, (entry.priority, next(self._sequence), entry.entry_id))
+
+    def _touch(self, entry: SemanticEntry, now: float) -> None:
+        entry.hits += 1
+        entry.last_hit = now
+        self._prioritize(entry)
+
+    def _evict_one(self) -> None:
+        while self._heap:
+            priority, _, entry_id = heapq.heappop(self._heap)
+            entry = self.entries.get(entry_id)
+            if entry is None or entry.priority != priority:
+                continue  # stale heap record
+            self._clock = priority
+            self._remove(entry)
+            self.stats.evictions += 1
+            return
+
+    def _remove(self, entry: SemanticEntry) -> None:
+        self.entries.pop(entry.entry_id, None)
+        index = self.indexes.get(entry.scope)
+        if index is not None:
+            index.remove(entry.entry_id)
+            if not len(index):
+                del self.indexes[entry.scope]
+        if len(self._heap) > 4 * max(64, len(self.entries)):
+            self._heap = [item for item in self._heap
+                          if item[2] in self.entries and self.entries[item[2]].priority == item[0]]
+            heapq.heapify(self._heap)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            'entries': len(self.entries),
+            'scopes': len(self.indexes),
+            'max_entries': self.max_entries,
+            'embedder': getattr(self.embedder, "name", type(self.embedder).__name__),
+            'similarity_threshold': self.similarity_threshold,
+            'hit_rate': stats.hits / stats.lookups if stats.lookups else 0.0,
+            'avg_lookup_ms': stats.lookup_time_total_s / stats.lookups * 1000 if stats.lookups else 0.0,
+            'model_calls_avoided': stats.model_calls_avoided,
+            'cost_saved_usd': round(stats.cost_saved_usd, 4),
+            'time_saved_s': round(stats.time_saved_s, 3),
+            'lookups': stats.lookups,
+            'hits': stats.hits,
+            'misses': stats.misses,
+            'below_threshold': stats.below_threshold,
+            'verification_rejections': stats.verification_rejections,
+            'stores': stats.stores,
+            'evictions': stats.evictions,
+            'expirations': stats.expirations
+        }
+
+
+def create_semantic_cache(embedding_cache: Optional[Any] = None) -> SemanticResponseCache:
+    """Semantic cache configured from the environment"""
+    model_name = os.getenv('SEMANTIC_CACHE_MODEL')
+    embedder = None
+    if model_name:
+        try:
+            import sentence_transformers  # noqa: F401
+            embedder = SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            logger.warning("⚠️ sentence-transformers not installed - semantic cache uses hashing embedder")
+
+    threshold = os.getenv('SEMANTIC_CACHE_THRESHOLD')
+    return SemanticResponseCache(
+        embedder=embedder,
+        similarity_threshold=float(threshold) if threshold else None,
+        max_entries=int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '5000')),
+        ttl=float(os.getenv('SEMANTIC_CACHE_TTL', '3600')),
+        share_across_users=os.getenv('SEMANTIC_CACHE_SHARE_ACROSS_USERS', 'false').lower() == 'true',
+        embedding_cache=embedding_cache
+    )
@@ -0,0 +1,955 @@
+"""
+🧊 Two-Tier Cache 🧊
+JAI MAHAKAAL! Hot keys in process, everything else one round trip away
+
+L1 is a bounded in-process W-TinyLFU cache: a small LRU window admits new
+keys, and a segmented-LRU main area only accepts a candidate if a
+count-min sketch says it is used more often than the entry it would evict.
+L2 is Redis through the async client, shared by every process.
+
+On top of the two tiers:
+- single-flight: concurrent misses on one key run the loader once
+- stale-while-revalidate: expired entries within `stale_ttl` are served
+  immediately while one background task refreshes them
+- negative caching: loaders returning None can be remembered briefly
+- per-namespace hit/miss metrics
+
+Redis values are self-describing envelopes (EnvelopeCodec): one header
+byte names the codec version (msgpack, or JSON when msgpack is missing)
+and whether the payload is zstd-compressed. Access counts never touch
+Redis on the read path; they are counted in process and flushed in one
+pipeline every few seconds.
+
+Invalidation never scans the keyspace. Writes can register the key in
+tag sets (user:<id>, model:<name>, document:<id>); invalidating a tag
+deletes its members in pipelined SSCAN batches. A whole namespace is
+invalidated by bumping its generation counter, which is part of every
+key, so old entries simply miss and age out. Other processes drop their
+L1 copies when the invalidation is broadcast over Redis pub/sub.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, Counter
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis-py < 4.2
+    redis_asyncio = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def cache_tags(
+    user_id: Optional[str] = None,
+    model: Optional[str] = None,
+    document_id: Optional[str] = None
+) -> List[str]:
+    """Standard invalidation tags for an entry"""
+    tags = []
+    if user_id:
+        tags.append(f"user:{user_id}")
+    if model:
+        tags.append(f"model:{model}")
+    if document_id:
+        tags.append(f"document:{document_id}")
+    return tags
+
+
+class CountMinSketch:
+    """4-row count-min sketch with 4-bit-style saturating counters and periodic aging"""
+
+    def __init__(self, capacity: int):
+        width = 1
+        while width < max(16, capacity * 4):
+            width <<= 1
+        self.mask = width - 1
+        self.rows = [bytearray(width) for _ in range(4)]
+        self.sample_size = max(10, capacity * 10)
+        self.additions = 0
+
+    def _indexes(self, key: str):
+        h = hash(key)
+        h2 = ((h >> 17) | 1) & 0xFFFFFFFF
+        return [(h + i * h2) & self.mask for i in range(4)]
+
+    def increment(self, key: str) -> None:
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def frequency(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def _age(self) -> None:
+        """Halve every counter so old popularity fades"""
+        for row in self.rows:
+            for i, value in enumerate(row):
+                if value:
+                    row[i] = value >> 1
+        self.additions //= 2
+
+
+class WTinyLFUCache:
+    """
+    Bounded W-TinyLFU map: 1% LRU window + segmented LRU main
+    (20% probation / 80% protected), admission by estimated frequency
+    """
+
+    def __init__(self, max_entries: int = 10000, window_ratio: float = 0.01):
+        self.max_entries = max(3, max_entries)
+        self.window_capacity = max(1, int(self.max_entries * window_ratio))
+        main_capacity = self.max_entries - self.window_capacity
+        self.protected_capacity = max(1, int(main_capacity * 0.8))
+        self.main_capacity = main_capacity
+
+        self.window: "OrderedDict[str, Any]" = OrderedDict()
+        self.probation: "OrderedDict[str, Any]" = OrderedDict()
+        self.protected: "OrderedDict[str, Any]" = OrderedDict()
+        self.sketch = CountMinSketch(self.max_entries)
+        self.evictions = 0
+        self.rejections = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+            return self.window[key]
+        if key in self.protected:
+            self.protected.move_to_end(key)
+            return self.protected[key]
+        if key in self.probation:
+            # Second hit in main: promote, demoting protected's LRU if full
+            value = self.probation.pop(key)
+            self.protected[key] = value
+            if len(self.protected) > self.protected_capacity:
+                demoted, demoted_value = self.protected.popitem(last=False)
+                self.probation[demoted] = demoted_value
+            return value
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                segment[key] = value
+                segment.move_to_end(key)
+                return
+
+        self.sketch.increment(key)
+        self.window[key] = value
+        if len(self.window) <= self.window_capacity:
+            return
+
+        candidate, candidate_value = self.window.popitem(last=False)
+        if len(self.probation) + len(self.protected) < self.main_capacity:
+            self.probation[candidate] = candidate_value
+            return
+
+        victim_segment = self.probation if self.probation else self.protected
+        victim = next(iter(victim_segment))
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            del victim_segment[victim]
+            self.probation[candidate] = candidate_value
+        else:
+            self.rejections += 1
+        self.evictions += 1
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                return segment.pop(key)
+        return default
+
+    def keys(self) -> List[str]:
+        return [*self.window, *self.probation, *self.protected]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [*self.window.items(), *self.probation.items(), *self.protected.items()]
+
+    def clear(self) -> None:
+        self.window.clear()
+        self.probation.clear()
+        self.protected.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.window or key in self.probation or key in self.protected
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+
+@dataclass
+class CacheEntry:
+    """Value plus freshness bounds (epoch seconds)"""
+    value: Any
+    expires_at: float
+    stale_until: float
+    negative: bool = False
+    tags: List[str] = field(default_factory=list)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class EnvelopeCodec:
+    """
+    Versioned serialization for L2 entries
+
+    Layout: 1 header byte, then the payload. The low bits of the header
+    are the codec version, the high bit marks zstd compression. Entries
+    written by older versions (bare JSON objects) still decode.
+    """
+
+    JSON = 0x01
+    MSGPACK = 0x02
+    ZSTD = 0x80
+
+    def __init__(self, compress_threshold: int = 1024, compression_level: int = 3):
+        self.compress_threshold = compress_threshold
+        self.version = self.MSGPACK if msgpack is not None else self.JSON
+        self._compressor = zstandard.ZstdCompressor(level=compression_level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    @property
+    def compression(self) -> Optional[str]:
+        return "zstd" if self._compressor is not None else None
+
+    def encode(self, entry: CacheEntry) -> bytes:
+        fields = [entry.value, entry.expires_at, entry.stale_until, entry.negative, entry.tags]
+        if self.version == self.MSGPACK:
+            payload = msgpack.packb(fields, default=str, use_bin_type=True)
+        else:
+            payload = json.dumps(fields, default=str, separators=(",", ":")).encode()
+
+        header = self.version
+        if self._compressor is not None and len(payload) >= self.compress_threshold:
+            payload = self._compressor.compress(payload)
+            header |= self.ZSTD
+        return bytes([header]) + payload
+
+    def decode(self, data: bytes) -> CacheEntry:
+        if data[:1] == b"{":
+            return CacheEntry(**json.loads(data))  # pre-versioned JSON envelope
+
+        header, payload = data[0], data[1:]
+        if header & self.ZSTD:
+            if self._decompressor is None:
+                raise ValueError("zstd-compressed cache entry but zstandard is not installed")
+            payload = self._decompressor.decompress(payload)
+
+        version = header & ~self.ZSTD
+        if version == self.MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack cache entry but msgpack is not installed")
+            fields = msgpack.unpackb(payload, raw=False)
+        elif version == self.JSON:
+            fields = json.loads(payload)
+        else:
+            raise ValueError(f"Unknown cache codec version: {version}")
+        return CacheEntry(*fields)
+
+
+@dataclass
+class NamespaceStats:
+    """Per-namespace cache counters"""
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    loads: int = 0
+    coalesced: int = 0
+    sets: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.l1_hits + self.l2_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+class TieredCache:
+    """
+    🧊 L1 (in-process W-TinyLFU) + L2 (async Redis) cache
+
+    Features:
+    - Bounded L1 with frequency-aware admission
+    - Shared L2 with automatic fallback to L1-only while Redis is down
+    - get_or_load with single-flight, stale-while-revalidate, negative caching
+    - Per-namespace metrics
+    - Tag and namespace-generation invalidation, broadcast to other processes
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis_client: Optional[Any] = None,
+        l1_max_entries: int = 10000,
+        default_ttl: float = 3600,
+        key_prefix: str = "lex:",
+        redis_retry_after: float = 5.0,
+        tag_ttl: float = 8 * 86400,
+        generation_refresh: float = 5.0,
+        hit_flush_interval: float = 10.0,
+        hot_keys_per_namespace: int = 1000
+    ):
+        self.redis_url = redis_url
+        self.redis_client = redis_client
+        self.default_ttl = default_ttl
+        self.key_prefix = key_prefix
+        self.redis_retry_after = redis_retry_after
+        self.tag_ttl = tag_ttl  # tag sets outlive any member written with ttl <= tag_ttl
+        self.generation_refresh = generation_refresh
+        self.hit_flush_interval = hit_flush_interval
+        self.hot_keys_per_namespace = hot_keys_per_namespace
+        self.codec = EnvelopeCodec()
+        self._redis_down_until = 0.0
+        self._instance_id = uuid.uuid4().hex
+        self._channel = f"{key_prefix}cache:invalidate"
+        self._listener: Optional[asyncio.Task] = None
+        self._generations: Dict[str, int] = {}
+        self._generation_checked: Dict[str, float] = {}
+
+        self.l1 = WTinyLFUCache(l1_max_entries)
+        self.stats: Dict[str, NamespaceStats] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: set = set()
+        self._hit_counts: Dict[str, Counter] = {}
+        self._hits_flushed_at = time.monotonic()
+
+    # Keys and bookkeeping
+
+    def _full_key(self, namespace: str, key: str) -> str:
+        generation = self._generations.get(namespace, 0)
+        if generation:
+            return f"{self.key_prefix}{namespace}:g{generation}:{key}"
+        return f"{self.key_prefix}{namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}tag:{tag}"
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.key_prefix}gen:{namespace}"
+
+    def _hits_key(self, namespace: str) -> str:
+        return f"{self.key_prefix}hits:{namespace}"
+
+    def _stats(self, namespace: str) -> NamespaceStats:
+        stats = self.stats.get(namespace)
+        if stats is None:
+            stats = self.stats[namespace] = NamespaceStats()
+        return stats
+
+    def _entry(
+        self,
+        value: Any,
+        ttl: Optional[float],
+        stale_ttl: float,
+        negative: bool = False,
+        tags: Optional[List[str]] = None
+    ) -> CacheEntry:
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        return CacheEntry(value, expires_at, expires_at + max(0.0, stale_ttl), negative, list(tags or []))
+
+    def _spawn(self, coro) -> None:
+        """Run a coroutine in the background if an event loop is running"""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    # L2 (Redis)
+
+    def _redis(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self.redis_client is None:
+            if not self.redis_url or redis_asyncio is None:
+                return None
+            self.redis_client = redis_asyncio.from_url(self.redis_url)
+        return self.redis_client
+
+    def _redis_failed(self, error: Exception) -> None:
+        self._redis_down_until = time.monotonic() + self.redis_retry_after
+        logger.warning(f"⚠️ L2 cache unavailable, serving from L1 only: {error}")
+
+    def l2_client(self):
+        """Async Redis client for callers that need raw commands, or None while L2 is down"""
+        return self._redis()
+
+    def mark_l2_down(self, error: Exception) -> None:
+        self._redis_failed(error)
+
+    def encode(self, entry: CacheEntry) -> bytes:
+        return self.codec.encode(entry)
+
+    def decode(self, data: bytes) -> CacheEntry:
+        return self.codec.decode(data)
+
+    def _decode_or_none(self, full_key: str, data: Optional[bytes]) -> Optional[CacheEntry]:
+        if not data:
+            return None
+        try:
+            return self.decode(data)
+        except Exception as e:
+            logger.warning(f"⚠️ Undecodable cache entry {full_key}: {e}")
+            return None
+
+    async def _l2_get(self, full_key: str) -> Optional[CacheEntry]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            data = await client.get(full_key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        return self._decode_or_none(full_key, data)
+
+    async def _l2_get_many(self, full_keys: List[str]) -> List[Optional[CacheEntry]]:
+        """One MGET for any number of keys"""
+        client = self._redis()
+        if client is None or not full_keys:
+            return [None] * len(full_keys)
+        try:
+            values = await client.mget(full_keys)
+        except Exception as e:
+            self._redis_failed(e)
+            return [None] * len(full_keys)
+        return [self._decode_or_none(k, v) for k, v in zip(full_keys, values)]
+
+    def _queue_l2_set(self, pipe, full_key: str, entry: CacheEntry) -> None:
+        ttl_ms = int((entry.stale_until - time.time()) * 1000)
+        if ttl_ms <= 0:
+            return
+        pipe.set(full_key, self.encode(entry), px=ttl_ms)
+        for tag in entry.tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, full_key)
+            pipe.pexpire(tag_key, max(ttl_ms, int(self.tag_ttl * 1000)))
+
+    async def _l2_set_many(self, items: List[Tuple[str, CacheEntry]]) -> None:
+        """Write entries (and their tag registrations) in one pipelined round trip"""
+        client = self._redis()
+        if client is None or not items:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for full_key, entry in items:
+                self._queue_l2_set(pipe, full_key, entry)
+            await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def _l2_set(self, full_key: str, entry: CacheEntry) -> None:
+        await self._l2_set_many([(full_key, entry)])
+
+    async def _l2_delete(self, *full_keys: str) -> int:
+        client = self._redis()
+        if client is None or not full_keys:
+            return 0
+        try:
+            return await client.delete(*full_keys)
+        except Exception as e:
+            self._redis_failed(e)
+            return 0
+
+    # Synchronous L1 access (for sync callers); L2 writes happen in the background
+
+    def get_local(self, namespace: str, key: str, default: Any = None) -> Any:
+        full_key = self._full_key(namespace, key)
+        entry = self.l1.get(full_key)
+        stats = self._stats(namespace)
+        if entry is not None and entry.is_fresh(time.time()):
+            stats.l1_hits += 1
+            self._record_access(namespace, key)
+            if entry.negative:
+                stats.negative_hits += 1
+                return default
+            return entry.value
+        stats.misses += 1
+        return default
+
+    def set_local(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        tags: Optional[List[str]] = None
+    ) -> None:
+        full_key = self._full_key(namespace, key)
+        entry = self._entry(value, ttl, stale_ttl, tags=tags)
+        self.l1.put(full_key, entry)
+        self._stats(namespace).sets += 1
+        self._spawn(self._l2_set(full_key, entry))
+
+    def delete_local(self, namespace: str, key: str) -> None:
+        full_key = self._full_key(namespace, key)
+        self.l1.pop(full_key)
+        self._spawn(self._l2_delete(full_key))
+
+    def invalidate_tag_local(self, tag: str) -> int:
+        """Drop a tag's entries from L1 now and from L2 in the background"""
+        removed = self._evict_l1_tag(tag)
+        self._spawn(self.invalidate_tag(tag))
+        return removed
+
+    def invalidate_namespace_local(self, namespace: str) -> int:
+        """Bump a namespace's generation locally now and in Redis in the background"""
+        self._bump_local_generation(namespace, self._generations.get(namespace, 0) + 1)
+        self._spawn(self._bump_l2_generation(namespace))
+        return self._generations[namespace]
+
+    # Async API
+
+    async def _lookup(self, namespace: str, full_key: str) -> Tuple[Optional[CacheEntry], str]:
+        """Find an entry in L1, then L2 (promoting to L1); returns (entry, tier)"""
+        entry = self.l1.get(full_key)
+        if entry is not None:
+            return entry, "l1"
+        entry = await self._l2_get(full_key)
+        if entry is not None:
+            self.l1.put(full_key, entry)
+            return entry, "l2"
+        return None, ""
+
+    def _count_hit(self, namespace: str, key: str, tier: str, entry: CacheEntry) -> None:
+        self._record_access(namespace, key)
+        stats = self._stats(namespace)
+        if tier == "l1":
+            stats.l1_hits += 1
+        else:
+            stats.l2_hits += 1
+        if entry.negative:
+            stats.negative_hits += 1
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Fresh value from L1/L2, or default"""
+        await self._sync_generation(namespace)
+        full_key = self._full_key(namespace, key)
+        stats = self._stats(namespace)
+        entry, tier = await self._lookup(namespace, full_key)
+        if entry is None or not entry.is_fresh(time.time()):
+            stats.misses += 1
+            return default
+        self._count_hit(namespace, key, tier, entry)
+        return default if entry.negative else entry.value
+
+    async def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        tags: Optional[List[str]] = None
+    ) -> None:
+        """Store in both tiers; tags register the key for invalidate_tag"""
+        await self._sync_generation(namespace)
+        full_key = self._full_key(namespace, key)
+        entry = self._entry(value, ttl, stale_ttl, tags=tags)
+        self.l1.put(full_key, entry)
+        self._stats(namespace).sets += 1
+        await self._l2_set(full_key, entry)
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """Fresh values for many keys: L1 first, then a single MGET for the rest"""
+        await self._sync_generation(namespace)
+        stats = self._stats(namespace)
+        now = time.time()
+        found: Dict[str, Any] = {}
+
+        missing = []
+        for key in keys:
+            entry = self.l1.get(self._full_key(namespace, key))
+            if entry is not None and entry.is_fresh(now):
+                self._count_hit(namespace, key, "l1", entry)
+                if not entry.negative:
+                    found[key] = entry.value
+            else:
+                missing.append(key)
+
+        full_keys = [self._full_key(namespace, key) for key in missing]
+        for key, full_key, entry in zip(missing, full_keys, await self._l2_get_many(full_keys)):
+            if entry is None or not entry.is_fresh(now):
+                stats.misses += 1
+                continue
+            self.l1.put(full_key, entry)
+            self._count_hit(namespace, key, "l2", entry)
+            if not entry.negative:
+                found[key] = entry.value
+        return found
+
+    async def set_many(
+        self,
+        namespace: str,
+        items: Dict[str, Any],
+        ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        tags: Optional[List[str]] = None
+    ) -> None:
+        """Store many values in both tiers with one pipelined Redis round trip"""
+        await self._sync_generation(namespace)
+        writes = []
+        for key, value in items.items():
+            full_key = self._full_key(namespace, key)
+            entry = self._entry(value, ttl, stale_ttl, tags=tags)
+            self.l1.put(full_key, entry)
+            writes.append((full_key, entry))
+        self._stats(namespace).sets += len(writes)
+        await self._l2_set_many(writes)
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        await self._sync_generation(namespace)
+        full_key = self._full_key(namespace, key)
+        in_l1 = self.l1.pop(full_key) is not None
+        return bool(await self._l2_delete(full_key)) or in_l1
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        negative_ttl: Optional[float] = None,
+        tags: Optional[List[str]] = None
+    ) -> Any:
+        """
+        Cached value, loading it on a miss
+
+        loader may be sync or async. Concurrent misses share one load.
+        Entries past ttl but within stale_ttl are returned immediately and
+        refreshed in the background. A None result is cached for
+        negative_ttl seconds when given.
+        """
+        await self._sync_generation(namespace)
+        full_key = self._full_key(namespace, key)
+        stats = self._stats(namespace)
+        now = time.time()
+
+        entry, tier = await self._lookup(namespace, full_key)
+        if entry is not None and entry.is_fresh(now):
+            self._count_hit(namespace, key, tier, entry)
+            return entry.value
+        if entry is not None and entry.is_usable(now):
+            self._count_hit(namespace, key, tier, entry)
+            stats.stale_hits += 1
+            if full_key not in self._inflight:
+                # Registered before the task starts so concurrent stale reads share one refresh
+                future = self._begin_load(full_key)
+                self._spawn(self._load(namespace, full_key, future, loader, ttl, stale_ttl, negative_ttl, tags))
+            return entry.value
+
+        stats.misses += 1
+        pending = self._inflight.get(full_key)
+        if pending is not None:
+            stats.coalesced += 1
+            return await asyncio.shield(pending)
+        future = self._begin_load(full_key)
+        return await self._load(namespace, full_key, future, loader, ttl, stale_ttl, negative_ttl, tags)
+
+    def _begin_load(self, full_key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        return future
+
+    async def _load(
+        self,
+        namespace: str,
+        full_key: str,
+        future: asyncio.Future,
+        loader: Callable[[], Any],
+        ttl: Optional[float],
+        stale_ttl: float,
+        negative_ttl: Optional[float],
+        tags: Optional[List[str]]
+    ) -> Any:
+        stats = self._stats(namespace)
+        try:
+            value = loader()
+            if inspect.isawaitable(value):
+                value = await value
+            stats.loads += 1
+
+            if value is not None:
+                entry = self._entry(value, ttl, stale_ttl, tags=tags)
+            elif negative_ttl:
+                entry = self._entry(None, negative_ttl, 0.0, negative=True, tags=tags)
+            else:
+                entry = None
+            if entry is not None:
+                self.l1.put(full_key, entry)
+                stats.sets += 1
+                await self._l2_set(full_key, entry)
+
+            future.set_result(value)
+            return value
+        except Exception as e:
+            stats.errors += 1
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn if there are none
+            raise
+        finally:
+            if not future.done():
+                future.cancel()  # loader cancelled; coalesced waiters must not hang
+            if self._inflight.get(full_key) is future:
+                del self._inflight[full_key]
+
+    # Access statistics (in process, flushed periodically)
+
+    def _record_access(self, namespace: str, key: str) -> None:
+        counts = self._hit_counts.get(namespace)
+        if counts is None:
+            counts = self._hit_counts[namespace] = Counter()
+        counts[key] += 1
+        if (time.monotonic() - self._hits_flushed_at >= self.hit_flush_interval
+                or len(counts) > self.hot_keys_per_namespace * 10):
+            self._hits_flushed_at = time.monotonic()
+            self._spawn(self.flush_access_counts())
+
+    async def flush_access_counts(self) -> int:
+        """
+        Push accumulated hit counts to per-namespace sorted sets (one
+        pipeline), trimmed to the hottest keys. Returns keys flushed.
+        """
+        counts, self._hit_counts = self._hit_counts, {}
+        client = self._redis()
+        if client is None or not counts:
+            return 0
+        try:
+            pipe = client.pipeline(transaction=False)
+            for namespace, namespace_counts in counts.items():
+                hits_key = self._hits_key(namespace)
+                for key, hits in namespace_counts.items():
+                    pipe.zincrby(hits_key, hits, key)
+                pipe.zremrangebyrank(hits_key, 0, -(self.hot_keys_per_namespace + 1))
+                pipe.expire(hits_key, 86400)
+            await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+            return 0
+        return sum(len(c) for c in counts.values())
+
+    async def get_hot_keys(self, namespace: str, limit: int = 20) -> List[Tuple[str, int]]:
+        """Most-hit keys in a namespace (flushed counts plus unflushed local ones)"""
+        totals = Counter(self._hit_counts.get(namespace, {}))
+        client = self._redis()
+        if client is not None:
+            try:
+                for key, score in await client.zrevrange(self._hits_key(namespace), 0, limit - 1, withscores=True):
+                    totals[key.decode() if isinstance(key, bytes) else key] += int(score)
+            except Exception as e:
+                self._redis_failed(e)
+        return totals.most_common(limit)
+
+    # Invalidation
+
+    async def invalidate_tag(self, tag: str, batch_size: int = 500) -> int:
+        """
+        Delete every entry registered under tag, in both tiers and in other
+        processes' L1. Returns the number of entries removed.
+        """
+        removed = self._evict_l1_tag(tag)
+        client = self._redis()
+        if client is None:
+            return removed
+
+        tag_key = self._tag_key(tag)
+        deleted = 0
+        try:
+            cursor = 0
+            while True:
+                cursor, members = await client.sscan(tag_key, cursor, count=batch_size)
+                if members:
+                    pipe = client.pipeline(transaction=False)
+                    pipe.unlink(*members)
+                    pipe.srem(tag_key, *members)
+                    unlinked, _ = await pipe.execute()
+                    deleted += unlinked
+                if not cursor:
+                    break
+            await self._publish({'tag': tag})
+        except Exception as e:
+            self._redis_failed(e)
+            return removed
+        return deleted
+
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """
+        Invalidate a whole namespace in O(1) by bumping its generation; old
+        L2 keys are left to expire. Returns the new generation.
+        """
+        self._bump_local_generation(namespace, self._generations.get(namespace, 0) + 1)
+        await self._bump_l2_generation(namespace)
+        return self._generations[namespace]
+
+    async def _bump_l2_generation(self, namespace: str) -> None:
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            generation = await client.incr(self._generation_key(namespace))
+            self._bump_local_generation(namespace, generation)
+            await self._publish({'namespace': namespace, 'generation': self._generations[namespace]})
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _bump_local_generation(self, namespace: str, generation: int) -> None:
+        if generation > self._generations.get(namespace, 0):
+            self._generations[namespace] = generation
+            self._clear_l1_namespace(namespace)  # old-generation entries can never hit again
+
+    async def _sync_generation(self, namespace: str) -> None:
+        """Pick up generation bumps from other processes (at most every generation_refresh seconds)"""
+        self._ensure_listener()
+        now = time.monotonic()
+        if now - self._generation_checked.get(namespace, 0.0) < self.generation_refresh:
+            return
+        self._generation_checked[namespace] = now
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            generation = await client.get(self._generation_key(namespace))
+        except Exception as e:
+            self._redis_failed(e)
+            return
+        self._bump_local_generation(namespace, int(generation or 0))
+
+    def _clear_l1_namespace(self, namespace: str) -> int:
+        prefix = f"{self.key_prefix}{namespace}:"
+        removed = 0
+        for full_key in self.l1.keys():
+            if full_key.startswith(prefix):
+                self.l1.pop(full_key)
+                removed += 1
+        return removed
+
+    def _evict_l1_tag(self, tag: str) -> int:
+        tagged = [full_key for full_key, entry in self.l1.items() if tag in entry.tags]
+        for full_key in tagged:
+            self.l1.pop(full_key)
+        return len(tagged)
+
+    # Cross-process L1 invalidation
+
+    async def _publish(self, message: Dict[str, Any]) -> None:
+        client = self._redis()
+        if client is not None:
+            await client.publish(self._channel, json.dumps({**message, 'origin': self._instance_id}))
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None and not self._listener.done():
+            return
+        if self._redis() is None:
+            return
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        pubsub = None
+        try:
+            pubsub = self.redis_client.pubsub()
+            await pubsub.subscribe(self._channel)
+            async for message in pubsub.listen():
+                if message.get('type') != 'message':
+                    continue
+                event = json.loads(message['data'])
+                if event.get('origin') == self._instance_id:
+                    continue
+                if 'tag' in event:
+                    self._evict_l1_tag(event['tag'])
+                elif 'namespace' in event:
+                    self._bump_local_generation(event['namespace'], int(event['generation']))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._redis_failed(e)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def close(self) -> None:
+        await self.flush_access_counts()
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        configured = self.redis_client is not None or bool(self.redis_url)
+        return {
+            'l1': {
+                'entries': len(self.l1),
+                'max_entries': self.l1.max_entries,
+                'evictions': self.l1.evictions,
+                'admission_rejections': self.l1.rejections
+            },
+            'l2': {
+                'configured': configured,
+                'available': configured and time.monotonic() >= self._redis_down_until
+            },
+            'inflight_loads': len(self._inflight),
+            'codec': {
+                'version': self.codec.version,
+                'compression': self.codec.compression
+            },
+            'unflushed_access_counts': sum(len(c) for c in self._hit_counts.values()),
+            'generations': dict(self._generations),
+            'invalidation_listener': self._listener is not None and not self._listener.done(),
+            'namespaces': {
+                namespace: {**asdict(stats), 'hit_rate': round(stats.hit_rate, 4)}
+                for namespace, stats in self.stats.items()
+            }
+        }
+
+
+_caches: Dict[Optional[str], TieredCache] = {}
+
+
+def get_tiered_cache(redis_url: Optional[str] = None) -> TieredCache:
+    """Shared two-tier cache per Redis URL (REDIS_URL by default)"""
+    redis_url = redis_url or os.getenv('REDIS_URL')
+    if redis_url not in _caches:
+        _caches[redis_url] = TieredCache(
+            redis_url=redis_url,
+            l1_max_entries=int(os.getenv('CACHE_L1_MAX_ENTRIES', '10000')),
+            default_ttl=float(os.getenv('CACHE_DEFAULT_TTL', '3600'))
+        )
+    return _caches[redis_url]
@@ -87,6 +87,23 @@ class Settings(BaseSettings):
     PROMETHEUS_PORT: int = Field(default=8002, env="PROMETHEUS_PORT")
     METRICS_ENABLED: bool = Field(default=True, env="METRICS_ENABLED")
     
+    # Orchestration Tracing
+    TRACE_BUFFER_SIZE: int = Field(default=1000, env="TRACE_BUFFER_SIZE")  # traces kept in memory
+    TRACE_SAMPLE_RATE: float = Field(default=0.1, env="TRACE_SAMPLE_RATE")  # successes spilled to disk
+    TRACE_LOG_PATH: str = Field(default="./logs/orchestration_traces.jsonl.gz", env="TRACE_LOG_PATH")
+    TRACE_LOG_MAX_BYTES: int = Field(default=50*1024**2, env="TRACE_LOG_MAX_BYTES")
+    TRACE_LOG_BACKUPS: int = Field(default=5, env="TRACE_LOG_BACKUPS")
+    
+    # Document Uploads
+    MAX_UPLOAD_BYTES: int = Field(default=200*1024**2, env="MAX_UPLOAD_BYTES")  # checked on Content-Length and as the body arrives
+    UPLOAD_CHUNK_SIZE: int = Field(default=1024**2, env="UPLOAD_CHUNK_SIZE")
+    DOCUMENT_JOB_TIMEOUT: float = Field(default=900.0, env="DOCUMENT_JOB_TIMEOUT")  # extraction + embeddings
+
+    # Vision Analysis
+    VISION_MAX_IMAGE_SIDE: int = Field(default=1568, env="VISION_MAX_IMAGE_SIDE")  # px, applied before encoding
+    VISION_NEAR_DUPLICATE_DISTANCE: int = Field(default=6, env="VISION_NEAR_DUPLICATE_DISTANCE")  # max Hamming bits
+    VISION_ANALYSIS_CACHE_SIZE: int = Field(default=2000, env="VISION_ANALYSIS_CACHE_SIZE")
+
     # Backup Configuration
     BACKUP_PATH: str = Field(default="/mnt/nas/backups", env="BACKUP_PATH")
     BACKUP_INTERVAL_HOURS: int = Field(default=24, env="BACKUP_INTERVAL_HOURS")
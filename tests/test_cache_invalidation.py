@@ -0,0 +1,136 @@
+"""
+🧪 Cache Invalidation Tests 🧪
+JAI MAHAKAAL! Invalidating a user must actually drop that user's entries
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from server.performance.tiered_cache import TieredCache, cache_tags
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def make_cache(server) -> TieredCache:
+    return TieredCache(redis_client=fakeredis.FakeAsyncRedis(server=server))
+
+
+class TestTagInvalidation:
+    """Tag sets registered at write time"""
+
+    @pytest.mark.asyncio
+    async def test_user_invalidation_drops_only_that_user(self, redis_server):
+        cache = make_cache(redis_server)
+        await cache.set("model", "a1", {"r": 1}, tags=cache_tags(user_id="alice", model="m"))
+        await cache.set("model", "a2", {"r": 2}, tags=cache_tags(user_id="alice"))
+        await cache.set("user", "alice", {"ctx": 1}, tags=cache_tags(user_id="alice"))
+        await cache.set("model", "b1", {"r": 3}, tags=cache_tags(user_id="bob", model="m"))
+
+        deleted = await cache.invalidate_tag("user:alice")
+
+        assert deleted == 3
+        assert await cache.get("model", "a1") is None
+        assert await cache.get("model", "a2") is None
+        assert await cache.get("user", "alice") is None
+        assert await cache.get("model", "b1") == {"r": 3}
+
+        # Nothing of alice's is left in Redis either, including the tag set
+        client = cache.l2_client()
+        assert await client.keys("lex:*a[12]") == []
+        assert not await client.exists("lex:tag:user:alice")
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_user_invalidation_reaches_other_processes(self, redis_server):
+        writer, reader = make_cache(redis_server), make_cache(redis_server)
+        await writer.set("user", "alice", {"ctx": 1}, tags=cache_tags(user_id="alice"))
+
+        # Reader now holds its own L1 copy and is subscribed for invalidations
+        assert await reader.get("user", "alice") == {"ctx": 1}
+        await asyncio.sleep(0.05)
+
+        await writer.invalidate_tag("user:alice")
+        await asyncio.sleep(0.05)
+
+        assert await reader.get("user", "alice") is None
+        await writer.close()
+        await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_large_tag_is_deleted_in_batches(self, redis_server):
+        cache = make_cache(redis_server)
+        for i in range(1200):
+            await cache.set("model", f"k{i}", i, tags=["user:heavy"])
+
+        assert await cache.invalidate_tag("user:heavy", batch_size=100) == 1200
+        assert await cache.get("model", "k0") is None
+        await cache.close()
+
+
+class TestNamespaceInvalidation:
+    """Generation counters instead of keyspace scans"""
+
+    @pytest.mark.asyncio
+    async def test_generation_bump_misses_old_entries(self, redis_server):
+        cache, other = make_cache(redis_server), make_cache(redis_server)
+        await cache.set("model", "k", "old")
+        assert await other.get("model", "k") == "old"
+
+        await cache.invalidate_namespace("model")
+        await asyncio.sleep(0.05)
+
+        assert await cache.get("model", "k") is None
+        assert await other.get("model", "k") is None
+        await cache.set("model", "k", "new")
+        assert await other.get("model", "k") == "new"
+        await cache.close()
+        await other.close()
+
+    def test_local_invalidation_without_redis(self):
+        cache = TieredCache()
+        cache.set_local("user", "alice", {"ctx": 1}, tags=cache_tags(user_id="alice"))
+        cache.set_local("user", "bob", {"ctx": 2}, tags=cache_tags(user_id="bob"))
+
+        assert cache.invalidate_tag_local("user:alice") == 1
+        assert cache.get_local("user", "alice") is None
+        assert cache.get_local("user", "bob") == {"ctx": 2}
+
+        cache.invalidate_namespace_local("user")
+        assert cache.get_local("user", "bob") is None
+
+
+class TestStaleRefresh:
+    """Stale-while-revalidate refreshes are single-flight"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stale_reads_share_one_refresh(self, redis_server):
+        cache = make_cache(redis_server)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"v": calls}
+
+        await cache.get_or_load("model", "k", loader, ttl=0.01, stale_ttl=60)
+        await asyncio.sleep(0.02)
+
+        results = await asyncio.gather(*(
+            cache.get_or_load("model", "k", loader, ttl=0.01, stale_ttl=60) for _ in range(5)
+        ))
+        await asyncio.sleep(0.1)
+
+        assert results == [{"v": 1}] * 5
+        assert calls == 2
+        assert cache.get_stats()['inflight_loads'] == 0
+        await cache.close()
@@ -0,0 +1,51 @@
+"""
+🧪 Document Processing Tests 🧪
+JAI MAHAKAAL! An uploaded document's chunks must reach the vector store
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class RecordingVectorStore:
+    """Collects what the manager would embed"""
+
+    def __init__(self):
+        self.documents = []
+
+    async def add_vectors(self, documents):
+        self.documents.extend(documents)
+        return True
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("LEXOS_VAULT_PATH", str(tmp_path / "vault"))
+    persistent_memory_manager = pytest.importorskip("server.memory.persistent_memory_manager")
+    pytest.importorskip("enhanced_pdf_processor")
+
+    store = RecordingVectorStore()
+    monkeypatch.setattr(persistent_memory_manager, "vector_store", store)
+    return persistent_memory_manager.PersistentMemoryManager(), store
+
+
+class TestProcessDocument:
+    """process_document as the upload job runs it, through the server package"""
+
+    @pytest.mark.asyncio
+    async def test_extracted_chunks_are_embedded(self, manager):
+        manager, store = manager
+        staged = manager.incoming_path / "notes.txt"
+        staged.write_text("Mahakaal guards the vault. " * 50)
+        document = await manager.ingest_file(staged, "notes.txt", "document", checksum="abc123")
+
+        document = await manager.process_document(document.doc_id)
+
+        assert document.processing_status == 'complete'
+        assert document.embeddings_stored
+        assert "Mahakaal guards the vault." in document.extracted_text
+        assert store.documents
+        assert all(doc['metadata']['doc_id'] == document.doc_id for doc in store.documents)
@@ -0,0 +1,68 @@
+"""
+🧪 Extraction Cache Tests 🧪
+JAI MAHAKAAL! Same content and version hit; the store stays within its size bound
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from extraction_cache import ExtractionCache, cache_key
+
+
+class TestKeys:
+    """What goes into a key decides what gets reused"""
+
+    def test_version_and_options_change_the_key(self):
+        base = cache_key('page', 'pdf_page', 1, 'abc', ocr_mode='auto')
+        assert base == cache_key('page', 'pdf_page', 1, 'abc', ocr_mode='auto')
+        assert base != cache_key('page', 'pdf_page', 2, 'abc', ocr_mode='auto')
+        assert base != cache_key('page', 'pdf_page', 1, 'abc', ocr_mode='always')
+        assert base != cache_key('page', 'pdf_page', 1, 'abd', ocr_mode='auto')
+
+
+class TestExtractionCache:
+    """Round trips and LRU eviction"""
+
+    @pytest.mark.asyncio
+    async def test_get_many_returns_only_cached_pages(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.db"))
+        await cache.put_many([(f"page{i}", "page", {"text": f"page {i}"}) for i in range(3)])
+
+        found = await cache.get_many(["page0", "page2", "page9"])
+
+        assert found == {"page0": {"text": "page 0"}, "page2": {"text": "page 2"}}
+        assert cache.stats['hits'] == 2 and cache.stats['misses'] == 1
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_overwriting_a_key_does_not_grow_total_bytes(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.db"))
+        value = {"blob": os.urandom(500).hex()}
+        await cache.put("page0", "page", value)
+        size = cache.total_bytes
+
+        for _ in range(5):
+            await cache.put("page0", "page", value)
+        await cache.put_many([("page0", "page", value), ("page0", "page", value)])
+
+        assert cache.total_bytes == size
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_eviction_keeps_recently_used_entries(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.db"), max_bytes=20000)
+        await cache.put("keep", "page", {"blob": os.urandom(500).hex()})
+        for i in range(40):
+            await cache.get("keep")
+            await cache.put(f"filler{i}", "page", {"blob": os.urandom(500).hex()})
+        cache.writes.flush()
+
+        assert cache.total_bytes <= cache.max_bytes
+        assert cache.stats['evictions'] > 0
+        assert await cache.get("keep") is not None
+        assert await cache.get("filler0") is None
+        cache.close()